@@ -9,6 +9,7 @@ from __future__ import annotations
 
 import argparse
 import concurrent.futures
+import hashlib
 import json
 import os
 import re
@@ -1295,8 +1296,75 @@ def _section_scopes(section: dict[str, Any]) -> list[str]:
     return [value for value in values if value]
 
 
-def parse_config(config_path: str) -> tuple[list[dict[str, Any]], list[dict[str, Any]], dict[str, str]]:
-    """Parse gh-dash YAML config using yq. Returns (pr_sections, issue_sections, repo_paths)."""
+ConfigSections = tuple[list[dict[str, Any]], list[dict[str, Any]], dict[str, str]]
+
+# Bump when the compiled shape changes so older snapshots are recompiled.
+CONFIG_SNAPSHOT_VERSION = 1
+
+
+def _config_snapshot_path(config_path: str, cache_dir: str) -> Path:
+    return Path(cache_dir) / f"gh_picker_config_{Path(config_path).stem}.json"
+
+
+def _load_config_snapshot(config_path: str, cache_dir: str) -> tuple[ConfigSections | None, dict[str, Any]]:
+    """Return the compiled sections when the snapshot still describes the config.
+
+    A matching (mtime_ns, size) is trusted without reading the YAML. When the
+    stat differs, the content hash decides, so a `chezmoi apply` that rewrites
+    identical bytes refreshes the stamp instead of forcing a recompile. Also
+    returns the fresh stamp for the caller to store.
+    """
+    st = os.stat(config_path)
+    stamp: dict[str, Any] = {
+        "version": CONFIG_SNAPSHOT_VERSION,
+        "config": os.path.abspath(config_path),
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+    }
+    try:
+        snapshot = json.loads(_config_snapshot_path(config_path, cache_dir).read_text(encoding="utf-8"))
+        sections = (snapshot["pr_sections"], snapshot["issue_sections"], snapshot["repo_paths"])
+    except Exception:
+        snapshot, sections = {}, None
+    if sections is not None and all(snapshot.get(k) == v for k, v in stamp.items()):
+        return sections, snapshot
+
+    with open(config_path, "rb") as f:
+        stamp["sha256"] = hashlib.sha256(f.read()).hexdigest()
+    same_content = snapshot.get("version") == stamp["version"] and snapshot.get("sha256") == stamp["sha256"]
+    if sections is not None and same_content:
+        _store_config_snapshot(config_path, cache_dir, stamp, sections)
+        return sections, stamp
+    return None, stamp
+
+
+def _store_config_snapshot(config_path: str, cache_dir: str, stamp: dict[str, Any], sections: ConfigSections) -> None:
+    pr_sections, issue_sections, repo_paths = sections
+    payload = {**stamp, "pr_sections": pr_sections, "issue_sections": issue_sections, "repo_paths": repo_paths}
+    try:
+        _atomic_write_text(str(_config_snapshot_path(config_path, cache_dir)), json.dumps(payload))
+    except Exception:
+        pass
+
+
+def parse_config(config_path: str, cache_dir: str | None = None) -> ConfigSections:
+    """Parse gh-dash YAML config using yq. Returns (pr_sections, issue_sections, repo_paths).
+
+    With `cache_dir`, the compiled sections are kept in a JSON snapshot keyed
+    by the config's stat and content hash, so only the first open after the
+    config changes shells out to `yq`; every other picker path is a small
+    JSON read.
+    """
+    stamp: dict[str, Any] | None = None
+    if cache_dir:
+        try:
+            sections, stamp = _load_config_snapshot(config_path, cache_dir)
+        except OSError as e:
+            print(f"Failed to parse config: {e}", file=sys.stderr)
+            return [], [], {}
+        if sections is not None:
+            return sections
+
     pr_sections: list[dict[str, Any]] = []
     issue_sections: list[dict[str, Any]] = []
     repo_paths: dict[str, str] = {}
@@ -1352,6 +1420,8 @@ def parse_config(config_path: str) -> tuple[list[dict[str, Any]], list[dict[str,
     for k, v in (data.get("repoPaths") or {}).items():
         repo_paths[str(k)] = str(v)
 
+    if stamp is not None:
+        _store_config_snapshot(config_path, cache_dir, stamp, (pr_sections, issue_sections, repo_paths))
     return pr_sections, issue_sections, repo_paths
 
 
@@ -3080,11 +3150,12 @@ def main():
         # `yq` call can exceed parse_config's 5s timeout, and its "Failed to
         # parse config" stderr leaks into the fzf popup even though the config
         # is not actually needed to render the cache. Defer the parse so the
-        # common `scope=all` open never touches `yq`.
+        # common `scope=all` open never touches `yq`; scoped opens read the
+        # compiled config snapshot and only reach `yq` after the config changes.
         scope_map: dict[str, set[str]] = {}
         effective_scope = scope
         if scope and scope != "all":
-            pr_sections, issue_sections, _repo_paths = parse_config(args.config)
+            pr_sections, issue_sections, _repo_paths = parse_config(args.config, cache_dir)
             if pr_sections or issue_sections:
                 scope_map = _section_scope_map(pr_sections, issue_sections)
             else:
@@ -3108,7 +3179,7 @@ def main():
         return
 
     # Full-fetch path genuinely needs the parsed sections.
-    pr_sections, issue_sections, repo_paths = parse_config(args.config)
+    pr_sections, issue_sections, repo_paths = parse_config(args.config, cache_dir)
     scope_map = _section_scope_map(pr_sections, issue_sections)
 
     prior_pr_badges = _read_prior_pr_badges(args.cache_file)
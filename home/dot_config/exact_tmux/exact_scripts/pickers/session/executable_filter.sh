@@ -37,9 +37,10 @@ done
 
 if [ "$force_refresh" -eq 1 ] && [ -x "$update_cmd" ]; then
   # alt-r: full synchronous refresh; blocks until quick and full scans both
-  # complete so the picker reload sees the freshest possible state.
+  # complete so the picker reload sees the freshest possible state. Dirty
+  # state is re-checked with git instead of trusting cached fingerprints.
   "$update_cmd" --force --quiet --quick-only --skip-dirty > /dev/null 2>&1 || true
-  "$update_cmd" --force --quiet > /dev/null 2>&1 || true
+  "$update_cmd" --force --quiet --recheck-dirty > /dev/null 2>&1 || true
 elif [ "$refresh" -eq 1 ] && [ -x "$update_cmd" ]; then
   # ctrl-r: synchronous quick scan (sessions only) so the picker reload that
   # follows this filter call sees up-to-date session rows on the first try.
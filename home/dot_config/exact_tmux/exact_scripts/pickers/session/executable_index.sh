@@ -80,11 +80,15 @@ emit_sessions_worktrees_and_dirs() {
   export PICK_SESSION_QUICK
   export PICK_SESSION_SESSIONS_ONLY
   export PICK_SESSION_SKIP_DIRTY
+  export PICK_SESSION_RECHECK_DIRTY
+  export PICK_SESSION_DIRTY_TTL
   export PICK_SESSION_SKIP_GH
+  export PICK_SESSION_SKIP_DISCOVERY
   export PICK_SESSION_IGNORE_FILE
   export PICK_SESSION_DIR_INCLUDE_HIDDEN
   export PICK_SESSION_GITHUB_LOGIN
   export PICK_SESSION_THREADS
+  export PICK_SESSION_PATHS_FILE
 
   PICK_SESSION_SCAN_ROOTS="$(tmux_opt '@pick_session_worktree_scan_roots' "$HOME/work,$HOME/code,$HOME/.backport/repositories,$HOME/.local/share")"
   PICK_SESSION_SCAN_DEPTH="$(tmux_opt '@pick_session_worktree_scan_depth' '6')"
@@ -92,9 +96,13 @@ emit_sessions_worktrees_and_dirs() {
   PICK_SESSION_QUICK="$quick_mode"
   PICK_SESSION_SESSIONS_ONLY="$sessions_only"
   PICK_SESSION_SKIP_DIRTY="$skip_dirty"
+  PICK_SESSION_RECHECK_DIRTY="$recheck_dirty"
+  PICK_SESSION_DIRTY_TTL="$(tmux_opt '@pick_session_dirty_cache_ttl' '600')"
   PICK_SESSION_SKIP_GH="$skip_gh"
+  PICK_SESSION_SKIP_DISCOVERY="$skip_discovery"
   PICK_SESSION_DIR_INCLUDE_HIDDEN="$(tmux_opt '@pick_session_dir_include_hidden' 'on')"
   PICK_SESSION_GITHUB_LOGIN="$(tmux_opt '@pick_session_github_login' '')"
+  PICK_SESSION_PATHS_FILE="$paths_file"
 
   python3 -u "$(cd "$(dirname "$0")" && pwd)/lib/index_main.py"
 }
@@ -102,13 +110,19 @@ emit_sessions_worktrees_and_dirs() {
 quick_mode=0
 sessions_only=0
 skip_dirty=0
+recheck_dirty=0
 skip_gh=0
+skip_discovery=0
+paths_file=""
 while [ $# -gt 0 ]; do
   case "$1" in
     --quick) quick_mode=1 ;;
     --sessions-only) sessions_only=1 ;;
     --skip-dirty) skip_dirty=1 ;;
+    --recheck-dirty) recheck_dirty=1 ;;
     --skip-gh) skip_gh=1 ;;
+    --skip-discovery) skip_discovery=1 ;;
+    --paths-from=*) paths_file="${1#--paths-from=}" ;;
   esac
   shift
 done
@@ -33,6 +33,7 @@ ttl_override=""
 lock_stale_seconds=180
 quick_only=0
 skip_dirty=0
+recheck_dirty=0
 skip_gh=0
 
 while [ $# -gt 0 ]; do
@@ -43,6 +44,7 @@ while [ $# -gt 0 ]; do
     --lock-stale-seconds=*) lock_stale_seconds="${1#--lock-stale-seconds=}" ;;
     --quick-only) quick_only=1 ;;
     --skip-dirty) skip_dirty=1 ;;
+    --recheck-dirty) recheck_dirty=1 ;;
     --skip-gh) skip_gh=1 ;;
   esac
   shift
@@ -61,6 +63,8 @@ pending_file="${cache_dir}/pick_session_pending.tsv"
 mutation_file="${cache_dir}/pick_session_mutations.tsv"
 error_log="${cache_dir}/pick_session_index_error.log"
 full_scan_stamp="${cache_dir}/pick_session_full_scan.stamp"
+# Held fresh by lib/index_watch_daemon.py while it watches every scan dir.
+watch_stamp="${cache_dir}/pick_session_index_watch.stamp"
 mkdir -p "$cache_dir"
 
 notify_error() {
@@ -353,6 +357,7 @@ if [ "$quick_only" -eq 1 ]; then
   # until they exit — see cleanup() docstring for why this matters).
   gen_quick_args=(--quick --sessions-only)
   [ "$skip_dirty" -eq 1 ] && gen_quick_args+=(--skip-dirty)
+  [ "$recheck_dirty" -eq 1 ] && gen_quick_args+=(--recheck-dirty)
   "$gen" "${gen_quick_args[@]}" > "$tmp_quick" 2> "$tmp_err_quick" &
   pid_quick=$!
   gen_pids+=("$pid_quick")
@@ -386,12 +391,24 @@ else
   # Quick scan: sessions only (merged into existing cache).
   gen_skip_args=()
   [ "$skip_dirty" -eq 1 ] && gen_skip_args+=(--skip-dirty)
+  [ "$recheck_dirty" -eq 1 ] && gen_skip_args+=(--recheck-dirty)
   [ "$skip_gh" -eq 1 ] && gen_skip_args+=(--skip-gh)
   "$gen" --quick --sessions-only ${gen_skip_args[@]+"${gen_skip_args[@]}"} > "$tmp_quick" 2> "$tmp_err_quick" &
   pid_quick=$!
   gen_pids+=("$pid_quick")
+  # While the index watcher covers the scan roots it keeps worktree rows
+  # current, so a TTL-driven full scan skips only the worktree walk; dirty/gh
+  # badges and directory rows still refresh. Manual --force runs walk anyway.
+  gen_full_args=(${gen_skip_args[@]+"${gen_skip_args[@]}"})
+  if [ "$force" -ne 1 ] && [ -f "$watch_stamp" ]; then
+    mt="$(mtime_epoch "$watch_stamp" 2> /dev/null || echo 0)"
+    age="$(($(now_epoch) - mt))"
+    if [ "$age" -ge 0 ] && [ "$age" -lt "$full_scan_ttl" ]; then
+      gen_full_args+=(--skip-discovery)
+    fi
+  fi
   # Perform a full scan (including directories) in the background.
-  "$gen" ${gen_skip_args[@]+"${gen_skip_args[@]}"} > "$tmp_full" 2> "$tmp_err_full" &
+  "$gen" ${gen_full_args[@]+"${gen_full_args[@]}"} > "$tmp_full" 2> "$tmp_err_full" &
   pid_full=$!
   gen_pids+=("$pid_full")
 
@@ -0,0 +1,63 @@
+#!/usr/bin/env bash
+# Start the optional inotify index watcher (lib/index_watch_daemon.py) when
+# `@pick_session_index_watch` is on. Linux only; the daemon holds its own lock,
+# so re-running this on config reloads is a no-op.
+set -euo pipefail
+
+tmux_opt() {
+  local key="$1"
+  local default_value="$2"
+  local value=""
+  if command -v tmux > /dev/null 2>&1 && [ -n "${TMUX:-}" ]; then
+    value="$(tmux show-option -gqv "${key}" 2> /dev/null || true)"
+  fi
+  if [ -n "$value" ]; then
+    printf '%s\n' "$value"
+  else
+    printf '%s\n' "$default_value"
+  fi
+}
+
+normalize_path_opt() {
+  local p="${1:-}"
+  case "$p" in
+    "~") printf '%s\n' "$HOME" ;;
+    "~/"*) printf '%s\n' "$HOME/${p#"~/"}" ;;
+    *) printf '%s\n' "$p" ;;
+  esac
+}
+
+case "$(tmux_opt '@pick_session_index_watch' 'off')" in
+  1 | true | yes | on) ;;
+  *) exit 0 ;;
+esac
+[ "$(uname -s)" = "Linux" ] || exit 0
+command -v python3 > /dev/null 2>&1 || exit 0
+
+script_dir="$(cd "$(dirname "$0")" && pwd)"
+ignore_file="$(normalize_path_opt "$(tmux_opt '@pick_session_dir_exclude_file' "$HOME/.config/tmux/pick_session_dir_exclude.txt")")"
+[ -f "$ignore_file" ] || ignore_file=""
+scan_roots="$(tmux_opt '@pick_session_worktree_scan_roots' "$HOME/work,$HOME/code,$HOME/.backport/repositories,$HOME/.local/share")"
+scan_depth="$(tmux_opt '@pick_session_worktree_scan_depth' '6')"
+full_scan_ttl="$(tmux_opt '@pick_session_full_scan_ttl' '60')"
+mutation_ttl="$(tmux_opt '@pick_session_mutation_tombstone_ttl' '300')"
+case "$scan_depth" in
+  '' | *[!0-9]*) scan_depth=6 ;;
+esac
+case "$full_scan_ttl" in
+  '' | *[!0-9]*) full_scan_ttl=60 ;;
+esac
+case "$mutation_ttl" in
+  '' | *[!0-9]*) mutation_ttl=300 ;;
+esac
+# Refresh the watch stamp well inside the full-scan TTL that index_update.sh
+# compares it against.
+heartbeat="$((full_scan_ttl / 2))"
+[ "$heartbeat" -ge 5 ] || heartbeat=5
+
+nohup python3 "$script_dir/lib/index_watch_daemon.py" \
+  --scan-roots "$scan_roots" \
+  --scan-depth "$scan_depth" \
+  --ignore-file "$ignore_file" \
+  --mutation-ttl "$mutation_ttl" \
+  --heartbeat "$heartbeat" > /dev/null 2>&1 &
@@ -0,0 +1,243 @@
+"""Persisted directory snapshot for the session picker's filesystem scans.
+
+``index_main.py`` needs two views of the same trees on every full reindex:
+repos (directories holding a ``.git`` entry) under the worktree scan roots, and
+depth-limited directories under ``$HOME``. Re-listing tens of thousands of
+directories each time is the expensive part, so this module remembers, per
+directory, its ``(mtime_ns, inode)``, whether it holds ``.git``, and its
+subdirectory names:
+
+    $XDG_CACHE_HOME/tmux/pick_session_dirs.json
+
+A directory's mtime only moves when its own entries are added, removed, or
+renamed, so a walk ``lstat``s each known directory and only ``scandir``s the
+ones whose stamp changed. Directories that disappear (or whose parent no
+longer lists them) are pruned together with their recorded subtree.
+
+Walks never follow symlinks. Exclude patterns use the picker's
+``pick_session_dir_exclude.txt`` semantics: a bare glob matches any path
+component, while a pattern containing ``/`` is anchored to the walk root.
+Pure stdlib; no external deps.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import stat
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from fnmatch import translate
+from pathlib import Path
+
+SNAPSHOT_VERSION = 1
+# A directory modified this close to the walk may change again within the
+# same mtime tick; record it unstamped so the next walk re-lists it.
+RACY_WINDOW_NS = 2_000_000_000
+
+# path -> [mtime_ns, inode, has_git, sorted subdirectory names]
+Node = list
+
+
+def store_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "tmux" / "pick_session_dirs.json"
+
+
+def read_exclude_file(path: str) -> list[str]:
+    """Read a .gitignore-style exclude file into ``exclude_matcher`` patterns.
+
+    Every non-comment line becomes one pattern, so multi-component patterns
+    (e.g. ``.local/share/mise/installs/``) anchor to the walk root the same way
+    single-component ones match any path component.
+    """
+    if not path or not os.path.isfile(path):
+        return []
+    patterns: list[str] = []
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for raw in f:
+                line = raw.strip()
+                if not line or line.startswith("#"):
+                    continue
+                line = line.rstrip("/")
+                if line:
+                    patterns.append(line)
+    except Exception:
+        pass
+    return patterns
+
+
+def exclude_matcher(patterns: list[str]) -> Callable[[str, str, int], bool]:
+    """Return ``excluded(name, rel, depth)`` for ``rel`` relative to the walk root."""
+    names: list[str] = []
+    anchored: dict[int, list[list[re.Pattern[str]]]] = {}
+    for raw in patterns:
+        pat = raw.strip().strip("/")
+        if not pat:
+            continue
+        if "/" in pat:
+            comps = [re.compile(translate(part)) for part in pat.split("/") if part]
+            anchored.setdefault(len(comps), []).append(comps)
+        else:
+            names.append(translate(pat))
+    # One alternation keeps the per-directory cost to a single regex call.
+    name_re = re.compile("|".join(names)) if names else None
+
+    def excluded(name: str, rel: str, depth: int) -> bool:
+        if name_re is not None and name_re.match(name):
+            return True
+        candidates = anchored.get(depth)
+        if candidates:
+            parts = rel.split("/")
+            return any(all(c.match(part) for c, part in zip(comps, parts)) for comps in candidates)
+        return False
+
+    return excluded
+
+
+class DirSnapshot:
+    def __init__(self, path: Path | None = None):
+        self.path = path or store_path()
+        self.dirs: dict[str, Node] = {}
+        self.changed = False
+        self._removed: set[str] = set()
+        # Nodes already checked during this run; a second walk reuses them.
+        self._checked: dict[str, Node] = {}
+        self._started_ns = time.time_ns()
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") == SNAPSHOT_VERSION and isinstance(data.get("dirs"), dict):
+                self.dirs = data["dirs"]
+        except Exception:
+            pass
+
+    def _forget(self, path: str) -> None:
+        if self.dirs.pop(path, None) is not None:
+            self._removed.add(path)
+            self.changed = True
+
+    def rescan(self) -> None:
+        """Forget which nodes this run already checked, so a long-lived caller's
+        next walk re-checks every stamp instead of reusing earlier answers."""
+        self._checked.clear()
+        self._started_ns = time.time_ns()
+
+    def node(self, path: str) -> Node | None:
+        """Return the current node for ``path``, re-listing it only when stale."""
+        checked = self._checked.get(path)
+        if checked is not None:
+            return checked
+        try:
+            st = os.lstat(path)
+        except OSError:
+            self._forget(path)
+            return None
+        if not stat.S_ISDIR(st.st_mode):
+            self._forget(path)
+            return None
+
+        cached = self.dirs.get(path)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_ino:
+            self._checked[path] = cached
+            return cached
+
+        has_git = False
+        children: list[str] = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.name == ".git":
+                            has_git = entry.is_dir(follow_symlinks=False) or entry.is_file(follow_symlinks=False)
+                        elif entry.is_dir(follow_symlinks=False):
+                            children.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        children.sort()
+        if cached is not None:
+            for gone in set(cached[3]).difference(children):
+                self._forget(os.path.join(path, gone))
+        mtime = 0 if st.st_mtime_ns >= self._started_ns - RACY_WINDOW_NS else st.st_mtime_ns
+        node = [mtime, st.st_ino, has_git, children]
+        self.dirs[path] = node
+        self._checked[path] = node
+        self._removed.discard(path)
+        self.changed = True
+        return node
+
+    def walk(
+        self,
+        root: str,
+        max_depth: int,
+        excluded: Callable[[str, str, int], bool],
+        *,
+        include_hidden: bool = True,
+        stop_at_repos: bool = False,
+        skip_paths: frozenset[str] = frozenset(),
+    ) -> Iterator[tuple[str, int, bool]]:
+        """Yield ``(path, depth, has_git)`` for ``root`` (depth 0) and every
+        directory under it down to ``max_depth``.
+
+        Excluded, hidden (unless ``include_hidden``) and ``skip_paths``
+        directories are neither yielded nor entered. With ``stop_at_repos`` a
+        directory holding ``.git`` is yielded but not entered, since anything
+        nested inside it belongs to that repo.
+        """
+        top = self.node(root)
+        if top is None:
+            return
+        stack: list[tuple[str, str, int, Node]] = [(root, "", 0, top)]
+        while stack:
+            path, rel, depth, node = stack.pop()
+            yield path, depth, bool(node[2])
+            if depth >= max_depth or (stop_at_repos and node[2]):
+                continue
+            prefix = path if path.endswith("/") else path + "/"
+            for name in reversed(node[3]):
+                if not include_hidden and name.startswith("."):
+                    continue
+                child_rel = f"{rel}/{name}" if rel else name
+                if excluded(name, child_rel, depth + 1):
+                    continue
+                child = prefix + name
+                if child in skip_paths:
+                    continue
+                child_node = self.node(child)
+                if child_node is not None:
+                    stack.append((child, child_rel, depth + 1, child_node))
+
+    def save(self) -> None:
+        """Persist the snapshot when a walk changed it, pruning removed subtrees."""
+        if not self.changed:
+            return
+        if self._removed:
+            removed = self._removed
+            kept: dict[str, Node] = {}
+            for path, node in self.dirs.items():
+                parent = path
+                while parent not in removed:
+                    up = os.path.dirname(parent)
+                    if up == parent:
+                        kept[path] = node
+                        break
+                    parent = up
+            self.dirs = kept
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".pick_session_dirs.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": SNAPSHOT_VERSION, "dirs": self.dirs}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self.changed = False
+        self._removed.clear()
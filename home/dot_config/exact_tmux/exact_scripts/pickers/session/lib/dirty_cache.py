@@ -0,0 +1,207 @@
+"""Stat-fingerprinted dirty-state cache for the session index.
+
+``index_main.py`` marks a worktree dirty when ``git status --porcelain
+--untracked-files=no`` prints anything. Running that for every worktree on
+every dirty pass is the slow part of a full reindex, so this module remembers
+each worktree's last answer together with a cheap fingerprint:
+
+    $XDG_CACHE_HOME/tmux/pick_session_dirty.json
+
+The fingerprint is built from ``stat`` calls and small reads only: the
+worktree's ``index`` (mtime, size), HEAD's target and the stamp of the ref it
+points at, the worktree root's mtime, and the newest mtime over its tracked
+top-level directories (``git ls-tree -d HEAD``, recorded when ``git status``
+last ran). ``git status`` runs again only when the fingerprint changed, the
+entry is older than the TTL, or the caller forces a recheck.
+
+Directory mtimes only move when entries are added, removed, or renamed, so an
+in-place edit below the top level is not seen until the TTL expires or the
+index changes; the TTL bounds that staleness. Pure stdlib; no external deps.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import json
+import os
+import subprocess
+import tempfile
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+import git_meta
+
+CACHE_VERSION = 1
+# An input modified this close to the check may change again within the same
+# mtime tick; such an entry is stored unfingerprinted so the next pass rechecks.
+RACY_WINDOW_NS = 2_000_000_000
+
+HIT = "hit"
+CHANGED = "changed"
+EXPIRED = "expired"
+FORCED = "forced"
+
+
+def store_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "tmux" / "pick_session_dirty.json"
+
+
+def _stamp(path: str) -> tuple[int, int]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return -1, -1
+    return st.st_mtime_ns, st.st_size
+
+
+def fingerprint(wt_path: str, dirs: Iterable[str]) -> tuple[str, int]:
+    """Return ``(fingerprint, newest input mtime_ns)``; ``("", 0)`` outside a worktree."""
+    gitdir = git_meta.gitdir_for(wt_path)
+    if not gitdir:
+        return "", 0
+    head = git_meta.head_target(gitdir)
+    if head.startswith("ref:"):
+        common = git_meta.common_dir(gitdir)
+        ref = _stamp(os.path.join(common, head[len("ref:") :].strip()))
+        if ref[0] < 0:
+            ref = _stamp(os.path.join(common, "packed-refs"))
+    else:
+        ref = (0, 0)
+    index = _stamp(os.path.join(gitdir, "index"))
+    root = _stamp(wt_path)[0]
+    newest_dir = max((_stamp(os.path.join(wt_path, d))[0] for d in dirs), default=0)
+    fp = f"{index[0]}:{index[1]}|{head}|{ref[0]}:{ref[1]}|{root}|{newest_dir}"
+    return fp, max(index[0], ref[0], root, newest_dir)
+
+
+def _git(wt_path: str, *args: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        ["git", "--no-optional-locks", "-c", "core.threads=1", "-C", wt_path, *args],
+        check=False,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        timeout=10,
+    )
+
+
+def tracked_dirs(wt_path: str) -> list[str]:
+    """Top-level directories tracked at HEAD (none in a repo without commits)."""
+    try:
+        r = _git(wt_path, "ls-tree", "-d", "-z", "--name-only", "HEAD")
+    except Exception:
+        return []
+    if r.returncode != 0:
+        return []
+    return sorted(name for name in (r.stdout or "").split("\0") if name)
+
+
+def status_dirty(wt_path: str) -> bool | None:
+    """True when tracked files differ from HEAD; None when git could not tell."""
+    try:
+        r = _git(wt_path, "-c", "status.renames=false", "status", "--porcelain", "--untracked-files=no")
+    except Exception:
+        return None
+    if r.returncode != 0:
+        return None
+    return bool((r.stdout or "").strip())
+
+
+class DirtyCache:
+    def __init__(self, path: Path | None = None, ttl: int = 600, recheck: bool = False):
+        self.path = path or store_path()
+        self.ttl = ttl
+        self.recheck = recheck
+        # path -> {"fp": fingerprint, "dirs": tracked top-level dirs, "dirty": bool, "ts": epoch}
+        self.entries: dict[str, dict] = {}
+        self._updated: set[str] = set()
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") == CACHE_VERSION and isinstance(data.get("entries"), dict):
+                self.entries = data["entries"]
+        except Exception:
+            pass
+
+    def _reason(self, wt_path: str, now: float) -> str:
+        if self.recheck:
+            return FORCED
+        entry = self.entries.get(wt_path)
+        if not entry or not entry.get("fp"):
+            return CHANGED
+        if fingerprint(wt_path, entry.get("dirs") or ())[0] != entry["fp"]:
+            return CHANGED
+        if now - float(entry.get("ts") or 0) > self.ttl:
+            return EXPIRED
+        return HIT
+
+    def _check(self, wt_path: str) -> tuple[bool | None, list[str], str]:
+        started_ns = time.time_ns()
+        dirs = tracked_dirs(wt_path)
+        # Fingerprint before `git status`, so a change made while it runs is
+        # seen as a changed fingerprint on the next pass.
+        fp, newest = fingerprint(wt_path, dirs)
+        dirty = status_dirty(wt_path)
+        return dirty, dirs, fp if newest < started_ns - RACY_WINDOW_NS else ""
+
+    def refresh(self, paths: Iterable[str], workers: int = 1) -> dict[str, tuple[bool, str]]:
+        """Return ``{path: (dirty, reason)}``, running ``git status`` only for misses."""
+        now = time.time()
+        results: dict[str, tuple[bool, str]] = {}
+        misses: dict[str, str] = {}
+        for wt_path in paths:
+            reason = self._reason(wt_path, now)
+            if reason == HIT:
+                results[wt_path] = (bool(self.entries[wt_path].get("dirty")), HIT)
+            else:
+                misses[wt_path] = reason
+        if not misses:
+            return results
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(self._check, p): p for p in misses}
+            for fut in concurrent.futures.as_completed(futures):
+                wt_path = futures[fut]
+                try:
+                    dirty, dirs, fp = fut.result()
+                except Exception:
+                    dirty, dirs, fp = None, [], ""
+                results[wt_path] = (bool(dirty), misses[wt_path])
+                if dirty is None:
+                    continue
+                self.entries[wt_path] = {"fp": fp, "dirs": dirs, "dirty": dirty, "ts": now}
+                self._updated.add(wt_path)
+        return results
+
+    def save(self) -> None:
+        """Persist updated entries over the current file, dropping vanished worktrees.
+
+        Quick and full scans can run concurrently, so entries another run wrote
+        meanwhile are kept unless this run re-checked the same worktree.
+        """
+        if not self._updated:
+            return
+        merged: dict[str, dict] = {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") == CACHE_VERSION and isinstance(data.get("entries"), dict):
+                merged = data["entries"]
+        except Exception:
+            pass
+        for wt_path in self._updated:
+            merged[wt_path] = self.entries[wt_path]
+        merged = {p: e for p, e in merged.items() if os.path.isdir(p)}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".pick_session_dirty.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "entries": merged}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self.entries = merged
+        self._updated.clear()
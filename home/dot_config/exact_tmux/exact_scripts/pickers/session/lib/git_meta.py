@@ -0,0 +1,210 @@
+"""In-process reader for the git metadata the session index needs.
+
+``index_main.py`` used to fork ``git`` per worktree for the default branch
+(``symbolic-ref``, ``show-ref``) and for worktree-scoped config
+(``config --worktree --get``). The answers live in a handful of small files,
+so this module reads them directly:
+
+- ``HEAD`` and ``config.worktree`` in each worktree's gitdir
+- loose refs, ``packed-refs`` and ``config`` in the repo's common dir
+
+Every parsed file is memoized on its ``(mtime_ns, size, inode)`` stamp, so the
+linked worktrees of one repo share a single parse of its common dir, and a
+rewritten file is simply parsed again. ``[include]`` directives are not
+followed. Repos on the reftable ref backend have no loose/packed refs; callers
+check ``uses_reftable`` and fall back to ``git``. Pure stdlib; no external deps.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from collections.abc import Callable, Iterator
+from typing import Any
+
+_memo: dict[str, tuple[tuple[int, int, int], Any]] = {}
+
+_SECTION_RE = re.compile(r'\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+_ESCAPES = {"n": "\n", "t": "\t", "b": "\b"}
+_TRUE = {"true", "yes", "on", "1"}
+
+
+def _load(path: str, parse: Callable[[str], Any]) -> Any:
+    """Parse `path` once per stamp; None when it cannot be read."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        _memo.pop(path, None)
+        return None
+    stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+    hit = _memo.get(path)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            value = parse(f.read())
+    except OSError:
+        return None
+    _memo[path] = (stamp, value)
+    return value
+
+
+def _first_line(text: str) -> str:
+    return text.split("\n", 1)[0].strip()
+
+
+def gitdir_for(worktree: str) -> str:
+    """The worktree's gitdir: its `.git` dir, or the admin dir a `.git` file points at."""
+    gitp = os.path.join(worktree, ".git")
+    if os.path.isdir(gitp):
+        return gitp
+    line = _load(gitp, _first_line) or ""
+    if not line.startswith("gitdir:"):
+        return ""
+    return os.path.normpath(os.path.join(worktree, line[len("gitdir:") :].strip()))
+
+
+def common_dir(gitdir: str) -> str:
+    """Where refs and the shared config live (a linked worktree's `commondir`)."""
+    line = _load(os.path.join(gitdir, "commondir"), _first_line)
+    return os.path.normpath(os.path.join(gitdir, line)) if line else gitdir
+
+
+def head_target(gitdir: str) -> str:
+    """Raw first line of HEAD: `ref: <ref>` or a detached object id."""
+    return _load(os.path.join(gitdir, "HEAD"), _first_line) or ""
+
+
+def head_ref(gitdir: str) -> str:
+    """`refs/heads/<branch>` HEAD points at, or "" when detached or unreadable."""
+    line = head_target(gitdir)
+    return line[len("ref:") :].strip() if line.startswith("ref:") else ""
+
+
+def uses_reftable(common: str) -> bool:
+    return os.path.isdir(os.path.join(common, "reftable"))
+
+
+def symbolic_ref(common: str, ref: str) -> str:
+    """Target of a symbolic ref such as `refs/remotes/origin/HEAD`, or "".
+
+    Symbolic refs are always loose files; `packed-refs` never holds them.
+    """
+    line = _load(os.path.join(common, ref), _first_line) or ""
+    return line[len("ref:") :].strip() if line.startswith("ref:") else ""
+
+
+def _parse_packed_refs(text: str) -> frozenset[str]:
+    refs = set()
+    for line in text.splitlines():
+        if not line or line[0] in "#^":
+            continue
+        _oid, _, name = line.partition(" ")
+        if name:
+            refs.add(name.strip())
+    return frozenset(refs)
+
+
+def ref_exists(common: str, ref: str) -> bool:
+    if os.path.isfile(os.path.join(common, ref)):
+        return True
+    return ref in (_load(os.path.join(common, "packed-refs"), _parse_packed_refs) or ())
+
+
+def _parse_value(value: str, lines: Iterator[str]) -> str:
+    """Unquote and unescape a config value, joining backslash continuations."""
+    out: list[str] = []
+    keep = 0
+    quoted = False
+    while True:
+        continued = False
+        i, n = 0, len(value)
+        while i < n:
+            c = value[i]
+            if c == "\\":
+                if i + 1 == n:
+                    continued = True
+                    break
+                out.append(_ESCAPES.get(value[i + 1], value[i + 1]))
+                keep = len(out)
+                i += 2
+                continue
+            if c == '"':
+                quoted = not quoted
+                keep = len(out)
+            elif not quoted and c in "#;":
+                break
+            elif not quoted and c.isspace():
+                # Leading whitespace is dropped; trailing whitespace is cut below.
+                if out:
+                    out.append(c)
+            else:
+                out.append(c)
+                keep = len(out)
+            i += 1
+        if not continued:
+            break
+        value = next(lines, "")
+    return "".join(out[:keep])
+
+
+def _parse_config(text: str) -> dict[str, list[str]]:
+    """`section[.subsection].name` -> values in file order (last one wins for --get).
+
+    A bare `name` line (implicit boolean) reads as "true".
+    """
+    out: dict[str, list[str]] = {}
+    section = ""
+    lines = iter(text.splitlines())
+    for raw in lines:
+        line = raw.strip()
+        if not line or line[0] in "#;":
+            continue
+        if line.startswith("["):
+            m = _SECTION_RE.match(line)
+            if not m:
+                section = ""
+                continue
+            name, sub = m.group(1), m.group(2)
+            if sub is not None:
+                section = name.lower() + "." + re.sub(r"\\(.)", r"\1", sub)
+            else:
+                # Legacy `[section.sub]` form: the subsection is case-insensitive too.
+                section = name.lower()
+            line = line[m.end() :].strip()
+            if not line or line[0] in "#;":
+                continue
+        if not section:
+            continue
+        key, eq, value = line.partition("=")
+        key = key.strip().lower()
+        if not key:
+            continue
+        out.setdefault(f"{section}.{key}", []).append(_parse_value(value, lines) if eq else "true")
+    return out
+
+
+def config(path: str) -> dict[str, list[str]]:
+    return _load(path, _parse_config) or {}
+
+
+def _normalize_key(key: str) -> str:
+    section, _, rest = key.partition(".")
+    sub, _, name = rest.rpartition(".")
+    return f"{section.lower()}.{sub}.{name.lower()}" if sub else f"{section.lower()}.{name.lower()}"
+
+
+def config_get(gitdir: str, key: str, *, worktree: bool = False) -> str:
+    """Last value of `key`, like `git config [--worktree] --get`; "" when unset.
+
+    `worktree=True` reads the gitdir's `config.worktree` when the repo enables
+    `extensions.worktreeConfig`, and otherwise the shared config, as git does.
+    """
+    local = os.path.join(common_dir(gitdir), "config")
+    path = local
+    if worktree:
+        enabled = config(local).get("extensions.worktreeconfig")
+        if enabled and enabled[-1].lower() in _TRUE:
+            path = os.path.join(gitdir, "config.worktree")
+    values = config(path).get(_normalize_key(key))
+    return values[-1] if values else ""
@@ -14,6 +14,10 @@ import time
 from pathlib import Path
 from typing import Any, Literal
 
+import dir_snapshot
+import dirty_cache
+import git_meta
+
 # If the consumer (fzf) exits early, don't spam tracebacks.
 signal.signal(signal.SIGPIPE, signal.SIG_DFL)
 
@@ -22,32 +26,6 @@ if threads_env and threads_env.isdigit():
     WORKER_THREADS = max(1, int(threads_env))
 else:
     WORKER_THREADS = max(1, (os.cpu_count() or 2) // 2)
-WORKER_THREADS_STR = str(WORKER_THREADS)
-
-
-def parse_ignore_file_to_excludes(ignore_file: str) -> list[str]:
-    """Read a .gitignore-style ignore file and return fd --exclude patterns.
-
-    fd's --ignore-file silently drops multi-component patterns (e.g.
-    `.local/share/mise/installs/`). Converting every pattern to an --exclude flag
-    works reliably for both single- and multi-component patterns.
-    """
-    if not ignore_file or not os.path.isfile(ignore_file):
-        return []
-    excludes: list[str] = []
-    try:
-        with open(ignore_file, "r", encoding="utf-8", errors="replace") as f:
-            for raw in f:
-                line = raw.strip()
-                if not line or line.startswith("#"):
-                    continue
-                line = line.rstrip("/")
-                if line:
-                    excludes.append(line)
-    except Exception:
-        pass
-    return excludes
-
 
 RESET = "\033[0m"
 
@@ -144,14 +122,9 @@ def normalize_branch_name(br: str) -> str:
 
 
 def head_branch(gitdir):
-    try:
-        head = Path(gitdir, "HEAD").read_text(encoding="utf-8", errors="replace").strip()
-    except Exception:
-        return ""
-    if head.startswith("ref:"):
-        ref = head.split(":", 1)[1].strip()
-        if ref.startswith("refs/heads/"):
-            return normalize_branch_name(ref[len("refs/heads/") :])
+    ref = git_meta.head_ref(gitdir)
+    if ref.startswith("refs/heads/"):
+        return normalize_branch_name(ref[len("refs/heads/") :])
     return ""
 
 
@@ -191,13 +164,10 @@ def origin_url_for_root(root: str) -> str:
     cfg = git_config_path_for_root(root)
     if cfg is None:
         return ""
-    try:
-        text = cfg.read_text(encoding="utf-8", errors="replace")
-        m = re.search(r'\[remote "(origin|upstream)"\].*?url\s*=\s*(.+)', text, flags=re.IGNORECASE | re.DOTALL)
-        if m:
-            return m.group(2).splitlines()[0].strip()
-    except Exception:
-        pass
+    # First of origin/upstream in file order, matching the old section scan.
+    for key, values in git_meta.config(str(cfg)).items():
+        if key in ("remote.origin.url", "remote.upstream.url") and values[0]:
+            return values[0].strip()
     return ""
 
 
@@ -254,10 +224,43 @@ def has_linked_worktrees(gitdir: str) -> bool:
         return False
 
 
+def _short_ref(ref: str) -> str:
+    for prefix in ("refs/heads/", "refs/tags/", "refs/remotes/", "refs/"):
+        if ref.startswith(prefix):
+            return ref[len(prefix) :]
+    return ref
+
+
 def default_branch_for_repo(repo_root: str) -> str:
     repo_root = resolve_path(repo_root)
     if not repo_root:
         return ""
+    gitdir = git_meta.gitdir_for(repo_root) or (repo_root if os.path.isfile(os.path.join(repo_root, "HEAD")) else "")
+    common = git_meta.common_dir(gitdir) if gitdir else ""
+    if not common or git_meta.uses_reftable(common):
+        return _default_branch_via_git(repo_root)
+    for remote in ("origin", "upstream"):
+        out = _short_ref(git_meta.symbolic_ref(common, f"refs/remotes/{remote}/HEAD"))
+        if out:
+            if out.startswith(remote + "/"):
+                out = out[len(remote) + 1 :]
+            else:
+                out = out.split("/", 1)[-1]
+            out = normalize_branch_name(out)
+            if out:
+                return out
+
+    for cand in DEFAULT_BRANCH_DIRS_ORDER:
+        for ref in (f"refs/heads/{cand}", f"refs/remotes/origin/{cand}", f"refs/remotes/upstream/{cand}"):
+            if git_meta.ref_exists(common, ref):
+                return cand
+    # Last-resort fallback for narrow clones where only a topic branch exists
+    # locally and remote HEAD is unavailable.
+    return "main"
+
+
+def _default_branch_via_git(repo_root: str) -> str:
+    """`default_branch_for_repo` through git itself, for refs git_meta cannot read (reftable)."""
     for remote in ("origin", "upstream"):
         try:
             out = subprocess.run(
@@ -367,21 +370,15 @@ def remote_names_for_root(root: str) -> dict[str, str]:
     if cfg is None:
         return {}
     remotes = {}
-    section = ""
-    try:
-        for line in cfg.read_text(encoding="utf-8", errors="replace").splitlines():
-            m = re.match(r'\[remote "(.+)"\]', line, flags=re.IGNORECASE)
-            if m:
-                section = m.group(1).strip()
-                remotes.setdefault(section, "")
-                continue
-            if section:
-                u = re.match(r"^\s*url\s*=\s*(.+)$", line)
-                if u:
-                    remotes[section] = parse_owner_from_remote_url(u.group(1).strip())
-                    section = ""
-    except Exception:
-        pass
+    for key, values in git_meta.config(str(cfg)).items():
+        if not key.startswith("remote."):
+            continue
+        name, _, var = key[len("remote.") :].rpartition(".")
+        if not name:
+            continue
+        remotes.setdefault(name, "")
+        if var == "url" and not remotes[name]:
+            remotes[name] = parse_owner_from_remote_url(values[0].strip())
     return remotes
 
 
@@ -526,35 +523,26 @@ def find_worktree_root_for_path(p, stop_at):
     return ""
 
 
+_dir_snapshot: dir_snapshot.DirSnapshot | None = None
+
+
+def dir_snapshot_store() -> dir_snapshot.DirSnapshot:
+    global _dir_snapshot
+    if _dir_snapshot is None:
+        _dir_snapshot = dir_snapshot.DirSnapshot()
+    return _dir_snapshot
+
+
 def scan_for_git_repos(roots, depth, ignore_file):
+    # A `.git` entry at depth <= `depth` means its repo dir sits at depth - 1.
+    # Nested repos are dropped below anyway, so the walk stops at each repo.
+    snapshot = dir_snapshot_store()
+    excluded = dir_snapshot.exclude_matcher(dir_snapshot.read_exclude_file(ignore_file))
     candidates = set()
-    fd_args = [
-        "fd",
-        "--hidden",
-        "--no-ignore",
-        "--absolute-path",
-        "--threads",
-        WORKER_THREADS_STR,
-        "--type",
-        "f",
-        "--type",
-        "d",
-        "--max-depth",
-        str(depth),
-        "--glob",
-        ".git",
-    ]
-    for pat in parse_ignore_file_to_excludes(ignore_file):
-        fd_args.extend(["--exclude", pat])
-
     for r in roots:
-        out = subprocess.run(
-            fd_args + [r], check=False, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
-        ).stdout
-        for gitp in out.splitlines():
-            p = gitp.strip()
-            if p:
-                candidates.add(resolve_path(str(Path(p).parent)))
+        for path, _depth, has_git in snapshot.walk(resolve_path(r), depth - 1, excluded, stop_at_repos=True):
+            if has_git:
+                candidates.add(path)
 
     accepted = []
     for wt_dir in sorted(candidates, key=lambda p: (len(p), p)):
@@ -567,34 +555,16 @@ HOME_DIR_SCAN_DEPTH = 6
 
 
 def get_home_dirs(root, ignore_file, include_hidden, stop_prefixes=None):
-    fd_args = [
-        "fd",
-        "--type",
-        "d",
-        "--max-depth",
-        str(HOME_DIR_SCAN_DEPTH),
-        "--absolute-path",
-        "--threads",
-        WORKER_THREADS_STR,
-    ]
-    if include_hidden in ("1", "true", "yes", "on"):
-        fd_args.append("--hidden")
-    fd_args.extend(["--exclude", ".git"])
-    for pat in parse_ignore_file_to_excludes(ignore_file):
-        fd_args.extend(["--exclude", pat])
-    if stop_prefixes:
-        for sp in sorted(set(stop_prefixes)):
-            if not sp:
-                continue
-            if sp == root or sp.startswith(root + os.sep):
-                rel = os.path.relpath(sp, root).replace(os.sep, "/").strip("/")
-                if rel and rel != ".":
-                    fd_args.extend(["--exclude", rel])
-
-    out = subprocess.run(
-        fd_args + [".", root], check=False, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
-    ).stdout
-    return [line.strip() for line in out.splitlines() if line.strip()]
+    """Directories under `root` (resolved, root excluded) down to HOME_DIR_SCAN_DEPTH."""
+    root = resolve_path(root)
+    walk = dir_snapshot_store().walk(
+        root,
+        HOME_DIR_SCAN_DEPTH,
+        dir_snapshot.exclude_matcher(dir_snapshot.read_exclude_file(ignore_file)),
+        include_hidden=include_hidden in ("1", "true", "yes", "on"),
+        skip_paths=frozenset(sp for sp in stop_prefixes or () if sp and sp.startswith(root + os.sep)),
+    )
+    return [path for path, depth, _has_git in walk if depth > 0]
 
 
 scan_roots_raw = os.environ.get("PICK_SESSION_SCAN_ROOTS", "").strip()
@@ -607,8 +577,25 @@ scan_roots_set = set(scan_roots)
 quick = os.environ.get("PICK_SESSION_QUICK", "").lower() in ("1", "true", "yes", "on")
 sessions_only = os.environ.get("PICK_SESSION_SESSIONS_ONLY", "").lower() in ("1", "true", "yes", "on")
 skip_dirty = os.environ.get("PICK_SESSION_SKIP_DIRTY", "").lower() in ("1", "true", "yes", "on")
+recheck_dirty = os.environ.get("PICK_SESSION_RECHECK_DIRTY", "").lower() in ("1", "true", "yes", "on")
+_dirty_ttl_env = os.environ.get("PICK_SESSION_DIRTY_TTL", "").strip()
+dirty_ttl = int(_dirty_ttl_env) if _dirty_ttl_env.isdigit() else 600
 skip_gh = os.environ.get("PICK_SESSION_SKIP_GH", "").lower() in ("1", "true", "yes", "on")
+# The index watch daemon keeps worktree rows current while it runs, so its
+# TTL full scans reuse the cached worktree list instead of walking the scan
+# roots; badges and directory rows are still rebuilt.
+skip_discovery = os.environ.get("PICK_SESSION_SKIP_DISCOVERY", "").lower() in ("1", "true", "yes", "on")
 ignore_file = os.environ.get("PICK_SESSION_IGNORE_FILE", "").strip()
+# Scoped refresh (the index watch daemon): index only the worktrees listed in
+# this file, one path per line, and emit just their session/worktree rows.
+only_paths_file = os.environ.get("PICK_SESSION_PATHS_FILE", "").strip()
+only_paths: list[str] | None = None
+if only_paths_file:
+    try:
+        with open(only_paths_file, "r", encoding="utf-8", errors="replace") as f:
+            only_paths = [resolve_path(line.strip()) for line in f if line.strip()]
+    except OSError:
+        only_paths = []
 
 dir_include_hidden = os.environ.get("PICK_SESSION_DIR_INCLUDE_HIDDEN", "on").lower()
 
@@ -845,39 +832,17 @@ def _wt_issue_number(wt_path: str) -> str:
     """Read issue number from worktree-local git config (comma.w.issue.number).
 
     This is set by ,w when creating worktrees linked to issues via gh-dash.
-    Zero-cost local lookup — no network call.
+    Zero-cost local lookup — no network call, no git fork.
     """
-    try:
-        r = subprocess.run(
-            ["git", "-C", wt_path, "config", "--worktree", "--get", "comma.w.issue.number"],
-            check=False,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-            text=True,
-            timeout=2,
-        )
-        num = (r.stdout or "").strip()
-        if num and num.isdigit():
-            return num
-    except Exception:
-        pass
-    return ""
+    gitdir = git_meta.gitdir_for(wt_path)
+    num = git_meta.config_get(gitdir, "comma.w.issue.number", worktree=True).strip() if gitdir else ""
+    return num if num.isdigit() else ""
 
 
 def _wt_issue_repo(wt_path: str) -> str:
     """Read repo NWO from worktree-local git config (comma.w.issue.repo)."""
-    try:
-        r = subprocess.run(
-            ["git", "-C", wt_path, "config", "--worktree", "--get", "comma.w.issue.repo"],
-            check=False,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-            text=True,
-            timeout=2,
-        )
-        return (r.stdout or "").strip()
-    except Exception:
-        return ""
+    gitdir = git_meta.gitdir_for(wt_path)
+    return git_meta.config_get(gitdir, "comma.w.issue.repo", worktree=True).strip() if gitdir else ""
 
 
 def extract_issue_number(branch: str) -> str:
@@ -945,7 +910,8 @@ def _gh_issue_state(
 def _closing_issue_from_pr(pr_data: dict[str, Any] | None) -> dict[str, Any] | None:
     """Extract the first closing issue from a PR's closingIssuesReferences.
 
-    Returns {number, url, nwo} or None.  ``nwo`` is the ``owner/repo`` of the
+    Returns {number, url, nwo, state} or None (``state`` is only filled by the
+    batched GraphQL lookup; ``gh pr view`` does not expose it).  ``nwo`` is the ``owner/repo`` of the
     issue's repository (extracted from the response) so callers can pass it as
     an explicit ``-R`` override to ``gh issue view`` — this handles cross-repo
     closing issues and fork workflows where cwd would resolve to the wrong repo.
@@ -961,7 +927,7 @@ def _closing_issue_from_pr(pr_data: dict[str, Any] | None) -> dict[str, Any] | N
             owner = (repo.get("owner") or {}).get("login", "")
             name = repo.get("name", "")
             nwo = f"{owner}/{name}" if owner and name else ""
-            return {"number": num, "url": url, "nwo": nwo}
+            return {"number": num, "url": url, "nwo": nwo, "state": ref.get("state", "")}
     return None
 
 
@@ -1160,6 +1126,25 @@ def _batch_ci_graphql(pr_numbers: dict[str, set[int]]) -> dict[str, dict[int, tu
     return out
 
 
+def _gh_pr_entry(pr_data: dict[str, Any], nwo: str) -> dict[str, Any]:
+    """Cache-shaped PR dict from a `gh pr view` payload or a GraphQL PR node."""
+    pr_num = pr_data["number"]
+    picker_review, picker_ci = _get_gh_picker_meta(nwo, pr_num) if nwo else ("", "")
+    return {
+        "number": pr_num,
+        "state": pr_data.get("state", ""),
+        "url": pr_data.get("url", ""),
+        "review": pr_data.get("reviewDecision", "") or picker_review,
+        "ci": picker_ci,
+        "author": (pr_data.get("author") or {}).get("login", ""),
+    }
+
+
+def _gh_issue_target(wt_path: str, branch: str) -> tuple[str, str]:
+    """Issue number known before any network call, plus its repo override."""
+    return _wt_issue_number(wt_path) or extract_issue_number(branch), _wt_issue_repo(wt_path)
+
+
 def _lookup_gh_info(wt_path: str, branch: str, nwo: str) -> dict[str, Any]:
     """Return an explicit lookup contract for a worktree.
 
@@ -1169,6 +1154,9 @@ def _lookup_gh_info(wt_path: str, branch: str, nwo: str) -> dict[str, Any]:
       3. PR closingIssuesReferences (linked via "Closes #N" in PR body)
     PR resolution: gh pr view (single network call, infers branch from cwd).
     Issue state: gh issue view (single network call, only if number found).
+
+    Per-worktree fallback for `_lookup_gh_info_batch` when the base repo
+    cannot be read from the worktree's git config.
     """
     result: dict[str, Any] = {"pr": None, "issue": None}
     if not branch:
@@ -1177,18 +1165,8 @@ def _lookup_gh_info(wt_path: str, branch: str, nwo: str) -> dict[str, Any]:
     if pr_status == GH_LOOKUP_FAILURE:
         return _gh_lookup_result(GH_LOOKUP_FAILURE)
     if pr_status == GH_LOOKUP_SUCCESS and pr_data:
-        pr_num = pr_data["number"]
-        picker_review, picker_ci = _get_gh_picker_meta(nwo, pr_num) if nwo else ("", "")
-        result["pr"] = {
-            "number": pr_num,
-            "state": pr_data.get("state", ""),
-            "url": pr_data.get("url", ""),
-            "review": pr_data.get("reviewDecision", "") or picker_review,
-            "ci": picker_ci,
-            "author": (pr_data.get("author") or {}).get("login", ""),
-        }
-    issue_num = _wt_issue_number(wt_path) or extract_issue_number(branch)
-    issue_repo_override = _wt_issue_repo(wt_path)
+        result["pr"] = _gh_pr_entry(pr_data, nwo)
+    issue_num, issue_repo_override = _gh_issue_target(wt_path, branch)
     if not issue_num:
         closing = _closing_issue_from_pr(pr_data)
         if closing:
@@ -1206,6 +1184,205 @@ def _lookup_gh_info(wt_path: str, branch: str, nwo: str) -> dict[str, Any]:
     return _gh_lookup_result(GH_LOOKUP_ABSENT)
 
 
+# Worktree lookups per `gh api graphql` call. Each call targets one repository,
+# so a full reindex costs about one call per repo rather than two `gh` forks per
+# worktree; larger repos split into a few calls that run in parallel.
+_GH_BATCH_CHUNK = 20
+_GH_PR_FIELDS = (
+    "number state url reviewDecision author { login } isCrossRepository headRepositoryOwner { login } "
+    "closingIssuesReferences(first: 5) { nodes { number state url repository { name owner { login } } } }"
+)
+_PULL_HEAD_RE = re.compile(r"refs/pull/(\d+)/head")
+
+
+def _gh_base_nwo(gitdir: str) -> str:
+    """The repo `gh` resolves as base: a `gh-resolved` remote, else upstream > github > origin."""
+    conf = git_meta.config(os.path.join(git_meta.common_dir(gitdir), "config"))
+    remotes: dict[str, str] = {}
+    for key, values in conf.items():
+        if key.startswith("remote.") and key.endswith(".url"):
+            remotes.setdefault(key[len("remote.") : -len(".url")], nwo_from_url(values[-1]))
+    for name, nwo in remotes.items():
+        resolved = (conf.get(f"remote.{name}.gh-resolved") or [""])[-1]
+        if resolved == "base" and nwo:
+            return nwo
+        if "/" in resolved:
+            return resolved
+    for name in ("upstream", "github", "origin"):
+        if remotes.get(name):
+            return remotes[name]
+    return next((nwo for nwo in remotes.values() if nwo), "")
+
+
+def _gh_head_for_branch(gitdir: str, branch: str) -> tuple[str, str, int]:
+    """(head branch, head owner, PR number) as `gh pr view` infers them from branch config.
+
+    `gh pr checkout` records `refs/pull/<n>/head` as the merge ref, which names
+    the PR directly. Otherwise the push remote (or tracking remote) supplies the
+    head owner, and the tracked branch name is the PR's head ref.
+    """
+    merge = git_meta.config_get(gitdir, f"branch.{branch}.merge")
+    m = _PULL_HEAD_RE.fullmatch(merge)
+    if m:
+        return branch, "", int(m.group(1))
+    push_remote = git_meta.config_get(gitdir, f"branch.{branch}.pushRemote") or git_meta.config_get(
+        gitdir, "remote.pushDefault"
+    )
+    remote = push_remote or git_meta.config_get(gitdir, f"branch.{branch}.remote")
+    url = remote if ("/" in remote or ":" in remote) else git_meta.config_get(gitdir, f"remote.{remote}.url")
+    owner = nwo_from_url(url).split("/", 1)[0] if url else ""
+    head = merge[len("refs/heads/") :] if merge.startswith("refs/heads/") and not push_remote else branch
+    return head, owner, 0
+
+
+def _gh_pick_branch_pr(nodes: list[dict[str, Any]], head_owner: str) -> dict[str, Any] | None:
+    """Pick the PR `gh pr view` would: matching head owner, open before closed, newest first."""
+    owner = head_owner.lower()
+    matches = [
+        n
+        for n in nodes
+        if n
+        and n.get("number")
+        and (not owner or ((n.get("headRepositoryOwner") or {}).get("login") or "").lower() in ("", owner))
+    ]
+    for node in matches:
+        if (node.get("state") or "").upper() == "OPEN":
+            return node
+    return matches[0] if matches else None
+
+
+def _gh_graphql_repo_chunk(
+    nwo: str, requests: list[tuple[str, str, Any]]
+) -> dict[str, tuple[_GH_LOOKUP_STATUS, Any]]:
+    """Resolve `(key, kind, arg)` requests against one repository in one call.
+
+    kinds: `pr_branch` (arg = head branch), `pr_number` and `issue` (arg = number).
+    Returns {key: (status, node)}; `pr_branch` nodes are the candidate PR list.
+    A failed call fails every request in it, so callers keep their cached rows.
+    """
+    owner, _, name = nwo.partition("/")
+    fields: list[str] = []
+    for i, (_key, kind, arg) in enumerate(requests):
+        if kind == "pr_branch":
+            fields.append(
+                f"a{i}: pullRequests(headRefName: {json.dumps(arg)}, states: [OPEN, CLOSED, MERGED], first: 30, "
+                f"orderBy: {{field: CREATED_AT, direction: DESC}}) {{ nodes {{ {_GH_PR_FIELDS} }} }}"
+            )
+        elif kind == "pr_number":
+            fields.append(f"a{i}: pullRequest(number: {int(arg)}) {{ {_GH_PR_FIELDS} }}")
+        else:
+            fields.append(f"a{i}: issue(number: {int(arg)}) {{ number state url }}")
+    query = f"query {{ r: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ {' '.join(fields)} }} }}"
+    failed: dict[str, tuple[_GH_LOOKUP_STATUS, Any]] = {key: (GH_LOOKUP_FAILURE, None) for key, _, _ in requests}
+    try:
+        # gh exits non-zero on partial errors (e.g. one unknown issue) but still
+        # prints the data, so the payload decides.
+        result = subprocess.run(
+            ["gh", "api", "graphql", "-f", f"query={query}"],
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=20,
+        )
+        payload = json.loads(result.stdout or "null")
+    except Exception:
+        return failed
+    repo = (payload.get("data") or {}).get("r") if isinstance(payload, dict) else None
+    if not isinstance(repo, dict):
+        return failed
+    error_types: dict[str, str] = {}
+    for err in payload.get("errors") or []:
+        path = (err.get("path") or []) if isinstance(err, dict) else []
+        if len(path) >= 2 and path[0] == "r":
+            error_types[str(path[1])] = str(err.get("type") or "")
+    out: dict[str, tuple[_GH_LOOKUP_STATUS, Any]] = {}
+    for i, (key, kind, _arg) in enumerate(requests):
+        node = repo.get(f"a{i}")
+        if node is None:
+            absent = error_types.get(f"a{i}") == "NOT_FOUND" and kind != "pr_branch"
+            out[key] = (GH_LOOKUP_ABSENT if absent else GH_LOOKUP_FAILURE, None)
+        elif kind == "pr_branch":
+            out[key] = (GH_LOOKUP_SUCCESS, node.get("nodes") or [])
+        else:
+            out[key] = (GH_LOOKUP_SUCCESS, node)
+    return out
+
+
+def _lookup_gh_info_batch(items: list[tuple[str, str, str]]) -> dict[str, dict[str, Any]]:
+    """`_lookup_gh_info` for many `(wt_path, branch, nwo)` worktrees at once.
+
+    PR-by-branch, PR-by-number and issue-by-number lookups are grouped per
+    repository into aliased GraphQL queries of up to `_GH_BATCH_CHUNK` lookups.
+    Closing-issue state comes with the PR node, so no second round is needed.
+    Worktrees whose base repo cannot be read locally use `_lookup_gh_info`.
+    """
+    out: dict[str, dict[str, Any]] = {}
+    per_repo: dict[str, list[tuple[str, str, Any]]] = {}
+    plans: dict[str, tuple[str, str, str, str, str]] = {}
+    fallback: list[tuple[str, str, str]] = []
+    for wt_path, branch, nwo in items:
+        if not branch:
+            out[wt_path] = _gh_lookup_result(GH_LOOKUP_ABSENT)
+            continue
+        gitdir = git_meta.gitdir_for(wt_path)
+        base = _gh_base_nwo(gitdir) if gitdir else ""
+        if not base:
+            fallback.append((wt_path, branch, nwo))
+            continue
+        head, head_owner, pr_num = _gh_head_for_branch(gitdir, branch)
+        if pr_num:
+            per_repo.setdefault(base, []).append((f"pr:{wt_path}", "pr_number", pr_num))
+        else:
+            per_repo.setdefault(base, []).append((f"pr:{wt_path}", "pr_branch", head))
+        issue_num, issue_repo = _gh_issue_target(wt_path, branch)
+        if issue_num:
+            per_repo.setdefault(issue_repo or base, []).append((f"issue:{wt_path}", "issue", issue_num))
+        plans[wt_path] = (branch, nwo, head_owner, issue_num, issue_repo)
+
+    chunks = [
+        (repo, reqs[i : i + _GH_BATCH_CHUNK])
+        for repo, reqs in per_repo.items()
+        for i in range(0, len(reqs), _GH_BATCH_CHUNK)
+    ]
+    answers: dict[str, tuple[_GH_LOOKUP_STATUS, Any]] = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=WORKER_THREADS) as pool:
+        fallback_futs = {pool.submit(_lookup_gh_info, *item): item[0] for item in fallback}
+        for chunk_out in pool.map(lambda c: _gh_graphql_repo_chunk(*c), chunks):
+            answers.update(chunk_out)
+        for fut in concurrent.futures.as_completed(fallback_futs):
+            out[fallback_futs[fut]] = fut.result()
+
+    for wt_path, (branch, nwo, head_owner, issue_num, _issue_repo) in plans.items():
+        pr_status, pr_node = answers.get(f"pr:{wt_path}", (GH_LOOKUP_FAILURE, None))
+        if pr_status == GH_LOOKUP_FAILURE:
+            out[wt_path] = _gh_lookup_result(GH_LOOKUP_FAILURE)
+            continue
+        if isinstance(pr_node, list):
+            pr_node = _gh_pick_branch_pr(pr_node, head_owner)
+        pr_data = None
+        if pr_node and pr_node.get("number"):
+            closing_refs = (pr_node.get("closingIssuesReferences") or {}).get("nodes") or []
+            pr_data = {**pr_node, "closingIssuesReferences": closing_refs}
+        pr = _gh_pr_entry(pr_data, nwo) if pr_data else None
+        issue = None
+        if issue_num:
+            issue_status, issue_node = answers.get(f"issue:{wt_path}", (GH_LOOKUP_FAILURE, None))
+            if issue_status == GH_LOOKUP_FAILURE:
+                out[wt_path] = _gh_lookup_result(GH_LOOKUP_FAILURE)
+                continue
+            if issue_status == GH_LOOKUP_SUCCESS and issue_node and issue_node.get("number"):
+                issue = issue_node
+        else:
+            closing = _closing_issue_from_pr(pr_data)
+            if closing:
+                issue = {"number": closing["number"], "state": closing.get("state", ""), "url": closing["url"]}
+        if pr or issue:
+            out[wt_path] = _gh_lookup_result(GH_LOOKUP_SUCCESS, pr, issue)
+        else:
+            out[wt_path] = _gh_lookup_result(GH_LOOKUP_ABSENT)
+    return out
+
+
 def _apply_gh_lookup_result(
     gh_entries: dict[str, dict[str, Any]],
     wt_gh_info: dict[str, dict[str, Any]],
@@ -1407,31 +1584,22 @@ def pr_is_terminal(gh_info: dict[str, Any] | None) -> bool:
     return bool(pr and (pr.get("state") or "").upper() in {"MERGED", "CLOSED"})
 
 
-def _check_dirty(wt_path: str) -> bool:
+_dirty_cache: dirty_cache.DirtyCache | None = None
+
+
+def _check_dirty(paths: list[str]) -> None:
+    """Run dirty checks through the fingerprint cache and record flags + reasons."""
+    global _dirty_cache
+    if _dirty_cache is None:
+        _dirty_cache = dirty_cache.DirtyCache(ttl=dirty_ttl, recheck=recheck_dirty)
+    for p, (dirty, reason) in _dirty_cache.refresh(paths, WORKER_THREADS).items():
+        if dirty:
+            wt_status.setdefault(p, set[str]()).add("dirty")
+        wt_dirty_check[p] = reason
     try:
-        r = subprocess.run(
-            [
-                "git",
-                "--no-optional-locks",
-                "-c",
-                "core.threads=1",
-                "-c",
-                "status.renames=false",
-                "-C",
-                wt_path,
-                "status",
-                "--porcelain",
-                "--untracked-files=no",
-            ],
-            check=False,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-            text=True,
-            timeout=10,
-        )
-        return bool((r.stdout or "").strip())
+        _dirty_cache.save()
     except Exception:
-        return False
+        pass
 
 
 def _cached_status_flags_by_path() -> dict[str, set[str]]:
@@ -1460,6 +1628,23 @@ def _cached_status_flags_by_path() -> dict[str, set[str]]:
     return statuses
 
 
+def _cached_worktree_paths() -> list[str]:
+    """Worktree and session paths under the scan roots, as the cache lists them."""
+    try:
+        lines = PICK_SESSION_CACHE_FILE.read_text(encoding="utf-8", errors="replace").splitlines()
+    except Exception:
+        return []
+    paths = set()
+    for line in lines:
+        parts = line.split("\t")
+        if len(parts) < 5 or parts[1] not in ("session", "worktree") or not parts[2]:
+            continue
+        path = resolve_path(parts[2])
+        if any(path == r or path.startswith(r + os.sep) for r in scan_roots):
+            paths.add(path)
+    return sorted(p for p in paths if os.path.isdir(p))
+
+
 def status_badge(flags: set[str]) -> str:
     if "gone" in flags:
         return BADGE_GONE
@@ -1490,22 +1675,32 @@ def ensure_group(repo_id: str, root_checkout: str, repo_path: str):
 
 
 wt_status: dict[str, set[str]] = {}
+# How each worktree's dirty flag was decided this run (dirty_cache reasons).
+wt_dirty_check: dict[str, str] = {}
 
 # 1. Discover worktrees
-if not quick and not sessions_only and shutil.which("fd"):
-    for wt_dir in scan_for_git_repos(scan_roots, int(os.environ.get("PICK_SESSION_SCAN_DEPTH", 6)), ignore_file):
-        info = worktree_info(wt_dir)
-        if info:
-            rid = str(info.get("repo_id", ""))
-            ensure_group(rid, str(info.get("root", "")), str(info.get("repo_path", "")))
-            groups[rid]["wt_map"][info["path"]] = {"branch": str(info.get("branch", "")), "repo_id": rid}
-            flags: set[str] = set()
-            if not os.path.isdir(info["path"]):
-                flags.add("gone")
-            elif info.get("stale"):
-                flags.add("stale")
-            if flags:
-                wt_status[info["path"]] = flags
+if only_paths is not None:
+    _discovered = [p for p in only_paths if os.path.isdir(p)]
+elif not quick and not sessions_only:
+    # An empty cache (first run, or a wiped one) still needs the real walk.
+    _discovered = (_cached_worktree_paths() if skip_discovery else []) or scan_for_git_repos(
+        scan_roots, int(os.environ.get("PICK_SESSION_SCAN_DEPTH", 6)), ignore_file
+    )
+else:
+    _discovered = []
+for wt_dir in _discovered:
+    info = worktree_info(wt_dir)
+    if info:
+        rid = str(info.get("repo_id", ""))
+        ensure_group(rid, str(info.get("root", "")), str(info.get("repo_path", "")))
+        groups[rid]["wt_map"][info["path"]] = {"branch": str(info.get("branch", "")), "repo_id": rid}
+        flags: set[str] = set()
+        if not os.path.isdir(info["path"]):
+            flags.add("gone")
+        elif info.get("stale"):
+            flags.add("stale")
+        if flags:
+            wt_status[info["path"]] = flags
 
 # 1b. Parallel dirty scan for worktrees that aren't already stale/gone.
 _dirty_candidates = [p for rid in groups for p in groups[rid]["wt_map"] if p not in wt_status]
@@ -1516,15 +1711,7 @@ if _dirty_candidates and skip_dirty:
         if cached_flags:
             wt_status.setdefault(p, set[str]()).update(cached_flags)
 elif _dirty_candidates:
-    with concurrent.futures.ThreadPoolExecutor(max_workers=WORKER_THREADS) as pool:
-        _futures = {pool.submit(_check_dirty, p): p for p in _dirty_candidates}
-        for fut in concurrent.futures.as_completed(_futures):
-            p = _futures[fut]
-            try:
-                if fut.result():
-                    wt_status.setdefault(p, set[str]()).add("dirty")
-            except Exception:
-                pass
+    _check_dirty(_dirty_candidates)
 
 # 2. Add sessions
 _tmux_session = subprocess.run(["tmux", "display-message", "-p", "#S"], check=False, stdout=subprocess.PIPE, text=True)
@@ -1565,6 +1752,17 @@ for row in sess_out.splitlines():
             groups[rid]["wt_map"].setdefault(info["path"], {"branch": str(info.get("branch", "")), "repo_id": rid})
             groups[rid]["sessions_by_wt"].setdefault(info["path"], []).append(name)
 
+# A scoped refresh only re-emits the requested worktrees; sessions rooted
+# elsewhere keep their cached rows.
+if only_paths is not None:
+    _only_set = set(only_paths)
+    for rid in list(groups):
+        group = groups[rid]
+        group["wt_map"] = {p: v for p, v in group["wt_map"].items() if p in _only_set}
+        group["sessions_by_wt"] = {p: v for p, v in group["sessions_by_wt"].items() if p in _only_set}
+        if not group["wt_map"]:
+            del groups[rid]
+
 # 2a. In quick/sessions-only mode, step 1b had no discovered worktrees yet.
 # Now that step 2 found session worktree paths, either preserve cached dirty
 # badges for fast refreshes or run exact dirty checks for those sessions.
@@ -1577,15 +1775,7 @@ if quick or sessions_only:
             if cached_flags:
                 wt_status.setdefault(p, set[str]()).update(cached_flags)
     elif _new_wt_paths:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=WORKER_THREADS) as pool:
-            _dirty_futs = {pool.submit(_check_dirty, p): p for p in _new_wt_paths}
-            for fut in concurrent.futures.as_completed(_dirty_futs):
-                p = _dirty_futs[fut]
-                try:
-                    if fut.result():
-                        wt_status.setdefault(p, set[str]()).add("dirty")
-                except Exception:
-                    pass
+        _check_dirty(_new_wt_paths)
 
 # 2b. Resolve GitHub metadata after both scans and live sessions have populated
 # the worktree groups. A quick refresh has no discovery pass, so looking up
@@ -1625,15 +1815,11 @@ if _gh_all:
 
     if _gh_need_fetch and not skip_gh and shutil.which("gh"):
         _fetch_meta = {p: (br, nwo) for p, br, nwo in _gh_need_fetch}
-        with concurrent.futures.ThreadPoolExecutor(max_workers=WORKER_THREADS) as pool:
-            _gh_futures = {pool.submit(_lookup_gh_info, p, br, nwo): p for p, br, nwo in _gh_need_fetch}
-            for fut in concurrent.futures.as_completed(_gh_futures):
-                p = _gh_futures[fut]
-                br, nwo = _fetch_meta[p]
-                lookup = fut.result()
-                _apply_gh_lookup_result(_gh_entries, wt_gh_info, p, br, nwo, _now, lookup)
-
-    if quick or sessions_only:
+        for p, lookup in _lookup_gh_info_batch(_gh_need_fetch).items():
+            br, nwo = _fetch_meta[p]
+            _apply_gh_lookup_result(_gh_entries, wt_gh_info, p, br, nwo, _now, lookup)
+
+    if quick or sessions_only or only_paths is not None:
         # Session-only refreshes cannot enumerate every worktree. Preserve their
         # cache entries while adding metadata for live sessions discovered here.
         _gh_pruned = _gh_entries
@@ -1726,6 +1912,8 @@ def emit_sessions_and_worktrees():
                 sf = status_meta_flags(flags)
                 if sf:
                     meta += f"|status={sf}"
+                if wt_path in wt_dirty_check:
+                    meta += f"|dirtycheck={wt_dirty_check[wt_path]}"
                 ghi = wt_gh_info.get(wt_path)
                 gm = gh_meta(ghi)
                 if gm:
@@ -1753,6 +1941,8 @@ def emit_sessions_and_worktrees():
                 sf = status_meta_flags(flags)
                 if sf:
                     meta += f"|status={sf}"
+                if wt_path in wt_dirty_check:
+                    meta += f"|dirtycheck={wt_dirty_check[wt_path]}"
                 ghi = wt_gh_info.get(wt_path)
                 gm = gh_meta(ghi)
                 if gm:
@@ -1768,6 +1958,9 @@ def emit_sessions_and_worktrees():
                 )
                 exclude_worktree_roots.add(wt_path)
 
+    if only_paths is not None:
+        return
+
     # Plain directory sessions do not belong to a git worktree group, but they
     # should still take ownership of their path in the picker. Collapse multiple
     # tmux sessions rooted at the same directory and prefer the canonical name
@@ -1808,11 +2001,11 @@ def emit_sessions_and_worktrees():
 emit_sessions_and_worktrees()
 
 # 5. Directories
-if not sessions_only:
+if not sessions_only and only_paths is None:
     # Directory output combines:
     # - configured scan roots (e.g. ~/work, ~/code)
     # - wrapper directories for detected repos
-    # - depth-limited home directories (fd scan under $HOME)
+    # - depth-limited home directories (snapshot walk under $HOME)
     wrapper_dirs = set()
     for rid in groups.keys():
         rp = (groups.get(rid, {}) or {}).get("repo_path", "")
@@ -1834,11 +2027,7 @@ if not sessions_only:
         home_worktree_seen.add(rwt)
         home_worktree_prefixes.append(rwt)
     home_worktree_prefixes.sort()
-    if shutil.which("fd"):
-        for p in get_home_dirs(home, ignore_file, dir_include_hidden, home_worktree_prefixes):
-            rp = resolve_path(p)
-            if rp:
-                wrapper_dirs.add(rp)
+    wrapper_dirs.update(get_home_dirs(home, ignore_file, dir_include_hidden, home_worktree_prefixes))
     wrapper_dirs.add(resolve_path(home))
     ordered_dirs = []
     seen_dirs = set()
@@ -1880,3 +2069,9 @@ if not sessions_only:
             mk = match_key(base, tpath, p)
             label = tpath
         print(f"{display_dir_entry(label)}\tdir\t{p}\t\t\t{mk}")
+
+if _dir_snapshot is not None:
+    try:
+        _dir_snapshot.save()
+    except OSError:
+        pass
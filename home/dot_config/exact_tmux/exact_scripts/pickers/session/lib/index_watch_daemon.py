@@ -0,0 +1,686 @@
+#!/usr/bin/env python3
+"""Keep the session-picker cache live from inotify events (Linux only).
+
+Motivation: between TTL-gated `index_update.sh` runs, new worktrees and removed
+directories show up late (or as `stale`/`gone` badges), and the only way to
+catch them is another full `index_main.py` pass over every scan root. The
+kernel already knows exactly which directories changed.
+
+Contract:
+- Optional and opt-in (`@pick_session_index_watch`); one instance per user,
+  held by a lock file, exiting with the tmux server.
+- Removed directories under the scan roots become `PATH_PREFIX` tombstones in
+  `pick_session_mutations.tsv`, the same records picker removals write.
+- New repos, new/removed linked worktrees and `HEAD` moves re-index only the
+  affected worktrees (`index.sh --paths-from=`), and their rows replace the old
+  ones in `pick_session_items.tsv`.
+- Every cache write takes `index_update.sh`'s lock and goes through
+  `publish_cache_filter.py`, so pending/mutation semantics are unchanged.
+- While the watcher has full coverage it keeps its own stamp fresh, and
+  `index_update.sh` then runs TTL-gated full scans with `--skip-discovery`:
+  they reuse the cached worktree list instead of walking the scan roots, but
+  still refresh dirty/gh badges and directory rows. Manual `--force` refreshes
+  and scans after the stamp lapses walk as before.
+
+Approach:
+- Walk the scan roots through the persisted directory snapshot with the same
+  depth and exclude rules as `scan_for_git_repos`, watching every directory
+  that is not a repo, each repo's `.git` (for `HEAD` and `worktrees/`), its
+  `.git/worktrees`, and each linked worktree's admin dir (its own `HEAD`).
+- Collect events into a batch and apply it once events settle.
+- Apply in a forked child whose pid owns the index lock, so a manual refresh
+  pre-empting the lock kills that apply, never the watcher.
+- On queue overflow, a failed apply, or exhausted watches fall back to full
+  scans.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import fcntl
+import os
+import select
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from pathlib import Path
+
+import dir_snapshot
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+DIR_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+GITDIR_MASK = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO | IN_ONLYDIR
+EVENT_HEADER = struct.Struct("iIII")
+
+SETTLE_S = 0.4
+MAX_BATCH_DELAY_S = 3.0
+HEARTBEAT_S = 30.0
+LOCK_STALE_S = 180
+LOCK_BUSY_EXIT = 75
+APPLY_FAILED_EXIT = 70
+
+
+class Inotify:
+    """Minimal ctypes binding: add/remove watches and decode event batches."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add.restype = ctypes.c_int
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._rm.restype = ctypes.c_int
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), "inotify_init1")
+        self.fd = fd
+
+    def add(self, path: str, mask: int) -> int:
+        wd = self._add(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def remove(self, wd: int) -> None:
+        self._rm(self.fd, wd)
+
+    def read(self) -> list[tuple[int, int, str]]:
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+        events = []
+        off = 0
+        while off + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, off)
+            off += EVENT_HEADER.size
+            name = data[off : off + length].rstrip(b"\0")
+            off += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def worktree_for_admin(admin: str) -> str:
+    """Linked worktree path recorded in a `.git/worktrees/<name>/gitdir` file."""
+    try:
+        with open(os.path.join(admin, "gitdir"), "r", encoding="utf-8", errors="replace") as f:
+            gitfile = f.readline().strip()
+    except OSError:
+        return ""
+    return os.path.dirname(gitfile) if gitfile else ""
+
+
+def admin_for_gitfile(gitfile: str) -> str:
+    """Admin dir a linked worktree's `.git` file points at (`gitdir: ...`)."""
+    try:
+        with open(gitfile, "r", encoding="utf-8", errors="replace") as f:
+            first = f.readline().strip()
+    except OSError:
+        return ""
+    if not first.startswith("gitdir:"):
+        return ""
+    raw = first.split(":", 1)[1].strip()
+    return os.path.normpath(raw if os.path.isabs(raw) else os.path.join(os.path.dirname(gitfile), raw))
+
+
+class IndexWatcher:
+    """Turn inotify events under the scan roots into a batch of row changes.
+
+    `refresh` collects worktree paths whose rows must be regenerated and
+    `removed` paths whose rows (with everything under them) must go.
+    """
+
+    def __init__(self, inotify: Inotify, roots: list[str], depth: int, excluded, snapshot=None):
+        self.inotify = inotify
+        self.roots = roots
+        # Same bound as scan_for_git_repos: a repo dir sits at most depth - 1 deep.
+        self.max_depth = depth - 1
+        self.excluded = excluded
+        self.snapshot = snapshot if snapshot is not None else dir_snapshot.DirSnapshot()
+        self.watches: dict[int, tuple[str, str]] = {}
+        self.watched: dict[tuple[str, str], int] = {}
+        # Watched scan dir -> (path relative to its root, depth), shallowest root wins.
+        self.dir_pos: dict[str, tuple[str, int]] = {}
+        self.admin_worktree: dict[str, str] = {}
+        self.refresh: set[str] = set()
+        self.removed: set[str] = set()
+        self.overflowed = False
+        self.exhausted = False
+        self._first_event = 0.0
+        self._last_event = 0.0
+
+    # -- watch bookkeeping -------------------------------------------------
+
+    def _add(self, role: str, key: str, target: str, mask: int) -> None:
+        if (role, key) in self.watched or self.exhausted:
+            return
+        try:
+            wd = self.inotify.add(target, mask)
+        except OSError as exc:
+            if exc.errno == errno.ENOSPC:
+                # Out of watches: coverage is partial, so full scans stay on.
+                self.exhausted = True
+            return
+        self.watches[wd] = (role, key)
+        self.watched[(role, key)] = wd
+
+    def _drop(self, wd: int) -> None:
+        entry = self.watches.pop(wd, None)
+        if entry is None:
+            return
+        if self.watched.get(entry) == wd:
+            del self.watched[entry]
+        if entry[0] == "dir":
+            self.dir_pos.pop(entry[1], None)
+
+    def _unwatch_under(self, path: str) -> None:
+        prefix = path + "/"
+        for (_role, key), wd in list(self.watched.items()):
+            if key == path or key.startswith(prefix):
+                self.inotify.remove(wd)
+                self._drop(wd)
+
+    def watch_roots(self) -> None:
+        for root in self.roots:
+            self._watch_tree(root, "", 0)
+
+    def rewatch(self) -> None:
+        """Drop every watch and walk the roots again (after a queue overflow)."""
+        for wd in list(self.watches):
+            self.inotify.remove(wd)
+            self._drop(wd)
+        self.exhausted = False
+        self.snapshot.rescan()
+        self.watch_roots()
+
+    def _watch_tree(self, top: str, rel: str, depth: int) -> list[str]:
+        """Watch `top` (at `rel`/`depth` under its root) and everything below it; return its repos."""
+
+        def excluded(name: str, sub_rel: str, sub_depth: int) -> bool:
+            return self.excluded(name, f"{rel}/{sub_rel}" if rel else sub_rel, depth + sub_depth)
+
+        repos = []
+        cut = len(top) + 1
+        for path, sub_depth, has_git in self.snapshot.walk(top, self.max_depth - depth, excluded, stop_at_repos=True):
+            at = depth + sub_depth
+            known = self.dir_pos.get(path)
+            if known is not None and known[1] <= at:
+                continue
+            if has_git:
+                repos.append(path)
+                self._watch_repo(path)
+                continue
+            sub = path[cut:]
+            self.dir_pos[path] = (f"{rel}/{sub}" if rel and sub else rel or sub, at)
+            self._add("dir", path, path, DIR_MASK)
+        return repos
+
+    def _watch_repo(self, repo: str) -> None:
+        gitp = os.path.join(repo, ".git")
+        if os.path.isdir(gitp) and not os.path.islink(gitp):
+            self._add("git", repo, gitp, GITDIR_MASK)
+            if os.path.isdir(os.path.join(gitp, "worktrees")):
+                self._watch_worktrees(repo)
+        elif os.path.isfile(gitp):
+            admin = admin_for_gitfile(gitp)
+            if admin and os.path.isdir(admin):
+                self._watch_admin(admin, repo)
+
+    def _watch_worktrees(self, repo: str) -> None:
+        container = os.path.join(repo, ".git", "worktrees")
+        self._add("worktrees", repo, container, DIR_MASK)
+        try:
+            names = os.listdir(container)
+        except OSError:
+            return
+        for name in names:
+            admin = os.path.join(container, name)
+            self._watch_admin(admin, worktree_for_admin(admin))
+
+    def _watch_admin(self, admin: str, worktree: str) -> None:
+        if worktree:
+            self.admin_worktree[admin] = worktree
+        self._add("admin", admin, admin, GITDIR_MASK)
+
+    # -- events ------------------------------------------------------------
+
+    def handle(self, wd: int, mask: int, name: str, now: float | None = None) -> None:
+        if mask & IN_Q_OVERFLOW:
+            self.overflowed = True
+            self._touch(now)
+            return
+        entry = self.watches.get(wd)
+        if entry is None:
+            return
+        if mask & IN_IGNORED:
+            self._drop(wd)
+            return
+        role, key = entry
+        appeared = mask & (IN_CREATE | IN_MOVED_TO)
+        vanished = mask & (IN_DELETE | IN_MOVED_FROM)
+        is_dir = mask & IN_ISDIR
+        if role == "dir":
+            child = os.path.join(key, name)
+            if name == ".git":
+                # The directory became (or stopped being) a repo. Like the full
+                # scan, stop descending into a repo: only its metadata is watched.
+                self.refresh.add(key)
+                if appeared:
+                    self._unwatch_under(key)
+                    self._watch_repo(key)
+            elif is_dir and appeared:
+                rel, depth = self.dir_pos.get(key, ("", 0))
+                child_rel = f"{rel}/{name}" if rel else name
+                if depth + 1 > self.max_depth or self.excluded(name, child_rel, depth + 1):
+                    return
+                self.snapshot.rescan()
+                self.refresh.update(self._watch_tree(child, child_rel, depth + 1))
+            elif is_dir and vanished:
+                self.removed.add(child)
+                self._unwatch_under(child)
+            else:
+                return
+        elif role == "git":
+            if name == "HEAD" and mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self.refresh.add(key)
+            elif name == "worktrees" and is_dir and appeared:
+                self._watch_worktrees(key)
+            else:
+                return
+        elif role == "worktrees":
+            admin = os.path.join(key, ".git", "worktrees", name)
+            if is_dir and appeared:
+                self._watch_admin(admin, worktree_for_admin(admin))
+            elif is_dir and vanished:
+                worktree = self.admin_worktree.get(admin, "")
+                self._unwatch_under(admin)
+                if not worktree:
+                    return
+                self.removed.add(worktree)
+            else:
+                return
+        elif role == "admin":
+            if name not in ("HEAD", "gitdir") or not mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                return
+            if name == "gitdir":
+                worktree = worktree_for_admin(key)
+                if worktree:
+                    self.admin_worktree[key] = worktree
+            if key not in self.admin_worktree:
+                return
+            self.refresh.add(self.admin_worktree[key])
+        self._touch(now)
+
+    def _touch(self, now: float | None) -> None:
+        now = time.monotonic() if now is None else now
+        if not self._first_event:
+            self._first_event = now
+        self._last_event = now
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.refresh or self.removed or self.overflowed)
+
+    def due(self, now: float) -> bool:
+        if not self.pending:
+            return False
+        return now - self._last_event >= SETTLE_S or now - self._first_event >= MAX_BATCH_DELAY_S
+
+    def _under_root(self, path: str) -> bool:
+        return any(path == r or path.startswith(r + "/") for r in self.roots)
+
+    def take(self) -> tuple[set[str], set[str], bool]:
+        """Return and clear the batch as `(refresh, gone, overflowed)`.
+
+        A removed path that exists again by now (re-created, or a worktree
+        whose admin dir was pruned) is re-indexed instead of tombstoned.
+        """
+        refresh = {p for p in self.refresh if self._under_root(p)}
+        gone = set()
+        for path in self.removed:
+            if os.path.lexists(path):
+                refresh.add(path)
+            else:
+                gone.add(path)
+        refresh = {p for p in refresh if not any(p == g or p.startswith(g + "/") for g in gone)}
+        batch = (refresh, gone, self.overflowed)
+        self.refresh, self.removed, self.overflowed = set(), set(), False
+        self._first_event = self._last_event = 0.0
+        return batch
+
+    def requeue(self, refresh: set[str], gone: set[str], now: float | None = None) -> None:
+        self.refresh |= refresh
+        self.removed |= gone
+        self._first_event = 0.0
+        self._touch(now)
+
+
+def merge_rows(cache_rows: list[str], fresh_rows: list[str], refreshed: set[str]) -> list[str]:
+    """Replace the cached session/worktree rows of `refreshed` paths with `fresh_rows`.
+
+    Fresh rows land where the first replaced row was (or ahead of the dir
+    rows), keeping repo groups together until the ordered snapshot re-sorts.
+    A dir row for a path that is now listed as a worktree or session is
+    dropped, as a full scan would.
+    """
+    fresh_paths = set()
+    for line in fresh_rows:
+        parts = line.split("\t", 3)
+        if len(parts) >= 3:
+            fresh_paths.add(parts[2])
+    out: list[str] = []
+    insert_at = None
+    first_dir = None
+    for line in cache_rows:
+        parts = line.split("\t", 3)
+        if len(parts) >= 3:
+            kind, path = parts[1], parts[2]
+            if (kind in ("session", "worktree") and path in refreshed) or (kind == "dir" and path in fresh_paths):
+                if insert_at is None:
+                    insert_at = len(out)
+                continue
+            if kind == "dir" and first_dir is None:
+                first_dir = len(out)
+        out.append(line)
+    if insert_at is None:
+        insert_at = first_dir if first_dir is not None else len(out)
+    out[insert_at:insert_at] = fresh_rows
+    return out
+
+
+class CachePublisher:
+    """Apply a batch to the item cache under `index_update.sh`'s lock."""
+
+    def __init__(self, cache_dir: Path, index_cmd: list[str], mutation_ttl: int = 300):
+        self.cache_dir = cache_dir
+        self.cache_file = cache_dir / "pick_session_items.tsv"
+        self.pending_file = cache_dir / "pick_session_pending.tsv"
+        self.mutation_file = cache_dir / "pick_session_mutations.tsv"
+        self.error_log = cache_dir / "pick_session_index_error.log"
+        self.lock_dir = cache_dir / "pick_session_items.tsv.lock"
+        self.index_cmd = index_cmd
+        self.mutation_ttl = mutation_ttl
+        self.publish_filter = Path(__file__).resolve().with_name("publish_cache_filter.py")
+
+    def acquire(self) -> bool:
+        pid_file = self.lock_dir / "pid"
+        for _ in range(2):
+            try:
+                self.lock_dir.mkdir()
+            except FileExistsError:
+                try:
+                    pid = int(pid_file.read_text().strip())
+                except (OSError, ValueError):
+                    pid = 0
+                if pid:
+                    try:
+                        os.kill(pid, 0)
+                        return False
+                    except ProcessLookupError:
+                        pass
+                    except PermissionError:
+                        return False
+                else:
+                    try:
+                        age = time.time() - self.lock_dir.stat().st_mtime
+                    except OSError:
+                        continue
+                    if age < LOCK_STALE_S:
+                        return False
+                try:
+                    pid_file.unlink(missing_ok=True)
+                    self.lock_dir.rmdir()
+                except OSError:
+                    return False
+                continue
+            pid_file.write_text(f"{os.getpid()}\n")
+            return True
+        return False
+
+    def release(self) -> None:
+        pid_file = self.lock_dir / "pid"
+        try:
+            if pid_file.read_text().strip() != str(os.getpid()):
+                return
+            pid_file.unlink()
+            self.lock_dir.rmdir()
+        except OSError:
+            pass
+
+    def apply_in_child(self, refresh: set[str], gone: set[str]) -> int:
+        """Fork, take the lock as the child, and apply; return the child's exit code.
+
+        0 means applied, `LOCK_BUSY_EXIT` that the lock was busy, and anything
+        else (`APPLY_FAILED_EXIT` or a killed child) that the batch may be
+        half-applied: tombstones written, refreshed rows lost.
+        """
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                if not self.acquire():
+                    code = LOCK_BUSY_EXIT
+                else:
+                    try:
+                        self.apply(refresh, gone)
+                    finally:
+                        self.release()
+            except BaseException:
+                code = APPLY_FAILED_EXIT
+                self._log_error("apply failed", traceback.format_exc())
+            os._exit(code)
+        _pid, status = os.waitpid(pid, 0)
+        return os.waitstatus_to_exitcode(status)
+
+    def apply(self, refresh: set[str], gone: set[str]) -> None:
+        if gone:
+            now = int(time.time())
+            with open(self.mutation_file, "a", encoding="utf-8") as f:
+                for path in sorted(gone):
+                    f.write(f"{now}\tPATH_PREFIX\t{path}\n")
+        fresh_rows: list[str] = []
+        if refresh:
+            indexed = self._index(refresh)
+            if indexed is None:
+                refresh = set()
+            else:
+                fresh_rows = indexed
+        try:
+            with open(self.cache_file, "r", encoding="utf-8", errors="ignore") as f:
+                cache_rows = f.read().splitlines()
+        except FileNotFoundError:
+            cache_rows = []
+        self._publish(merge_rows(cache_rows, fresh_rows, refresh))
+
+    def _index(self, refresh: set[str]) -> list[str] | None:
+        fd, paths_file = tempfile.mkstemp(prefix="pick_session_watch.", suffix=".paths")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.writelines(p + "\n" for p in sorted(refresh))
+            proc = subprocess.run(
+                [*self.index_cmd, f"--paths-from={paths_file}"],
+                check=False,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+        finally:
+            os.unlink(paths_file)
+        if proc.returncode != 0:
+            last = (proc.stderr or "").strip().splitlines()[-1:] or [f"exit {proc.returncode}"]
+            self._log_error("failed", last[0])
+            return None
+        return [line for line in proc.stdout.splitlines() if line.count("\t") >= 4]
+
+    def _log_error(self, what: str, detail: str) -> None:
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            with open(self.error_log, "a", encoding="utf-8") as f:
+                f.write(f"{stamp} [{os.getpid()}] pick_session index watch {what}: {detail.rstrip()}\n")
+        except OSError:
+            pass
+
+    def _publish(self, rows: list[str]) -> None:
+        fd, src = tempfile.mkstemp(dir=self.cache_dir, prefix=".pick_session_items.watch.", suffix=".tsv")
+        out = src + ".out"
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.writelines(line + "\n" for line in rows)
+            if self.pending_file.exists() or self.mutation_file.exists():
+                env = dict(
+                    os.environ,
+                    CACHE_FILE=src,
+                    PENDING_FILE=str(self.pending_file),
+                    MUTATIONS_FILE=str(self.mutation_file),
+                    MUTATION_TTL=str(self.mutation_ttl),
+                    CACHE_OUT=out,
+                )
+                subprocess.run([sys.executable, str(self.publish_filter)], check=True, env=env)
+            else:
+                os.replace(src, out)
+            try:
+                unchanged = Path(out).read_bytes() == self.cache_file.read_bytes()
+            except FileNotFoundError:
+                unchanged = False
+            if not unchanged:
+                os.replace(out, self.cache_file)
+        finally:
+            for leftover in (src, out):
+                try:
+                    os.unlink(leftover)
+                except FileNotFoundError:
+                    pass
+
+
+def hold_watch_stamp(stamp: Path, covered: bool) -> None:
+    """Refresh the coverage stamp `index_update.sh` checks; drop it once coverage is lost."""
+    try:
+        if covered:
+            stamp.touch()
+        else:
+            stamp.unlink()
+    except OSError:
+        pass
+
+
+def tmux_server_alive() -> bool:
+    socket_path = os.environ.get("TMUX", "").split(",", 1)[0]
+    return not socket_path or os.path.exists(socket_path)
+
+
+def spawn(cmd: list[str]) -> None:
+    if os.access(cmd[0], os.X_OK):
+        subprocess.Popen(
+            cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scan-roots", default="")
+    ap.add_argument("--scan-depth", type=int, default=6)
+    ap.add_argument("--ignore-file", default="")
+    ap.add_argument("--mutation-ttl", type=int, default=300)
+    ap.add_argument("--heartbeat", type=float, default=HEARTBEAT_S)
+    args = ap.parse_args(argv)
+    if not sys.platform.startswith("linux"):
+        return 0
+
+    cache_dir = dir_snapshot.store_path().parent
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    lock = open(cache_dir / "pick_session_index_watch.lock", "a+")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return 0
+    lock.truncate(0)
+    lock.write(f"{os.getpid()}\n")
+    lock.flush()
+
+    try:
+        inotify = Inotify()
+    except (OSError, AttributeError):
+        return 0
+
+    scripts = Path(os.path.expanduser("~/.config/tmux/scripts/pickers/session"))
+    index_update = str(scripts / "index_update.sh")
+    ordered_update = str(scripts / "ordered_cache_update.sh")
+    watch_stamp = cache_dir / "pick_session_index_watch.stamp"
+    # A stamp left by an earlier watcher must not vouch for this one's
+    # coverage before its first heartbeat.
+    hold_watch_stamp(watch_stamp, False)
+    # Mirror index_main's root list: configured roots plus $HOME.
+    roots = []
+    for raw in [*args.scan_roots.split(","), "~"]:
+        root = os.path.realpath(os.path.expanduser(raw.strip())) if raw.strip() else ""
+        if root and os.path.isdir(root) and root not in roots:
+            roots.append(root)
+    excluded = dir_snapshot.exclude_matcher(dir_snapshot.read_exclude_file(args.ignore_file))
+    watcher = IndexWatcher(inotify, roots, args.scan_depth, excluded)
+    publisher = CachePublisher(cache_dir, [str(scripts / "index.sh")], args.mutation_ttl)
+    watcher.watch_roots()
+    # One TTL-gated full pass covers whatever changed while nothing was watching.
+    spawn([index_update, "--quiet"])
+
+    next_beat = time.monotonic() + args.heartbeat
+    try:
+        while True:
+            now = time.monotonic()
+            timeout = SETTLE_S if watcher.pending else max(0.0, next_beat - now)
+            readable, _, _ = select.select([inotify.fd], [], [], timeout)
+            if readable:
+                for wd, mask, name in inotify.read():
+                    watcher.handle(wd, mask, name)
+            now = time.monotonic()
+            if watcher.due(now):
+                refresh, gone, overflowed = watcher.take()
+                if overflowed:
+                    watcher.rewatch()
+                    spawn([index_update, "--force", "--quiet"])
+                else:
+                    code = publisher.apply_in_child(refresh, gone)
+                    if code == 0:
+                        spawn([ordered_update, "--quiet"])
+                    elif code == LOCK_BUSY_EXIT:
+                        watcher.requeue(refresh, gone, now)
+                    else:
+                        # A failed apply may have tombstoned paths without
+                        # publishing their rows; stop vouching for the cache
+                        # and let a walking full scan rebuild it.
+                        hold_watch_stamp(watch_stamp, False)
+                        spawn([index_update, "--force", "--quiet"])
+            if now >= next_beat:
+                if not tmux_server_alive():
+                    return 0
+                # Full coverage makes the periodic worktree walk redundant.
+                hold_watch_stamp(watch_stamp, not watcher.exhausted)
+                next_beat = now + args.heartbeat
+    finally:
+        hold_watch_stamp(watch_stamp, False)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,10 +17,21 @@ extension.
 
 from __future__ import annotations
 
+# ruff: noqa: E402
+# The resident-host shim runs before this script's own imports.
+if __name__ == "__main__":
+    try:
+        import hook_host
+    except ImportError:
+        pass
+    else:
+        hook_host.forward("perturn_recall")
+
 import json
 import os
 import shutil
 import subprocess
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -132,12 +143,54 @@ def search_timeout(profile: RecallProfile) -> float:
     return float(profile.timeout)
 
 
+def resident_search(workspace: Path, query: str, profile: RecallProfile) -> list | None:
+    """Search through the resident ai-kb worker when one is already running.
+
+    Skips the `,ai-kb` interpreter start and the per-query vec_runner spawn.
+    Returns None when no worker serves this KB (the caller falls back to the
+    CLI); a worker that accepted the query but failed returns [] so a slow
+    turn never pays for the same search twice.
+    """
+    lib = Path.home() / "lib/,ai-kb"
+    if not (lib / "kb_client.py").is_file():
+        return None
+    try:
+        if str(lib) not in sys.path:
+            sys.path.insert(0, str(lib))
+        import kb_client
+
+        response = kb_client.call(
+            kb_client.RuntimeSpec(),
+            "search",
+            {
+                "query": query,
+                "limit": profile.fetch,
+                "mode": "hybrid",
+                "workspace": str(workspace),
+                "workspace_gate": True,
+                "connect_only": True,
+            },
+            timeout=search_timeout(profile),
+        )
+    except Exception:
+        return None
+    if response is None:
+        return None
+    rows = response.get("rows") if response.get("ok") is True else []
+    return rows if isinstance(rows, list) else []
+
+
 def search_capsules(workspace: Path, query: str, profile: RecallProfile) -> list:
     if not profile.enabled:
         return []
-    aikb = shutil.which(",ai-kb")
     flat = collapse(query, profile.query_chars)
-    if not aikb or not flat:
+    if not flat:
+        return []
+    rows = resident_search(workspace, flat, profile)
+    if rows is not None:
+        return apply_hybrid_floor(rows)
+    aikb = shutil.which(",ai-kb")
+    if not aikb:
         return []
     try:
         result = subprocess.run(
@@ -21,6 +21,16 @@ is the tell). Unknown payloads, unmatched commands, and every parse failure are
 
 from __future__ import annotations
 
+# ruff: noqa: E402
+# The resident-host shim runs before this script's own imports.
+if __name__ == "__main__":
+    try:
+        import hook_host
+    except ImportError:
+        pass
+    else:
+        hook_host.forward("premise_nudge")
+
 import json
 import os
 import re
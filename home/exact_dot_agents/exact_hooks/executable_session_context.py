@@ -3,6 +3,16 @@
 
 from __future__ import annotations
 
+# ruff: noqa: E402
+# The resident-host shim runs before this script's own imports.
+if __name__ == "__main__":
+    try:
+        import hook_host
+    except ImportError:
+        pass
+    else:
+        hook_host.forward("session_context")
+
 import json
 import os
 import shutil
@@ -31,8 +41,10 @@ MAX_WORKLOG_LINES = 12
 DISABLE_CONTEXT_ENV = "AGENT_HOOK_CONTEXT"
 DISABLE_CONTEXT_VALUES = {"0", "false", "no", "off", "disabled"}
 AI_EMBED_WARM_ENV = "AI_EMBED_WARM"
+HOOK_HOST_ENV = "AGENT_HOOK_HOST"
 TRUE_VALUES = {"1", "true", "yes", "on"}
 EMBED_WARM_TIMEOUT_SECONDS = 4
+KB_WARM_TIMEOUT_SECONDS = 3
 
 # Reconcile GitHub identity so PR-discovery / authorship checks below are anchored to
 # the verified `gh` principal, not assumed from `git config user.email`. Failed commands
@@ -79,25 +91,43 @@ NO_PERTURN_RECALL_NOTICE = (
 
 
 def warm_resident_embedder(payload: dict) -> None:
-    """Bounded, fail-open warmup for adapters that also invoke per-turn recall."""
+    """Bounded, fail-open embedder + KB worker warmup for adapters with per-turn recall."""
     if agent_depth() == "fast":
         return
     if not per_turn_recall_requested(payload):
         return
-    client = Path.home() / "lib/,ai-kb/embed_client.py"
-    if not client.is_file():
+    # Embedder first: the resident KB worker reuses it connect-only and
+    # never loads a model itself.
+    for name, timeout in (("embed_client.py", EMBED_WARM_TIMEOUT_SECONDS), ("kb_client.py", KB_WARM_TIMEOUT_SECONDS)):
+        client = Path.home() / "lib/,ai-kb" / name
+        if not client.is_file():
+            continue
+        try:
+            subprocess.run(
+                [sys.executable, str(client), "ensure", "--timeout", str(timeout)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
+                timeout=timeout + 1,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+
+def warm_hook_host() -> None:
+    """Start the resident hook host in the background when `AGENT_HOOK_HOST=1`.
+
+    Never waits: this session's later hooks use the host once it listens,
+    and every hook runs directly until then.
+    """
+    if os.environ.get(HOOK_HOST_ENV, "").strip().lower() not in TRUE_VALUES:
         return
     try:
-        subprocess.run(
-            [sys.executable, str(client), "ensure", "--timeout", str(EMBED_WARM_TIMEOUT_SECONDS)],
-            stdin=subprocess.DEVNULL,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=False,
-            timeout=EMBED_WARM_TIMEOUT_SECONDS + 1,
-        )
-    except (OSError, subprocess.TimeoutExpired):
-        pass
+        import hook_host
+    except ImportError:
+        return
+    hook_host.start()
 
 
 def per_turn_recall_requested(payload: dict) -> bool:
@@ -502,6 +532,7 @@ def main() -> None:
             print(f"[agent-worklog] session-start flush failed: {err}", file=sys.stderr)
 
     warm_resident_embedder(payload)
+    warm_hook_host()
 
     parts = [
         "## Agent Hook Context",
@@ -3,6 +3,16 @@
 
 from __future__ import annotations
 
+# ruff: noqa: E402
+# The resident-host shim runs before this script's own imports.
+if __name__ == "__main__":
+    try:
+        import hook_host
+    except ImportError:
+        pass
+    else:
+        hook_host.forward("worklog_recorder")
+
 import json
 import os
 import sys
@@ -20,6 +20,7 @@ AGENT_DEPTH_ENV = "AI_AGENT_DEPTH"
 AGENT_DEPTHS = {"fast", "balanced", "deep"}
 DEFAULT_AGENT_DEPTH = "balanced"
 PARENT_SESSION_ENV = "COPILOT_AGENT_SESSION_ID"
+TAIL_READ_BLOCK = 8192
 
 
 def read_payload() -> dict[str, Any]:
@@ -271,16 +272,49 @@ def bounded_text(value: Any, limit: int = 1200) -> str:
     return text[:limit] + f"\n... truncated {len(text) - limit} chars"
 
 
+def tail_lines(path: Path, lines: int, limit: int | None = None) -> list[str]:
+    """Mirrors agent_memory.py's tail_lines — change both together.
+
+    Returns the last `lines` lines of `path` (split like `str.splitlines()` on
+    the whole file) by seeking backward from EOF, so the cost follows the tail
+    rather than the worklog's age. With `limit`, reading also stops once the
+    complete lines already buffered exceed `limit` characters, since a caller
+    bounded by that budget could not use anything older. Raises OSError.
+    """
+    with path.open("rb") as handle:
+        offset = handle.seek(0, os.SEEK_END)
+        buffer = b""
+        while True:
+            if offset:
+                # Double the read each round so a huge final line stays linear.
+                size = min(offset, max(TAIL_READ_BLOCK, len(buffer)))
+                offset -= size
+                handle.seek(offset)
+                buffer = handle.read(size) + buffer
+            complete = buffer
+            if offset:
+                # Not at BOF yet, so the first buffered line may be partial.
+                newline = buffer.find(b"\n")
+                complete = buffer[newline + 1 :] if newline >= 0 else b""
+                if complete.count(b"\n") < lines and (limit is None or _tail_chars(complete) <= limit):
+                    continue
+            return complete.decode("utf-8", errors="replace").splitlines()[-lines:]
+
+
+def _tail_chars(data: bytes) -> int:
+    return sum(len(line) + 1 for line in data.decode("utf-8", errors="replace").splitlines())
+
+
 def transcript_tail(path: Path, lines: int = 20, limit: int = 4000) -> str:
     try:
-        content = path.read_text(encoding="utf-8", errors="replace").splitlines()
+        content = tail_lines(path, lines)
     except OSError:
         return ""
 
     selected: list[str] = []
     selected_chars = 0
     omitted = 0
-    for line in reversed(content[-lines:]):
+    for line in reversed(content):
         line_len = len(line) + (1 if selected else 0)
         if selected and selected_chars + line_len > limit:
             omitted += 1
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""Optional per-user resident host that runs hook handlers without a cold start.
+
+Every hook event otherwise starts a fresh `python3`, imports `hook_common`
+and its stdlib dependencies, and only then does a few milliseconds of work.
+`serve` keeps one interpreter warm with those modules loaded and the handler
+scripts compiled, listening on a private Unix socket, and exits after
+`AGENT_HOOK_HOST_IDLE_SECONDS` without a request.
+
+Each handler script calls `forward()` before its own imports. The shim only
+touches `_socket` and `os`: it passes the hook's stdin/stdout/stderr file
+descriptors, environment and cwd to the host and exits with the handler's
+status. The host forks one child per event, so handlers keep their
+process-per-event semantics (environment, cwd, module globals, `sys.exit`,
+concurrency) and only skip interpreter startup. With no live host, with
+`AGENT_HOOK_HOST=0`, or when the host refuses (another hooks directory, or
+hook files changed since it started), `forward()` returns and the script
+runs directly as before.
+
+`session_context.py` starts the host when `AGENT_HOOK_HOST=1`;
+`hook_host.py start|status|stop` manage it by hand.
+"""
+
+from __future__ import annotations
+
+import _socket
+import os
+import stat
+import sys
+
+HOST_ENV = "AGENT_HOOK_HOST"
+RUNTIME_DIR_ENV = "AGENT_HOOK_HOST_RUNTIME_DIR"
+IDLE_SECONDS_ENV = "AGENT_HOOK_HOST_IDLE_SECONDS"
+DEFAULT_IDLE_SECONDS = 900.0
+CONNECT_TIMEOUT_SECONDS = 0.1
+REQUEST_TIMEOUT_SECONDS = 2.0
+ACCEPT_POLL_SECONDS = 0.5
+MAX_HEADER_BYTES = 1024 * 1024
+MAX_SOCKET_PATH_BYTES = 100
+SOCKET_NAME = "hook-host.sock"
+LOCK_NAME = "hook-host.lock"
+PROTOCOL = b"agent-hook-host/1"
+ACCEPTED = b"+"
+REFUSED = b"-"
+HANDLERS = ("session_context", "perturn_recall", "premise_nudge", "band_gate", "worklog_recorder")
+FALSE_VALUES = {"0", "false", "no", "off"}
+
+# True inside a forked handler child, where `forward()` must run inline.
+_serving = False
+
+
+def hooks_dir() -> str:
+    return os.path.dirname(os.path.realpath(__file__))
+
+
+def runtime_dir() -> str:
+    override = os.environ.get(RUNTIME_DIR_ENV)
+    if override:
+        return os.path.expanduser(override)
+    runtime_home = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_home:
+        return os.path.join(runtime_home, "agent-hooks")
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "agent-hooks-runtime")
+
+
+def _owned(path: str, kind: int) -> bool:
+    """`path` is a `kind` entry owned by this user and closed to everyone else."""
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_IFMT(info.st_mode) == kind and info.st_uid == os.getuid() and not info.st_mode & 0o077
+
+
+def forward(handler: str) -> None:
+    """Run the calling hook in the resident host, or return to run it directly.
+
+    Returns only when no usable host accepted the event. Once the host has
+    accepted it (and with it this process's stdin), this process exits with
+    the handler's status instead of returning.
+    """
+    if _serving or os.environ.get(HOST_ENV, "").strip().lower() in FALSE_VALUES:
+        return
+    directory = runtime_dir()
+    path = os.path.join(directory, SOCKET_NAME)
+    if not _owned(directory, stat.S_IFDIR) or not _owned(path, stat.S_IFSOCK):
+        return
+    accepted = False
+    reply = b""
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT_SECONDS)
+        sock.connect(path)
+        fields = [PROTOCOL, os.fsencode(hooks_dir()), handler.encode(), os.fsencode(os.getcwd())]
+        fields.extend(key + b"=" + value for key, value in os.environb.items())
+        fds = b"".join(fd.to_bytes(4, sys.byteorder) for fd in (0, 1, 2))
+        sock.sendmsg([b"\0".join(fields) + b"\0\0"], [(_socket.SOL_SOCKET, _socket.SCM_RIGHTS, fds)])
+        accepted = sock.recv(1) == ACCEPTED
+        if accepted:
+            # The harness owns the hook timeout; wait as long as the handler runs.
+            sock.settimeout(None)
+            while not reply.endswith(b"\n"):
+                chunk = sock.recv(16)
+                if not chunk:
+                    break
+                reply += chunk
+    except OSError:
+        pass
+    finally:
+        sock.close()
+    if not accepted:
+        return
+    try:
+        status = int(reply)
+    except ValueError:
+        os.write(2, b"[agent-hook-host] handler exited without a status\n")
+        status = 1
+    os._exit(status)
+
+
+def handler_path(directory: str, handler: str) -> str | None:
+    """The handler script: `<name>.py` once deployed, `executable_<name>.py` in the repo."""
+    if handler not in HANDLERS:
+        return None
+    for name in (f"{handler}.py", f"executable_{handler}.py"):
+        candidate = os.path.join(directory, name)
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _fingerprint(directory: str) -> tuple:
+    entries = []
+    with os.scandir(directory) as listing:
+        for entry in listing:
+            if entry.name.endswith(".py"):
+                info = entry.stat()
+                entries.append((entry.name, info.st_ino, info.st_size, info.st_mtime_ns))
+    return tuple(sorted(entries))
+
+
+def _preload(directory: str) -> dict[str, object]:
+    """Compile every handler and import what it imports, once per host.
+
+    Handlers are executed as non-`__main__` modules, which loads
+    `hook_common` and the stdlib into `sys.modules`. Import failures are
+    ignored: each child re-runs its handler from scratch and fails exactly
+    as a direct run would.
+    """
+    import types
+
+    scripts: dict[str, object] = {}
+    for handler in HANDLERS:
+        path = handler_path(directory, handler)
+        if path is None:
+            continue
+        try:
+            with open(path, encoding="utf-8") as stream:
+                code = compile(stream.read(), path, "exec", dont_inherit=True)
+        except (OSError, SyntaxError, ValueError):
+            continue
+        scripts[path] = code
+        module = types.ModuleType(f"_hook_host_preload_{handler}")
+        module.__file__ = path
+        sys.modules[module.__name__] = module
+        try:
+            exec(code, module.__dict__)
+        except Exception:
+            pass
+        finally:
+            del sys.modules[module.__name__]
+    try:
+        import worklog_queue  # noqa: F401
+    except ImportError:
+        pass
+    return scripts
+
+
+def _run_script(path: str, code: object, directory: str) -> int:
+    """Execute one handler as `__main__` against fresh hook modules; return its status."""
+    import types
+
+    # Hook modules read the environment at import time (`SPEC_ROOT`, ...),
+    # so the child drops them and lets the handler re-import them; their
+    # stdlib dependencies stay resident.
+    for name, module in list(sys.modules.items()):
+        origin = getattr(module, "__file__", None)
+        if name not in ("__main__", "hook_host") and origin and os.path.dirname(os.path.realpath(origin)) == directory:
+            del sys.modules[name]
+    for entry in reversed(os.environ.get("PYTHONPATH", "").split(os.pathsep)):
+        if entry and entry not in sys.path:
+            sys.path.insert(1, entry)
+    sys.argv = [path]
+    module = types.ModuleType("__main__")
+    module.__file__ = path
+    sys.modules["__main__"] = module
+    try:
+        exec(code, module.__dict__)
+    except SystemExit as exit_:
+        if exit_.code is None:
+            return 0
+        if isinstance(exit_.code, int):
+            return exit_.code
+        print(exit_.code, file=sys.stderr)
+        return 1
+    return 0
+
+
+def _run_child(conn, fds: list[int], path: str, code: object, directory: str, cwd: bytes, environ: list[bytes]):
+    """Forked child: adopt the client's stdio, environment and cwd, run, report."""
+    import io
+    import signal
+    import traceback
+
+    global _serving
+    _serving = True
+    status = 1
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        conn.sendall(ACCEPTED)
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+        for fd in fds:
+            if fd > 2:
+                os.close(fd)
+        os.environ.clear()
+        for item in environ:
+            key, _, value = item.partition(b"=")
+            if key:
+                os.environb[key] = value
+        os.chdir(cwd)
+        sys.stdin = io.TextIOWrapper(io.FileIO(0, "r", closefd=False), encoding="utf-8")
+        sys.stdout = io.TextIOWrapper(io.FileIO(1, "w", closefd=False), encoding="utf-8")
+        sys.stderr = io.TextIOWrapper(
+            io.FileIO(2, "w", closefd=False), encoding="utf-8", errors="backslashreplace", line_buffering=True
+        )
+        status = _run_script(path, code, directory)
+    except BaseException:
+        try:
+            traceback.print_exc()
+        except Exception:
+            pass
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        try:
+            conn.sendall(f"{status}\n".encode())
+        except OSError:
+            pass
+        os._exit(0)
+
+
+def _receive_request(conn) -> tuple[list[bytes] | None, list[int]]:
+    """Read one request header and the three stdio descriptors sent with it."""
+    import array
+    import socket
+
+    fds = array.array("i")
+    data, ancdata, _, _ = conn.recvmsg(64 * 1024, socket.CMSG_SPACE(3 * fds.itemsize))
+    for level, kind, payload in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(payload[: len(payload) - len(payload) % fds.itemsize])
+    header = bytearray(data)
+    while not header.endswith(b"\0\0") and len(header) < MAX_HEADER_BYTES:
+        try:
+            chunk = conn.recv(64 * 1024)
+        except OSError:
+            chunk = b""
+        if not chunk:
+            return None, list(fds)
+        header += chunk
+    if not header.endswith(b"\0\0"):
+        return None, list(fds)
+    return bytes(header[:-2]).split(b"\0"), list(fds)
+
+
+def _private_runtime_dir(directory: str) -> None:
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise RuntimeError(f"hook host runtime directory is not owned by this user: {directory}")
+    if stat.S_IMODE(info.st_mode) != 0o700:
+        os.chmod(directory, 0o700)
+
+
+def serve(idle_seconds: float) -> int:
+    import fcntl
+    import signal
+    import socket
+    import time
+
+    directory = hooks_dir()
+    runtime = runtime_dir()
+    path = os.path.join(runtime, SOCKET_NAME)
+    _private_runtime_dir(runtime)
+    if len(os.fsencode(path)) > MAX_SOCKET_PATH_BYTES:
+        return 2
+    lock_fd = os.open(os.path.join(runtime, LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(lock_fd)
+        return 0
+    os.ftruncate(lock_fd, 0)
+    os.write(lock_fd, f"{os.getpid()}\n".encode())
+
+    # Handlers `import hook_host`; inside a child that must be this module.
+    sys.modules.setdefault("hook_host", sys.modules[__name__])
+    scripts = _preload(directory)
+    fingerprint = _fingerprint(directory)
+
+    def stop(*_: object) -> None:
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    os.umask(0o077)
+    if os.path.lexists(path):
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        listener.bind(path)
+        os.chmod(path, 0o600)
+        listener.listen(64)
+        listener.settimeout(ACCEPT_POLL_SECONDS)
+        last_active = time.monotonic()
+        while time.monotonic() - last_active < idle_seconds:
+            try:
+                conn, _ = listener.accept()
+            except socket.timeout:
+                continue
+            last_active = time.monotonic()
+            with conn:
+                conn.settimeout(REQUEST_TIMEOUT_SECONDS)
+                try:
+                    fields, fds = _receive_request(conn)
+                except OSError:
+                    continue
+                try:
+                    current = _fingerprint(directory) == fingerprint
+                    script = None
+                    if fields and len(fields) >= 4 and fields[0] == PROTOCOL and len(fds) == 3:
+                        if os.fsdecode(fields[1]) == directory:
+                            script = handler_path(directory, fields[2].decode("utf-8", "replace"))
+                    if not current or script is None or script not in scripts:
+                        conn.sendall(REFUSED)
+                        if not current:
+                            # Hook files changed under us: retire so the next
+                            # session start brings up a host on the new code.
+                            break
+                        continue
+                    if os.fork() == 0:
+                        listener.close()
+                        os.close(lock_fd)
+                        _run_child(conn, fds, script, scripts[script], directory, fields[3], fields[4:])
+                except OSError:
+                    try:
+                        conn.sendall(REFUSED)
+                    except OSError:
+                        pass
+                finally:
+                    for fd in fds:
+                        os.close(fd)
+    finally:
+        listener.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        os.close(lock_fd)
+    return 0
+
+
+def running_pid() -> int | None:
+    """PID of the live host for this user, judged by its lifetime lock."""
+    import fcntl
+
+    try:
+        fd = os.open(os.path.join(runtime_dir(), LOCK_NAME), os.O_RDWR)
+    except OSError:
+        return None
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        try:
+            return int(os.pread(fd, 32, 0).split()[0])
+        except (IndexError, ValueError):
+            return None
+    finally:
+        os.close(fd)
+    return None
+
+
+def start(idle_seconds: float | None = None) -> int | None:
+    """Spawn a detached host unless one is running; never waits for it."""
+    import subprocess
+
+    pid = running_pid()
+    if pid is not None:
+        return pid
+    if idle_seconds is None:
+        try:
+            idle_seconds = float(os.environ.get(IDLE_SECONDS_ENV, DEFAULT_IDLE_SECONDS))
+        except ValueError:
+            idle_seconds = DEFAULT_IDLE_SECONDS
+    try:
+        process = subprocess.Popen(
+            [sys.executable, os.path.realpath(__file__), "serve", "--idle-seconds", str(idle_seconds)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+            close_fds=True,
+        )
+    except OSError:
+        return None
+    return process.pid
+
+
+def stop() -> bool:
+    import signal
+
+    pid = running_pid()
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except OSError:
+        return False
+    return True
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Manage the resident agent hook host")
+    parser.add_argument("command", choices=("serve", "start", "status", "stop"))
+    parser.add_argument("--idle-seconds", type=float, default=None)
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        idle_seconds = args.idle_seconds if args.idle_seconds is not None else DEFAULT_IDLE_SECONDS
+        return serve(idle_seconds) if idle_seconds > 0 else 2
+    if args.command == "start":
+        pid = start(args.idle_seconds)
+    elif args.command == "stop":
+        pid = running_pid()
+        stop()
+    else:
+        pid = running_pid()
+    print(json.dumps({"running": pid is not None, "pid": pid, "socket": os.path.join(runtime_dir(), SOCKET_NAME)}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
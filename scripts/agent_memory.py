@@ -32,6 +32,7 @@ TOPIC_SUFFIXES = (
 )
 SELECT_CONTEXT_WORKLOG_LINES = 12
 SELECT_CONTEXT_WORKLOG_CHARS = 3000
+TAIL_READ_BLOCK = 8192
 # Mirrors MAX_SPEC_CHARS + REVIEW_CONCLUSION_HEADINGS in
 # home/exact_dot_agents/exact_hooks/executable_session_context.py — change both
 # together. `,agent-memory select` is a second clean-room entrypoint (agent_memory.py
@@ -127,11 +128,44 @@ def topic_files(spec_dir: Path, topic: str) -> list[Path]:
     return [spec_dir / f"{topic}{suffix}" for suffix in TOPIC_SUFFIXES]
 
 
+def tail_lines(path: Path, lines: int, limit: int | None = None) -> list[str]:
+    """Mirrors hook_common.py's tail_lines — change both together.
+
+    Returns the last `lines` lines of `path` (split like `str.splitlines()` on
+    the whole file) by seeking backward from EOF, so the cost follows the tail
+    rather than the worklog's age. With `limit`, reading also stops once the
+    complete lines already buffered exceed `limit` characters, since a caller
+    bounded by that budget could not use anything older. Raises OSError.
+    """
+    with path.open("rb") as handle:
+        offset = handle.seek(0, os.SEEK_END)
+        buffer = b""
+        while True:
+            if offset:
+                # Double the read each round so a huge final line stays linear.
+                size = min(offset, max(TAIL_READ_BLOCK, len(buffer)))
+                offset -= size
+                handle.seek(offset)
+                buffer = handle.read(size) + buffer
+            complete = buffer
+            if offset:
+                # Not at BOF yet, so the first buffered line may be partial.
+                newline = buffer.find(b"\n")
+                complete = buffer[newline + 1 :] if newline >= 0 else b""
+                if complete.count(b"\n") < lines and (limit is None or _tail_chars(complete) <= limit):
+                    continue
+            return complete.decode("utf-8", errors="replace").splitlines()[-lines:]
+
+
+def _tail_chars(data: bytes) -> int:
+    return sum(len(line) + 1 for line in data.decode("utf-8", errors="replace").splitlines())
+
+
 def transcript_tail(
     path: Path, lines: int = SELECT_CONTEXT_WORKLOG_LINES, limit: int = SELECT_CONTEXT_WORKLOG_CHARS
 ) -> str:
     try:
-        raw_lines = path.read_text(errors="replace").splitlines()
+        raw_lines = tail_lines(path, lines, limit)
     except OSError:
         return ""
 
@@ -37,11 +37,18 @@ import hashlib
 import json
 import os
 import re
+import select
 import shlex
 import shutil
 import sqlite3
 import subprocess
 import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
@@ -95,6 +102,34 @@ DECAY_RECENT_DAYS = 14
 # capsule is at or above this value (mirrors the `curate` dedupe
 # threshold) unless --force or --supersedes covers the collision.
 DUPLICATE_COSINE_THRESHOLD = 0.95
+# The duplicate probe asks the vector index for this many nearest
+# neighbours; a window saturated with above-threshold hits falls back to
+# the exhaustive scan.
+DUPLICATE_PROBE_K = 32
+
+# `ingest` embeds changed chunks this many at a time (one runner spawn per
+# batch) and commits each batch's capsules plus doc_ingests rows together.
+INGEST_EMBED_BATCH = 64
+
+# `capsule_changes` keeps at most this many rows. Only `vec_runner.py`
+# prunes applied rows, so without the cap a host that never runs it would
+# grow the journal forever; a consumer whose cursor fell behind the cap
+# sees the gap and resyncs from scratch.
+CHANGE_JOURNAL_LIMIT = 10_000
+
+# Query vectors are cached next to kb.sqlite3 (see query_cache.py) so a
+# repeated prompt skips the embedder. `AI_KB_QUERY_CACHE=0` disables it;
+# `AI_KB_QUERY_CACHE_SIZE` overrides the LRU capacity.
+QUERY_CACHE_FILENAME = "query_cache.sqlite3"
+
+# `search()` appends one line per call (`<utc>\t<id>\t<id>...`) to this
+# spool next to kb.sqlite3 instead of writing the capsules table, so a
+# search stays a pure database read. `fold_retrievals()` applies the
+# buffered events in bulk; `curate` runs it first and the resident KB
+# worker runs it on an idle timer. Searches outside a quiet worker fold it
+# once it reaches RETRIEVAL_LOG_FOLD_BYTES, so the spool stays bounded.
+RETRIEVAL_LOG_FILENAME = "retrieval.log"
+RETRIEVAL_LOG_FOLD_BYTES = 256 * 1024
 
 # --- Worklog harvest -------------------------------------------------------
 # `,ai-kb harvest` mines a hook worklog for durable-memory CANDIDATES; it
@@ -152,6 +187,25 @@ def csv_join(values: list[str]) -> str:
     return ",".join(seen)
 
 
+def _split_domain_tags_sql(id_expr: str, csv_expr: str, source: str | None = None) -> str:
+    """`SELECT tag, capsule_id` splitting a `domain_tags` CSV into trimmed, lower-cased tags.
+
+    A recursive CTE because trigger bodies have no table-valued split;
+    `source` names the table the expressions range over (none inside a
+    trigger, where they read NEW).
+    """
+    from_clause = f"FROM {source}" if source else ""
+    return f"""
+        WITH RECURSIVE split(capsule_id, tag, rest) AS (
+            SELECT {id_expr}, '', {csv_expr} || ',' {from_clause}
+            UNION ALL
+            SELECT capsule_id, LOWER(TRIM(substr(rest, 1, instr(rest, ',') - 1))), substr(rest, instr(rest, ',') + 1)
+            FROM split WHERE rest <> ''
+        )
+        SELECT tag, capsule_id FROM split WHERE tag <> ''
+    """
+
+
 def csv_split(value: str | None) -> list[str]:
     """Inverse of `csv_join`. Empty/None → []."""
     if not value:
@@ -268,6 +322,90 @@ class Hit:
     mmr_selected: bool
 
 
+# --- Resident vec_runner ---------------------------------------------------
+
+
+class VecRunnerPipe:
+    """One long-lived `vec_runner.py --serve` child speaking line-JSON.
+
+    Started on first use and reused for every later `knn`/`pairs` call
+    from the same KB instance, so `search()` and `curate()` pay the uv
+    resolve and vec0 load once per process instead of once per query.
+    The child exits on stdin EOF, so it never outlives its parent. Any
+    transport failure kills the child and raises RuntimeError; the next
+    call starts a fresh one.
+    """
+
+    def __init__(self, command: list[str]) -> None:
+        self.command = command
+        self._proc: subprocess.Popen | None = None
+        self._buffer = b""
+
+    @property
+    def pid(self) -> int | None:
+        return self._proc.pid if self._proc is not None and self._proc.poll() is None else None
+
+    def request(self, payload: dict, *, timeout: float) -> dict:
+        if self.pid is None:
+            self.close()
+            try:
+                self._proc = subprocess.Popen(
+                    self.command,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+            except OSError as err:
+                raise RuntimeError(f"vec_runner spawn failed: {err}") from err
+        proc = self._proc
+        deadline = time.monotonic() + timeout
+        try:
+            proc.stdin.write(json.dumps(payload).encode() + b"\n")
+            proc.stdin.flush()
+            while b"\n" not in self._buffer:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(f"vec_runner timed out after {timeout}s")
+                ready, _, _ = select.select([proc.stdout], [], [], remaining)
+                if not ready:
+                    continue
+                chunk = os.read(proc.stdout.fileno(), 65536)
+                if not chunk:
+                    raise RuntimeError(f"vec_runner exited {proc.poll()} before answering")
+                self._buffer += chunk
+        except OSError as err:
+            self.close()
+            raise RuntimeError(f"vec_runner pipe failed: {err}") from err
+        except RuntimeError:
+            self.close()
+            raise
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        try:
+            response = json.loads(line)
+        except json.JSONDecodeError as err:
+            self.close()
+            raise RuntimeError(f"vec_runner emitted unparseable stdout: {err} stdout={line!r}") from err
+        if not isinstance(response, dict):
+            self.close()
+            raise RuntimeError(f"vec_runner emitted a non-object response: {line!r}")
+        return response
+
+    def close(self) -> None:
+        proc, self._proc, self._buffer = self._proc, None, b""
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+
+
 # --- Knowledge base --------------------------------------------------------
 
 
@@ -284,7 +422,7 @@ class KnowledgeBase:
     change and trigger a re-embed pass.
     """
 
-    def __init__(self, home: Path | None = None, embedder=None) -> None:
+    def __init__(self, home: Path | None = None, embedder=None, vec_backend=None) -> None:
         self.home = home or default_home()
         self.capsules_dir = self.home / "capsules"
         self.db_path = self.home / "kb.sqlite3"
@@ -293,6 +431,19 @@ class KnowledgeBase:
         # one is injected (tests inject stubs).
         self._embedder = embedder
         self._embedder_resolved = embedder is not None
+        # Optional in-process replacement for the vec_runner spawn: a
+        # callable taking the runner request dict and returning its
+        # response dict. The resident `kb_worker.py` installs one backed
+        # by a warm vec0 connection; the CLI leaves it unset.
+        self._vec_backend = vec_backend
+        self._vec_pipe: VecRunnerPipe | None = None
+        self._query_cache = None
+        # One lazily opened connection reused by init() and search(); see
+        # `_shared_connection`. The lock serializes its users when a
+        # long-lived host shares this instance across threads.
+        self._shared_db: sqlite3.Connection | None = None
+        self._shared_lock = threading.RLock()
+        self._schema_ready = False
 
     # --- schema ------------------------------------------------------------
 
@@ -305,9 +456,13 @@ class KnowledgeBase:
         derived tables (`capsule_fts` / `kb_meta`) drift, we rebuild
         them from the current `capsules` rows without replacing the
         authoritative table.
+
+        Opening an unchanged KB is O(1): the FTS divergence scan runs only
+        when the trigger-maintained write generation has moved past the
+        last verified one (see `_schema_state`).
         """
         self.capsules_dir.mkdir(parents=True, exist_ok=True)
-        with self.connect() as db:
+        with self._shared_lock, self._shared_connection() as db:
             state = self._schema_state(db)
             if state == "capsules_stale":
                 capsules = self._load_sidecar_capsules()
@@ -318,21 +473,31 @@ class KnowledgeBase:
                 self._create_schema(db)
                 for row in rebuilt_rows:
                     self._insert_rebuilt_capsule(db, row)
+                self._stamp_mirror_verified(db)
                 return
             if state == "derived_stale":
                 db.execute("BEGIN IMMEDIATE")
                 self._repair_derived_tables(db)
                 return
-            self._create_schema(db)
+            # Idempotent DDL plus schema_version: once per instance, so a
+            # warm search's init() is read-only.
+            if not self._schema_ready:
+                self._create_schema(db)
+                self._schema_ready = True
+            if state == "missing":
+                # Both tables start empty, so the new mirror is consistent.
+                self._stamp_mirror_verified(db)
 
     def init_doc_ingest_table(self) -> None:
         """Idempotent table for tracking ingested documents.
 
         Stores the file path, sha256 of its content, when it was last
-        ingested, and the list of capsule IDs created for that file so
-        re-ingestion can replace stale chunks atomically. Created on
-        first ingest call; init() doesn't pre-create it because most
-        KBs never need it.
+        ingested, the file's mtime/size at that point (so unchanged
+        files skip without a read), and the list of capsule IDs created
+        for that file so re-ingestion can replace stale chunks
+        atomically. `ingest_checkpoints` marks a run that has not yet
+        finished for its target. Created on first ingest call; init()
+        doesn't pre-create them because most KBs never need them.
         """
         with self.connect() as db:
             db.execute(
@@ -341,7 +506,22 @@ class KnowledgeBase:
                     path TEXT PRIMARY KEY,
                     sha256 TEXT NOT NULL,
                     last_ingested_at TEXT NOT NULL,
-                    capsule_ids TEXT NOT NULL
+                    capsule_ids TEXT NOT NULL,
+                    mtime_ns INTEGER,
+                    size INTEGER
+                )
+                """
+            )
+            cols = {r[1] for r in db.execute("PRAGMA table_info(doc_ingests)").fetchall()}
+            for column in ("mtime_ns", "size"):
+                if column not in cols:
+                    db.execute(f"ALTER TABLE doc_ingests ADD COLUMN {column} INTEGER")
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+                    target TEXT PRIMARY KEY,
+                    started_at TEXT NOT NULL,
+                    files_committed INTEGER NOT NULL DEFAULT 0
                 )
                 """
             )
@@ -410,6 +590,148 @@ class KnowledgeBase:
             "INSERT OR REPLACE INTO kb_meta(key, value) VALUES('schema_version', ?)",
             (str(SCHEMA_VERSION),),
         )
+        # A fresh epoch whenever kb_meta is (re)created: journal consumers
+        # that remember another epoch must resync from scratch because the
+        # journal may have been dropped and its sequence restarted.
+        db.execute(
+            "INSERT OR IGNORE INTO kb_meta(key, value) VALUES('change_epoch', ?)",
+            (hashlib.sha256(os.urandom(16)).hexdigest()[:16],),
+        )
+        db.execute("INSERT OR IGNORE INTO kb_meta(key, value) VALUES('write_generation', '0')")
+        KnowledgeBase._create_change_journal(db)
+        KnowledgeBase._create_generation_triggers(db)
+        KnowledgeBase._create_domain_index(db)
+
+    @staticmethod
+    def _create_domain_index(db: sqlite3.Connection) -> None:
+        """Trigger-maintained `capsule_domains(capsule_id, tag)` join table.
+
+        One row per lower-cased tag in a capsule's `domain_tags` CSV, keyed
+        `(tag, capsule_id)` so a domain filter is an index lookup with exact
+        tag semantics (`js` no longer matches `json`). Like the change
+        journal, triggers keep it current on every write path, and a table
+        created over existing capsules is backfilled from them.
+        """
+        exists = db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'capsule_domains'"
+        ).fetchone()
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS capsule_domains (
+                tag TEXT NOT NULL,
+                capsule_id TEXT NOT NULL,
+                PRIMARY KEY (tag, capsule_id)
+            ) WITHOUT ROWID
+            """
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_capsule_domains_capsule ON capsule_domains(capsule_id)")
+        db.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS capsule_domains_insert AFTER INSERT ON capsules
+            BEGIN
+                INSERT OR IGNORE INTO capsule_domains(tag, capsule_id)
+                {_split_domain_tags_sql("NEW.id", "NEW.domain_tags")};
+            END
+            """
+        )
+        db.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS capsule_domains_delete AFTER DELETE ON capsules
+            BEGIN
+                DELETE FROM capsule_domains WHERE capsule_id = OLD.id;
+            END
+            """
+        )
+        db.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS capsule_domains_update AFTER UPDATE OF id, domain_tags ON capsules
+            BEGIN
+                DELETE FROM capsule_domains WHERE capsule_id = OLD.id;
+                INSERT OR IGNORE INTO capsule_domains(tag, capsule_id)
+                {_split_domain_tags_sql("NEW.id", "NEW.domain_tags")};
+            END
+            """
+        )
+        if not exists:
+            db.execute(
+                "INSERT OR IGNORE INTO capsule_domains(tag, capsule_id) "
+                + _split_domain_tags_sql("c.id", "c.domain_tags", source="capsules AS c")
+            )
+
+    @staticmethod
+    def _create_generation_triggers(db: sqlite3.Connection) -> None:
+        """Bump `kb_meta.write_generation` on every change to an FTS-mirrored column.
+
+        `init()` compares it with `mirror_verified_generation` instead of
+        diffing `capsules` against `capsule_fts` on every open. Triggers
+        cannot be attached to the FTS5 table itself, so a direct write to
+        `capsule_fts` is caught by the next generation-driven scan or by
+        `doctor`, which always runs the full check. Writers that update both
+        tables in one transaction (`remember`, `remove`, ingest batches)
+        re-stamp the new generation when the mirror was verified before
+        they ran, so ordinary writes do not re-arm the scan.
+        """
+        bump = "UPDATE kb_meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'write_generation';"
+        for name, event in (
+            ("capsule_generation_insert", "AFTER INSERT ON capsules"),
+            ("capsule_generation_delete", "AFTER DELETE ON capsules"),
+            ("capsule_generation_update", "AFTER UPDATE OF id, title, body, tags, source, domain_tags ON capsules"),
+        ):
+            db.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {bump} END")
+
+    @staticmethod
+    def _create_change_journal(db: sqlite3.Connection) -> None:
+        """Trigger-maintained journal of capsule ids whose indexed state changed.
+
+        Every write path (`remember`, `remove`, `reembed`, supersede marks,
+        rebuilds) goes through these triggers, so consumers such as
+        `vec_runner.py`'s vec_index apply only the ids logged after their
+        last-seen `seq` instead of diffing the whole table. AUTOINCREMENT
+        keeps `seq` monotonic even after a consumer prunes applied rows;
+        `sqlite_sequence` holds the high-water mark. A trigger on the
+        journal itself drops rows older than `CHANGE_JOURNAL_LIMIT`.
+        """
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS capsule_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL
+            )
+            """
+        )
+        db.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS capsule_changes_insert AFTER INSERT ON capsules
+            BEGIN
+                INSERT INTO capsule_changes(id) VALUES (NEW.id);
+            END
+            """
+        )
+        db.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS capsule_changes_delete AFTER DELETE ON capsules
+            BEGIN
+                INSERT INTO capsule_changes(id) VALUES (OLD.id);
+            END
+            """
+        )
+        db.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS capsule_changes_update
+            AFTER UPDATE OF embedding, embedding_dim, superseded_by, scope, kind, domain_tags ON capsules
+            BEGIN
+                INSERT INTO capsule_changes(id) VALUES (NEW.id);
+            END
+            """
+        )
+        db.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS capsule_changes_cap AFTER INSERT ON capsule_changes
+            BEGIN
+                DELETE FROM capsule_changes WHERE seq <= NEW.seq - {CHANGE_JOURNAL_LIMIT};
+            END
+            """
+        )
 
     @staticmethod
     def _create_capsule_indexes(db: sqlite3.Connection) -> None:
@@ -423,11 +745,27 @@ class KnowledgeBase:
         db.execute("DROP TABLE IF EXISTS capsule_fts")
         db.execute("DROP TABLE IF EXISTS capsules")
         db.execute("DROP TABLE IF EXISTS kb_meta")
+        db.execute("DROP TABLE IF EXISTS capsule_changes")
+        db.execute("DROP TABLE IF EXISTS capsule_domains")
 
     @staticmethod
     def _drop_derived_tables(db: sqlite3.Connection) -> None:
         db.execute("DROP TABLE IF EXISTS capsule_fts")
         db.execute("DROP TABLE IF EXISTS kb_meta")
+        for trigger in (
+            "capsule_changes_insert",
+            "capsule_changes_delete",
+            "capsule_changes_update",
+            "capsule_generation_insert",
+            "capsule_generation_delete",
+            "capsule_generation_update",
+            "capsule_domains_insert",
+            "capsule_domains_delete",
+            "capsule_domains_update",
+        ):
+            db.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        db.execute("DROP TABLE IF EXISTS capsule_changes")
+        db.execute("DROP TABLE IF EXISTS capsule_domains")
 
     def _load_sidecar_capsules(self) -> list[Capsule]:
         """Parse every canonical sidecar, quarantining the unparseable.
@@ -731,9 +1069,40 @@ class KnowledgeBase:
                 """,
                 (row["id"], row["title"], row["body"], row["tags"], row["source"], row["domain_tags"]),
             )
+        self._stamp_mirror_verified(db)
+
+    @staticmethod
+    def _mirror_generations(db: sqlite3.Connection) -> tuple[str | None, str | None]:
+        """(write_generation, mirror_verified_generation) from `kb_meta`; None when unset."""
+        found = dict(
+            db.execute(
+                "SELECT key, value FROM kb_meta WHERE key IN ('write_generation', 'mirror_verified_generation')"
+            ).fetchall()
+        )
+        return found.get("write_generation"), found.get("mirror_verified_generation")
+
+    @staticmethod
+    def _stamp_mirror_verified(db: sqlite3.Connection, generation: str | None = None) -> None:
+        """Record ``generation`` (default: the current one) as FTS-consistent."""
+        if generation is None:
+            generation = KnowledgeBase._mirror_generations(db)[0]
+        if generation is not None:
+            db.execute(
+                "INSERT OR REPLACE INTO kb_meta(key, value) VALUES('mirror_verified_generation', ?)",
+                (generation,),
+            )
 
     def _schema_state(self, db: sqlite3.Connection) -> str:
-        """Classify the current mirror state: missing, ok, capsules_stale, or derived_stale."""
+        """Classify the current mirror state: missing, ok, capsules_stale, or derived_stale.
+
+        The FTS mirror check is generation-gated: when no mirrored column
+        has changed since the last verification the KB is "ok" without
+        touching either table. Otherwise the full `_fts_mirror_diverges`
+        scan runs once, and a clean result stamps the generation it
+        covered so later opens are constant-time again. The generation is
+        read before the scan, so a write that lands mid-scan leaves the
+        stamp behind and is re-checked on the next open.
+        """
         rows = db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='capsules'").fetchall()
         if not rows:
             return "missing"
@@ -743,12 +1112,19 @@ class KnowledgeBase:
         aux = {
             r[0]
             for r in db.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name IN ('capsule_fts', 'kb_meta')"
+                "SELECT name FROM sqlite_master WHERE type='table' "
+                "AND name IN ('capsule_fts', 'kb_meta', 'capsule_domains')"
             ).fetchall()
         }
-        if "capsule_fts" not in aux or "kb_meta" not in aux:
+        if len(aux) < 3:
             return "derived_stale"
-        return "derived_stale" if self._fts_mirror_diverges(db) else "ok"
+        generation, verified = self._mirror_generations(db)
+        if generation is not None and generation == verified:
+            return "ok"
+        if self._fts_mirror_diverges(db):
+            return "derived_stale"
+        self._stamp_mirror_verified(db, generation)
+        return "ok"
 
     @staticmethod
     def _fts_mirror_diverges(db: sqlite3.Connection) -> bool:
@@ -811,6 +1187,48 @@ class KnowledgeBase:
         db.execute("PRAGMA busy_timeout=5000")
         return db
 
+    def _shared_connection(self) -> sqlite3.Connection:
+        """The instance's reusable connection, opened on first use.
+
+        `connect()` stays the per-operation connection for write paths
+        that own their transaction. The hot path (`init()` and every
+        phase of `search()`) reuses this one instead, so a search costs
+        no connect or PRAGMA round-trips and its statements stay in the
+        connection's prepared-statement cache across calls. Callers hold
+        `_shared_lock` while using it; `close()` closes it.
+        """
+        if self._shared_db is None:
+            self.home.mkdir(parents=True, exist_ok=True)
+            # A long-lived host may reach it from another thread than the
+            # one that opened it; the lock, not sqlite3, serializes use.
+            db = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA busy_timeout=5000")
+            self._shared_db = db
+        return self._shared_db
+
+    @contextmanager
+    def _read_snapshot(self, db: sqlite3.Connection | None = None) -> Iterator[sqlite3.Connection]:
+        """One read transaction on the shared connection.
+
+        Every statement inside sees the same committed snapshot, so the
+        BM25 lane, the row fetch and the MMR embedding fetch of one search
+        cannot straddle a concurrent write. Passing ``db`` reuses a
+        snapshot the caller already holds.
+        """
+        if db is not None:
+            yield db
+            return
+        with self._shared_lock:
+            db = self._shared_connection()
+            db.execute("BEGIN")
+            try:
+                yield db
+            finally:
+                if db.in_transaction:
+                    db.execute("COMMIT")
+
     # --- vec_runner subprocess --------------------------------------------
 
     def _vec_runner_path(self) -> Path:
@@ -832,10 +1250,20 @@ class KnowledgeBase:
         `AI_KB_DISABLE_EMBED` pattern so unit tests can run
         without uv + the sqlite-vec wheel installed. Production
         never sets this var.
+
+        The runner is resident by default: the first call starts one
+        `vec_runner.py --serve` child (`VecRunnerPipe`) that every later
+        call from this instance reuses. `AI_KB_VEC_RESIDENT=0` restores
+        one spawn per call.
         """
         if os.environ.get("AI_KB_DISABLE_VEC") in ("1", "true", "yes"):
             mode = payload.get("mode")
             return {"hits": []} if mode == "knn" else {"pairs": []}
+        if self._vec_backend is not None:
+            response = self._vec_backend(payload)
+            if "error" in response:
+                raise RuntimeError(f"vec_runner error: {response['error']}")
+            return response
         uv = shutil.which("uv")
         if uv is None:
             raise RuntimeError("uv binary not found on PATH; vec_runner requires uv")
@@ -843,6 +1271,15 @@ class KnowledgeBase:
         if not runner.is_file():
             raise RuntimeError(f"vec_runner missing at {runner}")
         cmd = [uv, "run", "--quiet", "--no-project", "--script", str(runner)]
+        if os.environ.get("AI_KB_VEC_RESIDENT", "").strip().lower() not in ("0", "false", "no", "off"):
+            if self._vec_pipe is None or self._vec_pipe.command[:-1] != cmd:
+                if self._vec_pipe is not None:
+                    self._vec_pipe.close()
+                self._vec_pipe = VecRunnerPipe([*cmd, "--serve"])
+            response = self._vec_pipe.request(payload, timeout=timeout)
+            if "error" in response:
+                raise RuntimeError(f"vec_runner error: {response['error']}")
+            return response
         try:
             proc = subprocess.run(
                 cmd,
@@ -865,6 +1302,16 @@ class KnowledgeBase:
             raise RuntimeError(f"vec_runner error: {response['error']}")
         return response
 
+    def close(self) -> None:
+        """Stop the resident vec_runner child and close the shared connection."""
+        if self._vec_pipe is not None:
+            self._vec_pipe.close()
+            self._vec_pipe = None
+        with self._shared_lock:
+            if self._shared_db is not None:
+                self._shared_db.close()
+                self._shared_db = None
+
     # --- embedder lookup ---------------------------------------------------
 
     def embedder(self):
@@ -895,6 +1342,37 @@ class KnowledgeBase:
         self._embedder_resolved = True
         return self._embedder
 
+    def query_cache(self):
+        """Return the shared query-embedding cache, or None when disabled."""
+        if os.environ.get("AI_KB_QUERY_CACHE", "").strip().lower() in ("0", "false", "no", "off"):
+            return None
+        if self._query_cache is None:
+            from query_cache import DEFAULT_CAPACITY, QueryEmbeddingCache  # local import — see embedder()
+
+            try:
+                capacity = int(os.environ.get("AI_KB_QUERY_CACHE_SIZE", DEFAULT_CAPACITY))
+            except ValueError:
+                capacity = DEFAULT_CAPACITY
+            self._query_cache = QueryEmbeddingCache(self.home / QUERY_CACHE_FILENAME, capacity)
+        return self._query_cache
+
+    def _query_vector(self, embedder, query: str) -> bytes:
+        """Packed float32 vector for a search query; b"" when it cannot be embedded.
+
+        The query cache is consulted first, so a repeated query never
+        reaches the embedder; fresh vectors are stored for next time.
+        """
+        cache = self.query_cache()
+        if cache is not None:
+            cached = cache.get(embedder.model, query)
+            if cached:
+                return cached
+        blobs = self._embed_blobs(embedder, [query])
+        blob = blobs[0] if blobs else b""
+        if blob and cache is not None:
+            cache.put(embedder.model, query, blob)
+        return blob
+
     # --- write paths -------------------------------------------------------
 
     def remember(
@@ -968,94 +1446,7 @@ class KnowledgeBase:
                     f"pass supersedes={dup_id!r} to update it or force=True to store anyway"
                 )
 
-        front = (
-            "---\n"
-            f"id: {note_id}\n"
-            f"title: {title}\n"
-            f"kind: {kind}\n"
-            f"scope: {scope}\n"
-            f"source: {source}\n"
-            f"tags: {tags}\n"
-            f"workspace_path: {workspace_path or ''}\n"
-            f"project_id: {project_id or ''}\n"
-            f"domain_tags: {domain_csv}\n"
-            f"confidence: {confidence}\n"
-            f"verified_by: {verified_by or ''}\n"
-            f"supersedes: {supersedes or ''}\n"
-            f"refs: {refs_csv}\n"
-            f"created_at: {now}\n"
-            "---\n\n"
-            f"# {title}\n\n"
-            f"{body_clean}\n"
-        )
-        path.write_text(front)
-
-        # If we set supersedes, also flip the parent's superseded_by
-        # pointer so the link is bidirectional.
-        if supersedes:
-            with self.connect() as db:
-                db.execute(
-                    "UPDATE capsules SET superseded_by = ?, updated_at = ? WHERE id = ?",
-                    (note_id, now, supersedes),
-                )
-
-        with self.connect() as db:
-            db.execute(
-                """
-                INSERT INTO capsules(
-                    id, kind, title, body, source, tags, path, scope,
-                    workspace_path, project_id, domain_tags, confidence,
-                    verified_by, supersedes, superseded_by, refs,
-                    embedding, embedding_model, embedding_dim,
-                    decay_score, retrieved_at, retrieval_count, created_at, updated_at
-                )
-                VALUES(
-                    :id, :kind, :title, :body, :source, :tags, :path, :scope,
-                    :workspace_path, :project_id, :domain_tags, :confidence,
-                    :verified_by, :supersedes, NULL, :refs,
-                    :embedding, :embedding_model, :embedding_dim,
-                    0.0, NULL, 0, :created_at, :updated_at
-                )
-                """,
-                {
-                    "id": note_id,
-                    "kind": kind,
-                    "title": title,
-                    "body": body_clean,
-                    "source": source,
-                    "tags": tags,
-                    "path": str(path),
-                    "scope": scope,
-                    "workspace_path": workspace_path,
-                    "project_id": project_id,
-                    "domain_tags": domain_csv,
-                    "confidence": confidence,
-                    "verified_by": verified_by,
-                    "supersedes": supersedes,
-                    "refs": refs_csv,
-                    "embedding": embedding_blob,
-                    "embedding_model": embedding_model,
-                    "embedding_dim": embedding_dim,
-                    "created_at": now,
-                    "updated_at": now,
-                },
-            )
-            db.execute(
-                """
-                INSERT INTO capsule_fts(id, title, body, tags, source, domain_tags)
-                VALUES(:id, :title, :body, :tags, :source, :domain_tags)
-                """,
-                {
-                    "id": note_id,
-                    "title": title,
-                    "body": body_clean,
-                    "tags": tags,
-                    "source": source,
-                    "domain_tags": domain_csv,
-                },
-            )
-
-        return Capsule(
+        capsule = Capsule(
             id=note_id,
             kind=kind,
             title=title,
@@ -1078,6 +1469,77 @@ class KnowledgeBase:
             created_at=now,
             updated_at=now,
         )
+        with self.connect() as db:
+            # If we set supersedes, also flip the parent's superseded_by
+            # pointer so the link is bidirectional.
+            if supersedes:
+                db.execute(
+                    "UPDATE capsules SET superseded_by = ?, updated_at = ? WHERE id = ?",
+                    (note_id, now, supersedes),
+                )
+            self._store_capsule(db, capsule, embedding_blob)
+        return capsule
+
+    @staticmethod
+    def _store_capsule(db: sqlite3.Connection, capsule: Capsule, embedding_blob: bytes | None) -> None:
+        """Write one new capsule's sidecar plus its `capsules`/FTS rows.
+
+        Shared by `remember` and the batched ingest writer; the caller owns
+        the connection (and so the transaction boundary) and has already
+        run any duplicate checks. The row and its FTS mirror land together,
+        so a mirror verified before the write stays verified after it.
+        """
+        generation, verified = KnowledgeBase._mirror_generations(db)
+        Path(capsule.path).write_text(
+            "---\n"
+            f"id: {capsule.id}\n"
+            f"title: {capsule.title}\n"
+            f"kind: {capsule.kind}\n"
+            f"scope: {capsule.scope}\n"
+            f"source: {capsule.source}\n"
+            f"tags: {capsule.tags}\n"
+            f"workspace_path: {capsule.workspace_path or ''}\n"
+            f"project_id: {capsule.project_id or ''}\n"
+            f"domain_tags: {capsule.domain_tags}\n"
+            f"confidence: {capsule.confidence}\n"
+            f"verified_by: {capsule.verified_by or ''}\n"
+            f"supersedes: {capsule.supersedes or ''}\n"
+            f"refs: {capsule.refs}\n"
+            f"created_at: {capsule.created_at}\n"
+            "---\n\n"
+            f"# {capsule.title}\n\n"
+            f"{capsule.body}\n"
+        )
+        row = asdict(capsule)
+        row["embedding"] = embedding_blob
+        db.execute(
+            """
+            INSERT INTO capsules(
+                id, kind, title, body, source, tags, path, scope,
+                workspace_path, project_id, domain_tags, confidence,
+                verified_by, supersedes, superseded_by, refs,
+                embedding, embedding_model, embedding_dim,
+                decay_score, retrieved_at, retrieval_count, created_at, updated_at
+            )
+            VALUES(
+                :id, :kind, :title, :body, :source, :tags, :path, :scope,
+                :workspace_path, :project_id, :domain_tags, :confidence,
+                :verified_by, :supersedes, NULL, :refs,
+                :embedding, :embedding_model, :embedding_dim,
+                0.0, NULL, 0, :created_at, :updated_at
+            )
+            """,
+            row,
+        )
+        db.execute(
+            """
+            INSERT INTO capsule_fts(id, title, body, tags, source, domain_tags)
+            VALUES(:id, :title, :body, :tags, :source, :domain_tags)
+            """,
+            row,
+        )
+        if generation is not None and generation == verified:
+            KnowledgeBase._stamp_mirror_verified(db)
 
     @staticmethod
     def _embed_text(title: str, body: str) -> str:
@@ -1086,6 +1548,19 @@ class KnowledgeBase:
         useful vector."""
         return f"{title}\n{body}".strip()
 
+    @staticmethod
+    def _embed_blobs(embedder, texts: list[str]) -> list[bytes]:
+        """Embed ``texts`` to packed float32 BLOBs; [] on failure.
+
+        Embedders with `embed_blobs` hand back the wire bytes as-is; any
+        other (test doubles, older embedders) is packed from `embed`.
+        """
+        if hasattr(embedder, "embed_blobs"):
+            return embedder.embed_blobs(texts)
+        from embed import pack_vector  # local import — see embedder()
+
+        return [pack_vector(vec) if vec else b"" for vec in embedder.embed(texts)]
+
     def _find_duplicate(
         self,
         title: str,
@@ -1103,6 +1578,12 @@ class KnowledgeBase:
         novel. ``exempt_id`` skips the capsule an explicit ``supersedes``
         already covers. Fail-open on the vector lane: without a comparable
         embedding only the title check applies.
+
+        The embedding check asks the search KNN index for the nearest
+        same-kind, same-model live neighbours at or above the threshold;
+        the O(N) scan over every same-kind BLOB only runs when the index
+        is unavailable (vec disabled, runner error, dim mismatch) or its
+        answer may be truncated.
         """
         with self.connect() as db:
             row = db.execute(
@@ -1113,6 +1594,10 @@ class KnowledgeBase:
                 return str(row["id"]), "title"
             if not embedding_vec or not embedding_model:
                 return None
+        probe = self._probe_duplicate_index(kind, embedding_vec, embedding_model, exempt_id)
+        if probe is not None:
+            return (probe, f"embedding cosine >= {DUPLICATE_COSINE_THRESHOLD}") if probe else None
+        with self.connect() as db:
             candidates = db.execute(
                 """
                 SELECT id, embedding FROM capsules
@@ -1123,42 +1608,169 @@ class KnowledgeBase:
                 """,
                 (kind, embedding_model),
             ).fetchall()
-        from embed import cosine, unpack_vector  # local import — see embedder()
-
-        for candidate in candidates:
-            if candidate["id"] == exempt_id:
-                continue
-            try:
-                existing_vec = unpack_vector(candidate["embedding"])
-            except Exception:
-                continue
-            if cosine(embedding_vec, existing_vec) >= DUPLICATE_COSINE_THRESHOLD:
-                return str(candidate["id"]), f"embedding cosine >= {DUPLICATE_COSINE_THRESHOLD}"
+        from similarity import VectorMatrix  # local import — see embedder()
+
+        candidates = [c for c in candidates if c["id"] != exempt_id]
+        # One candidate matrix scored in bulk; rows of another dimension
+        # score 0.0, as the old per-row cosine did.
+        matrix = VectorMatrix([c["embedding"] for c in candidates], dim=len(embedding_vec))
+        hit = matrix.first_at_least(embedding_vec, DUPLICATE_COSINE_THRESHOLD)
+        if hit is not None:
+            return str(candidates[hit]["id"]), f"embedding cosine >= {DUPLICATE_COSINE_THRESHOLD}"
         return None
 
+    def _probe_duplicate_index(
+        self, kind: str, embedding_vec: list[float], embedding_model: str, exempt_id: str | None
+    ) -> str | None:
+        """KNN leg of `_find_duplicate`.
+
+        Returns the matching capsule id, ``""`` when the index proves
+        there is no match, or ``None`` when the caller must scan.
+        """
+        if os.environ.get("AI_KB_DISABLE_VEC") in ("1", "true", "yes"):
+            return None
+        try:
+            response = self._call_vec_runner(
+                {
+                    "mode": "knn",
+                    "db_path": str(self.db_path),
+                    "query_vector": [float(x) for x in embedding_vec],
+                    "k": DUPLICATE_PROBE_K,
+                    "limit": DUPLICATE_PROBE_K,
+                    "filters": {"kinds": [kind], "models": [embedding_model]},
+                    "min_cosine": DUPLICATE_COSINE_THRESHOLD,
+                }
+            )
+        except RuntimeError:
+            return None
+        if response.get("saturated") is not False:
+            # Missing flag: an older runner that ignored min_cosine.
+            return None
+        for hit in response.get("hits", []):
+            if hit["id"] != exempt_id and float(hit["cosine"]) >= DUPLICATE_COSINE_THRESHOLD:
+                return str(hit["id"])
+        return ""
+
     def _record_retrieval(self, capsule_ids: "list[str]") -> None:
-        """Mark returned capsules as live: stamp retrieval and clear decay.
+        """Buffer a retrieval event for the returned capsules.
 
         This is the usage signal `curate decay` keys off — a capsule
         retrieved within `DECAY_RECENT_DAYS` is shielded from decay, and a
-        retrieval clears any decay it accumulated while dormant.
-        `updated_at` is left untouched: it tracks content edits only.
+        retrieval clears any decay it accumulated while dormant. The event
+        is one O_APPEND write to the retrieval spool, never a database
+        write, so searches do not contend with `remember`/`curate` for the
+        WAL write lock; `fold_retrievals()` applies it later. The stamp is
+        best-effort: a spool that cannot be written drops the event.
         """
         if not capsule_ids:
             return
-        now = utc_now()
-        placeholders = ",".join("?" for _ in capsule_ids)
-        with self.connect() as db:
-            db.execute(
-                f"""
-                UPDATE capsules
-                SET retrieved_at = ?,
-                    retrieval_count = retrieval_count + 1,
-                    decay_score = 0.0
-                WHERE id IN ({placeholders})
-                """,
-                (now, *capsule_ids),
-            )
+        line = "\t".join([utc_now(), *capsule_ids]) + "\n"
+        try:
+            self.home.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.home / RETRIEVAL_LOG_FILENAME, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line.encode("utf-8"))
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+    def pending_retrievals(self) -> int:
+        """Number of buffered retrieval events not yet folded into capsules."""
+        count = 0
+        for path in [self.home / RETRIEVAL_LOG_FILENAME, *self._folding_spools()]:
+            try:
+                with path.open("rb") as fh:
+                    count += sum(1 for line in fh if line.endswith(b"\n"))
+            except OSError:
+                continue
+        return count
+
+    def fold_retrievals_if_backlogged(self) -> int:
+        """Fold the spool once it reaches `RETRIEVAL_LOG_FOLD_BYTES`; 0 otherwise.
+
+        Called after CLI and worker searches so the spool cannot grow
+        without bound on a host where `curate` and the worker's idle fold
+        never run. Best-effort like the stamp itself: a busy KB leaves the
+        spool for the next search.
+        """
+        try:
+            if (self.home / RETRIEVAL_LOG_FILENAME).stat().st_size < RETRIEVAL_LOG_FOLD_BYTES:
+                return 0
+            return self.fold_retrievals()
+        except (OSError, sqlite3.Error):
+            return 0
+
+    def _folding_spools(self) -> list[Path]:
+        # Zero-padded nanosecond tokens sort in rotation order.
+        return sorted(self.home.glob("retrieval.*.folding"))
+
+    def fold_retrievals(self) -> int:
+        """Apply buffered retrieval events to the capsules table; return how many.
+
+        The spool is first renamed to `retrieval.<token>.folding` so new
+        searches start a fresh file, then each rotated spool is folded in
+        one transaction: per capsule, `retrieved_at` advances to its latest
+        event, `retrieval_count` grows by its event count and
+        `decay_score` resets to 0 — the same end state the per-search
+        UPDATE produced. The transaction also records the spool's token in
+        `kb_meta`, so a spool left behind by a crash between commit and
+        unlink is recognised and dropped instead of counted twice.
+        """
+        self.init()
+        live = self.home / RETRIEVAL_LOG_FILENAME
+        try:
+            if live.stat().st_size:
+                os.replace(live, self.home / f"retrieval.{time.time_ns():020d}.folding")
+        except OSError:
+            pass
+        folded = 0
+        for path in self._folding_spools():
+            token = path.name.split(".")[1]
+            try:
+                data = path.read_bytes()
+            except OSError:
+                continue
+            latest: dict[str, str] = {}
+            counts: dict[str, int] = {}
+            events = 0
+            # A line without its newline is a write still in flight; it is
+            # dropped with the spool like any other best-effort stamp.
+            for raw in data.decode("utf-8", "replace").splitlines(keepends=True):
+                if not raw.endswith("\n"):
+                    continue
+                stamp, *ids = raw.rstrip("\n").split("\t")
+                if not stamp or not ids:
+                    continue
+                events += 1
+                for capsule_id in ids:
+                    counts[capsule_id] = counts.get(capsule_id, 0) + 1
+                    if stamp > latest.get(capsule_id, ""):
+                        latest[capsule_id] = stamp
+            with self.connect() as db:
+                db.execute("BEGIN IMMEDIATE")
+                row = db.execute("SELECT value FROM kb_meta WHERE key = 'retrieval_folded_token'").fetchone()
+                if row is None or row["value"] < token:
+                    db.executemany(
+                        """
+                        UPDATE capsules
+                        SET retrieved_at = CASE
+                                WHEN retrieved_at IS NULL OR retrieved_at < ? THEN ?
+                                ELSE retrieved_at
+                            END,
+                            retrieval_count = retrieval_count + ?,
+                            decay_score = 0.0
+                        WHERE id = ?
+                        """,
+                        [(latest[cid], latest[cid], counts[cid], cid) for cid in counts],
+                    )
+                    db.execute(
+                        "INSERT OR REPLACE INTO kb_meta(key, value) VALUES('retrieval_folded_token', ?)",
+                        (token,),
+                    )
+                    folded += events
+            path.unlink(missing_ok=True)
+        return folded
 
     def reembed(self, *, limit: int | None = None) -> int:
         """Re-embed capsules whose embedding is missing or whose model
@@ -1171,8 +1783,6 @@ class KnowledgeBase:
         embedder = self.embedder()
         if embedder is None:
             return 0
-        from embed import pack_vector  # local import
-
         self.init()
         with self.connect() as db:
             rows = db.execute(
@@ -1196,13 +1806,13 @@ class KnowledgeBase:
         # supports list input. This keeps backfill cheap even on KBs
         # with thousands of capsules.
         texts = [self._embed_text(r["title"], r["body"]) for r in rows]
-        vectors = embedder.embed(texts)
-        if not vectors or len(vectors) != len(rows):
+        blobs = self._embed_blobs(embedder, texts)
+        if not blobs or len(blobs) != len(rows):
             return 0
         now = utc_now()
         with self.connect() as db:
-            for r, vec in zip(rows, vectors):
-                if not vec:
+            for r, blob in zip(rows, blobs):
+                if not blob:
                     continue
                 db.execute(
                     """
@@ -1210,7 +1820,7 @@ class KnowledgeBase:
                     SET embedding = ?, embedding_model = ?, embedding_dim = ?, updated_at = ?
                     WHERE id = ?
                     """,
-                    (pack_vector(vec), embedder.model, len(vec), now, r["id"]),
+                    (blob, embedder.model, len(blob) // 4, now, r["id"]),
                 )
         return len(rows)
 
@@ -1224,6 +1834,8 @@ class KnowledgeBase:
         domain_tags: list[str] | None = None,
         workspace_path: str | None = None,
         max_bytes: int = 1_000_000,
+        workers: int | None = None,
+        progress: Callable[[dict[str, int]], None] | None = None,
     ) -> dict[str, object]:
         """Recursively ingest one path into the KB.
 
@@ -1231,13 +1843,29 @@ class KnowledgeBase:
         Each ingested file is chunked on `^#` and `^##` headings; each
         chunk becomes one `kind=doc` capsule. Returns a summary dict
         with counts of files seen, files ingested (changed since last
-        run), files skipped (unchanged), and total capsules created.
-
-        Idempotent on file content: if the file's sha256 matches the
-        last recorded hash, the file is skipped and any existing
-        capsules from that file are kept as-is. When the hash changes,
-        the old capsules from that file are deleted and replaced.
+        run), files skipped (unchanged), total capsules created,
+        whether the run resumed an interrupted one, and the elapsed
+        time with files/sec and chunks/sec rates.
+
+        Idempotent on file content: a file whose mtime and size match
+        its doc_ingests row is skipped without being read; otherwise a
+        matching sha256 still skips it (and refreshes the recorded
+        stat). When the hash changes, the old capsules from that file
+        are deleted and replaced.
+
+        Pipeline: a pool of `workers` threads stats, reads, hashes and
+        chunks files; changed files are embedded `INGEST_EMBED_BATCH`
+        chunks at a time through one `Embedder.embed` call, and each
+        batch's old-chunk deletes, capsule inserts and doc_ingests
+        upserts share one transaction. Every committed batch is a
+        checkpoint: an interrupted run leaves its `ingest_checkpoints`
+        row behind, and the next run for the same target skips the
+        already-committed files on the stat pre-check and reports how
+        many the interrupted runs committed. ``progress``
+        (when given) is called after every committed batch with running
+        ``files_done``/``files_total``/``chunks_done`` counts.
         """
+        started = time.monotonic()
         self.init()
         self.init_doc_ingest_table()
         target = Path(target).expanduser().resolve()
@@ -1250,84 +1878,246 @@ class KnowledgeBase:
             files = [target]
         else:
             raise ValueError(f"unsupported ingest target: {target} (need .md file or dir)")
+        workers = max(1, workers if workers is not None else min(8, os.cpu_count() or 1))
+
+        with self.connect() as db:
+            recorded = {
+                row["path"]: (row["sha256"], csv_split(row["capsule_ids"]), row["mtime_ns"], row["size"])
+                for row in db.execute("SELECT path, sha256, capsule_ids, mtime_ns, size FROM doc_ingests")
+            }
+            checkpoint = db.execute(
+                "SELECT files_committed FROM ingest_checkpoints WHERE target = ?", (str(target),)
+            ).fetchone()
+            db.execute(
+                "INSERT OR IGNORE INTO ingest_checkpoints(target, started_at) VALUES (?, ?)",
+                (str(target), utc_now()),
+            )
+
+        def scan(f: Path) -> dict[str, object]:
+            return self._scan_ingest_file(f, recorded.get(str(f)), max_bytes, domain_tags or [])
 
-        domain_csv = csv_join(domain_tags or [])
         seen = 0
-        ingested = 0
         skipped = 0
+        ingested = 0
         capsule_count = 0
-        for f in files:
-            seen += 1
-            try:
-                size = f.stat().st_size
-            except OSError:
-                continue
-            if size > max_bytes:
-                continue
+        batch: list[dict[str, object]] = []
+        restamp: list[dict[str, object]] = []
+        batch_chunks = 0
+
+        def flush() -> None:
+            nonlocal ingested, capsule_count, batch, restamp, batch_chunks
+            if not batch and not restamp:
+                return
+            embedder = self.embedder() if batch_chunks else None
+            capsule_count += self._ingest_batch(
+                batch, restamp, embedder, scope=scope, workspace_path=workspace_path, checkpoint=str(target)
+            )
+            ingested += len(batch)
+            batch, restamp, batch_chunks = [], [], 0
+            if progress is not None:
+                progress({"files_done": seen, "files_total": len(files), "chunks_done": capsule_count})
+
+        # Results are consumed in walk order from a bounded window of
+        # in-flight scans, so batches (and ids) are deterministic and a
+        # huge tree never holds every file's text in memory at once.
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            window: deque = deque()
+            remaining = iter(files)
+            for f in remaining:
+                window.append(pool.submit(scan, f))
+                if len(window) >= workers * 4:
+                    break
+            while window:
+                item = window.popleft().result()
+                for f in remaining:
+                    window.append(pool.submit(scan, f))
+                    break
+                seen += 1
+                status = item["status"]
+                if status == "unchanged":
+                    skipped += 1
+                    continue
+                if status == "restamp":
+                    skipped += 1
+                    restamp.append(item)
+                    continue
+                if status != "changed":
+                    continue
+                count = len(item["chunks"])
+                if batch and batch_chunks + count > INGEST_EMBED_BATCH:
+                    flush()
+                batch.append(item)
+                batch_chunks += count
+            flush()
+
+        with self.connect() as db:
+            db.execute("DELETE FROM ingest_checkpoints WHERE target = ?", (str(target),))
+
+        elapsed = time.monotonic() - started
+        return {
+            "files_seen": seen,
+            "files_ingested": ingested,
+            "files_skipped_unchanged": skipped,
+            "capsules_stored": capsule_count,
+            "resumed": checkpoint is not None,
+            "files_committed_before_resume": checkpoint["files_committed"] if checkpoint else 0,
+            "elapsed_seconds": round(elapsed, 3),
+            "files_per_second": round(ingested / elapsed, 1) if elapsed > 0 else 0.0,
+            "chunks_per_second": round(capsule_count / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    @classmethod
+    def _scan_ingest_file(
+        cls,
+        f: Path,
+        previous: tuple[str, list[str], int | None, int | None] | None,
+        max_bytes: int,
+        domain_tags: list[str],
+    ) -> dict[str, object]:
+        """Stat, read, hash and chunk one ingest candidate.
+
+        Runs on the ingest worker pool, so it only touches the file
+        system. ``status`` is ``unchanged`` (stat matches the recorded
+        row, file not read), ``restamp`` (content unchanged but the
+        stat moved), ``changed`` (carries the chunks to store), or
+        ``ignored`` (unreadable or over ``max_bytes``).
+        """
+        try:
+            info = f.stat()
+        except OSError:
+            return {"status": "ignored", "path": f}
+        if info.st_size > max_bytes:
+            return {"status": "ignored", "path": f}
+        if previous and previous[2] == info.st_mtime_ns and previous[3] == info.st_size:
+            return {"status": "unchanged", "path": f}
+        try:
             text = f.read_text(errors="replace")
-            sha = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        except OSError:
+            return {"status": "ignored", "path": f}
+        sha = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        item: dict[str, object] = {"path": f, "sha": sha, "mtime_ns": info.st_mtime_ns, "size": info.st_size}
+        if previous and previous[0] == sha:
+            return {**item, "status": "restamp"}
+        chunks = []
+        for chunk in cls._chunk_markdown(text):
+            body = chunk["body"].strip()
+            if body:
+                chunks.append((chunk["title"][:120] or f.name, body))
+        return {
+            **item,
+            "status": "changed",
+            "old_ids": previous[1] if previous else [],
+            "domain_tags": cls._infer_domain_tags(f, domain_tags),
+            "chunks": chunks,
+        }
 
-            with self.connect() as db:
-                row = db.execute(
-                    "SELECT sha256, capsule_ids FROM doc_ingests WHERE path = ?",
-                    (str(f),),
-                ).fetchone()
-            if row and row["sha256"] == sha:
-                skipped += 1
-                continue
+    def _ingest_batch(
+        self,
+        batch: list[dict[str, object]],
+        restamp: list[dict[str, object]],
+        embedder,
+        *,
+        scope: str,
+        workspace_path: str | None,
+        checkpoint: str,
+    ) -> int:
+        """Embed and store one ingest batch; returns the capsules written.
+
+        One embed call covers every chunk in the batch. A short or
+        failed embed stores the batch without vectors (same degradation
+        as `remember` without an embedder; `reembed` backfills later).
+        Content-unchanged files in ``restamp`` only get their recorded
+        stat refreshed, in the same transaction as the batch and its
+        checkpoint bump.
+        """
+        texts = [self._embed_text(title, body) for item in batch for title, body in item["chunks"]]
+        blobs = self._embed_blobs(embedder, texts) if embedder is not None and texts else []
+        if len(blobs) != len(texts):
+            blobs = []
 
-            # Replace stale chunks atomically. Existing capsules for
-            # this file are removed first so retrieval doesn't return
-            # outdated content alongside the new chunks.
-            if row:
-                old_ids = csv_split(row["capsule_ids"])
-                for old_id in old_ids:
-                    self.remove(old_id)
-
-            chunks = self._chunk_markdown(text)
-            new_ids: list[str] = []
-            for chunk in chunks:
-                title = chunk["title"][:120] or f.name
-                body = chunk["body"].strip()
-                if not body:
-                    continue
-                inferred = self._infer_domain_tags(f, domain_tags or [])
-                capsule = self.remember(
-                    title=title,
-                    body=body,
-                    kind="doc",
-                    scope=scope,
-                    source=f"file:{f}",
-                    tags="kb-ingest,doc",
-                    workspace_path=workspace_path,
-                    domain_tags=inferred,
-                    confidence=0.9,
-                    # Ingest owns replacement through doc_ingests (stale
-                    # chunks are removed above); re-chunked docs would
-                    # otherwise trip the write-time duplicate probe.
-                    force=True,
-                )
-                new_ids.append(capsule.id)
-            capsule_count += len(new_ids)
-            ingested += 1
-            with self.connect() as db:
+        now = utc_now()
+        used_ids: set[str] = set()
+        stale_paths: list[str] = []
+        stored = 0
+        position = 0
+        with self.connect() as db:
+            generation, verified = self._mirror_generations(db)
+            for item in batch:
+                for old_id in item["old_ids"]:
+                    row = db.execute("SELECT path FROM capsules WHERE id = ?", (old_id,)).fetchone()
+                    if row is None:
+                        continue
+                    db.execute("DELETE FROM capsules WHERE id = ?", (old_id,))
+                    db.execute("DELETE FROM capsule_fts WHERE id = ?", (old_id,))
+                    stale_paths.append(row["path"])
+                new_ids: list[str] = []
+                for title, body in item["chunks"]:
+                    blob = blobs[position] if blobs else b""
+                    position += 1
+                    # make_id is microsecond-stamped; chunks written in one
+                    # tight loop can share a stamp and a slug.
+                    note_id = make_id(title)
+                    while note_id in used_ids:
+                        note_id = f"{note_id}-{len(used_ids)}"
+                    used_ids.add(note_id)
+                    capsule = Capsule(
+                        id=note_id,
+                        kind="doc",
+                        title=title,
+                        body=body,
+                        source=f"file:{item['path']}",
+                        tags="kb-ingest,doc",
+                        path=str(self.capsules_dir / f"{note_id}.md"),
+                        scope=scope,
+                        workspace_path=workspace_path,
+                        project_id=None,
+                        domain_tags=csv_join(item["domain_tags"]),
+                        confidence=0.9,
+                        verified_by=None,
+                        supersedes=None,
+                        superseded_by=None,
+                        refs="",
+                        embedding_model=embedder.model if blob else None,
+                        embedding_dim=len(blob) // 4,
+                        decay_score=0.0,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                    # Ingest owns replacement through doc_ingests, so the
+                    # write-time duplicate probe is skipped (as with
+                    # remember(force=True)).
+                    self._store_capsule(db, capsule, blob or None)
+                    new_ids.append(note_id)
+                stored += len(new_ids)
                 db.execute(
                     """
-                    INSERT INTO doc_ingests(path, sha256, last_ingested_at, capsule_ids)
-                    VALUES (?, ?, ?, ?)
+                    INSERT INTO doc_ingests(path, sha256, last_ingested_at, capsule_ids, mtime_ns, size)
+                    VALUES (?, ?, ?, ?, ?, ?)
                     ON CONFLICT(path) DO UPDATE SET
                         sha256 = excluded.sha256,
                         last_ingested_at = excluded.last_ingested_at,
-                        capsule_ids = excluded.capsule_ids
+                        capsule_ids = excluded.capsule_ids,
+                        mtime_ns = excluded.mtime_ns,
+                        size = excluded.size
                     """,
-                    (str(f), sha, utc_now(), csv_join(new_ids)),
+                    (str(item["path"]), item["sha"], now, csv_join(new_ids), item["mtime_ns"], item["size"]),
                 )
-        return {
-            "files_seen": seen,
-            "files_ingested": ingested,
-            "files_skipped_unchanged": skipped,
-            "capsules_stored": capsule_count,
-        }
+            db.executemany(
+                "UPDATE doc_ingests SET mtime_ns = ?, size = ? WHERE path = ?",
+                [(item["mtime_ns"], item["size"], str(item["path"])) for item in restamp],
+            )
+            if generation is not None and generation == verified:
+                self._stamp_mirror_verified(db)
+            db.execute(
+                "UPDATE ingest_checkpoints SET files_committed = files_committed + ? WHERE target = ?",
+                (len(batch), checkpoint),
+            )
+        for stale in stale_paths:
+            try:
+                Path(stale).unlink()
+            except FileNotFoundError:
+                pass
+        return stored
 
     @staticmethod
     def _chunk_markdown(text: str) -> list[dict[str, str]]:
@@ -1406,8 +2196,11 @@ class KnowledgeBase:
         if not capsule:
             return False
         with self.connect() as db:
+            generation, verified = self._mirror_generations(db)
             db.execute("DELETE FROM capsules WHERE id = ?", (note_id,))
             db.execute("DELETE FROM capsule_fts WHERE id = ?", (note_id,))
+            if generation is not None and generation == verified:
+                self._stamp_mirror_verified(db)
         try:
             Path(capsule.path).unlink()
         except FileNotFoundError:
@@ -1467,9 +2260,15 @@ class KnowledgeBase:
         ranking without being filtered out — a still-relevant decayed
         capsule can still surface.
 
-        Every returned capsule is stamped as retrieved
-        (`retrieved_at`/`retrieval_count`, decay cleared) so curation can
+        Every returned capsule is stamped as retrieved so curation can
         distinguish dormant memory from memory that keeps earning recall.
+        The stamp is buffered in the retrieval spool and reaches
+        `retrieved_at`/`retrieval_count` (decay cleared) when
+        `fold_retrievals()` runs, so a search never writes the database.
+
+        All SQLite reads (BM25 lane, row fetch, MMR embeddings) run in one
+        snapshot on the shared connection; the vector lane runs first, out
+        of process or on its own vec0 connection.
 
         Returned dicts are JSON-friendly (no embedding BLOB) and include
         all `Hit` fields plus `body` and `snippet` for prompt injection.
@@ -1488,14 +2287,36 @@ class KnowledgeBase:
         # has room to mix the two lanes; final cut is `limit`.
         candidate_pool = max(limit * 4, 20)
 
-        bm25_hits: list[tuple[str, float, str]] = []
-        if mode in ("hybrid", "bm25"):
-            bm25_hits = self._bm25_search(query, candidate_pool, scopes, kinds, domains)
-
         vector_hits: list[tuple[str, float]] = []
         if mode in ("hybrid", "vector"):
             vector_hits = self._vector_search(query, candidate_pool, scopes, kinds, domains)
 
+        with self._read_snapshot() as db:
+            hits = self._rank_hits(
+                db, query, limit, candidate_pool, mode, scopes, kinds, domains, vector_hits, workspace, workspace_gate
+            )
+        self._record_retrieval([h.id for h in hits])
+        return [asdict(h) for h in hits]
+
+    def _rank_hits(
+        self,
+        db: sqlite3.Connection,
+        query: str,
+        limit: int,
+        candidate_pool: int,
+        mode: str,
+        scopes: list[str],
+        kinds: list[str],
+        domains: list[str],
+        vector_hits: list[tuple[str, float]],
+        workspace: str | None,
+        workspace_gate: bool,
+    ) -> list[Hit]:
+        """The read-only half of `search()`: fuse lanes, score, diversify."""
+        bm25_hits: list[tuple[str, float, str]] = []
+        if mode in ("hybrid", "bm25"):
+            bm25_hits = self._bm25_search(query, candidate_pool, scopes, kinds, domains, db=db)
+
         # Build a unified candidate map keyed by capsule id.
         candidate_ids: list[str] = []
         seen: set[str] = set()
@@ -1510,7 +2331,7 @@ class KnowledgeBase:
         if not candidate_ids:
             return []
 
-        rows = self._fetch_rows(candidate_ids)
+        rows = self._fetch_rows(candidate_ids, db=db)
         # Stable order: rows in insertion order from candidate_ids.
         ordered_rows = [rows[h] for h in candidate_ids if h in rows]
         if workspace_gate:
@@ -1571,14 +2392,10 @@ class KnowledgeBase:
         # vector space. For BM25-only / vector-only modes we skip MMR
         # (those modes are explicit "I want pure-X" requests).
         if mode == "hybrid":
-            hits = self._apply_mmr(hits, limit)
-        else:
-            for h in hits[:limit]:
-                h.mmr_selected = True
-            hits = hits[:limit]
-
-        self._record_retrieval([h.id for h in hits])
-        return [asdict(h) for h in hits]
+            return self._apply_mmr(hits, limit, db=db)
+        for h in hits[:limit]:
+            h.mmr_selected = True
+        return hits[:limit]
 
     # --- retrieval internals ----------------------------------------------
 
@@ -1589,6 +2406,8 @@ class KnowledgeBase:
         scopes: list[str],
         kinds: list[str],
         domains: list[str],
+        *,
+        db: sqlite3.Connection | None = None,
     ) -> list[tuple[str, float, str]]:
         """Return [(id, score, snippet), ...] sorted best→worst.
 
@@ -1609,7 +2428,7 @@ class KnowledgeBase:
             ORDER BY score
             LIMIT ?
         """
-        with self.connect() as db:
+        with self._read_snapshot(db) as db:
             try:
                 rows = db.execute(sql, (fts_query, *params, n)).fetchall()
             except sqlite3.OperationalError:
@@ -1647,6 +2466,9 @@ class KnowledgeBase:
         `capsules.embedding` BLOBs on every call — so this method
         only has to spawn the process and parse JSON.
 
+        The query vector comes from `_query_vector`, so a query seen
+        before (same model, same normalized text) skips the embedder.
+
         Returns [] when no embedder is available (cannot embed the
         query) or the KB has no embedded capsules. Hard-fails
         (RuntimeError) if vec_runner itself is unreachable or errors;
@@ -1655,14 +2477,16 @@ class KnowledgeBase:
         embedder = self.embedder()
         if embedder is None:
             return []
-        qvec = embedder.embed_one(query)
-        if not qvec:
+        qblob = self._query_vector(embedder, query)
+        if not qblob:
             return []
+        from embed import unpack_vector  # local import — see embedder()
+
         response = self._call_vec_runner(
             {
                 "mode": "knn",
                 "db_path": str(self.db_path),
-                "query_vector": [float(x) for x in qvec],
+                "query_vector": unpack_vector(qblob),
                 "k": max(n * 2, 20),
                 "limit": n,
                 "filters": {"scopes": scopes, "kinds": kinds, "domains": domains},
@@ -1680,9 +2504,9 @@ class KnowledgeBase:
         """Compose the WHERE-tail used by both BM25 and vector paths.
 
         Returns a SQL fragment starting with `AND` (or empty string)
-        and the parameter list to bind. Domains are checked with LIKE
-        against the CSV column because we don't normalize them into a
-        join table for now (small N, low value).
+        and the parameter list to bind. Domains match whole tags,
+        case-insensitively, through the indexed `capsule_domains` join
+        table rather than a substring scan of the CSV column.
 
         Superseded capsules are always filtered out — they represent
         stale knowledge that has been replaced by a newer/better
@@ -1701,28 +2525,26 @@ class KnowledgeBase:
             parts.append(f"{alias}.kind IN ({placeholders})")
             params.extend(kinds)
         if domains:
-            sub = []
-            for d in domains:
-                sub.append(f"{alias}.domain_tags LIKE ?")
-                params.append(f"%{d}%")
-            parts.append("(" + " OR ".join(sub) + ")")
+            placeholders = ",".join("?" * len(domains))
+            parts.append(f"{alias}.id IN (SELECT capsule_id FROM capsule_domains WHERE tag IN ({placeholders}))")
+            params.extend(d.lower() for d in domains)
         return " AND " + " AND ".join(parts), params
 
-    def _fetch_rows(self, ids: list[str]) -> dict[str, sqlite3.Row]:
+    def _fetch_rows(self, ids: list[str], *, db: sqlite3.Connection | None = None) -> dict[str, sqlite3.Row]:
         """Bulk-fetch rows by id, preserving columns we need to score
         and present. Returns {id: row}."""
         if not ids:
             return {}
         placeholders = ",".join("?" * len(ids))
         cols = ",".join(c for c in CAPSULE_COLUMNS if c != "embedding")
-        with self.connect() as db:
+        with self._read_snapshot(db) as db:
             rows = db.execute(
                 f"SELECT {cols} FROM capsules WHERE id IN ({placeholders})",
                 tuple(ids),
             ).fetchall()
         return {r["id"]: r for r in rows}
 
-    def _apply_mmr(self, hits: list[Hit], k: int) -> list[Hit]:
+    def _apply_mmr(self, hits: list[Hit], k: int, *, db: sqlite3.Connection | None = None) -> list[Hit]:
         """Maximal Marginal Relevance diversification.
 
         Iteratively pick the hit that maximizes
@@ -1735,7 +2557,7 @@ class KnowledgeBase:
         if not hits or k <= 0:
             return []
         try:
-            from embed import cosine, unpack_vector
+            from similarity import VectorMatrix, mmr_order
         except Exception:
             for h in hits[:k]:
                 h.mmr_selected = True
@@ -1744,52 +2566,25 @@ class KnowledgeBase:
         # Bulk-fetch embeddings for the candidate set.
         ids = [h.id for h in hits]
         placeholders = ",".join("?" * len(ids))
-        with self.connect() as db:
+        with self._read_snapshot(db) as db:
             rows = db.execute(
                 f"SELECT id, embedding FROM capsules WHERE id IN ({placeholders})",
                 tuple(ids),
             ).fetchall()
-        vectors: dict[str, list[float]] = {}
-        for r in rows:
-            v = unpack_vector(r["embedding"])
-            if v:
-                vectors[r["id"]] = v
+        blobs = {r["id"]: r["embedding"] for r in rows if r["embedding"]}
 
-        if not vectors:
+        if not blobs:
             for h in hits[:k]:
                 h.mmr_selected = True
             return hits[:k]
 
-        selected: list[Hit] = []
-        candidates = list(hits)
-
-        # Seed with the top-RRF hit.
-        candidates.sort(key=lambda h: h.rrf_score, reverse=True)
-        first = candidates.pop(0)
-        first.mmr_selected = True
-        selected.append(first)
-
-        while candidates and len(selected) < k:
-            best: Hit | None = None
-            best_score = -1e9
-            for cand in candidates:
-                cand_vec = vectors.get(cand.id)
-                if cand_vec is None:
-                    sim_max = 0.0
-                else:
-                    sim_max = max(
-                        (cosine(cand_vec, vectors.get(s.id, [])) for s in selected),
-                        default=0.0,
-                    )
-                mmr = MMR_LAMBDA * cand.rrf_score - (1 - MMR_LAMBDA) * sim_max
-                if mmr > best_score:
-                    best_score = mmr
-                    best = cand
-            if best is None:
-                break
-            best.mmr_selected = True
-            selected.append(best)
-            candidates.remove(best)
+        # One candidate matrix (rows in hit order, normalized once); the
+        # selection loop then scores a whole row per pick instead of one
+        # cosine per (candidate, selected) pair.
+        matrix = VectorMatrix([blobs.get(h.id) for h in hits])
+        selected = [hits[idx] for idx in mmr_order(matrix, [h.rrf_score for h in hits], k, MMR_LAMBDA)]
+        for h in selected:
+            h.mmr_selected = True
         return selected
 
     # --- curation ----------------------------------------------------------
@@ -1828,10 +2623,15 @@ class KnowledgeBase:
           fact. Returns the candidate pairs in the summary so a human
           (or the reflector role) can adjudicate; we do not auto-link.
 
+        Buffered retrieval events are folded in first (see
+        `fold_retrievals`), so decay and dedupe see every search made
+        since the last pass.
+
         Returns a summary dict with counts and the contradiction
         candidate list.
         """
         self.init()
+        retrievals_folded = self.fold_retrievals()
 
         # Snapshot capsule metadata once. We no longer load embedding
         # BLOBs — the pairwise similarity work runs in vec_runner over
@@ -1938,6 +2738,7 @@ class KnowledgeBase:
             "decayed": decayed,
             "contradictions": contradictions[:20],
             "candidates_examined": len(meta),
+            "retrievals_folded": retrievals_folded,
         }
 
     @staticmethod
@@ -1991,8 +2792,20 @@ class KnowledgeBase:
             total = db.execute("SELECT COUNT(*) FROM capsules").fetchone()[0]
             with_embed = db.execute("SELECT COUNT(*) FROM capsules WHERE embedding IS NOT NULL").fetchone()[0]
         checks.append("sqlite_fts5=ok")
+        # The full mirror diff that init() skips while the write generation
+        # is unchanged; doctor always runs it and repairs on divergence.
+        with self.connect() as db:
+            generation = self._mirror_generations(db)[0]
+            if self._fts_mirror_diverges(db):
+                db.execute("BEGIN IMMEDIATE")
+                self._repair_derived_tables(db)
+                checks.append("fts_mirror=diverged (rebuilt from capsules)")
+            else:
+                self._stamp_mirror_verified(db, generation)
+                checks.append("fts_mirror=ok")
         checks.append(f"capsules={total}")
         checks.append(f"capsules_with_embedding={with_embed}")
+        checks.append(f"retrieval_log=pending {self.pending_retrievals()} event(s)")
         quarantined = sorted((self.home / "quarantine").glob("*.md"))
         checks.append(f"quarantined_sidecars={len(quarantined)}")
         for q in quarantined:
@@ -2002,6 +2815,17 @@ class KnowledgeBase:
             checks.append("embedder=unavailable (BM25-only retrieval)")
         else:
             checks.append(f"embedder=available model={embedder.model}")
+        cache = self.query_cache()
+        if cache is None:
+            checks.append("query_cache=disabled via AI_KB_QUERY_CACHE")
+        else:
+            stats = cache.stats()
+            lookups = stats["hits"] + stats["misses"]
+            rate = f"{stats['hits'] / lookups:.0%}" if lookups else "n/a"
+            checks.append(
+                f"query_cache=entries {stats['entries']}/{stats['capacity']} "
+                f"hits={stats['hits']} misses={stats['misses']} hit_rate={rate}"
+            )
         runner = self._vec_runner_path()
         if not runner.is_file():
             checks.append(f"vec_runner=missing at {runner}")
@@ -2058,24 +2882,28 @@ def worklog_path(workspace: Path, topic: str) -> Path:
     return agent_memory.spec_dir_for(workspace) / f"{topic}.worklog.jsonl"
 
 
-def read_worklog(path: Path) -> list[dict]:
-    """Parse a worklog JSONL file into dict entries, skipping malformed lines."""
+def iter_worklog(path: Path) -> Iterator[dict]:
+    """Yield a worklog JSONL file's dict entries one line at a time, skipping
+    malformed lines, so memory stays flat however long the topic has lived."""
     try:
-        text = path.read_text(encoding="utf-8", errors="replace")
+        with path.open(encoding="utf-8", errors="replace") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(obj, dict):
+                    yield obj
     except OSError:
-        return []
-    entries: list[dict] = []
-    for line in text.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            obj = json.loads(line)
-        except json.JSONDecodeError:
-            continue
-        if isinstance(obj, dict):
-            entries.append(obj)
-    return entries
+        return
+
+
+def read_worklog(path: Path) -> list[dict]:
+    """Parse a worklog JSONL file into dict entries, skipping malformed lines."""
+    return list(iter_worklog(path))
 
 
 def _entry_command(entry: dict) -> str:
@@ -2090,9 +2918,17 @@ def _entry_failed(entry: dict) -> bool:
     return str(entry.get("event") or "") == "postToolUseFailure"
 
 
+# A first word with no quoting or escapes is what shlex would return anyway;
+# matching it directly keeps a long harvest off shlex's per-char tokenizer.
+_PLAIN_PROGRAM_RE = re.compile(r"[ \t\r\n]*([^\s'\"\\]+)(?:[ \t\r\n]|$)")
+
+
 def _program(command: str) -> str:
     if not command:
         return ""
+    plain = _PLAIN_PROGRAM_RE.match(command)
+    if plain:
+        return os.path.basename(plain.group(1))
     try:
         tokens = shlex.split(command)
     except ValueError:
@@ -2147,7 +2983,7 @@ def _evidence(entry: dict) -> dict:
 HARVESTABLE_NOTE_KINDS = (frozenset(CAPSULE_KINDS) - {"doc"}) | {"decision"}
 
 
-def detect_candidates(entries: list[dict], *, min_repeats: int = 2) -> list[dict]:
+def detect_candidates(entries: Iterable[dict], *, min_repeats: int = 2) -> list[dict]:
     """Deterministic worklog detectors returning durable-memory candidates.
 
     Four lenses over the worklog: (0) a structured `,agent-memory note`
@@ -2158,75 +2994,76 @@ def detect_candidates(entries: list[dict], *, min_repeats: int = 2) -> list[dict
     clean command run `min_repeats`+ times (`repeated_command`). No capsule
     is written; each candidate is a suggestion the caller must verify before
     remembering.
-    """
-    candidates: list[dict] = []
 
-    # 0. structured notes recorded via `,agent-memory note`. These are the
-    # idea/decision capture surface: unlike command lenses they carry intent,
-    # so one deliberate note is enough. Identical (kind, text) notes collapse.
+    All four lenses run in one pass over `entries` (any iterable, e.g.
+    `iter_worklog()`), keeping only per-signature counters and the first
+    few evidence entries, so state grows with distinct signatures rather
+    than with the worklog.
+    """
+    notes: list[dict] = []
     seen_notes: set[tuple[str, str]] = set()
+    # (prog, sig) -> [first failing entry, first later clean run or None]
+    fixes: dict[tuple[str, str], list] = {}
+    awaiting_fix: dict[str, list[tuple[str, str]]] = {}
+    # sig/norm -> [count, first evidence entries]
+    err_groups: dict[str, list] = {}
+    cmd_groups: dict[str, list] = {}
+
     for entry in entries:
-        if entry.get("event") != "note":
-            continue
-        note_kind = str(entry.get("note_kind") or "")
-        text = str(entry.get("text") or "").strip()
-        if note_kind not in HARVESTABLE_NOTE_KINDS or not text:
-            continue
-        note_key = (note_kind, text)
-        if note_key in seen_notes:
-            continue
-        seen_notes.add(note_key)
-        refs = str(entry.get("refs") or "")
-        body = text
-        if refs:
-            body += f" Refs: {refs}."
-        body += " Recorded deliberately via `,agent-memory note`; verify before remembering."
-        evidence = _evidence(entry)
-        evidence["note_kind"] = note_kind
-        candidates.append(
-            {
-                "detector": "structured_note",
-                "kind": "fact" if note_kind == "decision" else note_kind,
-                "title": f"{note_kind}: {text}"[:120],
-                "body": body,
-                "count": 1,
-                "evidence": [evidence],
-                "note_kind": note_kind,
-            }
-        )
+        # 0. structured notes recorded via `,agent-memory note`. These are the
+        # idea/decision capture surface: unlike command lenses they carry
+        # intent, so one deliberate note is enough. Identical (kind, text)
+        # notes collapse.
+        if entry.get("event") == "note":
+            note_kind = str(entry.get("note_kind") or "")
+            text = str(entry.get("text") or "").strip()
+            if note_kind in HARVESTABLE_NOTE_KINDS and text and (note_kind, text) not in seen_notes:
+                seen_notes.add((note_kind, text))
+                notes.append(_note_candidate(entry, note_kind, text))
 
-    # 1. failure -> later clean run of the same program. Anchor on a real
-    # error message (not a bare nonzero exit) and skip noise programs, so a
-    # compound investigation command that merely exits nonzero is not a lead.
-    seen_fix: set[tuple[str, str]] = set()
-    for i, entry in enumerate(entries):
-        if not entry.get("error"):
-            continue
         command = _entry_command(entry)
         prog = _program(command)
-        if not prog or prog in HARVEST_NOISE_PROGRAMS:
+        failed = _entry_failed(entry)
+
+        # 1. a clean run settles every failure of the same program still
+        # waiting for one; the first failure per (prog, sig) is the anchor.
+        if prog and not failed:
+            for key in awaiting_fix.pop(prog, ()):
+                fixes[key][1] = entry
+
+        if entry.get("error"):
+            sig = _error_signature(entry)
+            if sig:
+                # Anchor on a real error message (not a bare nonzero exit) and
+                # skip noise programs, so a compound investigation command that
+                # merely exits nonzero is not a lead.
+                if prog and prog not in HARVEST_NOISE_PROGRAMS and (prog, sig) not in fixes:
+                    fixes[(prog, sig)] = [entry, None]
+                    awaiting_fix.setdefault(prog, []).append((prog, sig))
+                # 2. recurring error signature (real error messages only).
+                _tally(err_groups, sig, entry)
+
+        # 3. repeated clean command. Multiline / very long compound one-liners
+        # are ad-hoc investigation scaffolding, not durable recipes.
+        if failed or not command or prog in HARVEST_NOISE_PROGRAMS or "\n" in command:
             continue
-        sig = _error_signature(entry)
-        if not sig:
-            continue
-        fix = None
-        for later in entries[i + 1 :]:
-            if _program(_entry_command(later)) == prog and not _entry_failed(later):
-                fix = later
-                break
+        norm = _normalize_command(command)
+        if 4 <= len(norm) <= 200:
+            _tally(cmd_groups, norm, entry)
+
+    candidates = notes
+    fixed_sigs: set[str] = set()
+    for (prog, sig), (entry, fix) in fixes.items():
         if fix is None:
             continue
-        key = (prog, sig)
-        if key in seen_fix:
-            continue
-        seen_fix.add(key)
+        fixed_sigs.add(sig)
         candidates.append(
             {
                 "detector": "failure_to_fix",
                 "kind": "gotcha",
                 "title": f"{prog} failure: {sig}"[:120],
                 "body": (
-                    f"`{command}` failed with: {sig}. A later `{_entry_command(fix)}` ran clean. "
+                    f"`{_entry_command(entry)}` failed with: {sig}. A later `{_entry_command(fix)}` ran clean. "
                     "Verify the root cause and the fix before trusting this."
                 ),
                 "count": 1,
@@ -2236,19 +3073,8 @@ def detect_candidates(entries: list[dict], *, min_repeats: int = 2) -> list[dict
             }
         )
 
-    fixed_sigs = {c["signature"] for c in candidates if "signature" in c}
-
-    # 2. recurring error signature (real error messages only).
-    err_groups: dict[str, list[dict]] = {}
-    for entry in entries:
-        if not entry.get("error"):
-            continue
-        sig = _error_signature(entry)
-        if not sig or sig in fixed_sigs:
-            continue
-        err_groups.setdefault(sig, []).append(entry)
-    for sig, group in err_groups.items():
-        if len(group) < min_repeats:
+    for sig, (count, group) in err_groups.items():
+        if count < min_repeats or sig in fixed_sigs:
             continue
         candidates.append(
             {
@@ -2256,36 +3082,18 @@ def detect_candidates(entries: list[dict], *, min_repeats: int = 2) -> list[dict
                 "kind": "gotcha",
                 "title": f"Recurring error: {sig}"[:120],
                 "body": (
-                    f"Seen {len(group)}x in this topic's worklog: {sig}. "
+                    f"Seen {count}x in this topic's worklog: {sig}. "
                     "Capture the root cause and the durable fix as a gotcha."
                 ),
-                "count": len(group),
-                "evidence": [_evidence(e) for e in group[:3]],
+                "count": count,
+                "evidence": [_evidence(e) for e in group],
                 "signature": sig,
                 "program": "",
             }
         )
 
-    # 3. repeated clean command.
-    cmd_groups: dict[str, list[dict]] = {}
-    for entry in entries:
-        if _entry_failed(entry):
-            continue
-        command = _entry_command(entry)
-        if not command:
-            continue
-        if _program(command) in HARVEST_NOISE_PROGRAMS:
-            continue
-        # Multiline / very long compound one-liners are ad-hoc investigation
-        # scaffolding, not durable recipes.
-        if "\n" in command:
-            continue
-        norm = _normalize_command(command)
-        if len(norm) < 4 or len(norm) > 200:
-            continue
-        cmd_groups.setdefault(norm, []).append(entry)
-    for norm, group in cmd_groups.items():
-        if len(group) < min_repeats:
+    for norm, (count, group) in cmd_groups.items():
+        if count < min_repeats:
             continue
         candidates.append(
             {
@@ -2293,11 +3101,11 @@ def detect_candidates(entries: list[dict], *, min_repeats: int = 2) -> list[dict
                 "kind": "recipe",
                 "title": f"Frequent command: {norm}"[:120],
                 "body": (
-                    f"`{norm}` ran {len(group)}x cleanly in this topic. "
+                    f"`{norm}` ran {count}x cleanly in this topic. "
                     "If it is a reusable procedure, capture it as a recipe."
                 ),
-                "count": len(group),
-                "evidence": [_evidence(e) for e in group[:3]],
+                "count": count,
+                "evidence": [_evidence(e) for e in group],
                 "signature": norm,
                 "program": _program(norm),
             }
@@ -2308,6 +3116,32 @@ def detect_candidates(entries: list[dict], *, min_repeats: int = 2) -> list[dict
     return candidates
 
 
+def _tally(groups: dict[str, list], key: str, entry: dict, keep: int = 3) -> None:
+    group = groups.setdefault(key, [0, []])
+    group[0] += 1
+    if len(group[1]) < keep:
+        group[1].append(entry)
+
+
+def _note_candidate(entry: dict, note_kind: str, text: str) -> dict:
+    refs = str(entry.get("refs") or "")
+    body = text
+    if refs:
+        body += f" Refs: {refs}."
+    body += " Recorded deliberately via `,agent-memory note`; verify before remembering."
+    evidence = _evidence(entry)
+    evidence["note_kind"] = note_kind
+    return {
+        "detector": "structured_note",
+        "kind": "fact" if note_kind == "decision" else note_kind,
+        "title": f"{note_kind}: {text}"[:120],
+        "body": body,
+        "count": 1,
+        "evidence": [evidence],
+        "note_kind": note_kind,
+    }
+
+
 _HARVEST_STOPWORDS = frozenset(
     {"the", "and", "for", "with", "from", "this", "that", "was", "are", "not", "ran", "cannot"}
 )
@@ -2396,6 +3230,30 @@ def print_capsule(capsule: Capsule, as_json: bool) -> None:
     print(f"{capsule.id}\t{capsule.kind}/{capsule.scope}\t{capsule.title}\t{capsule.source}\t{capsule.path}")
 
 
+def resident_call(home: Path, op: str, params: dict) -> dict | None:
+    """Forward one CLI op to a running `kb_worker.py` for this KB home.
+
+    Returns the worker response, or None when the command should run
+    in-process: resident mode off, no worker for this home, a worker that
+    asked for fallback, or a test/debug env that disables embedding or the
+    vec lane (the worker would not honor those flags from this process).
+    Never spawns a worker; `kb_client.py ensure` owns startup.
+    """
+    if any(os.environ.get(name) in ("1", "true", "yes") for name in ("AI_KB_DISABLE_EMBED", "AI_KB_DISABLE_VEC")):
+        return None
+    try:
+        import kb_client
+
+        spec = kb_client.RuntimeSpec(home=home)
+    except (ImportError, OSError, ValueError):
+        return None
+    connect_only = os.environ.get("AI_EMBED_CONNECT_ONLY", "").strip().lower() in ("1", "true", "yes", "on")
+    response = kb_client.call(spec, op, {**params, "connect_only": connect_only})
+    if response is None or (response.get("ok") is not True and response.get("error") != "value_error"):
+        return None
+    return response
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Local agent knowledgebase")
     parser.add_argument("--home", type=Path, help="Override AI_KB_HOME")
@@ -2492,6 +3350,9 @@ def build_parser() -> argparse.ArgumentParser:
         help="Domain tag (repeat for multiple); inferred tags are added on top",
     )
     ingest.add_argument("--max-bytes", type=int, default=1_000_000)
+    ingest.add_argument(
+        "--workers", type=int, default=None, help="Scan/read/hash/chunk threads (default: min(8, CPU count))"
+    )
     ingest.add_argument("--json", action="store_true")
 
     harvest = sub.add_parser(
@@ -2542,24 +3403,30 @@ def main(argv: list[str] | None = None) -> int:
         ]
         if degraded:
             print(f"warning: degraded capsule metadata: {'; '.join(degraded)}", file=sys.stderr)
+        fields = {
+            "kind": args.kind,
+            "scope": args.scope,
+            "source": args.source,
+            "tags": args.tags,
+            "workspace_path": args.workspace_path,
+            "project_id": args.project_id,
+            "domain_tags": args.domain_tags or [],
+            "confidence": args.confidence,
+            "verified_by": args.verified_by,
+            "supersedes": args.supersedes,
+            "refs": args.refs or [],
+            "embed_now": not args.no_embed,
+            "force": args.force,
+        }
+        resident = resident_call(kb.home, "remember", {"title": args.title, "body": args.body, **fields})
+        if resident is not None:
+            if resident.get("error"):
+                print(f"error: {resident.get('message')}", file=sys.stderr)
+                return 1
+            print_capsule(Capsule(**resident["capsule"]), args.json)
+            return 0
         try:
-            capsule = kb.remember(
-                args.title,
-                args.body,
-                kind=args.kind,
-                scope=args.scope,
-                source=args.source,
-                tags=args.tags,
-                workspace_path=args.workspace_path,
-                project_id=args.project_id,
-                domain_tags=args.domain_tags or [],
-                confidence=args.confidence,
-                verified_by=args.verified_by,
-                supersedes=args.supersedes,
-                refs=args.refs or [],
-                embed_now=not args.no_embed,
-                force=args.force,
-            )
+            capsule = kb.remember(args.title, args.body, **fields)
         except ValueError as err:
             print(f"error: {err}", file=sys.stderr)
             return 1
@@ -2579,16 +3446,19 @@ def main(argv: list[str] | None = None) -> int:
             parser.error("search requires a positional query or --query-stdin")
         if args.workspace_gate and not args.workspace:
             parser.error("--workspace-gate requires --workspace")
-        rows = kb.search(
-            query,
-            args.limit,
-            scope=args.scope,
-            kind=args.kind,
-            workspace=args.workspace,
-            domain=args.domain,
-            mode=args.mode,
-            workspace_gate=args.workspace_gate,
-        )
+        filters = {
+            "scope": args.scope,
+            "kind": args.kind,
+            "workspace": args.workspace,
+            "domain": args.domain,
+            "mode": args.mode,
+            "workspace_gate": args.workspace_gate,
+        }
+        resident = resident_call(kb.home, "search", {"query": query, "limit": args.limit, **filters})
+        if resident is not None and resident.get("error"):
+            print(f"error: {resident.get('message')}", file=sys.stderr)
+            return 1
+        rows = resident["rows"] if resident is not None else kb.search(query, args.limit, **filters)
         if args.json:
             print(json.dumps(rows, indent=2))
         else:
@@ -2597,9 +3467,15 @@ def main(argv: list[str] | None = None) -> int:
                     f"{row['id']}\t{row['kind']}/{row['scope']}\t"
                     f"{row['title']}\trrf={row['rrf_score']:.4f}\t{row['snippet']}"
                 )
+        if resident is None:
+            kb.fold_retrievals_if_backlogged()
         return 0
     if args.cmd == "get":
-        capsule = kb.get(args.id)
+        resident = resident_call(kb.home, "get", {"id": args.id})
+        if resident is not None and not resident.get("error"):
+            capsule = Capsule(**resident["capsule"]) if resident["capsule"] else None
+        else:
+            capsule = kb.get(args.id)
         if not capsule:
             print(f"not found: {args.id}", file=sys.stderr)
             return 1
@@ -2633,19 +3509,36 @@ def main(argv: list[str] | None = None) -> int:
                 f"duplicates_marked={summary.get('duplicates', 0)} "
                 f"decayed={summary.get('decayed', 0)} "
                 f"contradictions={len(summary.get('contradictions', []))} "
-                f"candidates_examined={summary.get('candidates_examined', 0)}"
+                f"candidates_examined={summary.get('candidates_examined', 0)} "
+                f"retrievals_folded={summary.get('retrievals_folded', 0)}"
             )
             for c in summary.get("contradictions", []):
                 print(f"  ! pair {c['a_id']} ({c['a_kind']}) <-> {c['b_id']} ({c['b_kind']}) cosine={c['cosine']}")
         return 0
     if args.cmd == "ingest":
+
+        def report(state: dict[str, int]) -> None:
+            print(
+                f"\ringest: files {state['files_done']}/{state['files_total']} chunks {state['chunks_done']}",
+                end="",
+                file=sys.stderr,
+                flush=True,
+            )
+
+        show_progress = sys.stderr.isatty()
         summary = kb.ingest_path(
             args.target,
             scope=args.scope,
             workspace_path=args.workspace,
             domain_tags=args.domain_tags,
             max_bytes=args.max_bytes,
+            workers=args.workers,
+            progress=report if show_progress else None,
         )
+        if show_progress and summary["files_ingested"]:
+            print(file=sys.stderr)
+        if summary["resumed"] and not args.json:
+            print("resumed interrupted ingest; committed files were skipped", file=sys.stderr)
         if args.json:
             print(json.dumps(summary, indent=2))
         else:
@@ -2653,7 +3546,10 @@ def main(argv: list[str] | None = None) -> int:
                 f"files_seen={summary['files_seen']} "
                 f"files_ingested={summary['files_ingested']} "
                 f"files_skipped_unchanged={summary['files_skipped_unchanged']} "
-                f"capsules_stored={summary['capsules_stored']}"
+                f"capsules_stored={summary['capsules_stored']} "
+                f"elapsed_seconds={summary['elapsed_seconds']} "
+                f"files_per_second={summary['files_per_second']} "
+                f"chunks_per_second={summary['chunks_per_second']}"
             )
         return 0
     if args.cmd == "harvest":
@@ -2678,8 +3574,15 @@ def main(argv: list[str] | None = None) -> int:
                 file=sys.stderr,
             )
             return 2
-        entries = read_worklog(worklog)
-        candidates = detect_candidates(entries, min_repeats=args.min_repeats)
+        scanned = 0
+
+        def counted(stream: Iterator[dict]) -> Iterator[dict]:
+            nonlocal scanned
+            for entry in stream:
+                scanned += 1
+                yield entry
+
+        candidates = detect_candidates(counted(iter_worklog(worklog)), min_repeats=args.min_repeats)
         suppress_known(kb, candidates, workspace)
         shown = [c for c in candidates if not c["known"]][: args.limit]
         suppressed = sum(1 for c in candidates if c["known"])
@@ -2692,7 +3595,7 @@ def main(argv: list[str] | None = None) -> int:
                         "topic": topic,
                         "worklog": str(worklog),
                         "worklog_exists": worklog.exists(),
-                        "entries": len(entries),
+                        "entries": scanned,
                         "suppressed_known": suppressed,
                         "candidates": candidates,
                     },
@@ -2705,9 +3608,9 @@ def main(argv: list[str] | None = None) -> int:
             return 0
         suffix = f", {suppressed} already in KB" if suppressed else ""
         if not shown:
-            print(f"harvest: {len(entries)} worklog entries, no new durable candidates{suffix}")
+            print(f"harvest: {scanned} worklog entries, no new durable candidates{suffix}")
             return 0
-        print(f"harvest: {len(shown)} candidate(s) from {len(entries)} worklog entries (topic {topic}){suffix}")
+        print(f"harvest: {len(shown)} candidate(s) from {scanned} worklog entries (topic {topic}){suffix}")
         for candidate in shown:
             print()
             print(f"[{candidate['detector']}] {candidate['title']}  (x{candidate['count']}, kind={candidate['kind']})")
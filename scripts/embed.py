@@ -8,8 +8,9 @@ through `embed_client.py`; this hot path never starts a process.
 
 Protocol with the runner is defined in `embed_runner.py`:
 
-    request:  {"model": str, "texts": list[str]}
-    response: {"model": str, "dim": int, "vectors": list[list[float]]}
+    request:  {"model": str, "texts": list[str], "format": "f32"}
+    response: float32 vector frame (see `embed_client.encode_vector_frame`)
+              | {"model": str, "dim": int, "vectors": list[list[float]]}
               | {"error": str}
 
 The default model is `BAAI/bge-small-en-v1.5` (33M params, 384-dim,
@@ -31,7 +32,6 @@ import os
 import shutil
 import struct
 import subprocess
-from dataclasses import dataclass
 from pathlib import Path
 
 DEFAULT_MODEL = "BAAI/bge-small-en-v1.5"
@@ -55,13 +55,41 @@ def resident_connect_only() -> bool:
     return os.environ.get("AI_EMBED_CONNECT_ONLY", "").strip().lower() in TRUE_VALUES
 
 
-@dataclass
 class EmbedResult:
-    """Single embed response payload."""
+    """Single embed response payload.
 
-    model: str
-    dim: int
-    vectors: list[list[float]]
+    Binary transports fill ``blobs`` (one packed float32 row per text, the
+    exact bytes the KB stores) and ``vectors`` is decoded on first access;
+    JSON transports fill ``vectors`` and ``blobs`` is packed on first
+    access. Either way a consumer pays only for the form it reads.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        dim: int,
+        vectors: list[list[float]] | None = None,
+        blobs: list[bytes] | None = None,
+    ) -> None:
+        self.model = model
+        self.dim = dim
+        self._vectors = vectors
+        self._blobs = blobs
+
+    @property
+    def vectors(self) -> list[list[float]]:
+        if self._vectors is None:
+            self._vectors = [unpack_vector(blob) for blob in self._blobs or []]
+        return self._vectors
+
+    @property
+    def blobs(self) -> list[bytes]:
+        if self._blobs is None:
+            self._blobs = [pack_vector(vector) for vector in self._vectors or []]
+        return self._blobs
+
+    def __repr__(self) -> str:
+        return f"EmbedResult(model={self.model!r}, dim={self.dim}, count={len(self._blobs or self._vectors or [])})"
 
 
 class EmbedderUnavailable(RuntimeError):
@@ -138,6 +166,19 @@ class Embedder:
         except Exception:
             return []
 
+    def embed_blobs(self, texts: list[str]) -> list[bytes]:
+        """Embed a batch straight to packed float32 BLOBs. Returns [] on any failure.
+
+        The storage-side twin of `embed`: over the binary transports the
+        rows go from the wire into the KB without a float-list round-trip.
+        """
+        if not texts:
+            return []
+        try:
+            return self.embed_strict(texts).blobs
+        except Exception:
+            return []
+
     def embed_one(self, text: str) -> list[float]:
         """Embed a single text. Returns [] on any failure."""
         if not text:
@@ -159,17 +200,28 @@ class Embedder:
             spec = self._resident_runtime_spec()
             if spec is None:
                 raise EmbedderUnavailable("resident embedder unavailable")
-            payload = embed_client.embed(spec, texts, connect_only=True)
+            # A single text is a query on someone's hot path; anything
+            # larger is a backfill that yields to it in the worker queue.
+            payload = embed_client.embed(
+                spec, texts, connect_only=True, priority="interactive" if len(texts) == 1 else "bulk"
+            )
             if payload.get("ok") is not True:
                 raise EmbedderUnavailable("resident embedder unavailable")
+            dim = int(payload["dim"])
+            if "rows" in payload:
+                return EmbedResult(
+                    model=str(payload["model"]),
+                    dim=dim,
+                    blobs=embed_client.split_rows(payload["rows"], dim),
+                )
             return EmbedResult(
                 model=str(payload["model"]),
-                dim=int(payload["dim"]),
+                dim=dim,
                 vectors=[[float(value) for value in vector] for vector in payload["vectors"]],
             )
         if not self.is_available():
             raise EmbedderUnavailable(f"embedder not available: uv={uv_binary()!r} runner={self.runner!s}")
-        request = {"model": self.model, "texts": texts}
+        request = {"model": self.model, "texts": texts, "format": "f32"}
         cmd = [
             uv_binary() or "uv",
             "run",
@@ -181,22 +233,50 @@ class Embedder:
         try:
             proc = subprocess.run(
                 cmd,
-                input=json.dumps(request),
+                input=json.dumps(request).encode("utf-8"),
                 capture_output=True,
-                text=True,
                 timeout=self.timeout,
             )
         except (FileNotFoundError, subprocess.TimeoutExpired) as err:
             raise EmbedderUnavailable(f"runner spawn failed: {err}") from err
 
+        stdout = proc.stdout or b""
         if proc.returncode != 0:
+            stderr = (proc.stderr or b"").decode("utf-8", "replace").strip()
             raise EmbedderUnavailable(
-                f"runner exited {proc.returncode}: stderr={proc.stderr.strip()!r} stdout={proc.stdout.strip()!r}"
+                f"runner exited {proc.returncode}: stderr={stderr!r} "
+                f"stdout={stdout.decode('utf-8', 'replace').strip()!r}"
+            )
+        return self._parse_runner_stdout(stdout)
+
+    def _parse_runner_stdout(self, stdout: bytes) -> EmbedResult:
+        """Decode the runner reply: a float32 frame, else the last JSON line.
+
+        Library chatter on stdout may precede either form, so the frame is
+        located by its magic rather than assumed at offset 0. Runners that
+        predate binary framing ignore ``format`` and answer in JSON.
+        """
+        import embed_client
+
+        start = stdout.find(embed_client.F32_FRAME_MAGIC)
+        if start >= 0:
+            try:
+                lengths = embed_client.frame_lengths(stdout[start:])
+                end = start + lengths[1] if lengths and lengths[1] >= 0 else len(stdout)
+                header, rows = embed_client.decode_vector_frame(stdout[start:end])
+            except ValueError as err:
+                raise EmbedderUnavailable(f"runner emitted a bad vector frame: {err}") from err
+            dim = int(header.get("dim", 0))
+            return EmbedResult(
+                model=str(header.get("model", self.model)),
+                dim=dim,
+                blobs=embed_client.split_rows(rows, dim),
             )
+        text = stdout.decode("utf-8", "replace")
         try:
-            payload = json.loads(proc.stdout.strip().splitlines()[-1])
+            payload = json.loads(text.strip().splitlines()[-1])
         except (json.JSONDecodeError, IndexError) as err:
-            raise EmbedderUnavailable(f"runner emitted unparseable stdout: {err} stdout={proc.stdout!r}") from err
+            raise EmbedderUnavailable(f"runner emitted unparseable stdout: {err} stdout={text!r}") from err
         if "error" in payload:
             raise EmbedderUnavailable(f"runner error: {payload['error']}")
         return EmbedResult(
@@ -232,17 +312,9 @@ def cosine(a: list[float], b: list[float]) -> float:
     """Cosine similarity between two equal-length vectors.
 
     Returns 0.0 if either side is empty or lengths differ. We never
-    raise here because retrieval is best-effort.
+    raise here because retrieval is best-effort. Bulk callers should
+    build a `similarity.VectorMatrix` instead of calling this per pair.
     """
-    if not a or not b or len(a) != len(b):
-        return 0.0
-    dot = 0.0
-    na = 0.0
-    nb = 0.0
-    for x, y in zip(a, b):
-        dot += x * y
-        na += x * x
-        nb += y * y
-    if na <= 0 or nb <= 0:
-        return 0.0
-    return dot / ((na**0.5) * (nb**0.5))
+    from similarity import cosine as _cosine  # sibling module, see module docstring
+
+    return _cosine(a, b)
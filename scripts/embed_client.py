@@ -4,6 +4,12 @@
 The per-turn path uses ``embed(..., connect_only=True)`` and never calls
 ``ensure``. Session-start adapters may call the bounded ``ensure`` operation.
 Raw texts travel only inside a private Unix socket request.
+
+Vectors come back in the binary frame (``encode_vector_frame``) when the
+request asks for ``"format": "f32"``: a magic tag, a little-endian u32
+header length, a JSON header (``count``/``dim`` plus identity fields), then
+``count * dim`` raw little-endian float32 values. Errors, and workers from
+older generations that ignore the field, answer with one JSON line.
 """
 
 from __future__ import annotations
@@ -17,9 +23,11 @@ import os
 import shutil
 import socket
 import stat
+import struct
 import subprocess
 import sys
 import time
+from array import array
 from pathlib import Path
 
 DEFAULT_MODEL = "BAAI/bge-small-en-v1.5"
@@ -39,6 +47,58 @@ MAX_DISCOVERY_SOCKETS = 32
 TRUE_VALUES = {"1", "true", "yes", "on"}
 
 
+F32_FRAME_MAGIC = b"\0f32v1\0"
+_FRAME_PREFIX = len(F32_FRAME_MAGIC) + 4
+
+
+def encode_vector_frame(header: dict, rows: bytes) -> bytes:
+    """Frame ``rows`` (packed little-endian float32) behind a JSON header."""
+    encoded = json.dumps(header, separators=(",", ":")).encode()
+    return F32_FRAME_MAGIC + struct.pack("<I", len(encoded)) + encoded + rows
+
+
+def frame_lengths(data: bytes) -> tuple[int, int] | None:
+    """``(header_end, total_length)`` of a frame at the start of ``data``.
+
+    ``None`` until enough bytes are present to know; ``total_length`` is
+    -1 when only the header length is known so far.
+    """
+    if len(data) < _FRAME_PREFIX:
+        return None
+    header_end = _FRAME_PREFIX + struct.unpack("<I", data[len(F32_FRAME_MAGIC) : _FRAME_PREFIX])[0]
+    if len(data) < header_end:
+        return header_end, -1
+    header = json.loads(data[_FRAME_PREFIX:header_end])
+    if not isinstance(header, dict):
+        raise ValueError("frame header is not an object")
+    count, dim = header.get("count"), header.get("dim")
+    if not all(isinstance(v, int) and not isinstance(v, bool) and v >= 0 for v in (count, dim)):
+        raise ValueError("frame header lacks count/dim")
+    return header_end, header_end + count * dim * 4
+
+
+def decode_vector_frame(data: bytes) -> tuple[dict, bytes]:
+    """Split one complete frame into its header and float32 row bytes."""
+    if not data.startswith(F32_FRAME_MAGIC):
+        raise ValueError("not a vector frame")
+    lengths = frame_lengths(data)
+    if lengths is None or lengths[1] < 0 or len(data) != lengths[1]:
+        raise ValueError("truncated vector frame")
+    return json.loads(data[_FRAME_PREFIX : lengths[0]]), data[lengths[0] :]
+
+
+def split_rows(rows: bytes, dim: int) -> list[bytes]:
+    """Cut packed float32 rows into one BLOB per vector."""
+    width = dim * 4
+    return [rows[offset : offset + width] for offset in range(0, len(rows), width)] if width else []
+
+
+def finite_rows(rows: bytes) -> bool:
+    values = array("f")
+    values.frombytes(rows)
+    return all(map(math.isfinite, values))
+
+
 def _env_float(name: str, default: float) -> float:
     try:
         value = float(os.environ.get(name, str(default)))
@@ -269,7 +329,16 @@ def _request_socket(
         client.settimeout(_remaining_timeout(deadline))
         client.sendall(encoded)
         data = bytearray()
-        while b"\n" not in data:
+        while True:
+            if data.startswith(F32_FRAME_MAGIC):
+                lengths = frame_lengths(bytes(data))
+                if lengths is not None and lengths[1] > MAX_RESPONSE_BYTES:
+                    raise ValueError("response exceeds protocol limit")
+                if lengths is not None and 0 <= lengths[1] <= len(data):
+                    header, rows = decode_vector_frame(bytes(data[: lengths[1]]))
+                    return {**header, "rows": rows}
+            elif b"\n" in data:
+                break
             if len(data) >= MAX_RESPONSE_BYTES:
                 raise ValueError("response exceeds protocol limit")
             client.settimeout(_remaining_timeout(deadline))
@@ -609,7 +678,14 @@ def _valid_vectors(vectors: object, *, count: int, dimension: int) -> bool:
     return True
 
 
-def embed(spec: RuntimeSpec, texts: list[str], *, connect_only: bool) -> dict:
+def embed(spec: RuntimeSpec, texts: list[str], *, connect_only: bool, priority: str = "interactive") -> dict:
+    """Embed up to 8 texts on the resident worker.
+
+    ``priority`` picks the worker queue lane: ``interactive`` requests are
+    always batched ahead of ``bulk`` ones. A current worker answers with
+    packed float32 ``rows`` (binary frame); an older generation answers
+    with JSON ``vectors``. Callers handle both.
+    """
     if not texts or len(texts) > 8 or not all(isinstance(text, str) and 0 < len(text) <= 4096 for text in texts):
         return {"available": False, "vectors": [], "reason": "invalid_request"}
     if not connect_only:
@@ -620,7 +696,7 @@ def embed(spec: RuntimeSpec, texts: list[str], *, connect_only: bool) -> dict:
     try:
         response = request(
             spec,
-            {"op": "embed", "generation": spec.generation, "texts": texts},
+            {"op": "embed", "generation": spec.generation, "texts": texts, "priority": priority, "format": "f32"},
             timeout=CONNECT_ONLY_REQUEST_TIMEOUT_SECONDS if connect_only else REQUEST_TIMEOUT_SECONDS,
         )
     except (OSError, RuntimeError, ValueError, socket.timeout, json.JSONDecodeError):
@@ -630,9 +706,17 @@ def embed(spec: RuntimeSpec, texts: list[str], *, connect_only: bool) -> dict:
         or response.get("generation") != spec.generation
         or response.get("model") != spec.model
         or response.get("dim") != spec.dimension
-        or not _valid_vectors(response.get("vectors"), count=len(texts), dimension=spec.dimension)
     ):
         return {"available": False, "vectors": [], "reason": "invalid_response"}
+    rows = response.get("rows")
+    if isinstance(rows, bytes):
+        # Binary frame: one length check and one C-level finiteness pass
+        # instead of a JSON parse and per-element type checks.
+        if response.get("count") != len(texts) or len(rows) != len(texts) * spec.dimension * 4 or not finite_rows(rows):
+            return {"available": False, "vectors": [], "reason": "invalid_response"}
+        return response
+    if not _valid_vectors(response.get("vectors"), count=len(texts), dimension=spec.dimension):
+        return {"available": False, "vectors": [], "reason": "invalid_response"}
     return response
 
 
@@ -19,6 +19,11 @@ Protocol (request/response over stdio, single round-trip):
     stdout (one JSON object on failure):
         {"error": "<message>"}
 
+    With `"format": "f32"` in the request, success is instead one binary
+    vector frame (see `embed_client.encode_vector_frame`): a JSON header
+    `{"model", "dim", "count"}` followed by the raw little-endian float32
+    rows, ready to store as BLOBs. Errors stay JSON.
+
 Exit code: 0 on success, 1 on failure.
 
 This script intentionally lives outside the orchestrator's stdlib-only
@@ -77,6 +82,23 @@ def main() -> None:
         _eprint_and_exit(f"embed failed: {err}")
 
     dim = len(vectors[0]) if vectors and vectors[0] else 0
+    if req.get("format") == "f32" and all(len(v) == dim for v in vectors):
+        import struct
+        from pathlib import Path
+
+        sys.path.insert(0, str(Path(__file__).resolve().parent))
+        from embed_client import encode_vector_frame
+
+        flat = [value for vector in vectors for value in vector]
+        sys.stdout.flush()
+        sys.stdout.buffer.write(
+            encode_vector_frame(
+                {"model": model_id, "dim": dim, "count": len(vectors)},
+                struct.pack(f"<{len(flat)}f", *flat),
+            )
+        )
+        sys.stdout.buffer.flush()
+        return
     print(json.dumps({"model": model_id, "dim": dim, "vectors": vectors}))
 
 
@@ -5,7 +5,16 @@
 #   "fastembed>=0.3,<1.0",
 # ]
 # ///
-"""Private line-JSON FastEmbed worker. Never logs or echoes request text."""
+"""Private line-JSON FastEmbed worker. Never logs or echoes request text.
+
+Connections are served concurrently, one short-lived handler thread each
+(bounded by `MAX_CONNECTIONS`). Embed requests go through `EmbedQueue`: a
+single model thread drains two priority lanes, coalescing requests that
+arrive within `COALESCE_SECONDS` of each other into one model batch.
+`interactive` requests (the default; per-turn recall) always drain before
+`bulk` ones (multi-text backfills), and bulk-only batches are capped small
+so an interactive arrival never waits behind a long backfill batch.
+"""
 
 from __future__ import annotations
 
@@ -15,13 +24,26 @@ import math
 import os
 import socket
 import stat
+import struct
+import sys
 import threading
 import time
+from collections import deque
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from embed_client import encode_vector_frame  # noqa: E402
+
 MAX_REQUEST_BYTES = 64 * 1024
 STARTUP_TIMEOUT_SECONDS = 120.0
 REQUEST_TIMEOUT_SECONDS = 3.0
+JOB_TIMEOUT_SECONDS = 10.0
+MAX_CONNECTIONS = 32
+COALESCE_SECONDS = 0.004
+MAX_BATCH_TEXTS = 64
+MAX_BULK_BATCH_TEXTS = 16
+PRIORITIES = ("interactive", "bulk")
 
 
 def parse_args() -> argparse.Namespace:
@@ -81,6 +103,146 @@ def _valid_texts(value: object) -> bool:
     )
 
 
+class EmbedJob:
+    """One embed request waiting on the model thread."""
+
+    __slots__ = ("texts", "priority", "done", "vectors", "error")
+
+    def __init__(self, texts: list[str], priority: str) -> None:
+        self.texts = texts
+        self.priority = priority
+        self.done = threading.Event()
+        self.vectors: list[list[float]] | None = None
+        self.error: str | None = None
+
+
+class EmbedQueue:
+    """Two-lane coalescing queue in front of a single-threaded model.
+
+    `submit` is called from connection threads; `run` is the only place
+    the model is touched. Each round waits up to `coalesce_seconds` for
+    more work once the first job arrives, then takes whole jobs —
+    interactive lane first — up to the batch cap (bulk texts never past the
+    smaller bulk cap) and runs them as one `model.embed` call.
+    """
+
+    def __init__(
+        self,
+        model,
+        dimension: int,
+        *,
+        coalesce_seconds: float = COALESCE_SECONDS,
+        max_batch: int = MAX_BATCH_TEXTS,
+        max_bulk_batch: int = MAX_BULK_BATCH_TEXTS,
+    ) -> None:
+        self._model = model
+        self._dimension = dimension
+        self._coalesce_seconds = coalesce_seconds
+        self._max_batch = max_batch
+        self._max_bulk_batch = max_bulk_batch
+        self._lanes: dict[str, deque[EmbedJob]] = {name: deque() for name in PRIORITIES}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._batches = 0
+        self._texts = 0
+        self._coalesced = 0
+        self._max_seen = 0
+
+    def submit(self, texts: list[str], priority: str = "interactive") -> EmbedJob:
+        job = EmbedJob(texts, priority if priority in PRIORITIES else "interactive")
+        with self._cond:
+            if self._closed:
+                job.error = "shutting_down"
+                job.done.set()
+                return job
+            self._lanes[job.priority].append(job)
+            self._cond.notify_all()
+        return job
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _pending_texts(self) -> int:
+        return sum(len(job.texts) for lane in self._lanes.values() for job in lane)
+
+    def _take_batch(self) -> list[EmbedJob]:
+        """Interactive jobs up to `max_batch` texts, then bulk jobs into the
+        remaining room but never more than `max_bulk_batch` bulk texts, so a
+        query riding along does not widen the bulk lane's batch."""
+        interactive, bulk = self._lanes["interactive"], self._lanes["bulk"]
+        batch: list[EmbedJob] = []
+        size = bulk_size = 0
+        while interactive and (not batch or size + len(interactive[0].texts) <= self._max_batch):
+            job = interactive.popleft()
+            batch.append(job)
+            size += len(job.texts)
+        while bulk and (
+            not batch
+            or (
+                size + len(bulk[0].texts) <= self._max_batch
+                and bulk_size + len(bulk[0].texts) <= self._max_bulk_batch
+            )
+        ):
+            job = bulk.popleft()
+            batch.append(job)
+            size += len(job.texts)
+            bulk_size += len(job.texts)
+        return batch
+
+    def stats(self) -> dict[str, object]:
+        with self._cond:
+            return {
+                "queue": {name: len(lane) for name, lane in self._lanes.items()},
+                "batches": self._batches,
+                "batched_texts": self._texts,
+                "coalesced_requests": self._coalesced,
+                "max_batch": self._max_seen,
+                "mean_batch": round(self._texts / self._batches, 2) if self._batches else 0.0,
+            }
+
+    def run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or self._pending_texts() > 0)
+                if self._closed and not self._pending_texts():
+                    return
+                # Coalescing window: give concurrent callers a few ms to
+                # join this batch unless it is already full.
+                self._cond.wait_for(
+                    lambda: self._closed or self._pending_texts() >= self._max_batch,
+                    timeout=self._coalesce_seconds,
+                )
+                batch = self._take_batch()
+            self._embed(batch)
+
+    def _embed(self, batch: list[EmbedJob]) -> None:
+        texts = [text for job in batch for text in job.texts]
+        try:
+            vectors = [list(map(float, vector)) for vector in self._model.embed(texts)]
+        except Exception:
+            vectors = None
+        offset = 0
+        for job in batch:
+            chunk = vectors[offset : offset + len(job.texts)] if vectors is not None else None
+            offset += len(job.texts)
+            if chunk is None:
+                job.error = "embed_failed"
+            elif len(chunk) == len(job.texts) and all(
+                len(vector) == self._dimension and all(math.isfinite(value) for value in vector) for vector in chunk
+            ):
+                job.vectors = chunk
+            else:
+                job.error = "invalid_vectors"
+            job.done.set()
+        with self._cond:
+            self._batches += 1
+            self._texts += len(texts)
+            self._coalesced += len(batch) if len(batch) > 1 else 0
+            self._max_seen = max(self._max_seen, len(texts))
+
+
 def _unlink_owned_socket(path: Path, identity: tuple[int, int]) -> None:
     try:
         info = path.lstat()
@@ -160,97 +322,131 @@ def main() -> int:
     server.settimeout(0.2)
     _unlink_start_marker(start_marker)
 
-    state: dict[str, object] = {"model": None, "error": None}
+    state: dict[str, object] = {"queue": None, "error": None}
     loaded = threading.Event()
+    stopping = threading.Event()
+    activity = threading.Lock()
+    clock = {"last_active": time.monotonic(), "in_flight": 0}
+    slots = threading.BoundedSemaphore(MAX_CONNECTIONS)
 
     def load_model() -> None:
         try:
             from fastembed import TextEmbedding
 
-            state["model"] = TextEmbedding(model_name=args.model)
+            queue = EmbedQueue(TextEmbedding(model_name=args.model), args.dimension)
+            threading.Thread(target=queue.run, daemon=True).start()
+            state["queue"] = queue
         except Exception:
             state["error"] = "model_load_failed"
         finally:
             loaded.set()
 
+    def respond(request: object) -> dict | bytes:
+        if not isinstance(request, dict):
+            return {"error": "invalid_request"}
+        ready = loaded.is_set() and state["error"] is None
+        if request.get("op") == "ping":
+            response = {
+                "ok": ready,
+                "status": "ready" if ready else "starting",
+                "generation": args.generation,
+                "model": args.model,
+                "dim": args.dimension,
+                "pid": os.getpid(),
+            }
+            if state["queue"] is not None:
+                response.update(state["queue"].stats())
+            return response
+        if request.get("generation") != args.generation:
+            return {"error": "generation_mismatch"}
+        if request.get("op") == "shutdown":
+            stopping.set()
+            return {"ok": True, "pid": os.getpid()}
+        if request.get("op") != "embed":
+            return {"error": "unknown_op"}
+        if not loaded.is_set() or state["queue"] is None:
+            return {"error": "starting"}
+        if not _valid_texts(request.get("texts")):
+            return {"error": "invalid_texts"}
+        job = state["queue"].submit(request["texts"], str(request.get("priority") or "interactive"))
+        if not job.done.wait(JOB_TIMEOUT_SECONDS):
+            return {"error": "timeout"}
+        if job.error is not None:
+            return {"error": job.error}
+        response = {"ok": True, "generation": args.generation, "model": args.model, "dim": args.dimension}
+        if request.get("format") == "f32":
+            # Negotiated binary frame: raw little-endian float32 rows the
+            # caller can store as BLOBs without a JSON round-trip.
+            flat = [value for vector in job.vectors for value in vector]
+            return encode_vector_frame({**response, "count": len(job.vectors)}, struct.pack(f"<{len(flat)}f", *flat))
+        return {**response, "vectors": job.vectors}
+
+    def handle(conn: socket.socket) -> None:
+        try:
+            with conn:
+                try:
+                    raw, framing_error = receive_line(conn)
+                    response = {"error": framing_error} if framing_error else respond(json.loads(raw or b""))
+                except (OSError, ValueError, json.JSONDecodeError, TypeError):
+                    response = {"error": "invalid_request"}
+                try:
+                    if isinstance(response, bytes):
+                        conn.sendall(response)
+                    else:
+                        _send(conn, response)
+                except OSError:
+                    pass
+        finally:
+            with activity:
+                clock["in_flight"] -= 1
+                clock["last_active"] = time.monotonic()
+            slots.release()
+
     threading.Thread(target=load_model, daemon=True).start()
     started_at = time.monotonic()
-    last_active = started_at
     ready_observed = False
-    running = True
     try:
-        while running:
+        while not stopping.is_set():
             now = time.monotonic()
             if not loaded.is_set() and now - started_at >= STARTUP_TIMEOUT_SECONDS:
                 break
             if loaded.is_set() and state["error"] is not None:
                 break
-            if loaded.is_set() and not ready_observed:
-                ready_observed = True
-                last_active = now
-            if loaded.is_set() and now - last_active >= args.idle_seconds:
+            with activity:
+                if loaded.is_set() and not ready_observed:
+                    ready_observed = True
+                    clock["last_active"] = now
+                idle = loaded.is_set() and not clock["in_flight"] and now - clock["last_active"] >= args.idle_seconds
+            if idle:
                 break
             try:
                 conn, _ = server.accept()
             except socket.timeout:
                 continue
-            last_active = time.monotonic()
-            with conn:
-                try:
-                    raw, framing_error = receive_line(conn)
-                    if framing_error:
-                        response = {"error": framing_error}
-                    else:
-                        request = json.loads(raw or b"")
-                        if not isinstance(request, dict):
-                            response = {"error": "invalid_request"}
-                        elif request.get("op") == "ping":
-                            response = {
-                                "ok": loaded.is_set() and state["error"] is None,
-                                "status": "ready" if loaded.is_set() and state["error"] is None else "starting",
-                                "generation": args.generation,
-                                "model": args.model,
-                                "dim": args.dimension,
-                                "pid": os.getpid(),
-                            }
-                        elif request.get("generation") != args.generation:
-                            response = {"error": "generation_mismatch"}
-                        elif request.get("op") == "shutdown":
-                            response = {"ok": True, "pid": os.getpid()}
-                            running = False
-                        elif request.get("op") != "embed":
-                            response = {"error": "unknown_op"}
-                        elif not loaded.is_set() or state["model"] is None:
-                            response = {"error": "starting"}
-                        elif not _valid_texts(request.get("texts")):
-                            response = {"error": "invalid_texts"}
-                        else:
-                            model = state["model"]
-                            vectors = [list(map(float, vector)) for vector in model.embed(request["texts"])]
-                            valid = all(
-                                len(vector) == args.dimension and all(math.isfinite(value) for value in vector)
-                                for vector in vectors
-                            )
-                            response = (
-                                {
-                                    "ok": True,
-                                    "generation": args.generation,
-                                    "model": args.model,
-                                    "dim": args.dimension,
-                                    "vectors": vectors,
-                                }
-                                if valid
-                                else {"error": "invalid_vectors"}
-                            )
-                except (OSError, ValueError, json.JSONDecodeError, TypeError):
-                    response = {"error": "invalid_request"}
-                try:
-                    _send(conn, response)
-                except OSError:
-                    pass
+            if not slots.acquire(blocking=False):
+                with conn:
+                    try:
+                        _send(conn, {"error": "busy"})
+                    except OSError:
+                        pass
+                continue
+            with activity:
+                clock["in_flight"] += 1
+                clock["last_active"] = time.monotonic()
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
     finally:
         server.close()
         _unlink_owned_socket(socket_path, socket_identity)
+        # Let accepted connections (e.g. the shutdown caller) get their
+        # reply before the daemon handler threads die with the process.
+        drain_deadline = time.monotonic() + 1.0
+        while time.monotonic() < drain_deadline:
+            with activity:
+                if not clock["in_flight"]:
+                    break
+            time.sleep(0.01)
+        if state["queue"] is not None:
+            state["queue"].close()
     return 0
 
 
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""Secure generation-specific client for the resident ai-kb query worker.
+
+Mirrors ``embed_client.py``: one private Unix socket per generation, a
+bounded ``ensure`` for session-start warm-up, and connect-only calls for the
+hot path. ``call`` never spawns a worker; it returns ``None`` whenever the
+resident worker is absent or asks the caller to fall back to the in-process
+``KnowledgeBase``, so every caller keeps its current direct path.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import socket
+import stat
+import sys
+import time
+from pathlib import Path
+
+import embed_client
+
+PROTOCOL_VERSION = "1"
+DEFAULT_IDLE_SECONDS = 600.0
+DEFAULT_START_TIMEOUT_SECONDS = 8.0
+REQUEST_TIMEOUT_SECONDS = 5.0
+CONNECT_TIMEOUT_SECONDS = 0.12
+MAX_REQUEST_BYTES = 64 * 1024
+MAX_SOCKET_PATH_BYTES = 100
+FALSE_VALUES = {"0", "false", "no", "off"}
+# Worker answers that mean "serve this one yourself" rather than a failure.
+FALLBACK_ERRORS = frozenset({"embedder_unavailable", "generation_mismatch", "starting"})
+
+
+def default_home() -> Path:
+    """Same resolution as ``ai_kb.default_home`` without importing the KB."""
+    data_home = Path(os.environ.get("XDG_DATA_HOME", Path.home() / ".local" / "share"))
+    return Path(os.environ.get("AI_KB_HOME", data_home / "ai-kb")).expanduser()
+
+
+def default_runtime_dir() -> Path:
+    override = os.environ.get("AI_KB_RUNTIME_DIR")
+    if override:
+        return Path(override).expanduser()
+    runtime_home = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_home:
+        return Path(runtime_home) / "ai-kb"
+    cache_home = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    return cache_home / "ai-kb-runtime"
+
+
+def resident_enabled() -> bool:
+    """`AI_KB_RESIDENT=0` pins every caller to its direct in-process path."""
+    return os.environ.get("AI_KB_RESIDENT", "").strip().lower() not in FALSE_VALUES
+
+
+def _file_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest() if path.is_file() else "missing"
+
+
+def kb_module_path(directory: Path) -> Path:
+    """The KB module beside the worker: `ai_kb.py` in the repo, `main.py` once deployed."""
+    source = directory / "ai_kb.py"
+    return source if source.is_file() else directory / "main.py"
+
+
+def _generation(protocol_version: str, worker: Path, home: Path) -> str:
+    # The worker serves the KB module in-process, so a KB code change must
+    # retire the running generation just like a worker change does.
+    identity = "\0".join(
+        [
+            protocol_version,
+            _file_digest(worker),
+            _file_digest(kb_module_path(worker.parent)),
+            os.fspath(home),
+        ]
+    ).encode()
+    return hashlib.sha256(identity).hexdigest()[:20]
+
+
+class RuntimeSpec:
+    """Resolved worker identity and private runtime paths for one KB home."""
+
+    def __init__(
+        self,
+        *,
+        home: Path | str | None = None,
+        runtime_dir: Path | str | None = None,
+        idle_seconds: float | None = None,
+        protocol_version: str = PROTOCOL_VERSION,
+        worker: Path | str | None = None,
+    ) -> None:
+        self.home = (Path(home) if home is not None else default_home()).expanduser().resolve()
+        self.runtime_dir = Path(runtime_dir) if runtime_dir is not None else default_runtime_dir()
+        self.idle_seconds = (
+            idle_seconds
+            if idle_seconds is not None
+            else embed_client._env_float("AI_KB_IDLE_SECONDS", DEFAULT_IDLE_SECONDS)
+        )
+        self.protocol_version = protocol_version
+        self.worker = Path(worker) if worker is not None else Path(__file__).with_name("kb_worker.py")
+        if self.idle_seconds <= 0 or not self.protocol_version:
+            raise ValueError("invalid resident ai-kb runtime specification")
+        self.generation = _generation(self.protocol_version, self.worker, self.home)
+        self.socket_path = self.runtime_dir / f"kb-{self.generation}.sock"
+        self.lock_path = self.runtime_dir / f"start-{self.generation}.lock"
+        self.start_marker_path = self.runtime_dir / f"starting-{self.generation}.json"
+
+
+def secure_runtime_root(spec: RuntimeSpec, *, create: bool = True) -> None:
+    embed_client.secure_runtime_dir(spec.runtime_dir, create=create)
+    if len(os.fsencode(spec.socket_path)) > MAX_SOCKET_PATH_BYTES:
+        raise RuntimeError("runtime socket path is too long")
+
+
+def request(spec: RuntimeSpec, payload: dict, *, timeout: float = REQUEST_TIMEOUT_SECONDS) -> dict:
+    return embed_client._request_socket(spec.runtime_dir, spec.socket_path, payload, timeout=timeout)
+
+
+def _probe(spec: RuntimeSpec, *, timeout: float = CONNECT_TIMEOUT_SECONDS) -> tuple[str, dict | None]:
+    try:
+        response = request(spec, {"op": "ping"}, timeout=timeout)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return "stale", None
+    except socket.timeout:
+        return "starting", None
+    except (ConnectionError, OSError, RuntimeError, ValueError, json.JSONDecodeError):
+        return "invalid", None
+    if response.get("generation") != spec.generation or response.get("home") != os.fspath(spec.home):
+        return "invalid", response
+    if response.get("ok") is True and response.get("status") == "ready":
+        pid = response.get("pid")
+        if isinstance(pid, int) and not isinstance(pid, bool) and pid > 0:
+            return "ready", response
+    return "invalid", response
+
+
+def ping(spec: RuntimeSpec) -> dict | None:
+    status_value, response = _probe(spec)
+    return response if status_value == "ready" else None
+
+
+def call(
+    spec: RuntimeSpec,
+    op: str,
+    params: dict,
+    *,
+    timeout: float = REQUEST_TIMEOUT_SECONDS,
+) -> dict | None:
+    """Send one KB op to an already-running worker; never spawns.
+
+    Returns the worker response, or ``None`` when the caller should serve
+    the request itself: resident mode disabled, no live socket, or the
+    worker answered with a fallback error (e.g. it has no warm embedder but
+    the caller could still spawn one). A worker that accepted the request
+    and then failed or timed out yields ``{"error": ...}`` so hot-path
+    callers do not pay for the same query twice.
+    """
+    if not resident_enabled():
+        return None
+    payload = {"op": op, "generation": spec.generation, "params": params}
+    if len(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()) >= MAX_REQUEST_BYTES:
+        return None
+    try:
+        response = request(spec, payload, timeout=timeout)
+    except (FileNotFoundError, ConnectionRefusedError, RuntimeError):
+        return None
+    except socket.timeout:
+        return {"error": "timeout"}
+    except (ConnectionError, OSError, ValueError, json.JSONDecodeError):
+        return {"error": "unavailable"}
+    if response.get("error") in FALLBACK_ERRORS:
+        return None
+    return response
+
+
+def _wait_until_ready(spec: RuntimeSpec, deadline: float) -> dict:
+    while True:
+        try:
+            remaining = embed_client._remaining_timeout(deadline)
+        except socket.timeout:
+            break
+        status_value, response = _probe(spec, timeout=min(0.25, remaining))
+        if status_value == "ready" and response is not None:
+            return response
+        if status_value == "invalid" and embed_client._active_start_pid(spec) is None:
+            raise RuntimeError("worker returned an invalid identity or response")
+        try:
+            remaining = embed_client._remaining_timeout(deadline)
+        except socket.timeout:
+            break
+        time.sleep(min(0.05, remaining))
+    raise RuntimeError("worker did not become ready before the deadline")
+
+
+def _worker_command(spec: RuntimeSpec) -> list[str]:
+    # The worker's PEP 723 header pulls in sqlite-vec so KNN runs in-process;
+    # without uv it still serves BM25/get/remember on the stdlib interpreter.
+    uv = shutil.which("uv")
+    prefix = [uv, "run", "--quiet", "--no-project", "--script"] if uv else [sys.executable]
+    return [
+        *prefix,
+        os.fspath(spec.worker),
+        "--socket",
+        os.fspath(spec.socket_path),
+        "--generation",
+        spec.generation,
+        "--home",
+        os.fspath(spec.home),
+        "--idle-seconds",
+        str(spec.idle_seconds),
+        "--start-marker",
+        os.fspath(spec.start_marker_path),
+    ]
+
+
+def ensure(spec: RuntimeSpec, *, timeout: float = DEFAULT_START_TIMEOUT_SECONDS) -> dict:
+    """Return one ready worker, starting at most one process per generation."""
+    secure_runtime_root(spec)
+    if not spec.worker.is_file():
+        raise RuntimeError("resident ai-kb worker is unavailable")
+
+    deadline = time.monotonic() + timeout
+    flags = os.O_CREAT | os.O_RDWR | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_NOFOLLOW", 0)
+    lock_fd = os.open(spec.lock_path, flags, 0o600)
+    with os.fdopen(lock_fd, "r+") as lock:
+        lock_info = os.fstat(lock.fileno())
+        if not stat.S_ISREG(lock_info.st_mode) or lock_info.st_uid != os.getuid():
+            raise RuntimeError("start lock is not a user-owned regular file")
+        os.fchmod(lock.fileno(), 0o600)
+        while True:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except (BlockingIOError, InterruptedError):
+                try:
+                    remaining = embed_client._remaining_timeout(deadline)
+                except socket.timeout as err:
+                    raise RuntimeError("worker did not become ready before the deadline") from err
+                time.sleep(min(0.05, remaining))
+        try:
+            remaining = embed_client._remaining_timeout(deadline)
+        except socket.timeout as err:
+            raise RuntimeError("worker did not become ready before the deadline") from err
+        status_value, response = _probe(spec, timeout=min(CONNECT_TIMEOUT_SECONDS, remaining))
+        if status_value == "ready" and response is not None:
+            return response
+        if status_value == "starting":
+            return _wait_until_ready(spec, deadline)
+        if status_value == "invalid":
+            if embed_client._active_start_pid(spec) is not None:
+                return _wait_until_ready(spec, deadline)
+            raise RuntimeError("refusing an invalid live worker socket")
+        if embed_client._lexists(spec.socket_path):
+            embed_client._owned_socket(spec.socket_path)
+            spec.socket_path.unlink()
+        if embed_client._active_start_pid(spec) is not None:
+            return _wait_until_ready(spec, deadline)
+        embed_client._spawn_detached(_worker_command(spec), spec)
+        return _wait_until_ready(spec, deadline)
+
+
+def shutdown(spec: RuntimeSpec) -> dict:
+    if ping(spec) is None:
+        return {"available": False}
+    try:
+        response = request(spec, {"op": "shutdown", "generation": spec.generation}, timeout=1.0)
+    except (OSError, RuntimeError, ValueError, socket.timeout, json.JSONDecodeError):
+        return {"available": False}
+    deadline = time.monotonic() + 1.0
+    while embed_client._lexists(spec.socket_path) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return response
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Manage the resident ai-kb query worker")
+    parser.add_argument("command", choices=("ensure", "ping", "shutdown"))
+    parser.add_argument("--home", type=Path, default=None, help="Override AI_KB_HOME")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_START_TIMEOUT_SECONDS)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    try:
+        spec = RuntimeSpec(home=args.home)
+        if args.command == "ensure":
+            output = ensure(spec, timeout=args.timeout)
+        elif args.command == "ping":
+            output = ping(spec) or {"available": False}
+        else:
+            output = shutdown(spec)
+    except (OSError, RuntimeError, ValueError):
+        print(json.dumps({"available": False, "reason": "unavailable"}, sort_keys=True))
+        return 1
+    print(json.dumps(output, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
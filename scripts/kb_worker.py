@@ -0,0 +1,328 @@
+#!/usr/bin/env -S uv run --quiet --no-project --script
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#   "sqlite-vec>=0.1.6,<1.0",
+# ]
+# ///
+"""Private line-JSON ai-kb query worker. Never logs or echoes request text.
+
+Keeps one `KnowledgeBase` warm for a KB home and answers `search`, `get`
+and `remember` over the same private-socket, generation and idle-exit model
+as `embed_worker.py`. Warm state: the imported KB/embedder modules, the
+resolved resident-embedder handle, and (when sqlite-vec is importable) an
+in-process vec0 connection that replaces the per-query `vec_runner.py`
+spawn. Embedding inside the worker is connect-only: it reuses an
+already-warm `embed_worker.py` and never loads a model itself, so a request
+that would need a cold embed is handed back to the caller to serve. While
+idle, between requests once the spool is large, and once more on exit
+(before the socket is removed), it folds the search retrieval spool into
+the capsules table (see `KnowledgeBase.fold_retrievals`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from embed_worker import _private_root, _unlink_owned_socket, _unlink_start_marker, receive_line  # noqa: E402
+from kb_client import kb_module_path  # noqa: E402
+
+MAX_QUERY_CHARS = 4096
+# Buffered retrieval stamps are folded into the capsules table at most this
+# often, and only while no request is waiting.
+RETRIEVAL_FOLD_SECONDS = 60.0
+LIST_FILTERS = ("scope", "kind", "domain")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--socket")
+    parser.add_argument("--generation")
+    parser.add_argument("--home")
+    parser.add_argument("--idle-seconds", type=float)
+    parser.add_argument("--start-marker")
+    return parser.parse_args()
+
+
+def _send(conn: socket.socket, response: dict) -> None:
+    conn.sendall(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+
+
+def _load_kb_module():
+    """Import the sibling KB module under its repo or deployed file name."""
+    path = kb_module_path(Path(__file__).resolve().parent)
+    spec = importlib.util.spec_from_file_location("ai_kb", path)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("ai-kb module is unavailable")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["ai_kb"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _resident_vec_backend(db_path: Path):
+    """Return an in-process vec_runner callable, or None without sqlite-vec.
+
+    The vec0 connection is opened lazily on first use (the DB may not exist
+    yet at startup) and then kept for the worker's lifetime.
+    """
+    try:
+        import sqlite_vec  # noqa: F401
+    except ImportError:
+        return None
+    import sqlite3
+
+    import vec_runner
+
+    state: dict[str, object] = {"db": None}
+
+    def backend(payload: dict) -> dict:
+        try:
+            if state["db"] is None:
+                state["db"] = vec_runner._connect(str(db_path))
+            return vec_runner.handle(state["db"], payload)
+        except vec_runner.VecRunnerError as err:
+            return {"error": str(err)}
+        except sqlite3.Error as err:
+            return {"error": f"sqlite error: {err}"}
+
+    return backend
+
+
+class KbService:
+    """Request dispatcher around one warm `KnowledgeBase`."""
+
+    def __init__(self, home: Path) -> None:
+        import embed
+
+        self._embed = embed
+        self.vec_backend = _resident_vec_backend(home / "kb.sqlite3")
+        self.kb = _load_kb_module().KnowledgeBase(home, vec_backend=self.vec_backend)
+
+    def embedder(self):
+        """Resident embedder handle, re-discovered while none is ready."""
+        embedder = self.kb.embedder()
+        if embedder is None and not self._embedding_disabled():
+            self.kb._embedder_resolved = False
+            embedder = self.kb.embedder()
+        return embedder
+
+    @staticmethod
+    def _embedding_disabled() -> bool:
+        return os.environ.get("AI_KB_DISABLE_EMBED") in ("1", "true", "yes")
+
+    def _needs_fallback(self, params: dict) -> bool:
+        """True when a caller allowed to spawn an embedder would do better.
+
+        Connect-only callers (per-turn recall) accept the same no-embedder
+        degradation they already get in-process; everyone else keeps the
+        one-shot runner semantics by serving the request themselves.
+        """
+        if params.get("connect_only") is True or self._embedding_disabled():
+            return False
+        if self.embedder() is not None:
+            return False
+        return self._embed.uv_binary() is not None and self._embed.runner_path().is_file()
+
+    def search(self, params: dict) -> dict:
+        query = params.get("query")
+        if not isinstance(query, str) or not query.strip() or len(query) > MAX_QUERY_CHARS:
+            return {"error": "invalid_params"}
+        mode = params.get("mode", "hybrid")
+        if mode != "bm25" and self._needs_fallback(params):
+            return {"error": "embedder_unavailable"}
+        if mode != "bm25":
+            self.embedder()
+        filters = {}
+        for name in LIST_FILTERS:
+            value = params.get(name)
+            if value is not None and not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+                return {"error": "invalid_params"}
+            filters[name] = value
+        workspace = params.get("workspace")
+        if workspace is not None and not isinstance(workspace, str):
+            return {"error": "invalid_params"}
+        try:
+            rows = self.kb.search(
+                query,
+                int(params.get("limit", 5)),
+                workspace=workspace,
+                mode=str(mode),
+                workspace_gate=params.get("workspace_gate") is True,
+                **filters,
+            )
+        except ValueError as err:
+            return {"error": "value_error", "message": str(err)}
+        return {"ok": True, "rows": rows}
+
+    def get(self, params: dict) -> dict:
+        note_id = params.get("id")
+        if not isinstance(note_id, str) or not note_id:
+            return {"error": "invalid_params"}
+        capsule = self.kb.get(note_id)
+        return {"ok": True, "capsule": asdict(capsule) if capsule else None}
+
+    def remember(self, params: dict) -> dict:
+        title, body = params.get("title"), params.get("body")
+        if not isinstance(title, str) or not isinstance(body, str):
+            return {"error": "invalid_params"}
+        kwargs = {
+            key: params[key]
+            for key in (
+                "kind",
+                "scope",
+                "source",
+                "tags",
+                "workspace_path",
+                "project_id",
+                "domain_tags",
+                "confidence",
+                "verified_by",
+                "supersedes",
+                "refs",
+                "embed_now",
+                "force",
+            )
+            if key in params
+        }
+        if kwargs.get("embed_now", True) and self._needs_fallback(params):
+            return {"error": "embedder_unavailable"}
+        try:
+            capsule = self.kb.remember(title, body, **kwargs)
+        except (TypeError, ValueError) as err:
+            return {"error": "value_error", "message": str(err)}
+        return {"ok": True, "capsule": asdict(capsule)}
+
+    def fold_retrievals(self) -> int:
+        """Fold the retrieval spool; a busy or unwritable KB just waits for the next tick."""
+        try:
+            return self.kb.fold_retrievals()
+        except (OSError, RuntimeError, sqlite3.Error):
+            return 0
+
+    def fold_retrievals_if_backlogged(self) -> int:
+        """Fold between requests once the spool is large, so a worker that is
+        never idle long enough for the timer still keeps it bounded."""
+        try:
+            return self.kb.fold_retrievals_if_backlogged()
+        except (OSError, RuntimeError, sqlite3.Error):
+            return 0
+
+    def dispatch(self, op: object, params: object) -> dict:
+        if not isinstance(params, dict):
+            return {"error": "invalid_params"}
+        if op == "search":
+            return self.search(params)
+        if op == "get":
+            return self.get(params)
+        if op == "remember":
+            return self.remember(params)
+        return {"error": "unknown_op"}
+
+
+def main() -> int:
+    args = parse_args()
+    if (
+        not args.socket
+        or not args.generation
+        or not args.home
+        or args.idle_seconds is None
+        or args.idle_seconds <= 0
+        or not args.start_marker
+    ):
+        return 2
+    socket_path = Path(args.socket)
+    start_marker = Path(args.start_marker)
+    if start_marker != socket_path.parent / f"starting-{args.generation}.json":
+        return 2
+    _private_root(socket_path.parent)
+    if os.path.lexists(os.fspath(socket_path)):
+        return 1
+
+    # Embedding inside the worker must never load a model in-process.
+    os.environ["AI_EMBED_CONNECT_ONLY"] = "1"
+    home = Path(args.home)
+    service = KbService(home)
+
+    os.umask(0o077)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(os.fspath(socket_path))
+    os.chmod(socket_path, 0o600)
+    socket_info = socket_path.lstat()
+    socket_identity = (socket_info.st_dev, socket_info.st_ino)
+    server.listen(16)
+    server.settimeout(0.2)
+    _unlink_start_marker(start_marker)
+
+    last_active = last_fold = time.monotonic()
+    running = True
+    try:
+        while running:
+            if time.monotonic() - last_active >= args.idle_seconds:
+                break
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                if time.monotonic() - last_fold >= RETRIEVAL_FOLD_SECONDS:
+                    service.fold_retrievals()
+                    last_fold = time.monotonic()
+                continue
+            with conn:
+                try:
+                    raw, framing_error = receive_line(conn)
+                    if framing_error:
+                        response = {"error": framing_error}
+                    else:
+                        request = json.loads(raw or b"")
+                        if not isinstance(request, dict):
+                            response = {"error": "invalid_request"}
+                        elif request.get("op") == "ping":
+                            response = {
+                                "ok": True,
+                                "status": "ready",
+                                "generation": args.generation,
+                                "home": os.fspath(home),
+                                "vec": "resident" if service.vec_backend is not None else "subprocess",
+                                "pid": os.getpid(),
+                            }
+                        elif request.get("generation") != args.generation:
+                            response = {"error": "generation_mismatch"}
+                        elif request.get("op") == "shutdown":
+                            response = {"ok": True, "pid": os.getpid()}
+                            running = False
+                        else:
+                            response = service.dispatch(request.get("op"), request.get("params"))
+                except (OSError, ValueError, json.JSONDecodeError, TypeError):
+                    response = {"error": "invalid_request"}
+                except RuntimeError:
+                    # vec_runner failures keep the CLI's hard-fail contract:
+                    # surface an error rather than a silent BM25-only answer.
+                    response = {"error": "runtime_error"}
+                try:
+                    _send(conn, response)
+                except OSError:
+                    pass
+            service.fold_retrievals_if_backlogged()
+            last_active = time.monotonic()
+    finally:
+        server.close()
+        # Fold before the socket goes away: `kb_client.shutdown` treats the
+        # unlinked socket as "worker done", so nothing may write after it.
+        service.fold_retrievals()
+        _unlink_owned_socket(socket_path, socket_identity)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
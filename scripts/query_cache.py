@@ -0,0 +1,153 @@
+"""Persistent LRU cache of query embeddings for ai-kb retrieval.
+
+Per-turn recall and repeated searches embed near-identical prompt text over
+and over (follow-ups, retries, the same topic query at every session start).
+This cache maps ``(model, sha256(normalized text))`` to the packed float32
+query vector so a repeated query skips the embedder entirely.
+
+Storage is a small SQLite file next to ``kb.sqlite3`` (default
+``query_cache.sqlite3``) so every process that opens the same KB home — the
+``,ai-kb`` CLI, the resident ``kb_worker.py`` — shares one cache. Entries
+carry a logical-clock ``last_used`` stamp; once the table exceeds
+``capacity`` rows the least recently used ones are evicted. Hit/miss
+counters persist alongside so ``,ai-kb doctor`` can report the hit rate.
+
+The cache is strictly best-effort: any SQLite error (locked, corrupt,
+read-only home) reads as a miss and writes are dropped, so retrieval never
+fails because of it. Raw query text is never stored, only its hash.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import unicodedata
+from pathlib import Path
+
+DEFAULT_CAPACITY = 2048
+# Cache writes must never stall a hot-path search behind another writer.
+BUSY_TIMEOUT_SECONDS = 0.05
+
+
+def normalize_query(text: str) -> str:
+    """NFC + whitespace-collapsed text; the form the cache key hashes."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model: str, text: str) -> str:
+    digest = hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+    return f"{model}\0{digest}"
+
+
+class QueryEmbeddingCache:
+    """Size-bounded ``(model, query) -> float32 BLOB`` store with LRU eviction."""
+
+    def __init__(self, path: Path, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.path = Path(path)
+        self.capacity = max(1, capacity)
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+        if self._ready:
+            return db
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS query_embeddings_lru ON query_embeddings(last_used);
+                CREATE TABLE IF NOT EXISTS query_cache_stats (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                """
+            )
+        except sqlite3.Error:
+            db.close()
+            raise
+        self._ready = True
+        return db
+
+    @staticmethod
+    def _tick(db: sqlite3.Connection, counter: str) -> int:
+        """Bump ``counter`` and the shared logical clock; return the new clock."""
+        db.execute(
+            """
+            INSERT INTO query_cache_stats(name, value) VALUES (?, 1), ('clock', 1)
+            ON CONFLICT(name) DO UPDATE SET value = value + 1
+            """,
+            (counter,),
+        )
+        return db.execute("SELECT value FROM query_cache_stats WHERE name = 'clock'").fetchone()[0]
+
+    def get(self, model: str, text: str) -> bytes | None:
+        """Cached vector for ``text`` under ``model``; counts a hit or a miss."""
+        key = cache_key(model, text)
+        try:
+            db = self._connect()
+            try:
+                db.execute("BEGIN IMMEDIATE")
+                row = db.execute("SELECT vector FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+                clock = self._tick(db, "hits" if row else "misses")
+                if row:
+                    db.execute("UPDATE query_embeddings SET last_used = ? WHERE key = ?", (clock, key))
+                db.execute("COMMIT")
+            finally:
+                db.close()
+        except sqlite3.Error:
+            return None
+        return bytes(row[0]) if row else None
+
+    def put(self, model: str, text: str, vector: bytes) -> None:
+        """Store ``vector`` and evict least-recently-used rows beyond capacity."""
+        if not vector:
+            return
+        try:
+            db = self._connect()
+            try:
+                db.execute("BEGIN IMMEDIATE")
+                clock = self._tick(db, "stores")
+                db.execute(
+                    """
+                    INSERT INTO query_embeddings(key, model, vector, last_used) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET vector = excluded.vector, last_used = excluded.last_used
+                    """,
+                    (cache_key(model, text), model, vector, clock),
+                )
+                db.execute(
+                    """
+                    DELETE FROM query_embeddings WHERE key IN (
+                        SELECT key FROM query_embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.capacity,),
+                )
+                db.execute("COMMIT")
+            finally:
+                db.close()
+        except sqlite3.Error:
+            return
+
+    def stats(self) -> dict[str, int]:
+        """``entries``/``capacity`` plus the persisted ``hits``/``misses``/``stores`` counters."""
+        out = {"entries": 0, "capacity": self.capacity, "hits": 0, "misses": 0, "stores": 0}
+        if not self.path.exists():
+            return out
+        try:
+            db = self._connect()
+            try:
+                out["entries"] = db.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+                for name, value in db.execute("SELECT name, value FROM query_cache_stats"):
+                    if name in out:
+                        out[name] = value
+            finally:
+                db.close()
+        except sqlite3.Error:
+            pass
+        return out
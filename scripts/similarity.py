@@ -0,0 +1,174 @@
+"""Bulk cosine similarity over packed float32 embedding BLOBs.
+
+Capsule embeddings are stored as little-endian float32 BLOBs (see
+`embed.pack_vector`). Retrieval-side consumers (`_apply_mmr`, the
+write-time duplicate probe) score one vector against many, so this module
+builds a single candidate matrix straight from the BLOBs and scores it in
+bulk instead of unpacking each row into a Python list and looping.
+
+Two backends, same results:
+
+- NumPy, when importable: one ``(n, dim)`` float32 matrix, rows
+  pre-normalized, scored with one mat-vec product.
+- Stdlib fallback: each BLOB decoded in one ``array('f').frombytes``
+  call, plus a precomputed norm cache, scored with ``math.sumprod``
+  (``sum(map(mul, ...))`` before Python 3.12) so the inner loop stays in C.
+
+Rows that are missing, truncated, or a different dimension score 0.0 —
+the same soft-failure contract as `embed.cosine`.
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+from array import array
+from operator import mul
+
+try:
+    import numpy as _np
+except ImportError:  # optional accelerator; the stdlib path is complete
+    _np = None
+
+HAVE_NUMPY = _np is not None
+
+# C-level dot product on 3.12+; the map/mul fallback is still C-driven.
+_dot = getattr(math, "sumprod", None) or (lambda a, b: sum(map(mul, a, b)))
+
+
+def blob_array(blob: bytes | None) -> array:
+    """Decode a little-endian float32 BLOB into ``array('f')``; ``None``/empty give an empty array."""
+    values = array("f")
+    if blob:
+        values.frombytes(blob[: len(blob) // 4 * 4])
+        if sys.byteorder == "big":
+            values.byteswap()
+    return values
+
+
+def _as_floats(vector):
+    """BLOBs and arrays become a float list; lists and tuples are used as-is.
+
+    Dot products over a plain list run several times faster than over an
+    ``array('f')``, whose items are boxed one by one on every access.
+    """
+    if isinstance(vector, (bytes, bytearray, memoryview)):
+        return blob_array(bytes(vector)).tolist()
+    if isinstance(vector, array):
+        return vector.tolist()
+    return vector
+
+
+def _norm(values) -> float:
+    return math.hypot(*values)
+
+
+def cosine(a, b) -> float:
+    """Cosine of two vectors (lists, ``array('f')`` or float32 BLOBs).
+
+    0.0 when either side is empty, zero, or the lengths differ.
+    """
+    a, b = _as_floats(a), _as_floats(b)
+    if not a or len(a) != len(b):
+        return 0.0
+    na, nb = _norm(a), _norm(b)
+    if na <= 0 or nb <= 0:
+        return 0.0
+    return _dot(a, b) / (na * nb)
+
+
+class VectorMatrix:
+    """Candidate vectors of one dimension, normalized once, scored in bulk.
+
+    ``blobs`` are packed float32 embeddings in caller order; ``dim``
+    fixes the comparable dimension (default: the first usable row's).
+    Rows of any other size are kept as placeholders that score 0.0 so
+    indexes line up with the caller's list.
+    """
+
+    def __init__(self, blobs: list[bytes | None], dim: int | None = None, *, use_numpy: bool | None = None) -> None:
+        if dim is None:
+            dim = next((len(b) // 4 for b in blobs if b and len(b) >= 4), 0)
+        self.dim = dim
+        self.size = len(blobs)
+        self.numpy = HAVE_NUMPY if use_numpy is None else (use_numpy and HAVE_NUMPY)
+        self.valid = [bool(b) and dim > 0 and len(b) == dim * 4 for b in blobs]
+        if self.numpy:
+            matrix = _np.zeros((self.size, max(dim, 1)), dtype=_np.float32)
+            for idx, blob in enumerate(blobs):
+                if self.valid[idx]:
+                    matrix[idx] = _np.frombuffer(blob, dtype="<f4")
+            norms = _np.linalg.norm(matrix, axis=1)
+            norms[norms == 0] = 1.0
+            self._matrix = matrix / norms[:, None]
+        else:
+            self._rows = [blob_array(b).tolist() if ok else None for b, ok in zip(blobs, self.valid)]
+            # Norm cache: each row's norm is computed once per matrix,
+            # not once per comparison.
+            self._norms = [_norm(row) if row is not None else 0.0 for row in self._rows]
+
+    def scores(self, vector) -> list[float]:
+        """Cosine of ``vector`` against every row (0.0 for unusable rows)."""
+        query = _as_floats(vector)
+        if len(query) != self.dim or self.dim == 0:
+            return [0.0] * self.size
+        if self.numpy:
+            q = _np.asarray(query, dtype=_np.float32)
+            qn = float(_np.linalg.norm(q))
+            if qn <= 0:
+                return [0.0] * self.size
+            return (self._matrix @ (q / qn)).tolist()
+        qn = _norm(query)
+        if qn <= 0:
+            return [0.0] * self.size
+        return [
+            _dot(row, query) / (norm * qn) if row is not None and norm > 0 else 0.0
+            for row, norm in zip(self._rows, self._norms)
+        ]
+
+    def row_scores(self, index: int) -> list[float]:
+        """Cosine of row ``index`` against every row."""
+        if not self.valid[index]:
+            return [0.0] * self.size
+        if self.numpy:
+            return (self._matrix @ self._matrix[index]).tolist()
+        return self.scores(self._rows[index])
+
+    def first_at_least(self, vector, threshold: float) -> int | None:
+        """Index of the first row whose cosine with ``vector`` reaches ``threshold``."""
+        for idx, score in enumerate(self.scores(vector)):
+            if score >= threshold:
+                return idx
+        return None
+
+
+def mmr_order(matrix: VectorMatrix, relevance: list[float], k: int, lambda_: float) -> list[int]:
+    """Maximal Marginal Relevance selection over ``matrix`` rows.
+
+    Picks the highest-relevance row first, then repeatedly the row that
+    maximizes ``lambda_ * relevance - (1 - lambda_) * max_sim_to_selected``.
+    The running max-similarity per candidate is updated from one
+    ``row_scores`` call per pick (O(k x n) total) instead of being
+    recomputed against every selected row on every round. Ties keep the
+    earlier row, matching the scalar loop this replaces.
+    """
+    if not relevance or k <= 0:
+        return []
+    remaining = sorted(range(len(relevance)), key=lambda i: relevance[i], reverse=True)
+    first = remaining.pop(0)
+    selected = [first]
+    max_sim = matrix.row_scores(first)
+    while remaining and len(selected) < k:
+        best_pos = max(
+            range(len(remaining)),
+            key=lambda pos: (
+                lambda_ * relevance[remaining[pos]] - (1 - lambda_) * max_sim[remaining[pos]],
+                -pos,
+            ),
+        )
+        pick = remaining.pop(best_pos)
+        selected.append(pick)
+        for idx, score in enumerate(matrix.row_scores(pick)):
+            if score > max_sim[idx]:
+                max_sim[idx] = score
+    return selected
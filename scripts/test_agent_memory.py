@@ -908,6 +908,42 @@ class TestAgentMemory(AgentMemoryEnvMixin, unittest.TestCase):
             finally:
                 agent_memory.SPEC_ROOT = old_spec_root
 
+    def test_transcript_tail_seeks_from_eof_and_matches_a_full_read(self):
+        import agent_memory
+
+        def full_read_tail(path: Path, lines: int, limit: int) -> str:
+            tail: list[str] = []
+            total = 0
+            for line in reversed(path.read_text(encoding="utf-8", errors="replace").splitlines()):
+                next_total = total + len(line) + 1
+                if tail and (len(tail) >= lines or next_total > limit):
+                    break
+                tail.append(line)
+                total = next_total
+            return "\n".join(reversed(tail))
+
+        entries = [json.dumps({"n": n, "command": "é" * (n % 7), "pad": "x" * (n * 13 % 90)}) for n in range(400)]
+        bodies = {
+            "plain": "\n".join(entries) + "\n",
+            "no-trailing-newline": "\n".join(entries),
+            "crlf-and-blank-lines": "\r\n".join(entries[:50]) + "\r\n\r\n" + "\n".join(entries[50:]),
+            "huge-last-line": "\n".join(entries) + "\n" + "y" * 20000 + "\n",
+            "short": entries[0] + "\n",
+            "empty": "",
+        }
+        old_block = agent_memory.TAIL_READ_BLOCK
+        agent_memory.TAIL_READ_BLOCK = 64
+        self.addCleanup(setattr, agent_memory, "TAIL_READ_BLOCK", old_block)
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, body in bodies.items():
+                path = Path(tmp) / f"{name}.worklog.jsonl"
+                path.write_text(body, encoding="utf-8", newline="")
+                for lines, limit in ((12, 3000), (3, 200), (50, 100000), (1, 10)):
+                    with self.subTest(name=name, lines=lines, limit=limit):
+                        assert agent_memory.transcript_tail(path, lines, limit) == full_read_tail(path, lines, limit)
+
+            assert agent_memory.transcript_tail(Path(tmp) / "missing.worklog.jsonl") == ""
+
 
 class TestAgentMemoryNote(AgentMemoryEnvMixin, unittest.TestCase):
     """WHEN recording structured insights with `,agent-memory note`."""
@@ -5,17 +5,81 @@ from __future__ import annotations
 
 import json
 import os
+import shutil
 import subprocess
 import sys
 import tempfile
 import time
 import unittest
+from contextlib import closing, redirect_stdout
+from io import StringIO
 from pathlib import Path
+from unittest import mock
 
 import _test_support  # noqa: F401  (puts scripts/ on sys.path)
 from _test_support import SCRIPTS
 
 
+def _unverify_fts_mirror(db) -> None:
+    """Drop the FTS-verified stamp so the next open runs the full mirror scan.
+
+    A direct `capsule_fts` write bypasses the write-generation triggers, so
+    tests that corrupt the mirror re-arm the scan the way a real write would.
+    """
+    db.execute("DELETE FROM kb_meta WHERE key = 'mirror_verified_generation'")
+
+
+def _seed_embedded_capsules(kb, count: int, dim: int = 32) -> None:
+    """Bulk-insert `count` embedded capsules straight into SQLite.
+
+    Bypasses `remember` (sidecars, duplicate probe, embedder) so scale
+    tests can build a few-thousand-row KB in well under a second. The
+    FTS mirror is filled too so `init()` sees a consistent store.
+    """
+    import ai_kb
+    from embed import pack_vector
+
+    kb.init()
+    now = ai_kb.utc_now()
+    rows = []
+    for index in range(count):
+        vector = [((index * 31 + dim_index * 17) % 101) / 101.0 + 0.01 for dim_index in range(dim)]
+        rows.append(
+            {
+                **{column: None for column in ai_kb.CAPSULE_COLUMNS},
+                "id": f"seed-{index:05d}",
+                "kind": "fact",
+                "title": f"Seeded capsule {index}",
+                "body": f"seeded body {index}",
+                "source": "test",
+                "tags": "",
+                "path": "",
+                "scope": "universal",
+                "domain_tags": "",
+                "confidence": 0.5,
+                "refs": "",
+                "embedding": pack_vector(vector),
+                "embedding_model": "test/seed",
+                "embedding_dim": dim,
+                "decay_score": 0.0,
+                "retrieval_count": 0,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+    columns = ",".join(ai_kb.CAPSULE_COLUMNS)
+    placeholders = ",".join(f":{column}" for column in ai_kb.CAPSULE_COLUMNS)
+    with kb.connect() as db:
+        db.executemany(f"INSERT INTO capsules ({columns}) VALUES ({placeholders})", rows)
+        db.executemany(
+            """
+            INSERT INTO capsule_fts(id, title, body, tags, source, domain_tags)
+            VALUES(:id, :title, :body, :tags, :source, :domain_tags)
+            """,
+            rows,
+        )
+
+
 class TestAiKb(unittest.TestCase):
     """WHEN remembering and searching durable agent knowledge."""
 
@@ -153,6 +217,9 @@ class TestKnowledgeBaseSchemaV2(unittest.TestCase):
         with kb.connect() as db:
             db.execute("DROP TABLE IF EXISTS capsule_fts")
             db.execute("DROP TABLE IF EXISTS kb_meta")
+            # Older schemas predate the kb_meta write-generation triggers.
+            for trigger in ("capsule_generation_insert", "capsule_generation_delete", "capsule_generation_update"):
+                db.execute(f"DROP TRIGGER IF EXISTS {trigger}")
             db.execute("ALTER TABLE capsules RENAME TO capsules_backup")
             db.execute(
                 """
@@ -344,9 +411,10 @@ class TestKnowledgeBaseSchemaV2(unittest.TestCase):
                 assert state_before[keeper.id]["embedding_dim"] == 3
                 hits_before = kb.search("shared-needle", limit=10, mode="bm25")
                 assert loser.id not in [hit["id"] for hit in hits_before], hits_before
+                assert kb.fold_retrievals() == 1
 
-                # The search stamps retrieval on the returned capsules and
-                # clears their decay. The simulated stale schema predates the
+                # The folded search stamps retrieval on the returned capsules
+                # and clears their decay. The simulated stale schema predates the
                 # retrieval columns, so the rebuild preserves the cleared
                 # decay but cannot recover retrieval state (a real v2->v3
                 # migration starts every capsule as never-retrieved).
@@ -495,6 +563,7 @@ class TestKnowledgeBaseSchemaV2(unittest.TestCase):
                 hit_ids = [hit["id"] for hit in hits]
                 assert keeper.id in hit_ids, hit_ids
                 assert loser.id not in hit_ids, hit_ids
+                kb.fold_retrievals()
 
                 with kb.connect() as db:
                     rootpage_after = db.execute(
@@ -542,6 +611,7 @@ class TestKnowledgeBaseSchemaV2(unittest.TestCase):
                     "UPDATE capsule_fts SET title=?, body=? WHERE id=?",
                     ("WRONG TITLE", "WRONG BODY", cap.id),
                 )
+                _unverify_fts_mirror(db)
             with kb.connect() as db:
                 assert kb._schema_state(db) == "derived_stale"
 
@@ -573,6 +643,7 @@ class TestKnowledgeBaseSchemaV2(unittest.TestCase):
                     "UPDATE capsule_fts SET id=? WHERE id=?",
                     ("bogus-id-not-a-real-capsule", cap.id),
                 )
+                _unverify_fts_mirror(db)
             with kb.connect() as db:
                 assert kb._schema_state(db) == "derived_stale"
 
@@ -607,6 +678,7 @@ class TestKnowledgeBaseSchemaV2(unittest.TestCase):
                     SELECT id, title, body, tags, source, domain_tags FROM capsule_fts
                     """
                 )
+                _unverify_fts_mirror(db)
                 fts_count = db.execute("SELECT COUNT(*) FROM capsule_fts").fetchone()[0]
                 cap_count = db.execute("SELECT COUNT(*) FROM capsules").fetchone()[0]
                 assert fts_count == 2 and cap_count == 1, (fts_count, cap_count)
@@ -620,6 +692,43 @@ class TestKnowledgeBaseSchemaV2(unittest.TestCase):
                 assert kb._schema_state(db) == "ok"
                 assert db.execute("SELECT COUNT(*) FROM capsule_fts").fetchone()[0] == 1
 
+    def test_init_runs_the_fts_scan_only_when_the_write_generation_moves(self):
+        """Opening an unchanged KB must not diff capsules against capsule_fts;
+        remember/remove keep the mirror verified, any other mirrored-column
+        write re-arms exactly one scan, and doctor always runs (and repairs
+        from) the full check."""
+        import ai_kb
+
+        with tempfile.TemporaryDirectory() as tmp:
+            kb = ai_kb.KnowledgeBase(home=Path(tmp))
+            cap = kb.remember(title="Generation note", body="generation body", embed_now=False)
+            scan = mock.Mock(wraps=ai_kb.KnowledgeBase._fts_mirror_diverges)
+            with mock.patch.object(ai_kb.KnowledgeBase, "_fts_mirror_diverges", scan):
+                for _ in range(3):
+                    kb.init()
+                # Retrieval stamps touch non-mirrored columns only.
+                assert [h["id"] for h in kb.search("Generation", limit=5, mode="bm25")] == [cap.id]
+                second = kb.remember(title="Second note", body="another body", embed_now=False)
+                assert kb.remove(second.id)
+                kb.init()
+                assert scan.call_count == 0, scan.call_count
+
+                with kb.connect() as db:
+                    db.execute("UPDATE capsules SET tags = 'retagged' WHERE id = ?", (cap.id,))
+                    db.execute("UPDATE capsule_fts SET tags = 'retagged' WHERE id = ?", (cap.id,))
+                kb.init()
+                kb.init()
+                assert scan.call_count == 1, scan.call_count
+
+            # A direct FTS write after verification is invisible to the
+            # O(1) open but not to doctor.
+            with kb.connect() as db:
+                db.execute("UPDATE capsule_fts SET body = 'tampered' WHERE id = ?", (cap.id,))
+                assert kb._schema_state(db) == "ok"
+            assert "fts_mirror=diverged (rebuilt from capsules)" in kb.doctor()
+            assert kb.search("tampered", limit=5, mode="bm25") == []
+            assert "fts_mirror=ok" in kb.doctor()
+
     def test_remember_persists_full_metadata(self):
         import ai_kb
 
@@ -696,6 +805,39 @@ class TestKnowledgeBaseSchemaV2(unittest.TestCase):
             finally:
                 os.environ.pop("AI_KB_DISABLE_EMBED", None)
 
+    def test_domain_filter_matches_whole_tags_through_the_join_table(self):
+        import ai_kb
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"AI_KB_DISABLE_EMBED": "1"}):
+            kb = ai_kb.KnowledgeBase(home=Path(tmp))
+            js = kb.remember(title="Bundler quirk", body="parser note", domain_tags=["js"])
+            json_cap = kb.remember(title="Schema quirk", body="parser note", domain_tags=["json", "Python"], force=True)
+
+            def domain_ids(domain):
+                return {h["id"] for h in kb.search("parser note", limit=5, mode="bm25", domain=domain)}
+
+            # Whole-tag, case-insensitive: `js` no longer matches `json`.
+            assert domain_ids("js") == {js.id}
+            assert domain_ids("PYTHON") == {json_cap.id}
+            assert domain_ids(["js", "json"]) == {js.id, json_cap.id}
+
+            def index_rows():
+                with kb.connect() as db:
+                    return sorted(tuple(r) for r in db.execute("SELECT tag, capsule_id FROM capsule_domains"))
+
+            with kb.connect() as db:
+                db.execute("UPDATE capsules SET domain_tags = 'go, js' WHERE id = ?", (json_cap.id,))
+            assert index_rows() == sorted([("js", js.id), ("go", json_cap.id), ("js", json_cap.id)])
+            kb.remove(js.id)
+            assert index_rows() == [("go", json_cap.id), ("js", json_cap.id)]
+
+            # A KB without the table (older schema) is repaired and backfilled on open.
+            with kb.connect() as db:
+                db.execute("DROP TABLE capsule_domains")
+            assert domain_ids("go") == {json_cap.id}
+            assert index_rows() == [("go", json_cap.id), ("js", json_cap.id)]
+            kb.close()
+
 
 class TestKnowledgeBaseEmbeddingRoundtrip(unittest.TestCase):
     """End-to-end embedding test: actually shells out to the fastembed
@@ -973,6 +1115,48 @@ class TestKnowledgeBaseWriteDedupe(unittest.TestCase):
                 if saved is not None:
                     os.environ["AI_KB_DISABLE_EMBED"] = saved
 
+    def test_duplicate_probe_uses_the_knn_index_and_scans_only_as_fallback(self):
+        import ai_kb
+
+        class ConstantEmbedder:
+            model = "test/constant"
+
+            def embed_one(self, text):
+                return [0.6, 0.8, 0.0]
+
+        requests: list[dict] = []
+        answer: dict = {}
+
+        def backend(payload):
+            requests.append(payload)
+            return answer
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"AI_KB_DISABLE_VEC": ""}):
+            kb = ai_kb.KnowledgeBase(home=Path(tmp), embedder=ConstantEmbedder(), vec_backend=backend)
+            answer.update({"hits": [], "saturated": False})
+            first = kb.remember(title="First", body="same vector", kind="gotcha")
+            # The index is authoritative: no hit means no O(N) scan, even
+            # though an exhaustive scan would match `first`.
+            second = kb.remember(title="Second", body="same vector", kind="gotcha")
+            assert requests[-1]["min_cosine"] == ai_kb.DUPLICATE_COSINE_THRESHOLD
+            assert requests[-1]["filters"] == {"kinds": ["gotcha"], "models": ["test/constant"]}
+            assert requests[-1]["k"] == ai_kb.DUPLICATE_PROBE_K
+
+            answer.update({"hits": [{"id": first.id, "cosine": 0.99}], "saturated": False})
+            with self.assertRaisesRegex(ValueError, first.id):
+                kb.remember(title="Third", body="same vector", kind="gotcha")
+            # An exempt (superseded) hit is not a duplicate.
+            kb.remember(title="Fourth", body="same vector", kind="gotcha", supersedes=first.id)
+
+            # Saturated window or runner failure: fall back to the scan.
+            answer.update({"hits": [], "saturated": True})
+            with self.assertRaisesRegex(ValueError, "embedding cosine"):
+                kb.remember(title="Fifth", body="same vector", kind="gotcha")
+            answer.clear()
+            answer["error"] = "vec0 unavailable"
+            with self.assertRaisesRegex(ValueError, second.id):
+                kb.remember(title="Sixth", body="same vector", kind="gotcha")
+
     def test_superseded_capsules_do_not_block_new_titles(self):
         import ai_kb
 
@@ -1053,9 +1237,9 @@ class TestKnowledgeBaseWorkspaceGate(unittest.TestCase):
 
 
 class TestKnowledgeBaseRetrievalTracking(unittest.TestCase):
-    """search() stamps retrieval; curate decay only touches dormant capsules."""
+    """search() buffers retrieval; folding stamps it; curate decay only touches dormant capsules."""
 
-    def test_search_stamps_retrieval_and_clears_decay(self):
+    def test_search_stamps_retrieval_and_clears_decay_once_folded(self):
         import ai_kb
 
         with tempfile.TemporaryDirectory() as tmp:
@@ -1068,6 +1252,13 @@ class TestKnowledgeBaseRetrievalTracking(unittest.TestCase):
                     db.execute("UPDATE capsules SET decay_score = 0.5")
                 rows = kb.search("alpha needle", limit=5, mode="bm25")
                 assert [r["id"] for r in rows] == [hit.id], rows
+                with kb.connect() as db:
+                    untouched = db.execute("SELECT retrieval_count FROM capsules WHERE id = ?", (hit.id,)).fetchone()
+                assert untouched[0] == 0
+                assert kb.pending_retrievals() == 1
+                assert kb.fold_retrievals() == 1
+                assert kb.pending_retrievals() == 0
+                assert not list(Path(tmp).glob("retrieval*"))
                 with kb.connect() as db:
                     got = {
                         r["id"]: r
@@ -1084,6 +1275,57 @@ class TestKnowledgeBaseRetrievalTracking(unittest.TestCase):
             finally:
                 os.environ.pop("AI_KB_DISABLE_EMBED", None)
 
+    def test_fold_counts_every_event_and_drops_an_already_applied_spool(self):
+        import ai_kb
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"AI_KB_DISABLE_EMBED": "1"}):
+            kb = ai_kb.KnowledgeBase(home=Path(tmp))
+            cap = kb.remember(title="Retrieved note", body="alpha needle body")
+            for _ in range(3):
+                kb.search("alpha needle", limit=5, mode="bm25")
+            # A torn final line is a write still in flight, not an event.
+            with (Path(tmp) / ai_kb.RETRIEVAL_LOG_FILENAME).open("a") as fh:
+                fh.write("2026-01-01T00:00:00+00:00\t" + cap.id)
+            spool = (Path(tmp) / ai_kb.RETRIEVAL_LOG_FILENAME).read_bytes()
+            assert kb.fold_retrievals() == 3
+            # Simulate a crash after the fold committed but before the
+            # rotated spool was unlinked: the token in kb_meta skips it.
+            with kb.connect() as db:
+                token = db.execute("SELECT value FROM kb_meta WHERE key = 'retrieval_folded_token'").fetchone()[0]
+            (Path(tmp) / f"retrieval.{token}.folding").write_bytes(spool)
+            assert kb.fold_retrievals() == 0
+            assert not list(Path(tmp).glob("retrieval*"))
+            with kb.connect() as db:
+                row = db.execute(
+                    "SELECT retrieved_at, retrieval_count FROM capsules WHERE id = ?", (cap.id,)
+                ).fetchone()
+            assert row["retrieval_count"] == 3
+            assert row["retrieved_at"] > "2026-01-01T00:00:00+00:00"
+
+    def test_cli_search_folds_a_backlogged_spool(self):
+        """Below `RETRIEVAL_LOG_FOLD_BYTES` a CLI search only appends to the
+        spool; at the threshold it folds it, so the spool stays bounded
+        without `curate` or a worker."""
+        import ai_kb
+
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            mock.patch.dict(os.environ, {"AI_KB_DISABLE_EMBED": "1"}),
+            redirect_stdout(StringIO()),
+        ):
+            kb = ai_kb.KnowledgeBase(home=Path(tmp))
+            cap = kb.remember(title="Spooled note", body="spool needle body")
+            spool = Path(tmp) / ai_kb.RETRIEVAL_LOG_FILENAME
+            search = ["--home", tmp, "search", "spool needle", "--mode", "bm25"]
+            assert ai_kb.main(search) == 0
+            assert kb.pending_retrievals() == 1
+            with mock.patch.object(ai_kb, "RETRIEVAL_LOG_FOLD_BYTES", spool.stat().st_size * 2):
+                assert ai_kb.main(search) == 0
+                assert kb.pending_retrievals() == 0 and not spool.exists()
+            with kb.connect() as db:
+                row = db.execute("SELECT retrieval_count FROM capsules WHERE id = ?", (cap.id,)).fetchone()
+            assert row["retrieval_count"] == 2
+
     def test_curate_decay_shields_recently_retrieved_capsules(self):
         import ai_kb
 
@@ -1106,6 +1348,132 @@ class TestKnowledgeBaseRetrievalTracking(unittest.TestCase):
                 os.environ.pop("AI_KB_DISABLE_EMBED", None)
 
 
+class TestKnowledgeBaseSearchConnection(unittest.TestCase):
+    """search() reuses one connection, reads in one snapshot and never writes."""
+
+    def test_search_reuses_the_shared_connection_and_one_read_snapshot(self):
+        import ai_kb
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"AI_KB_DISABLE_EMBED": "1"}):
+            kb = ai_kb.KnowledgeBase(home=Path(tmp))
+            try:
+                _seed_embedded_capsules(kb, 50)
+                kb.search("seeded body 7", limit=3)
+                statements: list[str] = []
+                kb._shared_connection().set_trace_callback(statements.append)
+                with mock.patch.object(ai_kb.sqlite3, "connect", side_effect=AssertionError("fresh connection")):
+                    rows = kb.search("seeded body 7", limit=3)
+                assert rows and rows[0]["id"] == "seed-00007", rows
+                # "--" lines are FTS5's own shadow-table lookups.
+                verbs = [sql.split(None, 1)[0].upper() for sql in statements if not sql.startswith("--")]
+                begin = verbs.index("BEGIN")
+                commit = verbs.index("COMMIT", begin)
+                # A warm init() only reads; every SELECT of the ranking phase
+                # sits inside the one snapshot, followed by one batched stamp.
+                assert set(verbs[:begin]) <= {"SELECT", "PRAGMA"}, verbs
+                assert verbs[begin + 1 : commit] == ["SELECT"] * 3, verbs
+                # The retrieval stamp goes to the spool, not the database.
+                assert verbs[commit + 1 :] == [], verbs
+                assert kb.fold_retrievals() == 2
+                with kb.connect() as db:
+                    stamped = db.execute("SELECT retrieval_count FROM capsules WHERE id = 'seed-00007'").fetchone()[0]
+                assert stamped == 2
+            finally:
+                kb.close()
+
+    @unittest.skipUnless(os.environ.get("AI_KB_SCALE_TESTS"), "set AI_KB_SCALE_TESTS=1 to seed a 10k-capsule KB")
+    def test_search_on_10k_capsules(self):
+        """Selective (unique-token) and broad (every-row) hybrid queries on a
+        10k-capsule KB each return their target capsule. Opt-in: seeding and
+        330 searches are too slow for the default run."""
+        import ai_kb
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"AI_KB_DISABLE_EMBED": "1"}):
+            kb = ai_kb.KnowledgeBase(home=Path(tmp))
+            try:
+                _seed_embedded_capsules(kb, 10_000)
+                for count, query in (
+                    (300, lambda n: f"{n}"),
+                    (30, lambda n: f"seeded body {n}"),
+                ):
+                    for index in range(count):
+                        n = index * 37 % 10_000
+                        hits = kb.search(query(n), limit=5, mode="hybrid")
+                        assert hits and hits[0]["id"] == f"seed-{n:05d}", (query(n), hits[:1])
+            finally:
+                kb.close()
+
+
+class TestKnowledgeBaseQueryCache(unittest.TestCase):
+    """Repeated search queries reuse the cached vector, not the embedder."""
+
+    def test_repeated_query_skips_the_embedder_and_counts_hits(self):
+        import ai_kb
+
+        embedded: list[str] = []
+
+        class CountingEmbedder:
+            model = "test/counting"
+
+            def embed(self, texts):
+                embedded.extend(texts)
+                return [[0.6, 0.8, float(len(text) % 5)] for text in texts]
+
+            def embed_one(self, text):
+                return self.embed([text])[0]
+
+        vectors: list[list[float]] = []
+
+        def backend(payload):
+            vectors.append(payload["query_vector"])
+            return {"hits": []}
+
+        env = {"AI_KB_DISABLE_VEC": "", "AI_KB_QUERY_CACHE": "", "AI_KB_QUERY_CACHE_SIZE": ""}
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, env):
+            kb = ai_kb.KnowledgeBase(home=Path(tmp), embedder=CountingEmbedder(), vec_backend=backend)
+            kb.search("cat  pet", limit=3, mode="vector")
+            # Whitespace-only differences share a cache entry; a second KB
+            # instance on the same home (another process) shares the file.
+            other = ai_kb.KnowledgeBase(home=Path(tmp), embedder=CountingEmbedder(), vec_backend=backend)
+            other.search(" cat pet\n", limit=3, mode="vector")
+            assert embedded == ["cat  pet"], embedded
+            assert vectors[0] == vectors[1], vectors
+            assert (Path(tmp) / ai_kb.QUERY_CACHE_FILENAME).is_file()
+
+            CountingEmbedder.model = "test/other-model"
+            kb.search("cat pet", limit=3, mode="vector")
+            assert embedded == ["cat  pet", "cat pet"], embedded
+            report = [line for line in kb.doctor() if line.startswith("query_cache=")]
+            assert report == ["query_cache=entries 2/2048 hits=1 misses=2 hit_rate=33%"], report
+
+            with mock.patch.dict(os.environ, {"AI_KB_QUERY_CACHE": "0"}):
+                disabled = ai_kb.KnowledgeBase(home=Path(tmp), embedder=CountingEmbedder(), vec_backend=backend)
+                disabled.search("cat pet", limit=3, mode="vector")
+            assert embedded[-1] == "cat pet" and len(embedded) == 3, embedded
+
+    def test_cache_evicts_least_recently_used_and_fails_open(self):
+        from query_cache import QueryEmbeddingCache
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = QueryEmbeddingCache(Path(tmp) / "cache.sqlite3", capacity=2)
+            cache.put("m", "alpha", b"\x01\x00\x00\x00")
+            cache.put("m", "beta", b"\x02\x00\x00\x00")
+            assert cache.get("m", "alpha") == b"\x01\x00\x00\x00"
+            cache.put("m", "gamma", b"\x03\x00\x00\x00")
+            assert cache.get("m", "beta") is None
+            assert cache.get("m", "alpha") is not None and cache.get("m", "gamma") is not None
+            assert cache.get("other-model", "alpha") is None
+            stats = cache.stats()
+            assert (stats["entries"], stats["hits"], stats["misses"], stats["stores"]) == (2, 3, 2, 3), stats
+
+            broken = Path(tmp) / "broken.sqlite3"
+            broken.write_bytes(b"not a database" * 100)
+            corrupt = QueryEmbeddingCache(broken)
+            assert corrupt.get("m", "alpha") is None
+            corrupt.put("m", "alpha", b"\x01\x00\x00\x00")
+            assert corrupt.stats()["entries"] == 0
+
+
 class TestKnowledgeBaseCurate(unittest.TestCase):
     """Phase 7: curation pass — dedupe, decay, contradiction-scan.
 
@@ -1302,6 +1670,267 @@ class TestKnowledgeBaseVecRunner(unittest.TestCase):
                 if saved is not None:
                     os.environ["AI_KB_DISABLE_VEC"] = saved
 
+    def test_resident_pipe_serves_many_requests_from_one_process(self):
+        """`vec_runner.py --serve` answers every line, errors included,
+        without exiting; the KB-side pipe reuses that one child."""
+        import ai_kb
+
+        with tempfile.TemporaryDirectory() as tmp:
+            pipe = ai_kb.VecRunnerPipe([sys.executable, str(SCRIPTS / "vec_runner.py"), "--serve"])
+            try:
+                first = pipe.request({"mode": "knn"}, timeout=10)
+                pid = pipe.pid
+                second = pipe.request({"mode": "knn", "db_path": str(Path(tmp) / "kb.sqlite3")}, timeout=10)
+                assert first == {"error": "'db_path' must be a non-empty string"}, first
+                assert "error" in second, second
+                assert pid is not None and pipe.pid == pid
+            finally:
+                pipe.close()
+            assert pipe.pid is None
+
+    def test_resident_pipe_times_out_and_restarts(self):
+        import ai_kb
+
+        pipe = ai_kb.VecRunnerPipe([sys.executable, "-c", "import time; time.sleep(30)"])
+        started = time.monotonic()
+        try:
+            with self.assertRaisesRegex(RuntimeError, "timed out"):
+                pipe.request({"mode": "knn"}, timeout=0.3)
+            assert time.monotonic() - started < 5
+            assert pipe.pid is None
+        finally:
+            pipe.close()
+
+    @unittest.skipUnless(shutil.which("uv"), "uv + sqlite-vec are required for the live runner")
+    def test_resident_runner_reuses_one_child_and_matches_spawn_per_call(self):
+        """The same KNN queries, one uv spawn per call versus the resident
+        `--serve` child: identical hits, and every resident call is served
+        by the one child started on first use."""
+        import ai_kb
+
+        with tempfile.TemporaryDirectory() as tmp:
+            kb = ai_kb.KnowledgeBase(home=Path(tmp))
+            _seed_embedded_capsules(kb, 200)
+            payload = {"mode": "knn", "db_path": str(kb.db_path), "query_vector": [0.5] * 32, "k": 20, "limit": 5}
+            try:
+                with mock.patch.dict(os.environ, {"AI_KB_DISABLE_VEC": "", "AI_KB_VEC_RESIDENT": "0"}):
+                    spawn_ids = [hit["id"] for hit in kb._call_vec_runner(payload)["hits"]]
+                    assert kb._vec_pipe is None
+                with mock.patch.dict(os.environ, {"AI_KB_DISABLE_VEC": "", "AI_KB_VEC_RESIDENT": "1"}):
+                    resident_ids = [hit["id"] for hit in kb._call_vec_runner(payload)["hits"]]
+                    pid = kb._vec_pipe.pid
+                    for _ in range(3):
+                        assert [hit["id"] for hit in kb._call_vec_runner(payload)["hits"]] == resident_ids
+                    assert pid is not None and kb._vec_pipe.pid == pid
+            finally:
+                kb.close()
+            assert resident_ids == spawn_ids
+
+    def test_write_paths_feed_the_change_journal(self):
+        """remember/remove/reembed/supersede all land in `capsule_changes`
+        via triggers; unrelated mutable state (decay) does not, and the
+        epoch survives a plain re-init."""
+        import ai_kb
+
+        def journal(kb) -> list[str]:
+            with kb.connect() as db:
+                return [r[0] for r in db.execute("SELECT id FROM capsule_changes ORDER BY seq")]
+
+        def epoch(kb) -> str:
+            with kb.connect() as db:
+                return db.execute("SELECT value FROM kb_meta WHERE key = 'change_epoch'").fetchone()[0]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            kb = ai_kb.KnowledgeBase(home=Path(tmp))
+            first = kb.remember("Journal first", "alpha body", embed_now=False)
+            second = kb.remember("Journal second", "beta body", embed_now=False)
+            before = epoch(kb)
+            assert journal(kb) == [first.id, second.id]
+
+            with kb.connect() as db:
+                db.execute("UPDATE capsules SET decay_score = 0.4 WHERE id = ?", (first.id,))
+            assert journal(kb) == [first.id, second.id]
+
+            kb._mark_superseded(first.id, second.id)
+            assert kb.remove(second.id)
+            kb.init()
+            assert journal(kb)[2:] == [first.id, second.id]
+
+            embedded = ai_kb.KnowledgeBase(home=Path(tmp), embedder=TestKnowledgeBaseSchemaV2._fake_embedder())
+            assert embedded.reembed() == 1
+            assert journal(kb)[4:] == [first.id]
+            assert epoch(kb) == before
+
+    def test_vec_index_sync_applies_only_journal_deltas(self):
+        """A no-op sync never reads `capsules`; a delta sync re-indexes only
+        the logged ids. vec0 is not loadable here, so `vec_index` is a plain
+        table whose DDL carries the `float[N]` marker the runner parses."""
+        import sqlite3
+
+        import ai_kb
+        import vec_runner
+
+        with tempfile.TemporaryDirectory() as tmp:
+            kb = ai_kb.KnowledgeBase(home=Path(tmp))
+            _seed_embedded_capsules(kb, 2000)
+            db = sqlite3.connect(kb.db_path)
+            try:
+                db.execute(
+                    "CREATE TABLE vec_index (id TEXT PRIMARY KEY, embedding BLOB /* float[32] */, "
+                    "scope TEXT, kind TEXT, model TEXT, live INTEGER)"
+                )
+                db.commit()
+                assert vec_runner._ensure_vec_index(db) == 32
+                assert db.execute("SELECT COUNT(*) FROM vec_index").fetchone()[0] == 2000
+
+                statements: list[str] = []
+                db.set_trace_callback(statements.append)
+                assert vec_runner._ensure_vec_index(db) == 32
+                assert not any("capsules" in sql for sql in statements), statements
+
+                with kb.connect() as writer:
+                    writer.execute("DELETE FROM capsules WHERE id = 'seed-00001'")
+                    writer.execute("UPDATE capsules SET embedding = NULL, embedding_dim = 0 WHERE id = 'seed-00002'")
+                statements.clear()
+                assert vec_runner._ensure_vec_index(db) == 32
+                db.set_trace_callback(None)
+                assert not any("LEFT JOIN" in sql or "NOT IN" in sql for sql in statements), statements
+                assert db.execute("SELECT COUNT(*) FROM vec_index").fetchone()[0] == 1998
+                assert db.execute("SELECT COUNT(*) FROM capsule_changes").fetchone()[0] == 0
+
+                with kb.connect() as writer:
+                    writer.execute("UPDATE kb_meta SET value = 'rotated' WHERE key = 'change_epoch'")
+                    writer.execute("INSERT INTO vec_index(id, embedding) VALUES ('orphan', x'00')")
+                assert vec_runner._ensure_vec_index(db) == 32
+                assert db.execute("SELECT COUNT(*) FROM vec_index WHERE id = 'orphan'").fetchone()[0] == 0
+            finally:
+                db.close()
+
+    def test_change_journal_is_capped_and_a_lagging_cursor_resyncs(self):
+        """Without a consumer the journal stops at `CHANGE_JOURNAL_LIMIT`
+        rows; a vec cursor that fell behind the cap takes the full resync
+        instead of applying the truncated tail."""
+        import sqlite3
+
+        import ai_kb
+        import vec_runner
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(ai_kb, "CHANGE_JOURNAL_LIMIT", 5):
+            kb = ai_kb.KnowledgeBase(home=Path(tmp))
+            _seed_embedded_capsules(kb, 20)
+            with kb.connect() as db:
+                seqs = [r[0] for r in db.execute("SELECT seq FROM capsule_changes ORDER BY seq")]
+            assert seqs == list(range(16, 21))
+
+            db = sqlite3.connect(kb.db_path)
+            try:
+                db.execute(
+                    "CREATE TABLE vec_index (id TEXT PRIMARY KEY, embedding BLOB /* float[32] */, "
+                    "scope TEXT, kind TEXT, model TEXT, live INTEGER)"
+                )
+                db.commit()
+                assert vec_runner._ensure_vec_index(db) == 32
+                with kb.connect() as writer:
+                    writer.execute("DELETE FROM capsules WHERE id IN ('seed-00000', 'seed-00001')")
+                    writer.execute("INSERT INTO vec_index(id, embedding) VALUES ('orphan', x'00')")
+                    for index in range(2, 9):
+                        writer.execute("UPDATE capsules SET scope = 'project' WHERE id = ?", (f"seed-{index:05d}",))
+                assert not vec_runner._journal_intact(db, 20, 29)
+                assert vec_runner._ensure_vec_index(db) == 32
+                ids = {r[0] for r in db.execute("SELECT id FROM vec_index")}
+                assert "orphan" not in ids and "seed-00000" not in ids and len(ids) == 18
+                assert db.execute("SELECT COUNT(*) FROM vec_index WHERE scope = 'project'").fetchone()[0] == 7
+            finally:
+                db.close()
+
+    def test_rotated_change_epoch_rebuilds_rows_whose_id_survived(self):
+        """A new `change_epoch` means the journal may have lost entries, so
+        rows that kept their id must still pick up fresh metadata and
+        embeddings instead of only being reconciled by id."""
+        import sqlite3
+
+        import ai_kb
+        import vec_runner
+
+        with tempfile.TemporaryDirectory() as tmp:
+            kb = ai_kb.KnowledgeBase(home=Path(tmp))
+            _seed_embedded_capsules(kb, 5)
+            db = sqlite3.connect(kb.db_path)
+            try:
+                db.execute(
+                    "CREATE TABLE vec_index (id TEXT PRIMARY KEY, embedding BLOB /* float[32] */, "
+                    "scope TEXT, kind TEXT, model TEXT, live INTEGER)"
+                )
+                db.commit()
+                assert vec_runner._ensure_vec_index(db) == 32
+                with kb.connect() as writer:
+                    writer.execute("UPDATE capsules SET scope = 'project' WHERE id = 'seed-00003'")
+                    writer.execute("DELETE FROM capsule_changes")
+                    writer.execute("UPDATE kb_meta SET value = 'rotated' WHERE key = 'change_epoch'")
+                assert vec_runner._ensure_vec_index(db) == 32
+                row = db.execute("SELECT scope FROM vec_index WHERE id = 'seed-00003'").fetchone()
+                assert row == ("project",)
+                assert db.execute("SELECT COUNT(*) FROM vec_index").fetchone()[0] == 5
+            finally:
+                db.close()
+
+    def test_knn_fills_the_limit_for_rare_scopes_and_domains(self):
+        """Scope/kind/liveness are evaluated inside the KNN scan and the
+        remaining filters widen it, so a rare scope or domain returns a full
+        `limit` instead of whatever survived a global top-k. vec0 is not
+        loadable here: `vec_index` is a plain table and `_raw_knn` a brute
+        force scan that evaluates the same metadata constraints."""
+        import sqlite3
+
+        import ai_kb
+        import vec_runner
+        from embed import unpack_vector
+        from similarity import cosine
+
+        calls: list[tuple[int, str, list]] = []
+
+        def brute_force_knn(db, query_blob, k, constraints, params):
+            calls.append((k, constraints, list(params)))
+            query = unpack_vector(query_blob)
+            rows = db.execute(f"SELECT id, embedding FROM vec_index WHERE {constraints}", params).fetchall()
+            ranked = sorted((1.0 - cosine(query, unpack_vector(blob)), cid) for cid, blob in rows)
+            return [(cid, distance) for distance, cid in ranked[:k]]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            kb = ai_kb.KnowledgeBase(home=Path(tmp))
+            _seed_embedded_capsules(kb, 2000)
+            with kb.connect() as writer:
+                number = "CAST(substr(id, 6) AS INTEGER)"
+                writer.execute(f"UPDATE capsules SET scope = 'project' WHERE {number} % 250 = 0")
+                writer.execute(f"UPDATE capsules SET domain_tags = 'rare' WHERE {number} % 300 = 7")
+                writer.execute("UPDATE capsules SET superseded_by = 'seed-00001' WHERE id = 'seed-00250'")
+                seed = writer.execute("SELECT embedding FROM capsules WHERE id = 'seed-00001'").fetchone()[0]
+            query = unpack_vector(seed)
+            db = sqlite3.connect(kb.db_path)
+            try:
+                db.execute(
+                    "CREATE TABLE vec_index (id TEXT PRIMARY KEY, embedding BLOB /* float[32] */, "
+                    "scope TEXT, kind TEXT, model TEXT, live INTEGER)"
+                )
+                db.commit()
+                request = {"mode": "knn", "query_vector": query, "k": 10, "limit": 5}
+                with mock.patch.object(vec_runner, "_raw_knn", side_effect=brute_force_knn):
+                    scoped = vec_runner.handle(db, {**request, "filters": {"scopes": ["project"]}})["hits"]
+                    assert len(calls) == 1 and "scope = ?" in calls[0][1], calls
+                    calls.clear()
+                    rare = vec_runner.handle(db, {**request, "filters": {"domains": ["rare"]}})["hits"]
+                    assert len(calls) > 1, calls
+            finally:
+                db.close()
+            with kb.connect() as reader:
+                scopes = dict(reader.execute("SELECT id, scope FROM capsules WHERE scope = 'project'").fetchall())
+                tagged = {r[0] for r in reader.execute("SELECT id FROM capsules WHERE domain_tags = 'rare'")}
+            # 8 project capsules, one superseded: the live 7 cover the limit.
+            assert len(scoped) == 5 and {hit["id"] for hit in scoped} <= set(scopes), scoped
+            assert "seed-00250" not in {hit["id"] for hit in scoped}
+            assert len(rare) == 5 and {hit["id"] for hit in rare} <= tagged, rare
+            assert [hit["cosine"] for hit in rare] == sorted((hit["cosine"] for hit in rare), reverse=True)
+
     def test_doctor_reports_vec_runner_status(self):
         """`,ai-kb doctor` must surface vec_runner state so operators
         can debug a broken install. Verifies the line is present in
@@ -1325,6 +1954,105 @@ class TestKnowledgeBaseVecRunner(unittest.TestCase):
                     os.environ["AI_KB_DISABLE_VEC"] = saved
 
 
+class TestResidentKbWorker(unittest.TestCase):
+    """WHEN a resident `kb_worker.py` keeps one KB warm for hot-path callers."""
+
+    def test_cli_forwards_search_to_a_running_worker(self):
+        import ai_kb
+        import kb_client
+
+        rows = [{"id": "warm", "kind": "fact", "scope": "universal", "title": "t", "rrf_score": 0.5, "snippet": ""}]
+        with tempfile.TemporaryDirectory() as tmp:
+            with (
+                mock.patch.dict(os.environ, {"AI_KB_DISABLE_EMBED": "", "AI_KB_DISABLE_VEC": ""}),
+                mock.patch.object(kb_client, "call", return_value={"ok": True, "rows": rows}) as call,
+                mock.patch.object(ai_kb.KnowledgeBase, "search", side_effect=AssertionError("ran in-process")),
+                redirect_stdout(StringIO()) as out,
+            ):
+                code = ai_kb.main(["--home", tmp, "search", "warm query", "--json"])
+
+            assert code == 0
+            assert json.loads(out.getvalue()) == rows
+            spec, op, params = call.call_args.args
+            assert op == "search" and params["query"] == "warm query"
+            assert spec.home == Path(tmp).resolve()
+
+    def test_cli_runs_in_process_when_worker_asks_for_fallback(self):
+        import ai_kb
+        import kb_client
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with (
+                mock.patch.dict(os.environ, {"AI_KB_DISABLE_EMBED": "", "AI_KB_DISABLE_VEC": ""}),
+                mock.patch.object(kb_client, "request", return_value={"error": "embedder_unavailable"}),
+                mock.patch.object(ai_kb.KnowledgeBase, "search", return_value=[]) as search,
+                redirect_stdout(StringIO()) as out,
+            ):
+                code = ai_kb.main(["--home", tmp, "search", "cold query", "--json"])
+
+            assert code == 0
+            assert json.loads(out.getvalue()) == []
+            search.assert_called_once()
+
+    def test_generation_tracks_worker_kb_module_and_home(self):
+        import kb_client
+
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            worker = root / "kb_worker.py"
+            worker.write_text("# worker\n")
+            (root / "main.py").write_text("# deployed kb\n")
+            base = kb_client.RuntimeSpec(home=root / "a", runtime_dir=root / "rt", worker=worker)
+            other_home = kb_client.RuntimeSpec(home=root / "b", runtime_dir=root / "rt", worker=worker)
+            (root / "main.py").write_text("# deployed kb v2\n")
+            kb_changed = kb_client.RuntimeSpec(home=root / "a", runtime_dir=root / "rt", worker=worker)
+
+            assert kb_client.kb_module_path(root) == root / "main.py"
+            assert len({base.generation, other_home.generation, kb_changed.generation}) == 3
+            assert base.socket_path.name == f"kb-{base.generation}.sock"
+
+    def test_live_worker_serves_remember_search_get_and_exits_on_shutdown(self):
+        import kb_client
+
+        # AF_UNIX socket paths are length-limited; keep the runtime dir short and
+        # outside the source tree.
+        with tempfile.TemporaryDirectory(dir="/tmp", prefix="kb-") as tmp:
+            root = Path(tmp)
+            env = {
+                "AI_KB_DISABLE_EMBED": "1",
+                "AI_KB_DISABLE_VEC": "1",
+                "AI_KB_RESIDENT": "1",
+                "PATH": os.path.dirname(sys.executable) + os.pathsep + "/usr/bin:/bin",
+            }
+            spec = kb_client.RuntimeSpec(home=root / "kb", runtime_dir=root / "rt", idle_seconds=5)
+            with mock.patch.dict(os.environ, env):
+                ready = kb_client.ensure(spec, timeout=8)
+                try:
+                    assert ready["home"] == str(spec.home)
+                    stored = kb_client.call(
+                        spec,
+                        "remember",
+                        {"title": "Warm socket", "body": "Resident worker keeps the KB open.", "source": "test"},
+                    )
+                    assert stored["ok"] is True, stored
+                    capsule_id = stored["capsule"]["id"]
+
+                    found = kb_client.call(spec, "search", {"query": "resident worker", "mode": "bm25"})
+                    assert [row["id"] for row in found["rows"]] == [capsule_id]
+                    fetched = kb_client.call(spec, "get", {"id": capsule_id})
+                    assert fetched["capsule"]["title"] == "Warm socket"
+
+                    duplicate = kb_client.call(spec, "remember", {"title": "Warm socket", "body": "again"})
+                    assert duplicate["error"] == "value_error"
+                    assert kb_client.call(spec, "search", {"query": ""}) == {"error": "invalid_params"}
+                    mismatch = kb_client.request(spec, {"op": "get", "generation": "stale", "params": {}})
+                    assert mismatch == {"error": "generation_mismatch"}
+                finally:
+                    assert kb_client.shutdown(spec).get("ok") is True
+                assert not spec.socket_path.exists()
+                assert kb_client.call(spec, "get", {"id": "x"}) is None
+
+
 class TestKnowledgeBaseAsToolCLI(unittest.TestCase):
     """Phase 6: roles invoke the KB as a tool via the `,ai-kb search`
     subcommand. The shape of the CLI output (JSON array of hits with
@@ -1567,6 +2295,117 @@ class TestKnowledgeBaseDocIngestion(unittest.TestCase):
             foo = next(c for c in kb.list(limit=10) if c.title == "Foo skill")
             assert "foo" in (foo.domain_tags or "").split(","), foo.domain_tags
 
+    def test_ingest_embeds_changed_chunks_in_batches(self):
+        import ai_kb
+
+        fake = TestKnowledgeBaseSchemaV2._fake_embedder()
+        batches: list[int] = []
+        embed = fake.embed
+
+        def counting_embed(texts):
+            batches.append(len(texts))
+            return embed(texts)
+
+        fake.embed = counting_embed
+        progress: list[dict] = []
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(ai_kb, "INGEST_EMBED_BATCH", 4):
+            tmp_path = Path(tmp)
+            docs = tmp_path / "docs"
+            docs.mkdir()
+            for idx in range(5):
+                (docs / f"doc{idx}.md").write_text(f"# Doc {idx}\n\nintro {idx}\n\n## Detail\n\ndetail {idx}\n")
+
+            kb = ai_kb.KnowledgeBase(home=tmp_path / "kb", embedder=fake)
+            summary = kb.ingest_path(docs, progress=progress.append)
+            assert summary["files_ingested"] == 5, summary
+            assert summary["capsules_stored"] == 10, summary
+            # Whole files per batch: 2 + 2 chunks, 2 + 2, then the last file.
+            assert batches == [4, 4, 2], batches
+            assert progress[-1] == {"files_done": 5, "files_total": 5, "chunks_done": 10}
+            for key in ("elapsed_seconds", "files_per_second", "chunks_per_second"):
+                assert isinstance(summary[key], float), (key, summary)
+
+            with closing(kb.connect()) as db:
+                dims = {row[0] for row in db.execute("SELECT embedding_dim FROM capsules")}
+                ids = [row[0] for row in db.execute("SELECT id FROM capsules")]
+            assert dims == {3}, dims
+            assert len(set(ids)) == 10, ids
+
+            # Only the edited file is re-chunked and re-embedded.
+            batches.clear()
+            (docs / "doc3.md").write_text("# Doc 3\n\nrewritten\n")
+            summary = kb.ingest_path(docs)
+            assert summary["files_ingested"] == 1, summary
+            assert summary["files_skipped_unchanged"] == 4, summary
+            assert batches == [1], batches
+            assert len(kb.list(limit=50)) == 9
+
+    def test_ingest_skips_stat_unchanged_files_without_reading(self):
+        import ai_kb
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            docs = tmp_path / "docs"
+            docs.mkdir()
+            for idx in range(6):
+                (docs / f"doc{idx}.md").write_text(f"# Doc {idx}\n\nbody {idx}\n")
+            kb = ai_kb.KnowledgeBase(home=tmp_path / "kb")
+            assert kb.ingest_path(docs, workers=3)["files_ingested"] == 6
+
+            # Same bytes, new mtime: hashed once, then restamped.
+            touched = docs / "doc2.md"
+            os.utime(touched, ns=(touched.stat().st_atime_ns, touched.stat().st_mtime_ns + 10_000_000))
+            read_text = Path.read_text
+            reads: list[str] = []
+
+            def counting_read(path, *args, **kwargs):
+                reads.append(path.name)
+                return read_text(path, *args, **kwargs)
+
+            with mock.patch.object(Path, "read_text", counting_read):
+                summary = kb.ingest_path(docs, workers=3)
+                assert summary["files_skipped_unchanged"] == 6, summary
+                assert reads == ["doc2.md"], reads
+                reads.clear()
+                summary = kb.ingest_path(docs, workers=3)
+            assert summary["files_skipped_unchanged"] == 6, summary
+            assert reads == [], reads
+
+    def test_ingest_resumes_from_checkpoint_after_interruption(self):
+        import ai_kb
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(ai_kb, "INGEST_EMBED_BATCH", 2):
+            tmp_path = Path(tmp)
+            docs = tmp_path / "docs"
+            docs.mkdir()
+            for idx in range(6):
+                (docs / f"doc{idx}.md").write_text(f"# Doc {idx}\n\nbody {idx}\n")
+            kb = ai_kb.KnowledgeBase(home=tmp_path / "kb")
+
+            real_batch = kb._ingest_batch
+            calls: list[int] = []
+
+            def interrupted_batch(batch, *args, **kwargs):
+                calls.append(len(batch))
+                if len(calls) == 2:
+                    raise KeyboardInterrupt
+                return real_batch(batch, *args, **kwargs)
+
+            with mock.patch.object(kb, "_ingest_batch", interrupted_batch), self.assertRaises(KeyboardInterrupt):
+                kb.ingest_path(docs)
+            assert len(kb.list(limit=50)) == 2
+
+            summary = kb.ingest_path(docs)
+            assert summary["resumed"] is True, summary
+            assert summary["files_committed_before_resume"] == 2, summary
+            assert summary["files_skipped_unchanged"] == 2, summary
+            assert summary["files_ingested"] == 4, summary
+            assert len(kb.list(limit=50)) == 6
+            with closing(kb.connect()) as db:
+                assert db.execute("SELECT COUNT(*) FROM ingest_checkpoints").fetchone()[0] == 0
+            fresh = kb.ingest_path(docs)
+            assert fresh["resumed"] is False and fresh["files_committed_before_resume"] == 0, fresh
+
     def test_ingest_rejects_non_markdown_target(self):
         import ai_kb
 
@@ -1901,6 +2740,45 @@ class TestWorklogHarvest(unittest.TestCase):
             cands = ai_kb.detect_candidates(entries, min_repeats=2)
             assert any(c["detector"] == "repeated_command" for c in cands)
 
+    def test_detectors_stream_a_one_shot_worklog_iterator(self):
+        """Harvest feeds detect_candidates a generator; every lens must work in a single pass."""
+        import ai_kb
+
+        entries = [
+            self._entry(command="pytest a.py", error="E boom line 1"),
+            self._entry(command="make check", status="success"),
+            self._entry(command="pytest a.py", error="E boom line 2"),
+            self._entry(command="cargo build", error="linker failed 7"),
+            self._entry(event="note", note_kind="decision", text="ship the tail reader"),
+            self._entry(command="pytest a.py", status="success"),
+            self._entry(command="make check", status="success"),
+            self._entry(command="cargo build", error="linker failed 9"),
+            self._entry(command="make check", status="success"),
+            self._entry(command="make check", status="success"),
+        ]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            wl = Path(tmp) / "current.worklog.jsonl"
+            wl.write_text("".join(json.dumps(e) + "\n" for e in entries) + "{broken\n", encoding="utf-8")
+            stream = ai_kb.iter_worklog(wl)
+            assert not isinstance(stream, list)
+            cands = ai_kb.detect_candidates(stream, min_repeats=2)
+            assert next(stream, None) is None
+
+        assert [c["detector"] for c in cands] == [
+            "failure_to_fix",
+            "recurring_error",
+            "repeated_command",
+            "structured_note",
+        ]
+        fix, recurring, repeated, note = cands
+        # the first failure anchors the lead; the first later clean run is the fix
+        assert [e.get("error") for e in fix["evidence"]] == ["E boom line 1", None]
+        assert recurring["signature"] == "linker failed <n>" and recurring["count"] == 2
+        assert repeated["count"] == 4 and len(repeated["evidence"]) == 3
+        assert note["kind"] == "fact"
+        assert cands == ai_kb.detect_candidates(entries, min_repeats=2)
+
     def test_suppress_known_flags_existing_capsule(self):
         import ai_kb
 
@@ -11,6 +11,8 @@ import os
 import shutil
 import socket
 import stat
+import subprocess
+import sys
 import tempfile
 import threading
 import time
@@ -92,6 +94,292 @@ class TestEmbedModuleHelpers(unittest.TestCase):
         assert embed.cosine([], [1.0]) == 0.0
         assert embed.cosine([1.0], [1.0, 2.0]) == 0.0  # length mismatch
 
+    def test_vector_frame_roundtrip_rejects_truncation_and_beats_json_size(self):
+        import embed
+        import embed_client
+
+        vectors = [[0.25 * i + j / 7 for j in range(384)] for i in range(3)]
+        rows = b"".join(map(embed.pack_vector, vectors))
+        frame = embed_client.encode_vector_frame({"ok": True, "model": "m", "dim": 384, "count": 3}, rows)
+        header_end, total = embed_client.frame_lengths(frame)
+        assert total == len(frame) and frame[header_end:] == rows
+        assert embed_client.frame_lengths(frame[:4]) is None
+        assert embed_client.frame_lengths(frame[: header_end - 1])[1] == -1
+        header, decoded = embed_client.decode_vector_frame(frame)
+        assert header["count"] == 3
+        assert embed_client.split_rows(decoded, 384) == [rows[i * 1536 : (i + 1) * 1536] for i in range(3)]
+        with self.assertRaises(ValueError):
+            embed_client.decode_vector_frame(frame[:-1])
+        assert not embed_client.finite_rows(rows[:-4] + b"\x00\x00\xc0\x7f")  # NaN
+        json_bytes = len(json.dumps({"ok": True, "model": "m", "dim": 384, "vectors": vectors}))
+        assert len(frame) * 2 < json_bytes, (len(frame), json_bytes)
+
+    def test_runner_stdout_parses_frames_after_chatter_and_falls_back_to_json(self):
+        import embed
+        import embed_client
+
+        embedder = embed.Embedder(model="m")
+        rows = embed.pack_vector([1.0, 2.0]) + embed.pack_vector([3.0, 4.0])
+        frame = embed_client.encode_vector_frame({"ok": True, "model": "m", "dim": 2, "count": 2}, rows)
+        result = embedder._parse_runner_stdout(b"Fetching 5 files\n" + frame + b"\n")
+        assert result.dim == 2 and result.blobs == [rows[:8], rows[8:]]
+        assert result.vectors == [[1.0, 2.0], [3.0, 4.0]]
+        legacy = embedder._parse_runner_stdout(b'{"model": "m", "dim": 2, "vectors": [[1.0, 2.0]]}\n')
+        assert legacy.vectors == [[1.0, 2.0]] and legacy.blobs == [rows[:8]]
+        with self.assertRaises(embed.EmbedderUnavailable):
+            embedder._parse_runner_stdout(frame[:-3])
+
+
+def _scalar_cosine(a: list[float], b: list[float]) -> float:
+    """The per-pair Python loop `similarity` replaced; kept as the oracle."""
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    dot = na = nb = 0.0
+    for x, y in zip(a, b):
+        dot += x * y
+        na += x * x
+        nb += y * y
+    if na <= 0 or nb <= 0:
+        return 0.0
+    return dot / ((na**0.5) * (nb**0.5))
+
+
+def _random_blobs(count: int, dim: int, seed: int) -> list[bytes]:
+    import random
+
+    import embed
+
+    rng = random.Random(seed)
+    return [embed.pack_vector([rng.uniform(-1.0, 1.0) for _ in range(dim)]) for _ in range(count)]
+
+
+class TestSimilarityKernel(unittest.TestCase):
+    """Bulk cosine/MMR over packed BLOBs must match the scalar loop."""
+
+    def backends(self) -> list[bool]:
+        import similarity
+
+        return [False, True] if similarity.HAVE_NUMPY else [False]
+
+    def test_matrix_scores_match_scalar_cosine_and_zero_unusable_rows(self):
+        import embed
+        import similarity
+
+        blobs = _random_blobs(20, 16, seed=3)
+        blobs[4] = None
+        blobs[7] = embed.pack_vector([0.5] * 8)  # other dimension
+        blobs[9] = embed.pack_vector([0.0] * 16)  # zero vector
+        query = embed.unpack_vector(_random_blobs(1, 16, seed=4)[0])
+        for use_numpy in self.backends():
+            matrix = similarity.VectorMatrix(blobs, dim=16, use_numpy=use_numpy)
+            scores = matrix.scores(query)
+            for blob, score in zip(blobs, scores):
+                expected = _scalar_cosine(query, embed.unpack_vector(blob))
+                assert abs(score - expected) < 1e-5, (use_numpy, score, expected)
+            assert scores[4] == scores[7] == scores[9] == 0.0
+            assert matrix.scores([1.0, 2.0]) == [0.0] * 20
+            assert matrix.first_at_least(embed.unpack_vector(blobs[12]), 0.999) == 12
+
+    def test_mmr_order_matches_scalar_selection(self):
+        import embed
+        import random
+        import similarity
+
+        blobs = _random_blobs(40, 12, seed=11)
+        blobs[5] = None
+        vectors = [embed.unpack_vector(b) for b in blobs]
+        rng = random.Random(12)
+        relevance = [rng.uniform(0.0, 0.05) for _ in blobs]
+
+        remaining = sorted(range(len(blobs)), key=lambda i: relevance[i], reverse=True)
+        expected = [remaining.pop(0)]
+        while remaining and len(expected) < 10:
+            best, best_score = None, -1e9
+            for idx in remaining:
+                sim = max((_scalar_cosine(vectors[idx], vectors[s]) for s in expected), default=0.0)
+                score = 0.7 * relevance[idx] - 0.3 * sim
+                if score > best_score:
+                    best, best_score = idx, score
+            expected.append(best)
+            remaining.remove(best)
+
+        for use_numpy in self.backends():
+            matrix = similarity.VectorMatrix(blobs, use_numpy=use_numpy)
+            assert similarity.mmr_order(matrix, relevance, 10, 0.7) == expected, use_numpy
+
+    @unittest.skipUnless(os.environ.get("AI_KB_SCALE_TESTS"), "set AI_KB_SCALE_TESTS=1 to time the cosine paths")
+    def test_microbenchmark_384_dims(self):
+        """Score one query against 50/500/5000 candidates: unpack + scalar
+        loop (old path) versus the array('f') and NumPy matrix paths.
+        Opt-in; printed for comparison across changes."""
+        import embed
+        import similarity
+
+        query = embed.unpack_vector(_random_blobs(1, 384, seed=1)[0])
+        lines = []
+        for count in (50, 500, 5000):
+            blobs = _random_blobs(count, 384, seed=count)
+            started = time.perf_counter()
+            expected = [_scalar_cosine(query, embed.unpack_vector(b)) for b in blobs]
+            timings = {"scalar": time.perf_counter() - started}
+            for use_numpy in self.backends():
+                started = time.perf_counter()
+                scores = similarity.VectorMatrix(blobs, use_numpy=use_numpy).scores(query)
+                timings["numpy" if use_numpy else "array"] = time.perf_counter() - started
+                assert max(abs(a - b) for a, b in zip(scores, expected)) < 1e-5, (count, use_numpy)
+            lines.append(f"  n={count}: " + " ".join(f"{name}={sec * 1000:.2f}ms" for name, sec in timings.items()))
+        print("\ncosine 384d, build+score one query:\n" + "\n".join(lines))
+
+
+class TestEmbedWorkerQueue(unittest.TestCase):
+    """The resident worker's coalescing, two-lane embed queue."""
+
+    def test_queue_coalesces_waiting_requests_and_drains_interactive_first(self):
+        import embed_worker
+
+        gate = threading.Event()
+        calls: list[list[str]] = []
+
+        class GatedModel:
+            def embed(self, texts):
+                calls.append(list(texts))
+                if len(calls) == 1:
+                    gate.wait(5)
+                return [[1.0, 0.0] for _ in texts]
+
+        queue = embed_worker.EmbedQueue(GatedModel(), 2, coalesce_seconds=0.01, max_batch=3, max_bulk_batch=2)
+        runner = threading.Thread(target=queue.run, daemon=True)
+        runner.start()
+        try:
+            blocker = queue.submit(["backfill 0"], "bulk")
+            deadline = time.monotonic() + 2
+            while not calls and time.monotonic() < deadline:
+                time.sleep(0.005)
+            # The model is busy; everything below queues up behind it.
+            bulk = [queue.submit([f"backfill {i}"], "bulk") for i in (1, 2)]
+            interactive = [queue.submit([f"query {i}"], "interactive") for i in range(3)]
+            assert queue.stats()["queue"] == {"interactive": 3, "bulk": 2}
+            gate.set()
+            for job in [blocker, *bulk, *interactive]:
+                assert job.done.wait(2)
+                assert job.error is None and job.vectors == [[1.0, 0.0]] * len(job.texts)
+        finally:
+            queue.close()
+            runner.join(2)
+        assert calls == [["backfill 0"], ["query 0", "query 1", "query 2"], ["backfill 1", "backfill 2"]], calls
+        stats = queue.stats()
+        assert stats["batches"] == 3 and stats["batched_texts"] == 6 and stats["max_batch"] == 3, stats
+        assert stats["coalesced_requests"] == 5, stats
+
+    def test_mixed_batch_keeps_bulk_texts_within_the_bulk_cap(self):
+        import embed_worker
+
+        queue = embed_worker.EmbedQueue(object(), 2, max_batch=6, max_bulk_batch=2)
+        queue.submit(["query 0"], "interactive")
+        for i in range(4):
+            queue.submit([f"backfill {i}"], "bulk")
+        batch = queue._take_batch()
+        assert [(job.priority, job.texts) for job in batch] == [
+            ("interactive", ["query 0"]),
+            ("bulk", ["backfill 0"]),
+            ("bulk", ["backfill 1"]),
+        ]
+        assert [job.texts for job in queue._take_batch()] == [["backfill 2"], ["backfill 3"]]
+
+        # A single oversized bulk job still runs alone rather than starving.
+        queue.submit(["a", "b", "c"], "bulk")
+        assert [job.texts for job in queue._take_batch()] == [["a", "b", "c"]]
+
+    def test_queue_rejects_malformed_model_output_per_request(self):
+        import embed_worker
+
+        class ShortModel:
+            def embed(self, texts):
+                return [[0.5, float("nan")] for _ in texts]
+
+        queue = embed_worker.EmbedQueue(ShortModel(), 2, coalesce_seconds=0.0)
+        runner = threading.Thread(target=queue.run, daemon=True)
+        runner.start()
+        try:
+            job = queue.submit(["x"])
+            assert job.done.wait(2)
+            assert job.vectors is None and job.error == "invalid_vectors"
+        finally:
+            queue.close()
+            runner.join(2)
+
+    def test_live_worker_serves_concurrent_connections_and_reports_queue_stats(self):
+        import embed_client
+
+        with short_runtime_directory() as tmp:
+            root = Path(tmp)
+            worker = root / "worker.py"
+            worker.write_text(FAKE_FASTEMBED_WORKER)
+            spec = embed_client.RuntimeSpec(runtime_dir=root / "runtime", worker=worker, idle_seconds=5)
+            embed_client.secure_runtime_root(spec)
+            env = {**os.environ, "PYTHONPATH": str(Path(__file__).parent)}
+            command = [
+                sys.executable,
+                str(worker),
+                "--socket",
+                str(spec.socket_path),
+                "--generation",
+                spec.generation,
+                "--model",
+                spec.model,
+                "--dimension",
+                str(spec.dimension),
+                "--idle-seconds",
+                "5",
+                "--start-marker",
+                str(spec.start_marker_path),
+            ]
+            proc = subprocess.Popen(command, env=env)
+            try:
+                deadline = time.monotonic() + 5
+                while embed_client.ping(spec) is None and time.monotonic() < deadline:
+                    time.sleep(0.02)
+                assert embed_client.ping(spec) is not None
+
+                with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+                    responses = list(
+                        pool.map(
+                            lambda index: embed_client.embed(
+                                spec,
+                                [f"parallel request {index}"],
+                                connect_only=True,
+                                priority="bulk" if index % 2 else "interactive",
+                            ),
+                            range(8),
+                        )
+                    )
+                assert all(row.get("ok") is True for row in responses), responses
+                assert all(len(row["rows"]) == spec.dimension * 4 for row in responses), responses
+
+                # Clients that predate binary framing still get JSON vectors.
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                    client.settimeout(2)
+                    client.connect(str(spec.socket_path))
+                    request = {"op": "embed", "generation": spec.generation, "texts": ["legacy client"]}
+                    client.sendall(json.dumps(request).encode() + b"\n")
+                    reply = b""
+                    while not reply.endswith(b"\n"):
+                        chunk = client.recv(65536)
+                        if not chunk:
+                            break
+                        reply += chunk
+                legacy = json.loads(reply)
+                assert legacy["ok"] is True and len(legacy["vectors"][0]) == spec.dimension, legacy
+                stats = embed_client.ping(spec)
+                assert stats["queue"] == {"interactive": 0, "bulk": 0}, stats
+                assert stats["batched_texts"] == 9 and 2 <= stats["batches"] <= 9, stats
+                assert embed_client.shutdown(spec).get("ok") is True
+                assert proc.wait(5) == 0
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+
 
 class TestResidentEmbedRuntime(unittest.TestCase):
     """WHEN interactive recall opts into the resident connect-only lane."""
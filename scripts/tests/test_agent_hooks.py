@@ -8,6 +8,7 @@ import os
 import subprocess
 import sys
 import tempfile
+import time
 import unittest
 from pathlib import Path
 
@@ -2227,5 +2228,118 @@ class BandGateTests(unittest.TestCase):
         self.assertEqual(answer["hookSpecificOutput"]["updatedInput"]["model"], "gpt-5.4")
 
 
+class TestHookHost(unittest.TestCase):
+    """WHEN the optional resident hook host serves hook events."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.hooks = self.root / "hooks"
+        self.hooks.mkdir()
+        for source in HOOKS.glob("*.py"):
+            (self.hooks / source.name.removeprefix("executable_")).write_text(source.read_text())
+        self.runtime = self.root / "runtime"
+        self.env = hook_env({**os.environ, "AGENT_HOOK_HOST_RUNTIME_DIR": str(self.runtime)})
+        self.env["AGENT_MEMORY_SPEC_ROOT"] = str(self.root / "host-specs")
+
+    def start_host(self) -> subprocess.Popen:
+        host = subprocess.Popen(
+            [sys.executable, str(self.hooks / "hook_host.py"), "serve", "--idle-seconds", "30"],
+            env=self.env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.addCleanup(host.wait, 5)
+        self.addCleanup(host.terminate)
+        deadline = time.monotonic() + 10
+        while not (self.runtime / "hook-host.sock").exists():
+            self.assertIsNone(host.poll(), "hook host exited during startup")
+            self.assertLess(time.monotonic(), deadline, "hook host never listened")
+            time.sleep(0.02)
+        return host
+
+    def run_deployed(self, name: str, payload: dict, **env: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, str(self.hooks / name)],
+            input=json.dumps(payload),
+            capture_output=True,
+            text=True,
+            cwd=str(REPO),
+            env={**self.env, **env},
+        )
+
+    def test_host_runs_handlers_with_the_callers_stdio_env_and_status(self):
+        host = self.start_host()
+        nudge = {"hook_event_name": "PreToolUse", "tool_name": "Bash", "tool_input": {"command": "git stash"}}
+        hosted = self.run_deployed("premise_nudge.py", nudge)
+        direct = self.run_deployed("premise_nudge.py", nudge, AGENT_HOOK_HOST="0")
+        self.assertEqual((hosted.returncode, hosted.stdout), (direct.returncode, direct.stdout))
+        self.assertIn("Premise check", hosted.stdout)
+
+        # The handler re-reads its environment per event: the worklog lands
+        # under the caller's spec root, not the one the host started with.
+        with tempfile.TemporaryDirectory() as workspace:
+            spec_root = self.root / "caller-specs"
+            payload = {
+                "hook_event_name": "postToolUse",
+                "workspace_roots": [workspace],
+                "session_id": "host-session",
+                "tool_input": {"command": "printf hosted"},
+            }
+            result = self.run_deployed("worklog_recorder.py", payload, AGENT_MEMORY_SPEC_ROOT=str(spec_root))
+            self.assertEqual(result.returncode, 0, result.stderr)
+            worklogs = list(spec_root.rglob("*.worklog.jsonl"))
+            self.assertEqual(len(worklogs), 1)
+            self.assertEqual(json.loads(worklogs[0].read_text().splitlines()[-1])["command"], "printf hosted")
+        self.assertFalse((self.root / "host-specs").exists())
+
+        # A changed hook file retires the host; the event still runs directly.
+        with (self.hooks / "band_gate.py").open("a") as stream:
+            stream.write("\n")
+        retired = self.run_deployed("premise_nudge.py", nudge)
+        self.assertEqual(retired.stdout, direct.stdout)
+        self.assertEqual(host.wait(5), 0)
+
+    def test_events_run_in_the_host_instead_of_the_calling_process(self):
+        """A hosted event never imports the handler's modules in the caller.
+
+        `PYTHONVERBOSE` is read at interpreter startup, so only the calling
+        process logs its imports; the host's forked child stays quiet.
+        """
+        self.start_host()
+        nudge = {"hook_event_name": "PreToolUse", "tool_name": "Bash", "tool_input": {"command": "git stash"}}
+        for _ in range(3):
+            hosted = self.run_deployed("premise_nudge.py", nudge, PYTHONVERBOSE="1")
+            self.assertEqual(hosted.returncode, 0, hosted.stderr)
+            self.assertIn("Premise check", hosted.stdout)
+            self.assertIn("import 'hook_host'", hosted.stderr)
+            self.assertNotIn("import 'hook_common'", hosted.stderr)
+        direct = self.run_deployed("premise_nudge.py", nudge, PYTHONVERBOSE="1", AGENT_HOOK_HOST="0")
+        self.assertEqual(direct.stdout, hosted.stdout)
+        self.assertIn("import 'hook_common'", direct.stderr)
+
+    @unittest.skipUnless(os.environ.get("AGENT_HOOK_HOST_BENCH"), "set AGENT_HOOK_HOST_BENCH=1 to time the host")
+    def test_hook_latency_with_and_without_the_host(self):
+        """p50/p99 of one hook event both ways. Opt-in; printed for comparison across changes."""
+        self.start_host()
+        nudge = {"hook_event_name": "PreToolUse", "tool_name": "Bash", "tool_input": {"command": "ls"}}
+        timings = {}
+        for mode in ("1", "0"):
+            samples = []
+            for _ in range(60):
+                started = time.perf_counter()
+                result = self.run_deployed("premise_nudge.py", nudge, AGENT_HOOK_HOST=mode)
+                samples.append(time.perf_counter() - started)
+                self.assertEqual(result.returncode, 0, result.stderr)
+            samples.sort()
+            timings[mode] = (samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99)] * 1000)
+        print(
+            f"\nhook host: premise_nudge p50/p99 {timings['1'][0]:.1f}/{timings['1'][1]:.1f}ms hosted, "
+            f"{timings['0'][0]:.1f}/{timings['0'][1]:.1f}ms direct"
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
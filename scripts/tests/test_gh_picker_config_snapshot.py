@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Regression tests for the GitHub picker's compiled config snapshot."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+from unittest import mock
+
+import _test_support  # noqa: F401  (puts scripts/ on sys.path)
+from _test_support import REPO
+
+MODULE = REPO / "home/dot_config/exact_tmux/exact_scripts/pickers/github/lib/gh_items_main.py"
+
+CONFIG = {
+    "prSections": [
+        {"title": "Mine", "filters": "is:open is:pr author:@me\n", "scopes": ["focus"]},
+        {"title": "Queue", "filters": "is:open review-requested:@me", "source": "review-requested-direct"},
+    ],
+    "issuesSections": [{"title": "Assigned", "filters": "is:open assignee:@me", "scopes": "focus, explore"}],
+    "repoPaths": {"elastic/kibana": "~/work/kibana"},
+}
+
+
+def _load_module():
+    loader = SourceFileLoader("gh_items_config_snapshot_test", str(MODULE))
+    spec = importlib.util.spec_from_loader("gh_items_config_snapshot_test", loader)
+    if spec is None or spec.loader is None:
+        raise AssertionError("could not load gh picker items module")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestConfigSnapshot(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.module = _load_module()
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = str(Path(tmp.name) / "cache")
+        self.config = Path(tmp.name) / "gh-picker-work.yml"
+        self.config.write_text("prSections: []\n", encoding="utf-8")
+        self.yq_output = CONFIG
+        self.yq_calls = 0
+
+    def _fake_yq(self, cmd, **_kwargs):
+        self.assertEqual(cmd[0], "yq")
+        self.yq_calls += 1
+        return subprocess.CompletedProcess(cmd, 0, stdout=json.dumps(self.yq_output), stderr="")
+
+    def _parse(self, cache_dir: str | None = None):
+        with mock.patch.object(self.module.subprocess, "run", side_effect=self._fake_yq):
+            return self.module.parse_config(str(self.config), cache_dir)
+
+    def test_snapshot_compiles_once_and_serves_later_opens_without_yq(self):
+        expected = self._parse()
+        self.assertEqual(self.yq_calls, 1)
+        self.assertEqual(expected[0][0], {"title": "Mine", "filters": "is:open is:pr author:@me", "scopes": ["focus"]})
+        self.assertEqual(expected[1][0]["scopes"], ["focus", "explore"])
+
+        self.assertEqual(self._parse(self.cache_dir), expected)
+        self.assertEqual(self.yq_calls, 2)
+        for _ in range(3):
+            self.assertEqual(self._parse(self.cache_dir), expected)
+        self.assertEqual(self.yq_calls, 2)
+        self.assertTrue((Path(self.cache_dir) / "gh_picker_config_gh-picker-work.json").is_file())
+
+    def test_rewritten_identical_config_keeps_the_snapshot(self):
+        self._parse(self.cache_dir)
+        st = self.config.stat()
+        self.config.write_bytes(self.config.read_bytes())
+        os.utime(self.config, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+        self._parse(self.cache_dir)
+        self._parse(self.cache_dir)
+        self.assertEqual(self.yq_calls, 1)
+
+    def test_changed_config_recompiles(self):
+        self._parse(self.cache_dir)
+        self.config.write_text("prSections: [{}]\n", encoding="utf-8")
+        self.yq_output = {"prSections": [{"title": "Only", "filters": "is:pr"}]}
+
+        pr_sections, issue_sections, repo_paths = self._parse(self.cache_dir)
+        self.assertEqual(self.yq_calls, 2)
+        self.assertEqual(pr_sections, [{"title": "Only", "filters": "is:pr"}])
+        self.assertEqual((issue_sections, repo_paths), ([], {}))
+
+    def test_corrupt_snapshot_falls_back_to_yq(self):
+        self._parse(self.cache_dir)
+        (Path(self.cache_dir) / "gh_picker_config_gh-picker-work.json").write_text("{", encoding="utf-8")
+
+        self.assertEqual(self._parse(self.cache_dir)[2], {"elastic/kibana": "~/work/kibana"})
+        self.assertEqual(self.yq_calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,6 +14,7 @@ import unittest
 from concurrent.futures import ProcessPoolExecutor
 from multiprocessing import get_context
 from pathlib import Path
+from unittest import mock
 
 import _test_support  # noqa: F401
 from _test_support import REPO
@@ -725,6 +726,143 @@ class TestWorklogQueue(unittest.TestCase):
         self.assertEqual([entry["command"] for entry in entries], ["first", "second"])
         self.assertEqual(len({entry["worklog_id"] for entry in entries}), 2)
 
+    def _enqueue_at(self, session_key: str, second: int, command: str, **kwargs):
+        import worklog_queue
+
+        return worklog_queue.enqueue(
+            self.spec_dir,
+            session_key,
+            "current",
+            self.worklog,
+            {"ts": f"2026-07-11T12:{second // 60:02d}:{second % 60:02d}+00:00", "command": command},
+            start_worker=False,
+            **kwargs,
+        )
+
+    def test_in_order_flush_appends_and_reindexes_after_an_outside_write(self) -> None:
+        import worklog_queue
+
+        first = self._enqueue_at("append-session", 1, "one")
+        self._enqueue_at("append-session", 2, "two")
+        worklog_queue.flush_session(first.queue_dir)
+        inode = self.worklog.stat().st_ino
+        self._enqueue_at("append-session", 3, "three")
+        worklog_queue.flush_session(first.queue_dir)
+        # An in-order batch is appended in place, not rewritten.
+        self.assertEqual(self.worklog.stat().st_ino, inode)
+
+        # A writer outside the queue (and a replayed, already-committed
+        # event) invalidates the sidecar fingerprint; the rebuild dedupes.
+        replay = self._enqueue_at("append-session", 4, "four")
+        record = worklog_queue.read_queue_record(replay.path)
+        committed = {
+            **record["entry"],
+            "worklog_id": record["id"],
+            "session_key": record["session_key"],
+            "worklog_seq": record["seq"],
+        }
+        with self.worklog.open("a", encoding="utf-8") as stream:
+            stream.write(json.dumps(committed, sort_keys=True) + "\n")
+        self._enqueue_at("append-session", 5, "five")
+        result = worklog_queue.flush_session(first.queue_dir)
+        commands = [json.loads(line)["command"] for line in self.worklog.read_text(encoding="utf-8").splitlines()]
+
+        self.assertEqual((result.flushed, result.duplicates), (1, 1))
+        self.assertEqual(commands, ["one", "two", "three", "four", "five"])
+
+    def test_appends_exceed_the_line_cap_only_until_the_next_compaction(self) -> None:
+        import worklog_queue
+
+        config = worklog_queue.QueueConfig(max_worklog_lines=5)
+        for second in range(9):
+            receipt = self._enqueue_at("cap-session", second, f"command-{second}")
+            worklog_queue.flush_session(receipt.queue_dir, config=config)
+        # Nine lines fit under COMPACT_SLACK x 5, so every flush only
+        # appended; the batch that would make eleven compacts to the cap.
+        self.assertEqual(len(self.worklog.read_text(encoding="utf-8").splitlines()), 9)
+        receipt = self._enqueue_at("cap-session", 30, "late")
+        self._enqueue_at("cap-session", 31, "later")
+        worklog_queue.flush_session(receipt.queue_dir, config=config)
+        commands = [json.loads(line)["command"] for line in self.worklog.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual(commands, ["command-6", "command-7", "command-8", "late", "later"])
+
+        # A late, out-of-order event sorts in through a compaction, and a
+        # drain leaves readers the bounded tail.
+        self._enqueue_at("other-session", 7, "straggler")
+        worklog_queue.flush_spec_dir(self.spec_dir, config=config)
+        commands = [json.loads(line)["command"] for line in self.worklog.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual(commands, ["command-7", "straggler", "command-8", "late", "later"])
+
+    def test_per_event_flush_of_1000_hook_events_keeps_the_capped_tail(self) -> None:
+        """Enqueue + flush per event, as the per-event worker does, for 1,000
+        events in one session."""
+        import worklog_queue
+
+        for second in range(1000):
+            receipt = self._enqueue_at("bench-session", second, f"command-{second}")
+            worklog_queue.flush_session(receipt.queue_dir)
+        worklog_queue.flush_spec_dir(self.spec_dir)
+        lines = self.worklog.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(len(lines), worklog_queue.DEFAULT_MAX_WORKLOG_LINES)
+        self.assertEqual(json.loads(lines[-1])["command"], "command-999")
+
+    def test_counter_skips_directory_scans_until_a_crash_is_detected(self) -> None:
+        import worklog_queue
+
+        first = self._enqueue_at("counter-session", 1, "one")
+        queue_dir = first.queue_dir
+        scans: list[Path] = []
+        real_scan = worklog_queue._scan_counter
+
+        def counting_scan(path: Path, floor: int = 0) -> tuple[int, int, int]:
+            scans.append(path)
+            return real_scan(path, floor)
+
+        with mock.patch.object(worklog_queue, "_scan_counter", counting_scan):
+            second = self._enqueue_at("counter-session", 2, "two")
+            sizes = first.path.stat().st_size + second.path.stat().st_size
+            self.assertEqual(worklog_queue._pending_state(queue_dir), (2, sizes))
+            self.assertEqual(scans, [])
+
+            # A writer that dies between publishing an event and updating
+            # the record leaves it dirty; the next holder recounts once.
+            orphan = queue_dir / f"{second.seq + 1:020d}.json"
+            with self.assertRaises(RuntimeError):
+                with worklog_queue._counter(queue_dir) as counter:
+                    counter.begin()
+                    orphan.write_bytes(second.path.read_bytes())
+                    raise RuntimeError("killed mid-enqueue")
+            third = self._enqueue_at("counter-session", 3, "three")
+            self.assertEqual(scans, [queue_dir])
+            self.assertEqual(third.seq, second.seq + 2)
+            self.assertEqual(worklog_queue._pending_state(queue_dir)[0], 4)
+            self.assertEqual(len(scans), 1)
+
+        result = worklog_queue.flush_session(queue_dir)
+        self.assertEqual((result.pending, result.duplicates), (0, 1))
+        self.assertEqual(worklog_queue._pending_state(queue_dir), (0, 0))
+        self.assertEqual(self._enqueue_at("counter-session", 4, "four").seq, third.seq + 1)
+
+    def test_enqueue_with_a_deep_backlog_never_lists_the_queue(self) -> None:
+        """Enqueue cost must not grow with the pending backlog: only the first
+        enqueue, which creates the counter record, scans the directory."""
+        import worklog_queue
+
+        config = worklog_queue.QueueConfig(max_pending=1000, max_bytes=1024 * 1024)
+        listings: list[Path] = []
+        real_event_paths = worklog_queue._event_paths
+
+        def counting_event_paths(queue_dir: Path) -> list[Path]:
+            listings.append(queue_dir)
+            return real_event_paths(queue_dir)
+
+        with mock.patch.object(worklog_queue, "_event_paths", counting_event_paths):
+            for second in range(500):
+                self._enqueue_at("backlog-session", second, f"command-{second}", config=config)
+        queue_dir = worklog_queue.session_queue_dir(self.spec_dir, "backlog-session")
+        self.assertEqual(listings, [queue_dir])
+        self.assertEqual(worklog_queue._pending_state(queue_dir)[0], 500)
+
     def test_cleanup_checks_oldest_sessions_before_its_per_pass_limit(self) -> None:
         import worklog_queue
 
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Unit tests for the session picker's directory snapshot over synthetic trees."""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+from unittest import mock
+
+import _test_support  # noqa: F401  (puts scripts/ on sys.path)
+from _test_support import TMUX_PICKERS
+
+MODULE = TMUX_PICKERS / "session/lib/dir_snapshot.py"
+EXCLUDES = ["node_modules/", "bazel-*/", ".cache/", ".local/share/mise/installs/"]
+
+
+def _load_module():
+    loader = SourceFileLoader("session_dir_snapshot_test", str(MODULE))
+    spec = importlib.util.spec_from_loader("session_dir_snapshot_test", loader)
+    if spec is None or spec.loader is None:
+        raise AssertionError("could not load session dir snapshot module")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_synthetic_tree(root: Path, dirs: int, fanout: int = 8, repo_every: int = 40) -> int:
+    """Build a home-like tree of roughly `dirs` directories, breadth first.
+
+    Every `repo_every`-th directory becomes a repo (`.git` dir, or a `.git`
+    file for odd ones, like linked worktrees), and some branches carry
+    `node_modules` / `bazel-out` noise that the exclude patterns must skip.
+    Returns the number of directories created.
+    """
+    created = 0
+    frontier = [root]
+    while frontier and created < dirs:
+        parent = frontier.pop(0)
+        for i in range(fanout):
+            if created >= dirs:
+                break
+            name = (".hidden-%d" if i == fanout - 1 else "d%d") % i
+            child = parent / name
+            child.mkdir()
+            created += 1
+            if created % repo_every == 0:
+                if created % (2 * repo_every):
+                    (child / ".git").write_text("gitdir: /nowhere\n")
+                else:
+                    (child / ".git").mkdir()
+            if created % 97 == 0:
+                (child / "node_modules" / "pkg").mkdir(parents=True)
+                (child / "bazel-out" / "k8").mkdir(parents=True)
+            frontier.append(child)
+    return created
+
+
+def _naive_walk(root: str, max_depth: int, excluded, include_hidden=True, stop_at_repos=False, skip=frozenset()):
+    """Reference walk straight off the filesystem (what fd used to produce)."""
+    out = []
+    stack = [(root, "", 0)]
+    while stack:
+        path, rel, depth = stack.pop()
+        has_git = os.path.lexists(os.path.join(path, ".git")) and not os.path.islink(os.path.join(path, ".git"))
+        out.append((path, depth, has_git))
+        if depth >= max_depth or (stop_at_repos and has_git):
+            continue
+        for entry in os.scandir(path):
+            if entry.name == ".git" or not entry.is_dir(follow_symlinks=False):
+                continue
+            if not include_hidden and entry.name.startswith("."):
+                continue
+            child_rel = f"{rel}/{entry.name}" if rel else entry.name
+            if excluded(entry.name, child_rel, depth + 1) or entry.path in skip:
+                continue
+            stack.append((entry.path, child_rel, depth + 1))
+    return sorted(out)
+
+
+class TestDirSnapshot(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.module = _load_module()
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name).resolve() / "home"
+        self.root.mkdir()
+        self.store = Path(tmp.name) / "cache" / "pick_session_dirs.json"
+        self.excluded = self.module.exclude_matcher(EXCLUDES)
+
+    def _snapshot(self):
+        return self.module.DirSnapshot(self.store)
+
+    def _walk(self, snapshot, **kwargs):
+        return sorted(snapshot.walk(str(self.root), kwargs.pop("max_depth", 6), self.excluded, **kwargs))
+
+    def _age_tree(self):
+        # Step outside the racy window so warm walks can trust the stamps.
+        old = time.time() - 60
+        for dirpath, _dirnames, _files in os.walk(self.root):
+            os.utime(dirpath, (old, old))
+
+    def test_exclude_patterns_match_components_and_anchor_paths_with_slashes(self):
+        excluded = self.excluded
+        self.assertTrue(excluded("node_modules", "a/b/node_modules", 3))
+        self.assertTrue(excluded("bazel-out", "bazel-out", 1))
+        self.assertTrue(excluded("installs", ".local/share/mise/installs", 4))
+        self.assertFalse(excluded("installs", "x/.local/share/mise/installs", 5))
+        self.assertFalse(excluded("mise", ".local/share/mise", 3))
+
+    def test_walk_matches_a_fresh_filesystem_walk(self):
+        make_synthetic_tree(self.root, 600)
+        (self.root / "d0" / "link").symlink_to(self.root / "d1", target_is_directory=True)
+        skip = frozenset({str(self.root / "d2")})
+        cases = [
+            {"max_depth": 6},
+            {"max_depth": 3, "include_hidden": False},
+            {"max_depth": 5, "stop_at_repos": True},
+            {"max_depth": 6, "skip_paths": skip},
+        ]
+        for kwargs in cases:
+            with self.subTest(**{k: v for k, v in kwargs.items() if k != "skip_paths"}):
+                expected = _naive_walk(
+                    str(self.root),
+                    kwargs["max_depth"],
+                    self.excluded,
+                    kwargs.get("include_hidden", True),
+                    kwargs.get("stop_at_repos", False),
+                    kwargs.get("skip_paths", frozenset()),
+                )
+                self.assertEqual(self._walk(self._snapshot(), **dict(kwargs)), expected)
+
+    def test_warm_walk_relists_only_changed_directories_and_prunes_removed_subtrees(self):
+        make_synthetic_tree(self.root, 300)
+        self._age_tree()
+        first = self._snapshot()
+        self._walk(first)
+        first.save()
+
+        listed: list[str] = []
+        real_scandir = os.scandir
+
+        def walk_counting_listings(snapshot):
+            self.module.os.scandir = lambda path: listed.append(str(path)) or real_scandir(path)
+            try:
+                return self._walk(snapshot)
+            finally:
+                self.module.os.scandir = real_scandir
+
+        warm = self._snapshot()
+        walk_counting_listings(warm)
+        self.assertEqual(listed, [])
+        self.assertFalse(warm.changed)
+
+        fresh = self.root / "d3" / "fresh"
+        (fresh / "repo" / ".git").mkdir(parents=True)
+        shutil.rmtree(self.root / "d4")
+        changed = self._snapshot()
+        walked = walk_counting_listings(changed)
+        self.assertEqual(set(listed), {str(self.root), str(self.root / "d3"), str(fresh), str(fresh / "repo")})
+        self.assertIn((str(fresh / "repo"), 3, True), walked)
+        changed.save()
+
+        reloaded = self._snapshot()
+        removed = str(self.root / "d4")
+        self.assertFalse([p for p in reloaded.dirs if p == removed or p.startswith(removed + "/")])
+        self.assertIn(str(fresh / "repo"), reloaded.dirs)
+
+    def test_unchanged_tree_reindex_lists_no_directories(self):
+        """A warm reindex of an unchanged synthetic home (both index walks)
+        returns the cold results without a single scandir."""
+        make_synthetic_tree(self.root, 3000)
+        self._age_tree()
+
+        def reindex():
+            snapshot = self._snapshot()
+            walk = snapshot.walk(str(self.root), 5, self.excluded, stop_at_repos=True)
+            repos = sorted(p for p, _d, has_git in walk if has_git)
+            homes = sorted(p for p, d, _g in snapshot.walk(str(self.root), 6, self.excluded) if d > 0)
+            snapshot.save()
+            return repos, homes
+
+        cold = reindex()
+        with mock.patch.object(self.module.os, "scandir", wraps=os.scandir) as scandir:
+            warm = reindex()
+        self.assertEqual(scandir.call_count, 0)
+        self.assertEqual(warm, cold)
+        self.assertTrue(cold[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Tests for the session index's fingerprinted dirty-state cache."""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+from unittest import mock
+
+import _test_support  # noqa: F401  (puts scripts/ on sys.path)
+from _test_support import TMUX_PICKERS
+
+LIB = TMUX_PICKERS / "session/lib"
+if str(LIB) not in sys.path:
+    sys.path.insert(0, str(LIB))
+
+
+def _load_module():
+    loader = SourceFileLoader("session_dirty_cache_test", str(LIB / "dirty_cache.py"))
+    spec = importlib.util.spec_from_loader("session_dirty_cache_test", loader)
+    if spec is None or spec.loader is None:
+        raise AssertionError("could not load session dirty cache module")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _git(*args: str, cwd: Path) -> None:
+    cmd = ["git", "-c", "user.name=t", "-c", "user.email=t@e", *args]
+    subprocess.run(cmd, cwd=cwd, check=True, capture_output=True)
+
+
+def _age(path: Path, seconds: int = 60) -> None:
+    """Push mtimes out of the racy window so fingerprints are recorded."""
+    past = time.time() - seconds
+    for p in [path, *path.rglob("*")]:
+        os.utime(p, (past, past), follow_symlinks=False)
+
+
+@unittest.skipUnless(shutil.which("git"), "git is required")
+class TestDirtyCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.module = _load_module()
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        base = Path(tmp.name).resolve()
+        env = mock.patch.dict(os.environ, {"GIT_CONFIG_GLOBAL": os.devnull, "GIT_CONFIG_NOSYSTEM": "1"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.repo = base / "repo"
+        (self.repo / "src" / "deep").mkdir(parents=True)
+        (self.repo / "src" / "deep" / "a.txt").write_text("a\n")
+        (self.repo / "README.md").write_text("readme\n")
+        _git("init", "-q", "-b", "main", cwd=self.repo)
+        _git("add", ".", cwd=self.repo)
+        _git("commit", "-q", "-m", "init", cwd=self.repo)
+        _age(self.repo)
+        self.store = base / "cache" / "pick_session_dirty.json"
+        self.path = str(self.repo)
+
+    def _refresh(self, **kwargs):
+        cache = self.module.DirtyCache(self.store, **kwargs)
+        result = cache.refresh([self.path])[self.path]
+        cache.save()
+        return result
+
+    def test_warm_pass_trusts_fingerprint_without_forking_git(self):
+        self.assertEqual(self._refresh(), (False, "changed"))
+        with mock.patch("subprocess.run", side_effect=AssertionError("forked git")):
+            self.assertEqual(self._refresh(), (False, "hit"))
+
+    def test_fingerprint_inputs_trigger_a_recheck(self):
+        self._refresh()
+        # A new file in a tracked top-level dir moves that dir's mtime.
+        (self.repo / "src" / "b.txt").write_text("b\n")
+        self.assertEqual(self._refresh(), (False, "changed"))
+
+        (self.repo / "src" / "deep" / "a.txt").write_text("edited\n")
+        _git("add", "src/deep/a.txt", cwd=self.repo)
+        _age(self.repo)
+        self.assertEqual(self._refresh(), (True, "changed"))
+        self.assertEqual(self._refresh(), (True, "hit"))
+
+        _git("commit", "-q", "-m", "edit", cwd=self.repo)
+        _age(self.repo)
+        self.assertEqual(self._refresh(), (False, "changed"))
+
+    def test_ttl_and_recheck_force_git_status(self):
+        self._refresh()
+        self.assertEqual(self._refresh(recheck=True), (False, "forced"))
+        # In-place edits below the top level are only caught once the TTL lapses.
+        (self.repo / "src" / "deep" / "a.txt").write_text("edited\n")
+        self.assertEqual(self._refresh(), (False, "hit"))
+        self.assertEqual(self._refresh(ttl=0), (True, "expired"))
+
+    def test_racy_stamps_are_not_trusted_and_vanished_worktrees_are_pruned(self):
+        (self.repo / "src" / "c.txt").write_text("c\n")
+        self.assertEqual(self._refresh(), (False, "changed"))
+        self.assertEqual(self._refresh(), (False, "changed"), "inputs touched just now must be re-checked")
+
+        gone = self.repo.parent / "gone"
+        cache = self.module.DirtyCache(self.store)
+        cache.entries[str(gone)] = {"fp": "x", "dirs": [], "dirty": True, "ts": 0}
+        cache._updated.add(str(gone))
+        cache.save()
+        self.assertEqual(list(self.module.DirtyCache(self.store).entries), [self.path])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Parity tests for the session index's in-process git metadata reader."""
+
+from __future__ import annotations
+
+import ast
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+from unittest import mock
+
+import _test_support  # noqa: F401  (puts scripts/ on sys.path)
+from _test_support import TMUX_PICKERS
+
+LIB = TMUX_PICKERS / "session/lib"
+INDEX_MAIN = LIB / "index_main.py"
+if str(LIB) not in sys.path:
+    sys.path.insert(0, str(LIB))
+
+CONFIG_TAIL = r"""
+[remote "upstream"]
+	url = git@github.com:elastic/kibana.git
+[Comma "W.Issue"]
+	Note = "  padded  " ; trailing comment
+	path = C:\\work\\kibana
+	multi = first \
+second
+	flag
+[core.Legacy]
+	Mixed = yes # comment
+"""
+
+
+def _load_module():
+    loader = SourceFileLoader("session_git_meta_test", str(LIB / "git_meta.py"))
+    spec = importlib.util.spec_from_loader("session_git_meta_test", loader)
+    if spec is None or spec.loader is None:
+        raise AssertionError("could not load session git meta module")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _load_index_symbols() -> dict[str, object]:
+    """Pull the git-metadata helpers out of index_main.py without running the script."""
+    wanted = {
+        "normalize_branch_name",
+        "resolve_path",
+        "head_branch",
+        "git_config_path_for_root",
+        "origin_url_for_root",
+        "parse_owner_from_remote_url",
+        "remote_names_for_root",
+        "_short_ref",
+        "default_branch_for_repo",
+        "_default_branch_via_git",
+        "_wt_issue_number",
+        "_wt_issue_repo",
+        "DEFAULT_BRANCH_DIRS_ORDER",
+    }
+    tree = ast.parse(INDEX_MAIN.read_text(encoding="utf-8"), filename=str(INDEX_MAIN))
+    nodes: list[ast.stmt] = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            nodes.append(node)
+        elif isinstance(node, ast.FunctionDef) and node.name in wanted:
+            nodes.append(node)
+        elif isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id in wanted for t in node.targets):
+            nodes.append(node)
+    namespace: dict[str, object] = {}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), str(INDEX_MAIN), "exec"), namespace)
+    missing = sorted(wanted - namespace.keys())
+    if missing:
+        raise AssertionError(f"missing expected symbols in index_main.py: {', '.join(missing)}")
+    return namespace
+
+
+def _git(*args: str, cwd: Path) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.rstrip("\n")
+
+
+@unittest.skipUnless(shutil.which("git"), "git is required for parity checks")
+class TestGitMeta(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.module = _load_module()
+        cls.index = _load_index_symbols()
+        tmp = tempfile.TemporaryDirectory()
+        cls._tmp = tmp
+        base = Path(tmp.name).resolve()
+        env = {"GIT_CONFIG_GLOBAL": os.devnull, "GIT_CONFIG_NOSYSTEM": "1"}
+        cls._env = mock.patch.dict(os.environ, env)
+        cls._env.start()
+
+        cls.repo = base / "kibana" / "main"
+        cls.repo.mkdir(parents=True)
+        _git("init", "-q", "-b", "main", cwd=cls.repo)
+        _git("-c", "user.name=t", "-c", "user.email=t@e", "commit", "-q", "--allow-empty", "-m", "init", cwd=cls.repo)
+        _git("remote", "add", "origin", "git@github.com:someone/kibana.git", cwd=cls.repo)
+        with open(cls.repo / ".git" / "config", "a", encoding="utf-8") as f:
+            f.write(CONFIG_TAIL)
+        _git("update-ref", "refs/remotes/upstream/trunk", "HEAD", cwd=cls.repo)
+        _git("update-ref", "refs/remotes/origin/develop", "HEAD", cwd=cls.repo)
+        _git("pack-refs", "--all", cwd=cls.repo)
+        _git("update-ref", "refs/remotes/origin/loose", "HEAD", cwd=cls.repo)
+
+        cls.linked = base / "kibana" / "feat-123"
+        _git("worktree", "add", "-q", "-b", "feat-123", str(cls.linked), cwd=cls.repo)
+        _git("config", "extensions.worktreeConfig", "true", cwd=cls.repo)
+        _git("config", "--worktree", "comma.w.issue.number", "123", cwd=cls.linked)
+        _git("config", "--worktree", "comma.w.issue.repo", "elastic/kibana", cwd=cls.linked)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._env.stop()
+        cls._tmp.cleanup()
+
+    def test_config_values_match_git_config_get(self):
+        gitdir = str(self.repo / ".git")
+        for key in (
+            "remote.origin.url",
+            "remote.upstream.url",
+            "comma.W.Issue.note",
+            "comma.W.Issue.path",
+            "comma.W.Issue.multi",
+            "core.legacy.mixed",
+            "core.bare",
+        ):
+            with self.subTest(key=key):
+                self.assertEqual(self.module.config_get(gitdir, key), _git("config", "--get", key, cwd=self.repo))
+        self.assertEqual(self.module.config_get(gitdir, "comma.w.issue.note"), "")
+        # A bare key is an implicit boolean true.
+        flag = _git("config", "--bool", "--get", "comma.W.Issue.flag", cwd=self.repo)
+        self.assertEqual(self.module.config_get(gitdir, "comma.W.Issue.flag"), flag)
+
+    def test_refs_and_worktree_config_match_git(self):
+        gitdir = self.module.gitdir_for(str(self.linked))
+        common = self.module.common_dir(gitdir)
+        self.assertEqual(Path(common), self.repo / ".git")
+        self.assertEqual(self.module.head_ref(gitdir), "refs/heads/feat-123")
+        for ref in ("refs/heads/main", "refs/remotes/upstream/trunk", "refs/remotes/origin/loose", "refs/heads/nope"):
+            with self.subTest(ref=ref):
+                exists = subprocess.run(["git", "show-ref", "--verify", "--quiet", ref], cwd=self.repo).returncode == 0
+                self.assertEqual(self.module.ref_exists(common, ref), exists)
+        for key in ("comma.w.issue.number", "comma.w.issue.repo"):
+            expected = _git("config", "--worktree", "--get", key, cwd=self.linked)
+            self.assertEqual(self.module.config_get(gitdir, key, worktree=True), expected)
+        self.assertEqual(self.module.config_get(str(self.repo / ".git"), "comma.w.issue.number", worktree=True), "")
+
+    def test_memo_reparses_a_rewritten_file(self):
+        head = self.repo / ".git" / "refs" / "remotes" / "origin" / "HEAD"
+        head.write_text("ref: refs/remotes/origin/develop\n")
+        self.addCleanup(head.unlink)
+        common = str(self.repo / ".git")
+        self.assertEqual(self.module.symbolic_ref(common, "refs/remotes/origin/HEAD"), "refs/remotes/origin/develop")
+        head.write_text("ref: refs/remotes/origin/loose-one\n")
+        self.assertEqual(self.module.symbolic_ref(common, "refs/remotes/origin/HEAD"), "refs/remotes/origin/loose-one")
+
+    def test_index_helpers_answer_without_forking_git(self):
+        ns = self.index
+        repo, linked = str(self.repo), str(self.linked)
+        head = self.repo / ".git" / "refs" / "remotes" / "origin" / "HEAD"
+        cases = [("no remote HEAD", None), ("origin HEAD", "ref: refs/remotes/origin/develop\n")]
+        for label, content in cases:
+            with self.subTest(label):
+                if content:
+                    head.write_text(content)
+                    self.addCleanup(lambda: head.unlink(missing_ok=True))
+                expected = ns["_default_branch_via_git"](repo)
+                with mock.patch("subprocess.run", side_effect=AssertionError("forked git")):
+                    self.assertEqual(ns["default_branch_for_repo"](repo), expected)
+        with mock.patch("subprocess.run", side_effect=AssertionError("forked git")):
+            self.assertEqual(ns["_wt_issue_number"](linked), "123")
+            self.assertEqual(ns["_wt_issue_repo"](linked), "elastic/kibana")
+            self.assertEqual(ns["head_branch"](str(self.repo / ".git")), "main")
+            self.assertEqual(ns["origin_url_for_root"](repo), "git@github.com:someone/kibana.git")
+            self.assertEqual(ns["remote_names_for_root"](repo), {"origin": "someone", "upstream": "elastic"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,6 +22,9 @@ import _test_support  # noqa: F401  (puts scripts/ on sys.path)
 from _test_support import REPO, TMUX_PICKERS
 
 INDEX_MAIN = TMUX_PICKERS / "session/lib/index_main.py"
+# index_main.py imports its sibling lib modules the way the picker runs it.
+if str(INDEX_MAIN.parent) not in sys.path:
+    sys.path.insert(0, str(INDEX_MAIN.parent))
 
 
 def _load_session_cache_symbols() -> dict[str, object]:
@@ -449,5 +452,128 @@ class TestSessionPickerPrStyling(unittest.TestCase):
                 self.assertIn("\033[2;38;5;244m", display)
 
 
+_FAKE_GH = r"""
+import json, os, re, sys
+
+with open(os.environ["PICK_SESSION_TEST_GH_LOG"], "a", encoding="utf-8") as log:
+    log.write(json.dumps(sys.argv[1:]) + "\n")
+if sys.argv[1:3] != ["api", "graphql"]:
+    sys.exit(1)
+query = next(a[len("query="):] for a in sys.argv if a.startswith("query="))
+if "r: repository(" not in query:
+    print(json.dumps({"data": {}}))
+    sys.exit(0)
+answers = json.loads(os.environ["PICK_SESSION_TEST_GH_ANSWERS"])
+repo, errors = {}, []
+for alias, kind, arg in re.findall(r"(a\d+): (\w+)\((?:headRefName|number): \"?([^\",)]*)", query):
+    found = answers.get(f"{kind} {arg}")
+    if kind == "pullRequests":
+        repo[alias] = {"nodes": found or []}
+    elif found is None:
+        repo[alias] = None
+        errors.append({"type": "NOT_FOUND", "path": ["r", alias]})
+    else:
+        repo[alias] = found
+print(json.dumps({"data": {"r": repo}, "errors": errors}))
+sys.exit(1 if errors else 0)
+"""
+
+
+def _pr_node(number: int, state: str, author: str, closing: list[dict] | None = None) -> dict:
+    return {
+        "number": number,
+        "state": state,
+        "url": f"https://github.com/elastic/repo/pull/{number}",
+        "reviewDecision": "APPROVED",
+        "author": {"login": author},
+        "isCrossRepository": False,
+        "headRepositoryOwner": {"login": "me"},
+        "closingIssuesReferences": {"nodes": closing or []},
+    }
+
+
+@unittest.skipUnless(shutil.which("git"), "git is required")
+class TestSessionGitHubBatchLookup(unittest.TestCase):
+    """WHEN a full reindex resolves PR/issue badges for many worktrees."""
+
+    def _git(self, *args: str, cwd: Path) -> None:
+        cmd = ["git", "-c", "user.name=t", "-c", "user.email=t@e", *args]
+        subprocess.run(cmd, cwd=cwd, check=True, capture_output=True)
+
+    def test_one_graphql_call_per_repo_replaces_per_worktree_gh_forks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp).resolve()
+            home = root / "home"
+            main = home / "work" / "repo" / "main"
+            fake_bin = root / "bin"
+            main.mkdir(parents=True)
+            fake_bin.mkdir()
+            env_git = {"GIT_CONFIG_GLOBAL": os.devnull, "GIT_CONFIG_NOSYSTEM": "1"}
+            with mock.patch.dict(os.environ, env_git):
+                self._git("init", "-q", "-b", "main", cwd=main)
+                self._git("commit", "-q", "--allow-empty", "-m", "init", cwd=main)
+                self._git("remote", "add", "origin", "git@github.com:me/repo.git", cwd=main)
+                self._git("remote", "add", "upstream", "git@github.com:elastic/repo.git", cwd=main)
+                for branch in ("fix", "feat-123", "gone-9", "review"):
+                    self._git("worktree", "add", "-q", "-b", branch, f"../{branch}", cwd=main)
+                self._git("config", "branch.review.merge", "refs/pull/42/head", cwd=main)
+
+            (fake_bin / "tmux").write_text("#!/bin/sh\nexit 0\n", encoding="utf-8")
+            (fake_bin / "gh").write_text(f"#!{sys.executable}\n{_FAKE_GH}", encoding="utf-8")
+            for command in fake_bin.iterdir():
+                command.chmod(0o755)
+            gh_log = root / "gh.log"
+            closing = {
+                "number": 77,
+                "state": "CLOSED",
+                "url": "https://github.com/elastic/repo/issues/77",
+                "repository": {"name": "repo", "owner": {"login": "elastic"}},
+            }
+            answers = {
+                "pullRequests fix": [_pr_node(9, "CLOSED", "me"), _pr_node(10, "OPEN", "me", [closing])],
+                "pullRequest 42": _pr_node(42, "MERGED", "contributor"),
+                "issue 123": {"number": 123, "state": "OPEN", "url": "https://github.com/elastic/repo/issues/123"},
+            }
+            env = {
+                **os.environ,
+                **env_git,
+                "HOME": str(home),
+                "XDG_CACHE_HOME": str(root / "cache"),
+                "PATH": f"{fake_bin}{os.pathsep}{os.environ['PATH']}",
+                "PICK_SESSION_GITHUB_LOGIN": "me",
+                "PICK_SESSION_SKIP_DIRTY": "1",
+                "PICK_SESSION_SCAN_ROOTS": str(home / "work"),
+                "PICK_SESSION_THREADS": "2",
+                "PICK_SESSION_TEST_GH_LOG": str(gh_log),
+                "PICK_SESSION_TEST_GH_ANSWERS": json.dumps(answers),
+            }
+            result = subprocess.run(
+                [sys.executable, str(INDEX_MAIN)], check=False, capture_output=True, text=True, env=env
+            )
+            self.assertEqual(result.returncode, 0, result.stderr)
+
+            metas = {}
+            for line in result.stdout.splitlines():
+                parts = line.split("\t")
+                if len(parts) > 3 and parts[1] == "worktree":
+                    metas[Path(parts[2]).name] = parts[3].split("|")
+            self.assertIn("pr=10:OPEN:APPROVED::https://github.com/elastic/repo/pull/10", metas["fix"])
+            self.assertIn("issue=77:CLOSED:https://github.com/elastic/repo/issues/77", metas["fix"])
+            self.assertIn("issue=123:OPEN:https://github.com/elastic/repo/issues/123", metas["feat-123"])
+            self.assertIn("pr=42:MERGED:APPROVED::https://github.com/elastic/repo/pull/42", metas["review"])
+            self.assertIn("prrole=review", metas["review"])
+            self.assertFalse([m for m in metas["gone-9"] if m.startswith(("pr=", "issue="))])
+
+            calls = [json.loads(line) for line in gh_log.read_text(encoding="utf-8").splitlines()]
+            lookups = [c for c in calls if any("r: repository(" in a for a in c)]
+            self.assertEqual(len(lookups), 1)
+            self.assertIn('r: repository(owner: "elastic", name: "repo")', lookups[0][-1])
+            self.assertFalse([c for c in calls if c[:1] in (["pr"], ["issue"])])
+
+            entries = json.loads((root / "cache" / "tmux" / "pick_session_gh.json").read_text(encoding="utf-8"))
+            gone = entries["entries"][str(home / "work" / "repo" / "gone-9")]
+            self.assertEqual((gone["pr"], gone["issue"], gone["branch"]), (None, None, "gone-9"))
+
+
 if __name__ == "__main__":
     unittest.main()
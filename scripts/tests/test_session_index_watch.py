@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Tests for the session picker's inotify index watcher and its full-scan handoff."""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import select
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+from unittest import mock
+
+import _test_support  # noqa: F401  (puts scripts/ on sys.path)
+from _test_support import TMUX_PICKERS
+
+LIB = TMUX_PICKERS / "session/lib"
+MODULE = LIB / "index_watch_daemon.py"
+INDEX_UPDATE = TMUX_PICKERS / "session/executable_index_update.sh"
+INDEX_MAIN = LIB / "index_main.py"
+
+
+def _load_module():
+    sys.path.insert(0, str(LIB))
+    loader = SourceFileLoader("session_index_watch_test", str(MODULE))
+    spec = importlib.util.spec_from_loader("session_index_watch_test", loader)
+    if spec is None or spec.loader is None:
+        raise AssertionError("could not load session index watch module")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _row(kind: str, path: str, target: str = "") -> str:
+    return f"{kind}:{os.path.basename(path)}\t{kind}\t{path}\t\t{target}\t{path}"
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+class TestIndexWatcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.module = _load_module()
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        base = Path(tmp.name).resolve()
+        self.root = base / "work"
+        self.repo = self.root / "kibana" / "main"
+        self.linked = self.root / "kibana" / "feat"
+        admin = self.repo / ".git" / "worktrees" / "feat"
+        admin.mkdir(parents=True)
+        (self.repo / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+        (admin / "HEAD").write_text("ref: refs/heads/feat\n")
+        (admin / "gitdir").write_text(f"{self.linked}/.git\n")
+        self.linked.mkdir()
+        (self.linked / ".git").write_text(f"gitdir: {admin}\n")
+        (self.root / "node_modules").mkdir()
+        self.admin = admin
+
+        self.inotify = self.module.Inotify()
+        self.addCleanup(self.inotify.close)
+        excluded = self.module.dir_snapshot.exclude_matcher(["node_modules/"])
+        snapshot = self.module.dir_snapshot.DirSnapshot(base / "cache" / "pick_session_dirs.json")
+        self.watcher = self.module.IndexWatcher(self.inotify, [str(self.root)], 6, excluded, snapshot)
+        self.watcher.watch_roots()
+
+    def _pump(self):
+        while select.select([self.inotify.fd], [], [], 0.1)[0]:
+            for event in self.inotify.read():
+                self.watcher.handle(*event)
+
+    def test_watches_scan_dirs_and_repo_metadata_but_not_repo_contents(self):
+        roles = {(role, key) for role, key in self.watcher.watches.values()}
+        self.assertIn(("dir", str(self.root / "kibana")), roles)
+        self.assertIn(("git", str(self.repo)), roles)
+        self.assertIn(("worktrees", str(self.repo)), roles)
+        self.assertIn(("admin", str(self.admin)), roles)
+        self.assertNotIn(("dir", str(self.repo)), roles)
+        self.assertNotIn(("dir", str(self.root / "node_modules")), roles)
+
+    def test_new_repo_and_head_moves_queue_refreshes(self):
+        fresh = self.root / "code" / "dotfiles"
+        (fresh / ".git").mkdir(parents=True)
+        # git updates HEAD by renaming a lock file over it.
+        lock = self.admin / "HEAD.lock"
+        lock.write_text("ref: refs/heads/other\n")
+        os.replace(lock, self.admin / "HEAD")
+        self._pump()
+
+        refresh, gone, overflowed = self.watcher.take()
+        self.assertEqual(refresh, {str(fresh), str(self.linked)})
+        self.assertEqual((gone, overflowed), (set(), False))
+        self.assertFalse(self.watcher.pending)
+
+        (fresh / "src" / "deep").mkdir(parents=True)
+        self._pump()
+        self.assertFalse(self.watcher.pending, "a repo's own directories are not watched")
+
+    def test_removed_worktree_and_scan_dir_become_tombstones(self):
+        shutil.rmtree(self.linked)
+        shutil.rmtree(self.admin)
+        self._pump()
+        refresh, gone, _ = self.watcher.take()
+        self.assertEqual(gone, {str(self.linked)})
+        self.assertEqual(refresh, set())
+
+        (self.root / "kibana" / "scratch").mkdir()
+        self._pump()
+        shutil.rmtree(self.root / "kibana" / "scratch")
+        self._pump()
+        self.assertEqual(self.watcher.take()[1], {str(self.root / "kibana" / "scratch")})
+
+    def test_due_waits_for_events_to_settle(self):
+        self.watcher.handle(self.watcher.watched[("git", str(self.repo))], self.module.IN_MOVED_TO, "HEAD", now=10.0)
+        self.assertFalse(self.watcher.due(10.1))
+        self.assertTrue(self.watcher.due(10.0 + self.module.SETTLE_S))
+
+
+class TestCachePublisher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.module = _load_module()
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = Path(tmp.name)
+        self.fake_index = self.cache_dir / "fake_index.py"
+        self.fake_index.write_text(
+            textwrap.dedent(
+                """
+                import sys
+                paths_file = sys.argv[1].split("=", 1)[1]
+                for path in open(paths_file).read().split():
+                    print(f"fresh\\tworktree\\t{path}\\twt:feat\\t/r\\t{path}")
+                """
+            )
+        )
+        self.publisher = self.module.CachePublisher(self.cache_dir, [sys.executable, str(self.fake_index)])
+        self.cache = self.cache_dir / "pick_session_items.tsv"
+
+    def test_merge_replaces_rows_in_place_and_drops_dirs_now_listed_as_worktrees(self):
+        cache = [_row("session", "/a", "a"), _row("worktree", "/b"), _row("worktree", "/c"), _row("dir", "/d")]
+        fresh = [_row("worktree", "/b").replace("worktree:", "new:"), _row("worktree", "/d")]
+        merged = self.module.merge_rows(cache, fresh, {"/b", "/d"})
+        self.assertEqual(merged, [cache[0], fresh[0], fresh[1], cache[2]])
+
+        added = self.module.merge_rows(cache, [_row("worktree", "/e")], {"/e"})
+        self.assertEqual(added, cache[:3] + [_row("worktree", "/e"), cache[3]])
+
+    def test_apply_tombstones_gone_paths_and_swaps_in_reindexed_rows(self):
+        rows = [_row("session", "/w/gone/x", "x"), _row("worktree", "/w/feat"), _row("dir", "/w")]
+        self.cache.write_text("".join(r + "\n" for r in rows))
+
+        self.publisher.apply({"/w/feat"}, {"/w/gone"})
+
+        self.assertEqual(
+            self.cache.read_text().splitlines(),
+            ["fresh\tworktree\t/w/feat\twt:feat\t/r\t/w/feat", _row("dir", "/w")],
+        )
+        kind, path = (self.cache_dir / "pick_session_mutations.tsv").read_text().split("\t")[1:]
+        self.assertEqual((kind, path), ("PATH_PREFIX", "/w/gone\n"))
+        leftovers = sorted(os.listdir(self.cache_dir))
+        self.assertEqual(leftovers, ["fake_index.py", "pick_session_items.tsv", "pick_session_mutations.tsv"])
+
+    def test_busy_index_lock_defers_the_batch(self):
+        lock_dir = self.cache_dir / "pick_session_items.tsv.lock"
+        lock_dir.mkdir()
+        (lock_dir / "pid").write_text(f"{os.getpid()}\n")
+        self.cache.write_text(_row("worktree", "/w/feat") + "\n")
+
+        self.assertEqual(self.publisher.apply_in_child({"/w/feat"}, set()), self.module.LOCK_BUSY_EXIT)
+        self.assertEqual(self.cache.read_text(), _row("worktree", "/w/feat") + "\n")
+
+        shutil.rmtree(lock_dir)
+        self.assertEqual(self.publisher.apply_in_child({"/w/feat"}, set()), 0)
+        self.assertTrue(self.cache.read_text().startswith("fresh\t"))
+        self.assertFalse(lock_dir.exists())
+
+    def test_failed_apply_is_reported_and_logged(self):
+        with mock.patch.object(self.publisher, "apply", side_effect=RuntimeError("boom")):
+            code = self.publisher.apply_in_child({"/w/feat"}, set())
+        self.assertEqual(code, self.module.APPLY_FAILED_EXIT)
+        log = (self.cache_dir / "pick_session_index_error.log").read_text()
+        self.assertIn("pick_session index watch apply failed: Traceback", log)
+        self.assertIn("RuntimeError: boom", log)
+        self.assertFalse((self.cache_dir / "pick_session_items.tsv.lock").exists())
+
+
+class TestWatchedFullScan(unittest.TestCase):
+    """The watch stamp must only skip worktree discovery, never the TTL full scan."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        base = Path(tmp.name).resolve()
+        self.home = base / "home"
+        self.cache_dir = base / "cache" / "tmux"
+        self.cache_dir.mkdir(parents=True)
+        self.watch_stamp = self.cache_dir / "pick_session_index_watch.stamp"
+        self.full_scan_stamp = self.cache_dir / "pick_session_full_scan.stamp"
+        self.gen_log = base / "gen.log"
+        scripts = self.home / ".config/tmux/scripts/pickers/session"
+        scripts.mkdir(parents=True)
+        gen = scripts / "index.sh"
+        gen.write_text(
+            "#!/bin/sh\n"
+            f"printf '%s\\n' \"$*\" >> '{self.gen_log}'\n"
+            "printf 'main\\tsession\\t/main\\t\\tmain\\n'\n"
+        )
+        gen.chmod(0o755)
+        self.env = {k: v for k, v in os.environ.items() if k != "TMUX"}
+        self.env.update({"HOME": str(self.home), "XDG_CACHE_HOME": str(base / "cache")})
+
+    def _full_scan_args(self, *extra: str) -> str:
+        subprocess.run([str(INDEX_UPDATE), "--quiet", *extra], env=self.env, check=True, capture_output=True)
+        runs = self.gen_log.read_text().splitlines()
+        full = [r for r in runs if "--quick" not in r.split()]
+        self.assertEqual(len(full), 1, runs)
+        self.gen_log.unlink()
+        return full[0]
+
+    def test_ttl_full_scan_still_refreshes_badges_while_the_watch_stamp_is_fresh(self):
+        self.watch_stamp.touch()
+        self.assertEqual(self._full_scan_args(), "--skip-discovery")
+        self.assertTrue(self.full_scan_stamp.exists(), "a watched full scan still re-arms the TTL gate")
+
+        self.full_scan_stamp.unlink()
+        self.assertEqual(self._full_scan_args("--force"), "", "--force always walks the scan roots")
+
+        past = self.watch_stamp.stat().st_mtime - 3600
+        os.utime(self.watch_stamp, (past, past))
+        self.full_scan_stamp.unlink()
+        self.assertEqual(self._full_scan_args(), "", "a stale watch stamp no longer vouches for coverage")
+
+    @unittest.skipUnless(shutil.which("git"), "git is required")
+    def test_skip_discovery_reuses_cached_worktrees_and_still_checks_dirty_state(self):
+        work = self.home / "work"
+        cached, uncached = work / "cached", work / "uncached"
+        for repo in (cached, uncached):
+            repo.mkdir(parents=True)
+            (repo / "a.txt").write_text("a\n")
+            git = ["git", "-c", "user.name=t", "-c", "user.email=t@e", "-C", str(repo)]
+            subprocess.run([*git, "init", "-q", "-b", "main"], check=True, capture_output=True)
+            subprocess.run([*git, "add", "."], check=True, capture_output=True)
+            subprocess.run([*git, "commit", "-q", "-m", "init"], check=True, capture_output=True)
+        (cached / "a.txt").write_text("edited\n")
+        (self.cache_dir / "pick_session_items.tsv").write_text(f"cached\tworktree\t{cached}\t\tcached\n")
+        fake_bin = self.home / "bin"
+        fake_bin.mkdir()
+        (fake_bin / "tmux").write_text("#!/bin/sh\nexit 0\n")
+        (fake_bin / "tmux").chmod(0o755)
+        env = {
+            **self.env,
+            "PATH": f"{fake_bin}{os.pathsep}{os.environ['PATH']}",
+            "GIT_CONFIG_GLOBAL": os.devnull,
+            "GIT_CONFIG_NOSYSTEM": "1",
+            "PICK_SESSION_SCAN_ROOTS": str(work),
+            "PICK_SESSION_SKIP_GH": "1",
+            "PICK_SESSION_THREADS": "1",
+        }
+
+        def worktree_rows(skip_discovery: str) -> dict[str, str]:
+            env["PICK_SESSION_SKIP_DISCOVERY"] = skip_discovery
+            out = subprocess.run(
+                [sys.executable, str(INDEX_MAIN)], env=env, check=True, capture_output=True, text=True
+            ).stdout
+            rows = [line.split("\t") for line in out.splitlines()]
+            return {r[2]: r[0] for r in rows if r[1] == "worktree"}
+
+        watched = worktree_rows("1")
+        self.assertEqual(list(watched), [str(cached)])
+        self.assertIn("*", watched[str(cached)], "the dirty pass still runs on cached worktrees")
+        self.assertEqual(sorted(worktree_rows("0")), [str(cached), str(uncached)])
+
+    def test_watch_stamp_is_held_only_while_every_scan_dir_is_watched(self):
+        module = _load_module()
+        module.hold_watch_stamp(self.watch_stamp, True)
+        self.assertTrue(self.watch_stamp.exists())
+        module.hold_watch_stamp(self.watch_stamp, False)
+        self.assertFalse(self.watch_stamp.exists())
+        module.hold_watch_stamp(self.watch_stamp, False)
+        self.assertFalse(self.full_scan_stamp.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@
 # /// script
 # requires-python = ">=3.10"
 # dependencies = [
-#   "sqlite-vec>=0.1,<1.0",
+#   "sqlite-vec>=0.1.6,<1.0",
 # ]
 # ///
 """Vector retrieval runner — isolated subprocess that loads the
@@ -23,10 +23,16 @@ extension loading enabled, and the orchestrator only knows how to
 spawn a subprocess and parse JSON.
 
 This runner manages its own `vec_index` table — a vec0 virtual table
-mirroring `capsules.id` and `capsules.embedding` — synchronizing
-deltas from the canonical `capsules` table on every call. The
-orchestrator process never sees `vec_index`; that table is purely an
-implementation detail of this runner.
+mirroring `capsules.id` and `capsules.embedding`, plus `scope`, `kind`,
+`model` and `live` metadata columns so KNN can skip ineligible rows — and a
+small `vec_meta` bookkeeping table. Sync is driven by the trigger-maintained
+`capsule_changes` journal that `ai_kb.py` keeps: each call compares its
+last-applied journal sequence with the journal's high-water mark and
+re-indexes only the ids logged since, so a no-op sync costs a few
+primary-key lookups regardless of KB size. A changed `change_epoch`
+(journal recreated) or a model/dim swap falls back to a full resync.
+The orchestrator process never sees `vec_index`; that table is purely
+an implementation detail of this runner.
 
 Protocol (request/response over stdio, single round-trip per spawn):
 
@@ -40,11 +46,19 @@ Protocol (request/response over stdio, single round-trip per spawn):
             "filters": {
                 "scopes":  [...],
                 "kinds":   [...],
-                "domains": [...]
-            }
+                "domains": [...],
+                "models":  [...]
+            },
+            "min_cosine": 0.95          # optional
         }
         stdout -> {"hits": [{"id": "...", "cosine": 0.91}, ...]}
 
+        With `min_cosine` (the write-time duplicate probe), only hits at
+        or above it are returned and the response adds `"saturated":
+        bool` — true when all `k` raw neighbours cleared the threshold
+        before filtering, i.e. a filtered-out crowd may hide a match and
+        the caller should fall back to an exhaustive scan.
+
     Pairwise (curate dedupe / contradiction shortlist):
         stdin  -> {
             "mode": "pairs",
@@ -56,13 +70,23 @@ Protocol (request/response over stdio, single round-trip per spawn):
 
     Failure (any mode): {"error": "<message>"}; exit code 1.
 
+Resident mode (`vec_runner.py --serve`): the same request objects, one
+per stdin line, each answered by exactly one response line on stdout.
+The process keeps one vec0 connection per `db_path` warm across
+requests, answers failures with `{"error": ...}` instead of exiting,
+and exits when stdin closes (i.e. when its parent goes away). This is
+what `ai_kb.py` drives so one KB process pays the uv resolve and
+extension load once instead of once per query.
+
 The runner never mutates the `capsules` table. It only reads from
-it and writes to its own `vec_index` table. Concurrent callers are
-serialized by SQLite's WAL locking.
+it, writes its own `vec_index`/`vec_meta` tables, and prunes journal
+rows it has applied (it is the journal's only consumer). Concurrent
+callers are serialized by SQLite's WAL locking.
 """
 
 from __future__ import annotations
 
+import argparse
 import json
 import re
 import sqlite3
@@ -71,11 +95,24 @@ import sys
 from typing import Any
 
 
+class VecRunnerError(Exception):
+    """A request the runner cannot serve; the message is the wire `error`."""
+
+
 def _print_error_and_exit(message: str) -> None:
     print(json.dumps({"error": message}))
     sys.exit(1)
 
 
+# Filterable capsule metadata mirrored into vec0 metadata columns (sqlite-vec
+# 0.1.6+). Equality constraints on them are evaluated inside the KNN scan, so
+# a narrowly scoped query ranks only eligible rows instead of post-filtering
+# a global top-k. A `vec_index` whose DDL lacks any of them is rebuilt.
+VEC_METADATA_COLUMNS = ("scope", "kind", "model", "live")
+# vec0's default ceiling on `k` for one KNN query.
+VEC0_MAX_K = 4096
+
+
 def _serialize_f32(vector: list[float]) -> bytes:
     return struct.pack(f"{len(vector)}f", *vector)
 
@@ -92,18 +129,21 @@ def _connect(db_path: str) -> sqlite3.Connection:
     try:
         import sqlite_vec
     except ImportError as err:
-        _print_error_and_exit(f"sqlite_vec wheel not installed: {err}")
+        db.close()
+        raise VecRunnerError(f"sqlite_vec wheel not installed: {err}") from err
     try:
         db.enable_load_extension(True)
         sqlite_vec.load(db)
         db.enable_load_extension(False)
     except sqlite3.OperationalError as err:
-        _print_error_and_exit(f"failed to load vec0: {err}")
-    except AttributeError:
-        _print_error_and_exit(
+        db.close()
+        raise VecRunnerError(f"failed to load vec0: {err}") from err
+    except AttributeError as err:
+        db.close()
+        raise VecRunnerError(
             "this Python's sqlite3 module lacks enable_load_extension; "
             "uv's bundled Python should have it — check your uv install"
-        )
+        ) from err
     return db
 
 
@@ -121,6 +161,23 @@ def _existing_vec_dim(db: sqlite3.Connection) -> int | None:
     return int(match.group(1)) if match else None
 
 
+def _vec_index_has_metadata(db: sqlite3.Connection) -> bool:
+    """True when the existing `vec_index` DDL declares every metadata column."""
+    row = db.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='vec_index'").fetchone()
+    if not row or not row[0]:
+        return False
+    return all(re.search(rf"\b{column}\b", row[0]) for column in VEC_METADATA_COLUMNS)
+
+
+# The vec_index row for each capsule: embedding plus its metadata columns.
+_INDEX_ROW_SELECT = """
+    SELECT c.id, c.embedding, c.scope, c.kind, COALESCE(c.embedding_model, ''),
+           CASE WHEN c.superseded_by IS NULL THEN 1 ELSE 0 END
+    FROM capsules c
+"""
+_INDEX_ROW_INSERT = "INSERT INTO vec_index(id, embedding, scope, kind, model, live) VALUES (?, ?, ?, ?, ?, ?)"
+
+
 def _capsules_dim(db: sqlite3.Connection) -> int | None:
     """Sample one capsules row to learn the canonical embedding dim.
 
@@ -132,21 +189,35 @@ def _capsules_dim(db: sqlite3.Connection) -> int | None:
     return int(row[0]) if row else None
 
 
-def _ensure_vec_index(db: sqlite3.Connection) -> int | None:
-    """Lazily create vec_index and sync with `capsules`. Returns the
-    embedding dim used by the index, or None if no embeddings exist
-    in the KB yet (caller should treat that as an empty result set).
+def _journal_state(db: sqlite3.Connection) -> tuple[str, int] | None:
+    """Return `(change_epoch, high-water seq)` of the KB change journal.
 
-    Resilience: if a model swap changed the dim, we drop and rebuild
-    the index. This is rare and the rebuild cost is bounded by the
-    KB size.
+    None means the KB predates the journal (no epoch in `kb_meta`), in
+    which case every call falls back to the full anti-join sync.
     """
-    cap_dim = _capsules_dim(db)
-    if cap_dim is None:
+    try:
+        row = db.execute("SELECT value FROM kb_meta WHERE key = 'change_epoch'").fetchone()
+    except sqlite3.OperationalError:
         return None
+    if not row:
+        return None
+    seq = db.execute("SELECT seq FROM sqlite_sequence WHERE name = 'capsule_changes'").fetchone()
+    return str(row[0]), int(seq[0]) if seq else 0
+
+
+def _vec_meta(db: sqlite3.Connection) -> dict[str, str]:
+    db.execute("CREATE TABLE IF NOT EXISTS vec_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    return {key: value for key, value in db.execute("SELECT key, value FROM vec_meta")}
 
+
+def _full_sync(db: sqlite3.Connection, cap_dim: int, rebuild: bool = False) -> None:
+    """Rebuild-or-reconcile the whole index against `capsules`.
+
+    Reconciling only adds and drops ids, so `rebuild` first clears the
+    index when rows may carry metadata changes the journal no longer has.
+    """
     existing_dim = _existing_vec_dim(db)
-    if existing_dim is not None and existing_dim != cap_dim:
+    if existing_dim is not None and (existing_dim != cap_dim or not _vec_index_has_metadata(db)):
         db.execute("DROP TABLE vec_index")
         existing_dim = None
 
@@ -155,11 +226,17 @@ def _ensure_vec_index(db: sqlite3.Connection) -> int | None:
             f"""
             CREATE VIRTUAL TABLE vec_index USING vec0(
                 id TEXT PRIMARY KEY,
-                embedding float[{cap_dim}] distance_metric=cosine
+                embedding float[{cap_dim}] distance_metric=cosine,
+                scope TEXT,
+                kind TEXT,
+                model TEXT,
+                live INTEGER
             )
             """
         )
 
+    if rebuild:
+        db.execute("DELETE FROM vec_index")
     db.execute(
         """
         DELETE FROM vec_index
@@ -169,9 +246,8 @@ def _ensure_vec_index(db: sqlite3.Connection) -> int | None:
         """
     )
     new_rows = db.execute(
-        """
-        SELECT c.id, c.embedding
-        FROM capsules c
+        f"""
+        {_INDEX_ROW_SELECT}
         LEFT JOIN vec_index v ON v.id = c.id
         WHERE c.embedding IS NOT NULL
           AND c.embedding_dim = ?
@@ -180,11 +256,95 @@ def _ensure_vec_index(db: sqlite3.Connection) -> int | None:
         (cap_dim,),
     ).fetchall()
     if new_rows:
-        db.executemany(
-            "INSERT INTO vec_index(id, embedding) VALUES (?, ?)",
-            [(r[0], r[1]) for r in new_rows],
-        )
-    db.commit()
+        db.executemany(_INDEX_ROW_INSERT, [tuple(r) for r in new_rows])
+
+
+def _journal_intact(db: sqlite3.Connection, since: int, until: int) -> bool:
+    """True when every journal row in `(since, until]` is still present.
+
+    ai_kb caps the journal length, so a cursor that fell behind the cap
+    finds the oldest rows it never applied already gone.
+    """
+    count = db.execute("SELECT COUNT(*) FROM capsule_changes WHERE seq > ? AND seq <= ?", (since, until)).fetchone()
+    return int(count[0]) == until - since
+
+
+def _apply_journal(db: sqlite3.Connection, since: int, until: int, cap_dim: int) -> None:
+    """Re-index only the ids the journal logged in `(since, until]`."""
+    changed = [
+        r[0] for r in db.execute("SELECT DISTINCT id FROM capsule_changes WHERE seq > ? AND seq <= ?", (since, until))
+    ]
+    for start in range(0, len(changed), 500):
+        batch = changed[start : start + 500]
+        marks = ",".join("?" * len(batch))
+        db.execute(f"DELETE FROM vec_index WHERE id IN ({marks})", batch)
+        rows = db.execute(
+            f"""
+            {_INDEX_ROW_SELECT}
+            WHERE c.id IN ({marks}) AND c.embedding IS NOT NULL AND c.embedding_dim = ?
+            """,
+            (*batch, cap_dim),
+        ).fetchall()
+        if rows:
+            db.executemany(_INDEX_ROW_INSERT, [tuple(r) for r in rows])
+
+
+def _ensure_vec_index(db: sqlite3.Connection) -> int | None:
+    """Lazily create vec_index and sync it with `capsules`. Returns the
+    embedding dim used by the index, or None if no embeddings exist
+    in the KB yet (caller should treat that as an empty result set).
+
+    Fast path: when `vec_meta` already records the journal's current
+    epoch and high-water sequence, nothing changed since the last sync
+    and we return the remembered dim without touching `capsules`.
+    Otherwise, under one write lock, apply the journalled deltas (or a
+    full resync when the epoch changed, the journal was capped past our
+    cursor, the runner has no bookkeeping yet, or a model swap changed
+    the dim), record the new sequence, and prune the applied journal
+    rows.
+    """
+    journal = _journal_state(db)
+    meta = _vec_meta(db)
+    if (
+        journal is not None
+        and meta.get("epoch") == journal[0]
+        and meta.get("seq") == str(journal[1])
+        and meta.get("dim") is not None
+    ):
+        dim = int(meta["dim"])
+        return dim or None
+
+    if db.in_transaction:
+        db.commit()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-read under the write lock so no journal row can slip between
+        # the sequence we record and the deltas we apply.
+        journal = _journal_state(db)
+        meta = _vec_meta(db)
+        cap_dim = _capsules_dim(db)
+        if cap_dim is None:
+            dim_value = 0
+        else:
+            dim_value = cap_dim
+            tracked = journal is not None and meta.get("epoch") == journal[0] and meta.get("seq", "").isdigit()
+            intact = tracked and _journal_intact(db, int(meta["seq"]), journal[1])
+            if intact and _existing_vec_dim(db) == cap_dim and _vec_index_has_metadata(db):
+                _apply_journal(db, int(meta["seq"]), journal[1], cap_dim)
+            else:
+                # Any cursor we cannot trust (rotated epoch, capped journal)
+                # may hide metadata changes; only a first sync reconciles.
+                _full_sync(db, cap_dim, rebuild=meta.get("epoch") is not None and not intact)
+        if journal is not None:
+            db.executemany(
+                "INSERT OR REPLACE INTO vec_meta(key, value) VALUES (?, ?)",
+                [("epoch", journal[0]), ("seq", str(journal[1])), ("dim", str(dim_value))],
+            )
+            db.execute("DELETE FROM capsule_changes WHERE seq <= ?", (journal[1],))
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
     return cap_dim
 
 
@@ -199,6 +359,7 @@ def _build_filter_clause(filters: dict[str, Any]) -> tuple[str, list]:
     scopes = filters.get("scopes") or []
     kinds = filters.get("kinds") or []
     domains = filters.get("domains") or []
+    models = filters.get("models") or []
     if scopes:
         parts.append(f"c.scope IN ({','.join('?' * len(scopes))})")
         params.extend(scopes)
@@ -206,16 +367,56 @@ def _build_filter_clause(filters: dict[str, Any]) -> tuple[str, list]:
         parts.append(f"c.kind IN ({','.join('?' * len(kinds))})")
         params.extend(kinds)
     if domains:
-        sub = " OR ".join("c.domain_tags LIKE ?" for _ in domains)
-        parts.append(f"({sub})")
-        params.extend(f"%{d}%" for d in domains)
+        parts.append(f"c.id IN (SELECT capsule_id FROM capsule_domains WHERE tag IN ({','.join('?' * len(domains))}))")
+        params.extend(str(d).lower() for d in domains)
+    if models:
+        parts.append(f"c.embedding_model IN ({','.join('?' * len(models))})")
+        params.extend(models)
     return " AND ".join(parts), params
 
 
+def _metadata_constraints(filters: dict[str, Any]) -> tuple[str, list]:
+    """The part of `filters` vec0 can evaluate inside the KNN scan.
+
+    Liveness always, plus scope/kind/model when a single value is asked
+    for (vec0 metadata constraints are plain comparisons). Everything
+    else — multi-valued filters, domains — stays in `_build_filter_clause`
+    and is applied to the neighbours the scan returns.
+    """
+    parts = ["live = 1"]
+    params: list = []
+    for key, column in (("scopes", "scope"), ("kinds", "kind"), ("models", "model")):
+        values = filters.get(key) or []
+        if len(values) == 1:
+            parts.append(f"{column} = ?")
+            params.append(values[0])
+    return " AND ".join(parts), params
+
+
+def _raw_knn(db: sqlite3.Connection, query_blob: bytes, k: int, constraints: str, params: list) -> list:
+    """`[(id, distance), ...]` of the `k` nearest rows satisfying `constraints`."""
+    return db.execute(
+        f"""
+        SELECT id, distance FROM vec_index
+        WHERE embedding MATCH ? AND k = ? AND {constraints}
+        ORDER BY distance
+        """,
+        (query_blob, k, *params),
+    ).fetchall()
+
+
+def _filter_ids(db: sqlite3.Connection, ids: list[str], where: str, params: list) -> set[str]:
+    if not ids:
+        return set()
+    marks = ",".join("?" * len(ids))
+    rows = db.execute(f"SELECT c.id FROM capsules c WHERE c.id IN ({marks}) AND {where}", (*ids, *params))
+    return {r[0] for r in rows}
+
+
 def _knn(db: sqlite3.Connection, req: dict[str, Any]) -> dict[str, Any]:
     qvec = req.get("query_vector") or []
     if not isinstance(qvec, list) or not all(isinstance(x, (int, float)) for x in qvec):
-        _print_error_and_exit("'query_vector' must be a list of floats")
+        raise VecRunnerError("'query_vector' must be a list of floats")
     if not qvec:
         return {"hits": []}
     k = int(req.get("k", 20))
@@ -226,29 +427,55 @@ def _knn(db: sqlite3.Connection, req: dict[str, Any]) -> dict[str, Any]:
     if dim is None:
         return {"hits": []}
     if len(qvec) != dim:
-        _print_error_and_exit(f"query_vector dim {len(qvec)} != index dim {dim}; re-embed required")
+        raise VecRunnerError(f"query_vector dim {len(qvec)} != index dim {dim}; re-embed required")
 
     where, params = _build_filter_clause(filters)
-    sql = f"""
-        WITH knn AS (
-            SELECT id, distance
-            FROM vec_index
-            WHERE embedding MATCH ? AND k = ?
-            ORDER BY distance
+    constraints, constraint_params = _metadata_constraints(filters)
+    query_blob = _serialize_f32([float(x) for x in qvec])
+    if req.get("min_cosine") is not None:
+        return _knn_threshold(
+            db, query_blob, k, limit, float(req["min_cosine"]), where, params, constraints, constraint_params
         )
-        SELECT knn.id, knn.distance
-        FROM knn
-        JOIN capsules c ON c.id = knn.id
-        WHERE {where}
-        ORDER BY knn.distance
-        LIMIT ?
+    # Filters vec0 cannot evaluate are applied to the returned neighbours;
+    # when they reject too many, widen the scan until `limit` survive or
+    # the eligible rows run out, so a rare domain still fills the limit.
+    k = max(1, min(k, VEC0_MAX_K))
+    while True:
+        raw = _raw_knn(db, query_blob, k, constraints, constraint_params)
+        allowed = _filter_ids(db, [r[0] for r in raw], where, params)
+        hits = [{"id": r[0], "cosine": max(0.0, 1.0 - float(r[1]))} for r in raw if r[0] in allowed]
+        if len(hits) >= limit or len(raw) < k or k >= VEC0_MAX_K:
+            return {"hits": hits[:limit]}
+        k = min(k * 4, VEC0_MAX_K)
+
+
+def _knn_threshold(
+    db: sqlite3.Connection,
+    query_blob: bytes,
+    k: int,
+    limit: int,
+    min_cosine: float,
+    where: str,
+    params: list,
+    constraints: str,
+    constraint_params: list,
+) -> dict[str, Any]:
+    """KNN restricted to neighbours at or above `min_cosine`.
+
+    The raw top-k (already narrowed by the metadata constraints) comes
+    from the index first so the response can say whether the window was
+    saturated (every raw neighbour cleared the threshold); the remaining
+    filters are then applied to just those ids.
     """
-    rows = db.execute(
-        sql,
-        (_serialize_f32([float(x) for x in qvec]), k, *params, limit),
-    ).fetchall()
-    hits = [{"id": r[0], "cosine": max(0.0, 1.0 - float(r[1]))} for r in rows]
-    return {"hits": hits}
+    raw = _raw_knn(db, query_blob, k, constraints, constraint_params)
+    close = [(r[0], max(0.0, 1.0 - float(r[1]))) for r in raw]
+    close = [(cid, cos) for cid, cos in close if cos >= min_cosine]
+    saturated = len(raw) >= k and len(close) == len(raw)
+    if not close:
+        return {"hits": [], "saturated": saturated}
+    allowed = _filter_ids(db, [cid for cid, _ in close], where, params)
+    hits = [{"id": cid, "cosine": cos} for cid, cos in close if cid in allowed][:limit]
+    return {"hits": hits, "saturated": saturated}
 
 
 def _pairs(db: sqlite3.Connection, req: dict[str, Any]) -> dict[str, Any]:
@@ -294,34 +521,88 @@ def _pairs(db: sqlite3.Connection, req: dict[str, Any]) -> dict[str, Any]:
     return {"pairs": pairs}
 
 
-def main() -> None:
-    raw = sys.stdin.read()
-    if not raw.strip():
-        _print_error_and_exit("empty stdin; expected one JSON object")
+def handle(db: sqlite3.Connection, req: dict[str, Any]) -> dict[str, Any]:
+    """Serve one request against an already-connected vec0 database.
+
+    Shared by the one-shot stdio protocol below and by in-process callers
+    (the resident `kb_worker.py`) that keep one vec0 connection warm.
+    Raises `VecRunnerError` for malformed requests and lets `sqlite3.Error`
+    propagate so each caller maps failures onto its own wire format.
+    """
+    mode = req.get("mode")
+    if mode == "knn":
+        return _knn(db, req)
+    if mode == "pairs":
+        return _pairs(db, req)
+    raise VecRunnerError(f"unknown mode {mode!r}; expected 'knn' or 'pairs'")
+
 
+def _parse_request(raw: str) -> tuple[dict[str, Any], str]:
+    """Decode one request object and its `db_path`, or raise `VecRunnerError`."""
+    if not raw.strip():
+        raise VecRunnerError("empty stdin; expected one JSON object")
     try:
         req = json.loads(raw)
     except json.JSONDecodeError as err:
-        _print_error_and_exit(f"stdin not valid JSON: {err}")
-
+        raise VecRunnerError(f"stdin not valid JSON: {err}") from err
     if not isinstance(req, dict):
-        _print_error_and_exit("request must be a JSON object")
-
-    mode = req.get("mode")
+        raise VecRunnerError("request must be a JSON object")
     db_path = req.get("db_path")
     if not isinstance(db_path, str) or not db_path:
-        _print_error_and_exit("'db_path' must be a non-empty string")
+        raise VecRunnerError("'db_path' must be a non-empty string")
+    return req, db_path
+
 
-    db = _connect(db_path)
+def _serve_one(raw: str, connections: dict[str, sqlite3.Connection]) -> dict[str, Any]:
+    db_path = ""
     try:
-        if mode == "knn":
-            result = _knn(db, req)
-        elif mode == "pairs":
-            result = _pairs(db, req)
-        else:
-            _print_error_and_exit(f"unknown mode {mode!r}; expected 'knn' or 'pairs'")
-            return  # unreachable, satisfies linters
-        print(json.dumps(result))
+        req, db_path = _parse_request(raw)
+        db = connections.get(db_path)
+        if db is None:
+            db = connections[db_path] = _connect(db_path)
+        return handle(db, req)
+    except VecRunnerError as err:
+        return {"error": str(err)}
+    except sqlite3.Error as err:
+        # Drop the cached connection so a transient failure (locked DB,
+        # replaced file) does not poison every later request.
+        stale = connections.pop(db_path, None)
+        if stale is not None:
+            stale.close()
+        return {"error": f"sqlite error: {err}"}
+
+
+def serve() -> None:
+    """Resident mode: one request per stdin line until EOF."""
+    connections: dict[str, sqlite3.Connection] = {}
+    try:
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            sys.stdout.write(json.dumps(_serve_one(line, connections)) + "\n")
+            sys.stdout.flush()
+    finally:
+        for db in connections.values():
+            db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--serve", action="store_true", help="Serve line-delimited requests until stdin closes")
+    if parser.parse_args().serve:
+        serve()
+        return
+
+    try:
+        req, db_path = _parse_request(sys.stdin.read())
+        db = _connect(db_path)
+    except VecRunnerError as err:
+        _print_error_and_exit(str(err))
+        return  # unreachable, satisfies linters
+    try:
+        print(json.dumps(handle(db, req)))
+    except VecRunnerError as err:
+        _print_error_and_exit(str(err))
     except sqlite3.Error as err:
         _print_error_and_exit(f"sqlite error: {err}")
     finally:
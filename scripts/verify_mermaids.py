@@ -58,11 +58,11 @@ CENSUS: list[Claim] = [
     Claim(
         name="total effective git files",
         globs=None,
-        claimed=1377,
+        claimed=1396,
         anchors=[
-            ("README.md", "1377 files in the effective git file set"),
-            ("00-overview.mmd", "1377 files in the effective git file set"),
-            ("00-overview.mmd", "file census (1377 total)"),
+            ("README.md", "1396 files in the effective git file set"),
+            ("00-overview.mmd", "1396 files in the effective git file set"),
+            ("00-overview.mmd", "file census (1396 total)"),
         ],
     ),
     Claim(
@@ -83,8 +83,8 @@ CENSUS: list[Claim] = [
     Claim(
         name="home/dot_config/exact_tmux/",
         globs=["home/dot_config/exact_tmux/*"],
-        claimed=116,
-        anchors=[("05-tmux-pickers.mmd", "exact_tmux/ (116)"), ("00-overview.mmd", "tmux 116")],
+        claimed=121,
+        anchors=[("05-tmux-pickers.mmd", "exact_tmux/ (121)"), ("00-overview.mmd", "tmux 121")],
     ),
     Claim(
         name="home/dot_config/exact_nvim/",
@@ -133,12 +133,12 @@ CENSUS: list[Claim] = [
     Claim(
         name="home/exact_lib/",
         globs=["home/exact_lib/*"],
-        claimed=78,
+        claimed=82,
         anchors=[
-            ("07c-bin-commands.mmd", "home/exact_lib/ (78 command/shared library files)"),
-            ("README.md", "`home/exact_lib/` (78 command/shared library files)"),
+            ("07c-bin-commands.mmd", "home/exact_lib/ (82 command/shared library files)"),
+            ("README.md", "`home/exact_lib/` (82 command/shared library files)"),
             ("README.md", "38 command libraries plus shared helpers"),
-            ("00-overview.mmd", "command-lib 78 (38 command dirs + shared)"),
+            ("00-overview.mmd", "command-lib 82 (38 command dirs + shared)"),
         ],
     ),
     Claim(
@@ -150,20 +150,20 @@ CENSUS: list[Claim] = [
     Claim(
         name="home/exact_dot_agents/",
         globs=["home/exact_dot_agents/*"],
-        claimed=125,
+        claimed=126,
         anchors=[
-            ("03b-agent-skills-hooks.mmd", "exact_dot_agents/ (125)"),
-            ("00-overview.mmd", "agents 125"),
+            ("03b-agent-skills-hooks.mmd", "exact_dot_agents/ (126)"),
+            ("00-overview.mmd", "agents 126"),
         ],
     ),
     Claim(
         name="scripts/",
         globs=["scripts/*"],
-        claimed=119,
+        claimed=128,
         anchors=[
-            ("11-scripts-helpers.mmd", "scripts/ (119)"),
-            ("README.md", "`scripts/` (119)"),
-            ("00-overview.mmd", "scripts 119"),
+            ("11-scripts-helpers.mmd", "scripts/ (128)"),
+            ("README.md", "`scripts/` (128)"),
+            ("00-overview.mmd", "scripts 128"),
         ],
     ),
 ]
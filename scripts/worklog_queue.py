@@ -10,6 +10,7 @@ import json
 import os
 import re
 import stat
+import struct
 import subprocess
 import sys
 import time
@@ -22,7 +23,17 @@ from typing import Iterator
 
 QUEUE_DIR_NAME = ".worklog-queue-v1"
 LOCK_DIR_NAME = ".worklog-locks-v1"
+INDEX_DIR_NAME = ".worklog-index-v1"
+INDEX_VERSION = 1
+# A worklog may grow to this multiple of `max_worklog_lines` through plain
+# appends before a flush compacts (sorts and trims) it back to the cap.
+COMPACT_SLACK = 2
 EVENT_SUFFIX = ".json"
+COUNTER_NAME = "counter"
+# `magic, next_seq, pending, pending_bytes, dirty`: one record small enough
+# to be rewritten in place with a single `pwrite`.
+COUNTER_RECORD = struct.Struct("<8sqqqq")
+COUNTER_MAGIC = b"wlqctr01"
 ERROR_LOG_NAME = "errors.jsonl"
 MAX_ERROR_LINES = 50
 DEFAULT_MAX_PENDING = 256
@@ -114,14 +125,10 @@ def _event_paths(queue_dir: Path) -> list[Path]:
 
 
 def _pending_state(queue_dir: Path) -> tuple[int, int]:
-    paths = _event_paths(queue_dir)
-    total = 0
-    for path in paths:
-        try:
-            total += path.stat().st_size
-        except OSError:
-            continue
-    return len(paths), total
+    if not queue_dir.is_dir():
+        return 0, 0
+    with _counter(queue_dir) as counter:
+        return counter.pending, counter.pending_bytes
 
 
 def _ensure_private_dir(path: Path) -> None:
@@ -195,19 +202,109 @@ def _append_error(queue_dir: Path, code: str, message: str) -> None:
         _atomic_write(path, "\n".join(lines[-MAX_ERROR_LINES:]) + "\n")
 
 
-def _next_sequence(queue_dir: Path) -> int:
-    sequence_path = queue_dir / "sequence"
-    values = [0]
+def _scan_counter(queue_dir: Path, floor: int = 0) -> tuple[int, int, int]:
+    """Rebuild `(next_seq, pending, pending_bytes)` from the directory itself.
+
+    The legacy `sequence` file and `floor` (the last recorded `next_seq`)
+    keep the sequence monotonic even when flushed events left no files.
+    """
+    values = [0, floor - 1]
     try:
-        values.append(int(sequence_path.read_text(encoding="utf-8").strip()))
+        values.append(int((queue_dir / "sequence").read_text(encoding="utf-8").strip()))
     except (OSError, ValueError):
         pass
+    pending = 0
+    pending_bytes = 0
     for path in _event_paths(queue_dir):
         try:
             values.append(int(path.stem))
         except ValueError:
+            pass
+        try:
+            pending_bytes += path.stat().st_size
+        except OSError:
             continue
-    return max(values) + 1
+        pending += 1
+    return max(values) + 1, pending, pending_bytes
+
+
+class _QueueCounter:
+    """The queue's `(next_seq, pending, pending_bytes)` record, held under flock.
+
+    Enqueue and flush update it in place instead of listing and stat-ing
+    every pending event. A holder calls `begin()` before touching event
+    files, which marks the record dirty; the clean record is written back
+    only once the files and the counts agree again. A holder that dies in
+    between leaves the mark behind, and the next holder rebuilds the
+    counts from the directory — the only time it is listed.
+    """
+
+    def __init__(self, queue_dir: Path, fd: int) -> None:
+        self.queue_dir = queue_dir
+        self.fd = fd
+        self.dirty = False
+        self.recovered = False
+        self.next_seq = 0
+        self.pending = 0
+        self.pending_bytes = 0
+        if not self._load():
+            self.recover()
+
+    def _load(self) -> bool:
+        data = os.pread(self.fd, COUNTER_RECORD.size, 0)
+        if len(data) != COUNTER_RECORD.size:
+            return False
+        magic, next_seq, pending, pending_bytes, dirty = COUNTER_RECORD.unpack(data)
+        if magic != COUNTER_MAGIC:
+            return False
+        self.next_seq = next_seq
+        if dirty or next_seq < 1 or pending < 0 or pending_bytes < 0:
+            return False
+        # Also catches a record rolled back under an event it had already
+        # counted (power loss after the event file was fsynced).
+        if (self.queue_dir / f"{next_seq:020d}{EVENT_SUFFIX}").exists():
+            return False
+        self.pending = pending
+        self.pending_bytes = pending_bytes
+        return True
+
+    def _store(self, dirty: bool) -> None:
+        record = COUNTER_RECORD.pack(COUNTER_MAGIC, self.next_seq, self.pending, self.pending_bytes, int(dirty))
+        os.pwrite(self.fd, record, 0)
+
+    def recover(self) -> None:
+        self.next_seq, self.pending, self.pending_bytes = _scan_counter(self.queue_dir, self.next_seq)
+        self.recovered = True
+
+    def begin(self) -> None:
+        if not self.dirty:
+            self._store(dirty=True)
+            self.dirty = True
+
+    def commit(self) -> None:
+        if self.pending < 0 or self.pending_bytes < 0:
+            self.recover()
+        self._store(dirty=False)
+        os.fsync(self.fd)
+        self.dirty = False
+
+
+@contextmanager
+def _counter(queue_dir: Path) -> Iterator[_QueueCounter]:
+    """Exclusive access to the queue counter; commits on success.
+
+    An exception after `begin()` leaves the record dirty on purpose so the
+    next holder recounts; one before it (a full queue) changes nothing.
+    """
+    fd = os.open(queue_dir / COUNTER_NAME, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        counter = _QueueCounter(queue_dir, fd)
+        yield counter
+        if counter.dirty or counter.recovered:
+            counter.commit()
+    finally:
+        os.close(fd)
 
 
 def _validate_target(spec_dir: Path, worklog_path: Path) -> str:
@@ -237,8 +334,8 @@ def enqueue(
         with _locked(_session_lifecycle_lock(spec_dir, safe_session)):
             _ensure_private_dir(queue_dir)
             target_name = _validate_target(spec_dir, worklog_path)
-            with _locked(queue_dir / "enqueue.lock"):
-                seq = _next_sequence(queue_dir)
+            with _locked(queue_dir / "enqueue.lock"), _counter(queue_dir) as counter:
+                seq = counter.next_seq
                 event_id = f"{safe_session}:{seq:020d}:{uuid.uuid4().hex}"
                 record = {
                     "version": 1,
@@ -251,13 +348,17 @@ def enqueue(
                     "entry": entry,
                 }
                 encoded = json.dumps(record, sort_keys=True, separators=(",", ":")) + "\n"
-                pending, pending_bytes = _pending_state(queue_dir)
-                if pending >= config.max_pending or pending_bytes + len(encoded.encode()) > config.max_bytes:
+                size = len(encoded.encode())
+                pending, pending_bytes = counter.pending, counter.pending_bytes
+                if pending >= config.max_pending or pending_bytes + size > config.max_bytes:
                     _append_error(queue_dir, "queue_full", f"pending={pending} bytes={pending_bytes}")
                     raise QueueFullError(f"worklog queue full for session {safe_session}")
                 path = queue_dir / f"{seq:020d}{EVENT_SUFFIX}"
+                counter.begin()
                 _atomic_write(path, encoded)
-                _atomic_write(queue_dir / "sequence", f"{seq}\n")
+                counter.next_seq = seq + 1
+                counter.pending += 1
+                counter.pending_bytes += size
     worker_pid = start_flush_worker(queue_dir, config=config) if start_worker else None
     return QueueReceipt(queue_dir=queue_dir, path=path, event_id=event_id, seq=seq, worker_pid=worker_pid)
 
@@ -329,6 +430,128 @@ def _load_worklog(path: Path) -> tuple[list[str], set[str]]:
     return lines, ids
 
 
+def _target_index_path(spec_dir: Path, target_name: str) -> Path:
+    digest = hashlib.sha256(target_name.encode()).hexdigest()[:20]
+    return spec_dir / INDEX_DIR_NAME / f"{digest}.json"
+
+
+def _fingerprint(path: Path) -> list[int] | None:
+    try:
+        info = path.stat()
+    except OSError:
+        return None
+    return [info.st_ino, info.st_size, info.st_mtime_ns]
+
+
+def _line_key(value: object) -> list | None:
+    """Chronological sort key of a worklog entry; None when it has no `ts`."""
+    if not isinstance(value, dict):
+        return None
+    timestamp = value.get("ts")
+    if not isinstance(timestamp, str) or not timestamp:
+        return None
+    sequence = value.get("worklog_seq", 0)
+    return [timestamp, str(value.get("session_key") or ""), sequence if isinstance(sequence, int) else 0]
+
+
+def _index_lines(lines: list[str], fingerprint: list[int] | None) -> dict:
+    """Sidecar index of a worklog's content: seen ids, line count, order state.
+
+    `sortable` mirrors `_chronological_lines`: a single line without a
+    parseable `ts` freezes the file in insertion order. `ordered` says the
+    lines already are in chronological order, so in-order entries can be
+    appended after `max_key` without re-sorting anything.
+    """
+    ids: list[str] = []
+    sortable = True
+    ordered = True
+    max_key: list | None = None
+    for line in lines:
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError:
+            sortable = False
+            continue
+        if isinstance(value, dict) and value.get("worklog_id"):
+            ids.append(str(value["worklog_id"]))
+        key = _line_key(value)
+        if key is None:
+            sortable = False
+        elif max_key is not None and key < max_key:
+            ordered = False
+        else:
+            max_key = key
+    return {
+        "version": INDEX_VERSION,
+        "fingerprint": fingerprint,
+        "lines": len(lines),
+        "sortable": sortable,
+        "ordered": ordered,
+        "max_key": max_key,
+        "ids": ids,
+    }
+
+
+def _load_index(spec_dir: Path, target_name: str) -> dict:
+    """The target's sidecar index, rebuilt from the worklog when it is stale.
+
+    The index records the worklog's `(inode, size, mtime_ns)` as of its
+    last write. Any other writer (a migration, a test, a crash between
+    append and index update) changes that fingerprint, and the one
+    rebuild that follows costs what every flush used to.
+    """
+    target = spec_dir / target_name
+    fingerprint = _fingerprint(target)
+    try:
+        index = json.loads(_target_index_path(spec_dir, target_name).read_text(encoding="utf-8"))
+        current = isinstance(index, dict) and index.get("version") == INDEX_VERSION
+        if current and index.get("fingerprint") == fingerprint:
+            return index
+    except (OSError, ValueError):
+        pass
+    lines, _ = _load_worklog(target)
+    return _index_lines(lines, fingerprint)
+
+
+def _store_index(spec_dir: Path, target_name: str, index: dict) -> None:
+    """Replace the sidecar without fsync: a lost or torn index only costs a rebuild."""
+    path = _target_index_path(spec_dir, target_name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.parent / f".{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    try:
+        temp.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+        os.replace(temp, path)
+    except OSError:
+        try:
+            temp.unlink()
+        except OSError:
+            pass
+
+
+def _drop_index(spec_dir: Path, target_name: str) -> None:
+    try:
+        _target_index_path(spec_dir, target_name).unlink()
+    except OSError:
+        pass
+
+
+def _append_lines(path: Path, lines: list[str]) -> None:
+    """Durably append `lines`, first terminating a torn final line if any."""
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        size = os.fstat(fd).st_size
+        prefix = ""
+        if size:
+            with open(path, "rb") as stream:
+                stream.seek(size - 1)
+                if stream.read(1) != b"\n":
+                    prefix = "\n"
+        os.write(fd, (prefix + "\n".join(lines) + "\n").encode("utf-8"))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
 def _chronological_lines(lines: list[str]) -> list[str]:
     ordered: list[tuple[str, str, int, int, str]] = []
     for index, line in enumerate(lines):
@@ -355,14 +578,25 @@ def _chronological_lines(lines: list[str]) -> list[str]:
 def _flush_target(
     spec_dir: Path, target_name: str, records: list[tuple[Path, dict]], max_lines: int
 ) -> tuple[int, int]:
+    """Group-commit `records` into the target worklog under its lock.
+
+    The common case is one durable append: the sidecar index supplies the
+    seen ids for replay dedupe and the newest `(ts, session_key, seq)`, and
+    a batch that sorts at or after it is appended in order. A batch that
+    would land out of order, or growth past `COMPACT_SLACK` times
+    `max_lines`, instead rewrites the file chronologically and trims it to
+    `max_lines` — the same result the per-flush rewrite always produced.
+    """
     target = spec_dir / target_name
     flushed = 0
     duplicates = 0
     with _locked(_target_lock_path(spec_dir, target_name)):
-        lines, existing_ids = _load_worklog(target)
+        index = _load_index(spec_dir, target_name)
+        seen = set(index["ids"])
+        batch: list[tuple[list | None, str, str]] = []
         for _, record in records:
             event_id = str(record["id"])
-            if event_id in existing_ids:
+            if event_id in seen:
                 duplicates += 1
                 continue
             entry = {
@@ -371,18 +605,58 @@ def _flush_target(
                 "session_key": record["session_key"],
                 "worklog_seq": record["seq"],
             }
-            lines.append(json.dumps(entry, sort_keys=True))
-            existing_ids.add(event_id)
+            batch.append((_line_key(entry), event_id, json.dumps(entry, sort_keys=True)))
+            seen.add(event_id)
             flushed += 1
         if flushed:
-            lines = _chronological_lines(lines)
-            _atomic_write(target, "\n".join(lines[-max_lines:]) + "\n")
-    for path, _ in records:
-        path.unlink()
-    _fsync_dir(records[0][0].parent)
+            keys = [key for key, _, _ in batch]
+            sortable = index["sortable"] and None not in keys
+            if sortable:
+                batch.sort(key=lambda item: item[0])
+            in_order = not sortable or (
+                index["ordered"] and (index["max_key"] is None or batch[0][0] >= index["max_key"])
+            )
+            if in_order and index["lines"] + flushed <= max_lines * COMPACT_SLACK:
+                _append_lines(target, [line for _, _, line in batch])
+                index["ids"].extend(event_id for _, event_id, _ in batch)
+                index["lines"] += flushed
+                index["sortable"] = sortable
+                if sortable:
+                    index["max_key"] = batch[-1][0]
+                index["fingerprint"] = _fingerprint(target)
+            else:
+                lines, _ = _load_worklog(target)
+                lines = _chronological_lines(lines + [line for _, _, line in batch])[-max_lines:]
+                _atomic_write(target, "\n".join(lines) + "\n")
+                index = _index_lines(lines, _fingerprint(target))
+            _store_index(spec_dir, target_name, index)
+    queue_dir = records[0][0].parent
+    with _counter(queue_dir) as counter:
+        counter.begin()
+        for path, _ in records:
+            counter.pending_bytes -= path.stat().st_size
+            path.unlink()
+            counter.pending -= 1
+        _fsync_dir(queue_dir)
     return flushed, duplicates
 
 
+def compact_worklog(spec_dir: Path, target_name: str, max_lines: int) -> bool:
+    """Sort and trim one worklog to `max_lines` if appends grew it past the cap."""
+    with _locked(_target_lock_path(spec_dir, target_name)):
+        index = _load_index(spec_dir, target_name)
+        if index["lines"] <= max_lines:
+            if index["fingerprint"] is not None:
+                _store_index(spec_dir, target_name, index)
+            return False
+        target = spec_dir / target_name
+        lines, _ = _load_worklog(target)
+        lines = _chronological_lines(lines)[-max_lines:]
+        _atomic_write(target, "\n".join(lines) + "\n")
+        _store_index(spec_dir, target_name, _index_lines(lines, _fingerprint(target)))
+        return True
+
+
 def _flush_locked(queue_dir: Path, config: QueueConfig) -> FlushResult:
     paths = _event_paths(queue_dir)
     if not paths:
@@ -409,7 +683,7 @@ def _flush_locked(queue_dir: Path, config: QueueConfig) -> FlushResult:
         except OSError as err:
             errors += 1
             _append_error(queue_dir, "flush_failed", f"{target_name}: {err}")
-    return FlushResult(flushed=flushed, duplicates=duplicates, pending=len(_event_paths(queue_dir)), errors=errors)
+    return FlushResult(flushed=flushed, duplicates=duplicates, pending=_pending_state(queue_dir)[0], errors=errors)
 
 
 def flush_session(queue_dir: Path, *, config: QueueConfig = QueueConfig()) -> FlushResult:
@@ -434,6 +708,10 @@ def flush_spec_dir(spec_dir: Path, *, config: QueueConfig = QueueConfig()) -> Fl
         result = FlushResult()
         for queue_dir in queue_dirs:
             result = result.add(flush_session(queue_dir, config=config))
+        # Readers drain through here, so they always see the bounded tail
+        # even though background flushes only append.
+        for worklog in sorted(spec_dir.glob("*.worklog.jsonl")):
+            compact_worklog(spec_dir, worklog.name, config.max_worklog_lines)
         recorded_errors = 0
         for queue_dir in queue_dirs:
             for error_path in (queue_dir / ERROR_LOG_NAME, queue_dir / "dispatcher-errors.jsonl"):
@@ -555,6 +833,7 @@ def migrate_worklog(spec_dir: Path, source_name: str, target_name: str, *, confi
                 lines = _chronological_lines(lines)
                 _atomic_write(target, "\n".join(lines[-config.max_worklog_lines :]) + "\n")
             source.unlink()
+            _drop_index(spec_dir, source_name)
             return migrated
 
 
@@ -597,6 +876,7 @@ def cleanup_stale_state(spec_dir: Path, *, config: QueueConfig = QueueConfig())
                     path.unlink()
                 except OSError:
                     continue
+                _drop_index(spec_dir, path.name)
                 removed += 1
         else:
             try: